@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# Benchmark suite of the per step cost of the TVB <-> Spiking Network co-simulation,
+# as a function of the number of TVB nodes, spiking nodes, interfaces and neurons per population.
+# The interfaces are the actual core interfaces, acting on stand-in devices that are not connected to any simulator,
+# so that only the cost of the interfaces' hot path is measured.
+# Run with "tox -e benchmark" to persist the results in .benchmarks/ and compare them with the previous run.
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.interfaces.tvb_to_spikeNet_device_interface import TVBtoSpikeNetDeviceInterface
+from tvb_multiscale.core.interfaces.spikeNet_to_tvb_interface import SpikeNetToTVBinterface
+from tvb_multiscale.core.spiking_models.devices import DeviceSet
+
+from tests.core.test_devices import DummyInputDevice, DummySpikeRecorder, DummyMultimeter
+from tests.core.test_interfaces import \
+    DummyTVBSpikeNetInterface, N_TVB_SVS, _prepare_transforms, _prepare_kernel_transforms
+
+
+DT = 0.1
+
+# The sweeps, with the largest configurations deselected by default, as slow:
+SWEEP = [(number_of_nodes, n_spiking_nodes, n_interfaces, n_neurons)
+         for number_of_nodes, n_spiking_nodes in [(10, 1), (100, 10), (1000, 100)]
+         for n_interfaces in [1, 4]
+         for n_neurons in [100, 1000]]
+
+
+def _sweep_params(sweep, max_size=10000):
+    # Mark as slow the configurations of more than max_size spiking nodes * interfaces * neurons:
+    return [pytest.param(*dims, marks=pytest.mark.slow) if np.prod(dims[1:]) > max_size else dims
+            for dims in sweep]
+
+
+class DummyTVBtoSpikeNetDeviceInterface(TVBtoSpikeNetDeviceInterface):
+
+    def set(self, values):
+        self.Set({"rate": np.maximum(0.0, self._assert_input_size(values)),
+                  "stop": self.dt})
+
+
+class BenchmarkBulkInputDevice(DummyInputDevice):
+
+    # Unlike DummyBulkInputDevice, it does not count the bulk calls,
+    # so that the benchmarks do not change any state read by the unit tests:
+    @classmethod
+    def SetDevices(cls, devices, values_dicts):
+        for device, values_dict in zip(devices, values_dicts):
+            device._values_dict.update(values_dict)
+
+
+def _prepare_output_devices(model, n_spiking_nodes, n_neurons):
+    if model == "spike_recorder":
+        return [DummySpikeRecorder(neurons=range(n_neurons)) for _ in range(n_spiking_nodes)]
+    return [DummyMultimeter(neurons=range(n_neurons), record_from=["V_m"]) for _ in range(n_spiking_nodes)]
+
+
+def _record_step(interface, t, rate=0.01):
+    # Every output device records the events of one spiking network time step,
+    # i.e., the spikes of a fraction rate of its neurons, or a sample of all of its neurons:
+    for spikeNet_to_tvb_interface in interface.spikeNet_to_tvb_interfaces:
+        for node in spikeNet_to_tvb_interface.devices():
+            device = spikeNet_to_tvb_interface[node]
+            neurons = np.array(device.neurons)
+            device.reset()
+            if spikeNet_to_tvb_interface.model == "spike_recorder":
+                senders = neurons[np.random.uniform(size=neurons.shape) < rate]
+                device.record(t * np.ones(senders.shape), senders)
+            else:
+                device.record(t * np.ones(neurons.shape), neurons, V_m=np.random.normal(-60.0, 5.0, neurons.shape))
+
+
+def _prepare_cosimulation_step(number_of_nodes, n_spiking_nodes, n_interfaces, n_neurons,
+                               input_device_class=DummyInputDevice, prepare_transforms=_prepare_transforms):
+    spiking_nodes_ids = np.arange(n_spiking_nodes)
+    interface = DummyTVBSpikeNetInterface()
+    interface.tvb_nodes_ids = np.arange(n_spiking_nodes, number_of_nodes)
+    interface.spiking_nodes_ids = spiking_nodes_ids
+    interface.transforms = prepare_transforms(number_of_nodes)
+    input_models = ["poisson_generator", "dc_generator"]
+    output_models = ["spike_recorder", "multimeter"]
+    interface.tvb_to_spikeNet_interfaces = []
+    interface.spikeNet_to_tvb_interfaces = []
+    for i_int in range(n_interfaces):
+        model = input_models[i_int % len(input_models)]
+        interface.tvb_to_spikeNet_interfaces.append(
+            DummyTVBtoSpikeNetDeviceInterface(None, "input%d" % i_int, model, DT, i_int % N_TVB_SVS,
+                                              spiking_nodes_ids, spiking_nodes_ids,
+                                              np.random.uniform(size=(n_spiking_nodes,)),
+                                              [input_device_class(model=model) for _ in range(n_spiking_nodes)]))
+        model = output_models[i_int % len(output_models)]
+        interface.spikeNet_to_tvb_interfaces.append(
+            SpikeNetToTVBinterface(None, i_int % N_TVB_SVS, "output%d" % i_int, model, spiking_nodes_ids,
+                                   np.random.uniform(size=(n_spiking_nodes,)),
+                                   _prepare_output_devices(model, n_spiking_nodes, n_neurons)))
+    interface.configure(None)
+    state = np.random.uniform(size=(N_TVB_SVS, number_of_nodes, 1))
+    coupling = np.random.uniform(size=(N_TVB_SVS, number_of_nodes, 1))
+    return interface, state, coupling
+
+
+def _add_extra_info(benchmark, **dims):
+    for dim, value in dims.items():
+        benchmark.extra_info[dim] = int(value)
+
+
+def test_cosimulation_step():
+    interface, state, coupling = _prepare_cosimulation_step(10, 2, 2, 10)
+    _record_step(interface, DT)
+    interface.tvb_state_to_spikeNet(state, coupling, None)
+    for tvb_to_spikeNet_interface in interface.tvb_to_spikeNet_interfaces:
+        assert np.allclose(tvb_to_spikeNet_interface.Get(["rate"])["rate"],
+                           np.maximum(0.0, tvb_to_spikeNet_interface.scale * 1000.0 *
+                                      state[tvb_to_spikeNet_interface.tvb_sv_id, :2, 0]))
+    new_state = interface.spikeNet_state_to_tvb_state(state.copy())
+    spike_recorders_interface, multimeters_interface = interface.spikeNet_to_tvb_interfaces
+    for node in multimeters_interface.devices():
+        device = multimeters_interface[node]
+        expected = multimeters_interface.scale[node] * np.mean(device.events["V_m"])
+        assert new_state[multimeters_interface.tvb_sv_id, node, 0] == pytest.approx(expected, rel=1e-5)
+    n_spikes = np.array(spike_recorders_interface.do_for_all_devices("number_of_events"))
+    assert np.allclose(new_state[spike_recorders_interface.tvb_sv_id, :2, 0],
+                       spike_recorders_interface.scale * 10.0 * n_spikes / 10)
+
+
+@pytest.mark.parametrize("number_of_nodes, n_spiking_nodes, n_interfaces, n_neurons", _sweep_params(SWEEP))
+def test_benchmark_cosimulation_step(benchmark, number_of_nodes, n_spiking_nodes, n_interfaces, n_neurons):
+    # The whole exchange of one TVB time step, after the spiking network has recorded the events of that step:
+    interface, state, coupling = _prepare_cosimulation_step(number_of_nodes, n_spiking_nodes,
+                                                            n_interfaces, n_neurons)
+    steps = iter(range(1, 10 ** 9))
+
+    def setup():
+        _record_step(interface, next(steps) * DT)
+
+    def cosimulation_step():
+        interface.tvb_state_to_spikeNet(state, coupling, None)
+        interface.spikeNet_state_to_tvb_state(state)
+
+    benchmark.group = "cosimulation_step_%d_interfaces" % n_interfaces
+    _add_extra_info(benchmark, number_of_nodes=number_of_nodes, n_spiking_nodes=n_spiking_nodes,
+                    n_interfaces=n_interfaces, n_neurons=n_neurons)
+    benchmark.pedantic(cosimulation_step, setup=setup, rounds=100, warmup_rounds=1)
+
+
+def test_cosimulation_step_stats():
+    interface, state, coupling = _prepare_cosimulation_step(10, 2, 2, 10)
+    stats = interface.enable_stats()
+    _record_step(interface, DT)
+    interface.tvb_state_to_spikeNet(state, coupling, None)
+    interface.spikeNet_state_to_tvb_state(state)
+    # The devices' interfaces add the stats of their own phases:
+    assert stats["tvb_to_spikeNet_0_input0"]["devices_Set"].calls == 1
+    assert stats["tvb_to_spikeNet_0_input0"]["devices_Set"].values == 2 * 2  # rate and stop of 2 devices
+    n_spikes = np.sum(interface.spikeNet_to_tvb_interfaces[0].do_for_all_devices("number_of_events"))
+    assert stats["spikeNet_to_tvb_0_output0"]["events_read"].events == n_spikes
+    assert stats["spikeNet_to_tvb_1_output1"]["values_read"].values == 2 * 10  # V_m of 2 devices x 10 neurons
+
+
+@pytest.mark.parametrize("stats", [False, True])
+def test_benchmark_cosimulation_step_stats(benchmark, stats):
+    # The overhead of the stats, which should be negligible, and zero when they are disabled:
+    interface, state, coupling = _prepare_cosimulation_step(100, 10, 4, 100)
+    if stats:
+        interface.enable_stats()
+    steps = iter(range(1, 10 ** 9))
+
+    def setup():
+        _record_step(interface, next(steps) * DT)
+
+    def cosimulation_step():
+        interface.tvb_state_to_spikeNet(state, coupling, None)
+        interface.spikeNet_state_to_tvb_state(state)
+
+    benchmark.group = "cosimulation_step_stats"
+    benchmark.pedantic(cosimulation_step, setup=setup, rounds=100, warmup_rounds=1)
+
+
+@pytest.mark.parametrize("prepare_transforms", [_prepare_transforms, _prepare_kernel_transforms])
+def test_benchmark_cosimulation_step_transforms(benchmark, prepare_transforms):
+    # Plain transformation functions versus transform kernels, with weights sliced in advance:
+    interface, state, coupling = _prepare_cosimulation_step(1000, 100, 4, 100,
+                                                            prepare_transforms=prepare_transforms)
+    steps = iter(range(1, 10 ** 9))
+
+    def setup():
+        _record_step(interface, next(steps) * DT)
+
+    def cosimulation_step():
+        interface.tvb_state_to_spikeNet(state, coupling, None)
+        interface.spikeNet_state_to_tvb_state(state)
+
+    benchmark.group = "cosimulation_step_transforms"
+    benchmark.pedantic(cosimulation_step, setup=setup, rounds=100, warmup_rounds=1)
+
+
+@pytest.mark.parametrize("device_class", [DummyInputDevice, BenchmarkBulkInputDevice])
+@pytest.mark.parametrize("n_devices", [10, 100, pytest.param(1000, marks=pytest.mark.slow)])
+def test_benchmark_device_set_Set(benchmark, n_devices, device_class):
+    device_set = DeviceSet("dummy", "poisson_generator",
+                           [device_class(model="poisson_generator") for _ in range(n_devices)])
+    values = np.random.uniform(size=(n_devices,))
+
+    benchmark.group = "device_set_Set"
+    _add_extra_info(benchmark, n_devices=n_devices)
+    benchmark(device_set.Set, {"rate": values, "stop": DT})
+
+
+@pytest.mark.parametrize("model", ["spike_recorder", "multimeter"])
+@pytest.mark.parametrize("n_spiking_nodes, n_neurons",
+                         _sweep_params([(n_spiking_nodes, n_neurons)
+                                        for n_spiking_nodes in [10, 100] for n_neurons in [100, 1000]]))
+def test_benchmark_devices_readout(benchmark, model, n_spiking_nodes, n_neurons):
+    # The readout of the output devices, i.e., of the new spikes' numbers or of the new samples' means:
+    interface, state, coupling = _prepare_cosimulation_step(n_spiking_nodes, n_spiking_nodes, 2, n_neurons)
+    spikeNet_to_tvb_interface = interface.spikeNet_to_tvb_interfaces[model == "multimeter"]
+    if model == "spike_recorder":
+        readout = lambda: spikeNet_to_tvb_interface.population_mean_spikes_number
+    else:
+        readout = lambda: spikeNet_to_tvb_interface.current_population_mean_values
+    steps = iter(range(1, 10 ** 9))
+
+    def setup():
+        _record_step(interface, next(steps) * DT)
+
+    benchmark.group = "%s_readout" % model
+    _add_extra_info(benchmark, n_spiking_nodes=n_spiking_nodes, n_neurons=n_neurons)
+    benchmark.pedantic(readout, setup=setup, rounds=100, warmup_rounds=1)
+
+
+if __name__ == "__main__":
+    test_cosimulation_step()
+    test_cosimulation_step_stats()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from xarray import DataArray, combine_by_coords
+
+from tvb_multiscale.core.utils.buffers import SpikesBuffer, TimeSeriesBuffer
+
+
+def test_spikes_buffer_append():
+    buffer = SpikesBuffer(initial_capacity=2)
+    assert len(buffer) == 0
+    assert buffer.times.size == 0
+    buffer.append([0.1, 0.2, 0.3], [0, 1, 2])
+    buffer.append([0.4, 0.5], 3)
+    buffer.append([], [])
+    assert len(buffer) == 5
+    assert buffer.capacity >= 5
+    assert np.allclose(buffer.times, [0.1, 0.2, 0.3, 0.4, 0.5])
+    assert np.all(buffer.senders == [0, 1, 2, 3, 3])
+    with pytest.raises(ValueError):
+        buffer.times[0] = 1.0
+    # The events returned are copies, independent from the buffer:
+    events = buffer.get_events()
+    events["times"][0] = 1.0
+    assert buffer.times[0] == 0.1
+
+
+def test_spikes_buffer_append_from_dict():
+    buffer = SpikesBuffer(initial_capacity=1)
+    buffer.append_from_dict({0: [1, 2], 5: [], 7: [3]}, times_scale=0.1)
+    buffer.append_from_dict({})
+    buffer.append_from_dict({0: []})
+    assert np.allclose(buffer.times, [0.1, 0.2, 0.3])
+    assert np.all(buffer.senders == [0, 0, 7])
+
+
+def test_spikes_buffer_growth_and_clear():
+    buffer = SpikesBuffer(initial_capacity=10, times_dtype="f4", senders_dtype="u4")
+    n_reallocations = 0
+    capacity = buffer.capacity
+    for i_chunk in range(1000):
+        buffer.append(np.arange(10) + 10.0 * i_chunk, np.arange(10))
+        if buffer.capacity != capacity:
+            n_reallocations += 1
+            capacity = buffer.capacity
+    assert len(buffer) == 10000
+    assert buffer.times.dtype == np.float32
+    assert buffer.senders.dtype == np.uint32
+    assert np.allclose(buffer.times, np.arange(10000))
+    # Geometric growth reallocates only a logarithmic number of times:
+    assert n_reallocations <= np.ceil(np.log2(1000))
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.capacity == capacity
+    buffer.clear(shrink=True)
+    assert buffer.capacity == 10
+    with pytest.raises(ValueError):
+        SpikesBuffer(growth_factor=1.0)
+
+
+def _prepare_chunk(i_chunk, n_times=10, n_variables=2, n_neurons=100):
+    times = 0.1 * (np.arange(n_times) + i_chunk * n_times)
+    data = np.random.uniform(size=(n_times, n_variables, n_neurons))
+    return data, times, ["V_m", "g_exc"][:n_variables], np.arange(n_neurons)
+
+
+def test_time_series_buffer():
+    buffer = TimeSeriesBuffer()
+    assert buffer.shape == (0, 0, 0)
+    assert buffer.to_DataArray().size == 0
+    chunks = [_prepare_chunk(i_chunk) for i_chunk in range(3)]
+    buffer.append(*chunks[0])
+    for data, times, _, _ in chunks[1:]:
+        buffer.append(data, times)
+    assert buffer.shape == (30, 2, 100)
+    data = buffer.to_DataArray(name="test")
+    assert data.dims == ("Time", "Variable", "Neuron")
+    assert data.name == "test"
+    assert np.allclose(data.values, np.concatenate([chunk[0] for chunk in chunks]))
+    assert np.allclose(data.coords["Time"].values, np.concatenate([chunk[1] for chunk in chunks]))
+    assert list(data.coords["Variable"].values) == ["V_m", "g_exc"]
+    with pytest.raises(ValueError):
+        buffer.append(chunks[0][0], chunks[0][1], variables=["V_m", "g_inh"])
+    with pytest.raises(ValueError):
+        buffer.append(chunks[0][0][:, :1], chunks[0][1])
+    with pytest.raises(ValueError):
+        buffer.append(chunks[0][0], chunks[0][1][:-1])
+    buffer.clear()
+    assert buffer.number_of_times == 0
+    assert buffer.variables == ["V_m", "g_exc"]
+
+
+def test_time_series_buffer_get_window():
+    buffer = TimeSeriesBuffer()
+    times, data = buffer.get_window(0.0)
+    assert len(times) == 0 and data.size == 0
+    chunks = [_prepare_chunk(i_chunk) for i_chunk in range(3)]
+    for chunk in chunks:
+        buffer.append(*chunk)
+    all_times = np.concatenate([chunk[1] for chunk in chunks])
+    all_data = np.concatenate([chunk[0] for chunk in chunks])
+    for t_from in [-1.0, 0.05, 0.95, 1.5, 2.9, 3.0]:
+        times, data = buffer.get_window(t_from)
+        assert np.allclose(times, all_times[all_times > t_from])
+        assert np.allclose(data, all_data[all_times > t_from])
+    times, data = buffer.get_window()
+    assert np.allclose(times, all_times[-1:])
+    assert np.allclose(data, all_data[-1:])
+
+
+@pytest.mark.parametrize("n_chunks", [10, 1000, 10000])
+def test_benchmark_time_series_buffer_read(benchmark, n_chunks):
+    # The cost of appending a newly read chunk should not depend on the number of chunks already recorded:
+    buffer = TimeSeriesBuffer()
+    chunk = _prepare_chunk(0)
+    for _ in range(n_chunks):
+        buffer.append(*chunk)
+
+    def read():
+        buffer.append(*chunk)
+        return buffer.shape
+
+    benchmark.group = "time_series_buffer_read"
+    benchmark(read)
+
+
+@pytest.mark.parametrize("n_chunks", [10, 100, pytest.param(1000, marks=pytest.mark.slow)])
+def test_benchmark_combine_by_coords_read(benchmark, n_chunks):
+    # The previous way of merging every newly read chunk to the whole data, as a reference:
+    data = [_prepare_chunk(i_chunk) for i_chunk in range(n_chunks + 1)]
+    data = [DataArray(chunk, dims=["Time", "Variable", "Neuron"],
+                      coords={"Time": times, "Variable": variables, "Neuron": neurons})
+            for chunk, times, variables, neurons in data]
+    recorded = combine_by_coords(data[:-1], fill_value=np.nan)
+
+    benchmark.group = "time_series_buffer_read"
+    benchmark(combine_by_coords, [recorded, data[-1]], fill_value=np.nan)
+
+
+if __name__ == "__main__":
+    test_spikes_buffer_append()
+    test_spikes_buffer_append_from_dict()
+    test_spikes_buffer_growth_and_clear()
+    test_time_series_buffer()
+    test_time_series_buffer_get_window()
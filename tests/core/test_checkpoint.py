@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.interfaces.cosimulation import CoSimulationDriver
+from tvb_multiscale.core.interfaces.spikeNet_to_tvb_interface import SpikeNetToTVBinterface
+from tvb_multiscale.core.io.checkpoint import CoSimulationCheckpointer
+
+from tvb.simulator.simulator import Simulator
+from tvb.simulator.models.wilson_cowan import WilsonCowan
+from tvb.simulator.coupling import Linear
+from tvb.simulator.integrators import HeunStochastic
+from tvb.simulator.noise import Additive
+from tvb.simulator.monitors import Raw
+from tvb.datatypes.connectivity import Connectivity
+
+from tests.core.test_cosimulation import DummySpikingNetwork, DummyCoSimulationInterface
+from tests.core.test_devices import DummySpikeRecorder
+from tests.core.test_interfaces import _prepare_dummy_interface
+
+
+SYNCHRONIZATION_TIME = 0.5
+
+
+def _prepare_tvb_simulator():
+    weights = np.array([[0.0, 2.0, 3.0], [2.0, 0.0, 1.0], [3.0, 1.0, 0.0]])
+    connectivity = Connectivity(weights=weights, tract_lengths=10 * weights,
+                                region_labels=np.array(["a", "b", "c"]),
+                                centres=np.zeros((3, 3)), areas=np.ones((3,)))
+    connectivity.configure()
+    simulator = Simulator(model=WilsonCowan(), connectivity=connectivity, coupling=Linear(),
+                          integrator=HeunStochastic(dt=0.1, noise=Additive(nsig=np.array([1e-3]))),
+                          monitors=(Raw(),), simulation_length=SYNCHRONIZATION_TIME)
+    simulator.configure()
+    return simulator
+
+
+def _prepare_cosimulation(checkpointer):
+    interface, state, coupling = _prepare_dummy_interface()
+    interface.spiking_network = DummySpikingNetwork(DummyCoSimulationInterface())
+    interface.spiking_network.interface.spiking_input = np.zeros((1,))
+    devices = [DummySpikeRecorder(neurons=range(2)) for _ in range(2)]
+    interface.spikeNet_to_tvb_interfaces.append(
+        SpikeNetToTVBinterface(None, 0, "dummy_spikes", "spike_recorder", nodes_ids=[0, 1], device_set=devices))
+    interface.configure(None)
+    simulator = checkpointer.tvb_simulator
+
+    def run_spiking_simulator(simulation_length):
+        devices[0].record([simulator.current_step * 0.1], [0])
+
+    def tvb_integrate(state):
+        simulator.run(simulation_length=SYNCHRONIZATION_TIME)
+        return state, coupling, None
+
+    driver = CoSimulationDriver(interface, tvb_integrate, SYNCHRONIZATION_TIME,
+                                run_spiking_simulator=run_spiking_simulator, checkpointer=checkpointer)
+    return driver, state, coupling
+
+
+def test_checkpoint_and_resume(tmpdir):
+    n_windows = 7
+    path = os.path.join(str(tmpdir), "checkpoint.h5")
+    # The reference uninterrupted co-simulation:
+    driver, state, coupling = _prepare_cosimulation(CoSimulationCheckpointer(path, 1.0, _prepare_tvb_simulator()))
+    driver.run(state.copy(), coupling, None, n_windows)
+    expected_simulator = driver.checkpointer.tvb_simulator
+    expected_spikes_counts = driver.tvb_spikeNet_interface.spikeNet_to_tvb_interfaces[-1].spikes_counts
+    # A co-simulation that crashes after 5 windows, the last checkpoint being written after 4 windows:
+    driver, state, coupling = _prepare_cosimulation(CoSimulationCheckpointer(path, 1.0, _prepare_tvb_simulator()))
+    driver.run(state.copy(), coupling, None, 5)
+    assert driver.checkpointer.last_checkpoint_time == pytest.approx(2.0)
+    # Resuming a new co-simulation from the checkpoint:
+    driver, _, _ = _prepare_cosimulation(CoSimulationCheckpointer(path, 1.0, _prepare_tvb_simulator()))
+    assert driver.checkpointer.exists
+    state, coupling, stimulus = driver.resume()
+    assert driver.windows_done == 4
+    assert driver.time == pytest.approx(2.0)
+    assert stimulus is None
+    assert np.all(driver.tvb_spikeNet_interface.spikeNet_to_tvb_interfaces[-1].spikes_counts == [4, 0])
+    driver.run(state, coupling, stimulus, n_windows - driver.windows_done)
+    simulator = driver.checkpointer.tvb_simulator
+    assert simulator.current_step == expected_simulator.current_step
+    assert np.allclose(simulator.current_state, expected_simulator.current_state)
+    assert np.allclose(simulator.history.buffer, expected_simulator.history.buffer)
+    assert np.all(driver.tvb_spikeNet_interface.spikeNet_to_tvb_interfaces[-1].spikes_counts
+                  == expected_spikes_counts)
+    assert not os.path.isfile(path + ".tmp")
+
+
+def test_checkpoint_errors(tmpdir):
+    checkpointer = CoSimulationCheckpointer(os.path.join(str(tmpdir), "checkpoint.h5"), 1.0)
+    with pytest.raises(ValueError):
+        CoSimulationDriver(DummyCoSimulationInterface(), lambda state: (state, None, None), 0.1,
+                           pipelined=True, checkpointer=checkpointer)
+    driver = CoSimulationDriver(DummyCoSimulationInterface(), lambda state: (state, None, None), 0.1)
+    with pytest.raises(ValueError):
+        driver.resume()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.tvb.connectivity_cache import ConnectivityCache
+
+from tvb.datatypes.connectivity import Connectivity
+
+
+@pytest.fixture
+def connectivity_zip(tmpdir):
+    tvb_data = pytest.importorskip("tvb_data")
+    source = os.path.join(os.path.dirname(tvb_data.__file__), "connectivity", "connectivity_76.zip")
+    if not os.path.isfile(source):
+        pytest.skip("No connectivity zip file available!")
+    filepath = os.path.join(str(tmpdir), "connectivity.zip")
+    shutil.copyfile(source, filepath)
+    return filepath
+
+
+def _preprocess(connectivity, ceil=1.0):
+    connectivity.weights = connectivity.scaled_weights(mode="region")
+    connectivity.weights[connectivity.weights > ceil] = ceil
+    connectivity.configure()
+    return connectivity
+
+
+def test_connectivity_cache(connectivity_zip, tmpdir, monkeypatch):
+    loads = []
+    from_file = Connectivity.from_file
+
+    def counted_from_file(*args, **kwargs):
+        loads.append(args)
+        return from_file(*args, **kwargs)
+
+    monkeypatch.setattr(Connectivity, "from_file", counted_from_file)
+    expected = _preprocess(from_file(connectivity_zip), 0.5)
+    cache = ConnectivityCache(maxsize=2, path=os.path.join(str(tmpdir), "cache"))
+    connectivity = cache.get(connectivity_zip, {"ceil": 0.5}, lambda conn: _preprocess(conn, 0.5))
+    assert len(loads) == 1
+    assert os.path.isfile(cache.filepath(cache.key(connectivity_zip, {"ceil": 0.5})))
+    for attr in ["weights", "tract_lengths", "centres", "region_labels", "speed", "delays"]:
+        assert np.array_equal(getattr(connectivity, attr), getattr(expected, attr))
+    # A cache hit returns an independent copy, without loading the file again:
+    connectivity.weights[:] = 0.0
+    connectivity = cache.get(connectivity_zip, {"ceil": 0.5}, lambda conn: _preprocess(conn, 0.5))
+    assert len(loads) == 1
+    assert np.array_equal(connectivity.weights, expected.weights)
+    # Different options are cached separately...
+    cache.get(connectivity_zip, {"ceil": 0.1}, lambda conn: _preprocess(conn, 0.1))
+    cache.get(connectivity_zip, {"ceil": 0.2}, lambda conn: _preprocess(conn, 0.2))
+    assert len(loads) == 3
+    # ...in their own npz files, without any temporary files left behind:
+    assert len(os.listdir(cache.path)) == 3
+    # ...and the least recently used one is evicted from memory, but loaded from its npz file:
+    assert len(cache._connectivities) == 2
+    connectivity = cache.get(connectivity_zip, {"ceil": 0.5}, lambda conn: _preprocess(conn, 0.5))
+    assert len(loads) == 3
+    assert np.array_equal(connectivity.weights, expected.weights)
+    # A modified file has a different key:
+    key = cache.key(connectivity_zip, {"ceil": 0.5})
+    with open(connectivity_zip, "ab") as file:
+        file.write(b"\0")
+    assert cache.key(connectivity_zip, {"ceil": 0.5}) != key
+
+
+def test_simulator_builder_connectivity_cache(connectivity_zip):
+    pytest.importorskip("tvb.simulator.cosimulator")
+    from tvb_multiscale.core.tvb.simulator_builder import SimulatorBuilder
+    builder = SimulatorBuilder()
+    builder.connectivity = connectivity_zip
+    builder.connectivity_cache = ConnectivityCache()
+    connectivity = builder.build().connectivity
+    builder.connectivity_cache = None
+    expected = builder.build().connectivity
+    assert np.array_equal(connectivity.weights, expected.weights)
+    assert np.array_equal(connectivity.tract_lengths, expected.tract_lengths)
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+import time
+
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.interfaces.cosimulation import CoSimulationDriver
+
+from tests.core.test_interfaces import DummyTVBSpikeNetInterface, _prepare_dummy_interface, _prepare_transforms
+
+
+class DummySpikingNetwork(object):
+
+    def __init__(self, interface, min_delay=1.0, run_time=0.0):
+        self.interface = interface
+        self.min_delay = min_delay
+        self.run_time = run_time
+        self.n_runs = 0
+
+    def Run(self, simulation_length):
+        if self.run_time:
+            time.sleep(self.run_time)
+        self.n_runs += 1
+        # The spiking network's output is determined by its last input:
+        self.interface.spiking_output = 2.0 * self.interface.spiking_input
+
+
+class DummyCoSimulationInterface(object):
+
+    def __init__(self, min_delay=1.0, run_time=0.0):
+        self.spiking_network = DummySpikingNetwork(self, min_delay, run_time)
+        self.spiking_input = None
+        self.spiking_output = None
+
+    @property
+    def spikeNet_min_delay(self):
+        return self.spiking_network.min_delay
+
+    def tvb_state_to_spikeNet(self, state, coupling, stimulus):
+        self.spiking_input = state[1].copy()
+
+    def spikeNet_state_to_tvb_state(self, state):
+        state[0] = self.spiking_output
+        return state
+
+
+def _tvb_integrate(state):
+    state = state + 1.0
+    return state, state.copy(), None
+
+
+def _reference_cosimulation(state, n_windows, lag=0):
+    # The TVB state of window k is updated by the spiking network's output of window k - lag:
+    inputs = []
+    for i_window in range(n_windows):
+        inputs.append(state[1].copy())
+        if i_window >= lag:
+            state[0] = 2.0 * inputs[i_window - lag]
+        state = state + 1.0
+    return state
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cosimulation_driver(pipelined):
+    n_windows = 5
+    interface = DummyCoSimulationInterface()
+    driver = CoSimulationDriver(interface, _tvb_integrate, 0.1, pipelined=pipelined)
+    state = np.random.uniform(size=(2, 3))
+    expected = _reference_cosimulation(state.copy(), n_windows, lag=int(pipelined))
+    state, coupling, stimulus = driver.run(state, state.copy(), None, n_windows)
+    assert interface.spiking_network.n_runs == n_windows
+    assert np.allclose(state, expected)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cosimulation_driver_continuation(pipelined):
+    # Continuing a co-simulation gives the same result as running it at once:
+    n_windows = 6
+    state = np.random.uniform(size=(2, 3))
+    expected = _reference_cosimulation(state.copy(), n_windows, lag=int(pipelined))
+    driver = CoSimulationDriver(DummyCoSimulationInterface(), _tvb_integrate, 0.1, pipelined=pipelined)
+    output = driver.run(state.copy(), state.copy(), None, n_windows // 2)
+    output = driver.run(*output, n_windows=n_windows - n_windows // 2)
+    assert np.allclose(output[0], expected)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cosimulation_driver_windowed(pipelined):
+    n_windows = 4
+    interface, state, coupling = _prepare_dummy_interface()
+    interface.spiking_network = DummySpikingNetwork(DummyCoSimulationInterface(), min_delay=0.3)
+    interface.spiking_network.interface.spiking_input = np.zeros((1,))
+    interface.configure_synchronization(0.3, 0.4)
+    n_step = interface.synchronization_n_step
+    run_lengths = []
+
+    def run_spiking_simulator(simulation_length):
+        run_lengths.append(simulation_length)
+
+    def tvb_integrate(states):
+        assert states.shape == (n_step, ) + state.shape
+        return states + 1.0, np.repeat(coupling[None], n_step, axis=0), None
+
+    driver = CoSimulationDriver(interface, tvb_integrate, pipelined=pipelined, windowed=True,
+                                run_spiking_simulator=run_spiking_simulator)
+    assert driver.synchronization_time == pytest.approx(0.3)
+    states = np.repeat(state[None], n_step, axis=0)
+    driver.run(states, np.repeat(coupling[None], n_step, axis=0), None, n_windows)
+    # One spiking simulator Run per synchronization window:
+    assert run_lengths == [driver.synchronization_time] * n_windows
+    for tvb_to_spikeNet_interface in interface.tvb_to_spikeNet_interfaces:
+        assert tvb_to_spikeNet_interface.window_values.shape[0] == n_step
+    with pytest.raises(ValueError):
+        CoSimulationDriver(interface, tvb_integrate, 0.5, windowed=True)
+
+
+def _prepare_generators_interface(n_nodes=2, n_neurons=10):
+    # A TVB -> Spiking Network interface of dc and Poisson generators' proxies of the NumPy simulator:
+    from types import SimpleNamespace
+    from pandas import Series
+    from tvb_multiscale.tvb_numpy.config import CONFIGURED
+    from tvb_multiscale.tvb_numpy.numpy_simulator.simulator import NumPySimulator
+    from tvb_multiscale.tvb_numpy.numpy_models.population import NumPyPopulation
+    from tvb_multiscale.tvb_numpy.numpy_models.region_node import NumPyRegionNode
+    from tvb_multiscale.tvb_numpy.numpy_models.builders.numpy_factory import create_device, connect_device
+    from tvb_multiscale.tvb_numpy.interfaces.tvb_to_numpy_devices_interface import \
+        TVBtoNumPyDCGeneratorInterface, TVBtoNumPyPoissonGeneratorInterface
+    from tvb_multiscale.core.spiking_models.builders.factory import build_and_connect_devices_one_to_many
+    simulator = NumPySimulator(dt=0.1, seed=0)
+    nodes = Series(dtype="O")
+    for i_node in range(n_nodes):
+        node_label = "node%d" % i_node
+        nodes[node_label] = NumPyRegionNode(node_label, Series(dtype="O"), simulator)
+        nodes[node_label]["E"] = NumPyPopulation(simulator.create_neurons("iaf_psc_exp", n_neurons),
+                                                 "E", "iaf_psc_exp", simulator)
+    spiking_network = SimpleNamespace(numpy_simulator=simulator)
+    interface = DummyTVBSpikeNetInterface()
+    interface.tvb_to_spikeNet_interfaces = []
+    interface.spikeNet_to_tvb_interfaces = []
+    names = ["tvb%d" % i_node for i_node in range(n_nodes)]
+    for tvb_sv_id, (model, interface_class) in enumerate(zip(["dc_generator", "poisson_generator"],
+                                                             [TVBtoNumPyDCGeneratorInterface,
+                                                              TVBtoNumPyPoissonGeneratorInterface])):
+        device_dict = {"model": model, "connections": {model: "E"}, "nodes": list(nodes.index), "names": names,
+                       "weights": 1.0, "delays": 0.1, "receptor_type": 0}
+        devices = build_and_connect_devices_one_to_many(device_dict, create_device, connect_device,
+                                                        nodes, names, CONFIGURED, numpy_simulator=simulator)
+        device_interface = interface_class(spiking_network, dt=interface.dt, nodes_ids=list(range(n_nodes)),
+                                           scale=np.ones((n_nodes, )))
+        interface.tvb_to_spikeNet_interfaces.append(
+            device_interface.from_device_set(devices[model], tvb_sv_id=tvb_sv_id, name=model))
+    interface.transforms = _prepare_transforms(n_nodes)
+    interface.configure(None)
+    return interface, simulator
+
+
+def test_windowed_generators_exchange(monkeypatch):
+    # The windowed exchange drives the Spiking Network as the per step exchange, for a constant TVB input:
+    from tvb_multiscale.tvb_numpy.numpy_simulator.simulator import NumPySimulator
+    n_windows = 4
+    state = np.array([[0.01, 0.02], [0.5, 1.0]])[:, :, None]
+    activities = []
+    get_generators_activity = NumPySimulator._get_generators_activity
+
+    def recorded_generators_activity(self, n_steps):
+        activity = get_generators_activity(self, n_steps)
+        activities[-1].append(activity)
+        return activity
+
+    monkeypatch.setattr(NumPySimulator, "_get_generators_activity", recorded_generators_activity)
+    results = []
+    for windowed in [False, True]:
+        activities.append([])
+        interface, simulator = _prepare_generators_interface()
+        interface.configure_synchronization(0.3)
+        n_step = interface.synchronization_n_step
+        for _ in range(n_windows):
+            if windowed:
+                states = np.repeat(state[None], n_step, axis=0)
+                interface.tvb_state_to_spikeNet_window(states, states, None)
+                simulator.run(n_step * interface.dt)
+            else:
+                for _ in range(n_step):
+                    interface.tvb_state_to_spikeNet(state, state, None)
+                    simulator.run(interface.dt)
+        results.append((np.concatenate([activity["current"] for activity in activities[-1]], axis=1),
+                        np.concatenate([activity["rate"] for activity in activities[-1]], axis=1),
+                        simulator.populations[0].state["V_m"].copy()))
+    (currents, rates, V_m), (window_currents, window_rates, window_V_m) = results
+    assert currents.shape == window_currents.shape == (2, n_windows * n_step)
+    # All time steps are driven by the generators...
+    assert np.all(currents > 0.0) and np.all(rates > 0.0)
+    # ...exactly as in the per step exchange:
+    assert np.allclose(window_currents, currents)
+    assert np.allclose(window_rates, rates)
+    assert np.allclose(window_V_m, V_m)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cosimulation_driver_stats(pipelined):
+    n_windows = 3
+    interface, state, coupling = _prepare_dummy_interface()
+    interface.spiking_network = DummySpikingNetwork(DummyCoSimulationInterface())
+    interface.spiking_network.interface.spiking_input = np.zeros((1,))
+    stats = interface.enable_stats()
+    driver = CoSimulationDriver(interface, lambda state: (state, coupling, None), 0.1, pipelined=pipelined)
+    driver.run(state, coupling, None, n_windows)
+    assert stats["cosimulation"]["tvb_integration"].calls == n_windows
+    assert stats["cosimulation"]["spikeNet_run"].calls == n_windows
+    assert stats["tvb_to_spikeNet_0_dummy"]["set"].calls == n_windows
+    # In pipelined mode, the spiking network's state of the last window has not been transmitted to TVB yet:
+    assert stats["spikeNet_to_tvb_0_dummy0"]["readout"].calls == n_windows - int(pipelined)
+
+
+def test_cosimulation_driver_errors():
+    with pytest.raises(ValueError):
+        CoSimulationDriver(DummyCoSimulationInterface(min_delay=0.1), _tvb_integrate, 1.0, pipelined=True)
+
+    def failing_run(simulation_length):
+        raise RuntimeError("Spiking simulation failed!")
+
+    driver = CoSimulationDriver(DummyCoSimulationInterface(), _tvb_integrate, 0.1, pipelined=True,
+                                run_spiking_simulator=failing_run)
+    with pytest.raises(RuntimeError):
+        driver.run(np.zeros((2, 3)), None, None, 2)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_benchmark_cosimulation_driver_scheduling(benchmark, pipelined):
+    # Scheduling only: the spiking network's Run and the TVB integration (of a dummy interface)
+    # are stand-ins sleeping for ~run_time each, i.e., releasing the GIL completely,
+    # so that the speedup is the upper bound of the pipelined mode, not the one of any real simulator.
+    # See tests/tvb_numpy/test_cosimulation.py for the benchmark of a co-simulation with the NumPy backend:
+    n_windows = 10
+    run_time = 0.002
+    interface, state, coupling = _prepare_dummy_interface(10, 100, 50)
+    interface.spiking_network = DummySpikingNetwork(DummyCoSimulationInterface(), run_time=run_time)
+    interface.spiking_network.interface.spiking_input = np.zeros((1,))
+
+    def tvb_integrate(state):
+        time.sleep(run_time)
+        return state, coupling, None
+
+    def cosimulate(pipelined):
+        driver = CoSimulationDriver(interface, tvb_integrate, 0.1, pipelined=pipelined)
+        return driver.run(state, coupling, None, n_windows)
+
+    tic = time.time()
+    cosimulate(False)
+    serial_time = time.time() - tic
+    benchmark.group = "cosimulation_driver_scheduling"
+    benchmark(cosimulate, pipelined)
+    if benchmark.stats is not None:
+        benchmark.extra_info["speedup"] = serial_time / benchmark.stats.stats.mean
+
+
+if __name__ == "__main__":
+    for pipelined in [False, True]:
+        test_cosimulation_driver(pipelined)
+        test_cosimulation_driver_continuation(pipelined)
+        test_cosimulation_driver_windowed(pipelined)
+    test_cosimulation_driver_errors()
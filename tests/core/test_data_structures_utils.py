@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from xarray import DataArray
+
+from tvb_multiscale.core.utils.data_structures_utils import \
+    filter_events, sort_events_by_x_and_y, continuous_data_to_events
+
+
+def _prepare_dummy_spikes_events(n_events=1000, n_neurons=100, t_end=100.0, dt=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.round(rng.uniform(0.0, t_end, n_events) / dt) * dt
+    senders = rng.integers(0, n_neurons, n_events)
+    return {"times": times, "senders": senders, "weights": rng.uniform(size=(n_events, ))}
+
+
+def _reference_filter_events(events, times=None, exclude_times=[]):
+    # Per event (non vectorized) selection of events, as a reference:
+
+    def in_values(value, values):
+        if len(values) == 2:
+            return (values[0] is None or value >= values[0]) and (values[1] is None or value <= values[1])
+        return value in values
+
+    inds = [(times is None or len(times) == 0 or in_values(time, times)) and
+            (len(exclude_times) == 0 or not in_values(time, exclude_times))
+            for time in events["times"]]
+    return {var: np.array(vals)[np.array(inds, dtype="bool")] for var, vals in events.items()}
+
+
+def _reference_sort_events_by_x_and_y(events, x="senders", y="times"):
+    # Per unique x (non vectorized) grouping of events, as a reference:
+    xs = np.array(events[x])
+    ys = np.array(events[y])
+    return {xlbl: np.sort(ys[xs == xlbl]) for xlbl in np.unique(xs).tolist()}
+
+
+def _reference_continuous_data_to_events(data):
+    # Per (time, neuron) sample (non vectorized) conversion of a DataArray to events, as a reference:
+    variables = data.coords["Variable"].values
+    data = data.stack(Var=("Time", "Neuron"))
+    times_senders = np.array([[float(var[0]), var[1]] for var in data.coords["Var"].values]).astype("O")
+    events = dict()
+    events["times"] = np.array(times_senders[:, 0]).astype("f")
+    events["senders"] = times_senders[:, 1]
+    for i_var, var in enumerate(variables):
+        events[var] = data[i_var].values
+    return events
+
+
+@pytest.mark.parametrize("times, exclude_times", [(None, []),
+                                                  ([10.0, 50.0], []),
+                                                  ([10.0, None], [20.0, 30.0]),
+                                                  ([None, 50.0], []),
+                                                  ([0.1, 0.2, 10.0], []),
+                                                  (None, [0.1, 0.2, 10.0])])
+def test_filter_events(times, exclude_times):
+    events = _prepare_dummy_spikes_events()
+    output = filter_events(events, times=times, exclude_times=exclude_times)
+    expected = _reference_filter_events(events, times, exclude_times)
+    assert list(output.keys()) == list(events.keys())
+    for var in events.keys():
+        assert np.allclose(output[var], expected[var])
+    assert filter_events({"times": [], "senders": []}, times=times) == {"times": [], "senders": []}
+
+
+def test_sort_events_by_x_and_y():
+    events = _prepare_dummy_spikes_events()
+    expected = _reference_sort_events_by_x_and_y(events)
+    output = sort_events_by_x_and_y(events)
+    assert list(output.keys()) == list(expected.keys())
+    for key in expected.keys():
+        assert np.allclose(output[key], expected[key])
+    output = sort_events_by_x_and_y(events, x="times", y="senders", filter_x=[10.0, 20.0, -1.0])
+    assert list(output.keys()) == [-1.0, 10.0, 20.0]
+    assert len(output[-1.0]) == 0
+    assert np.all(output[10.0] == np.sort(events["senders"][events["times"] == 10.0]))
+    output = sort_events_by_x_and_y(events, filter_y=[10.0, 20.0], exclude_x=[0])
+    assert 0 not in output.keys()
+    for key, vals in output.items():
+        assert np.all(np.isin(vals, [10.0, 20.0]))
+    # Neurons' indices of the form (population index, neuron index):
+    events["senders"] = np.stack([events["senders"] // 10, events["senders"] % 10], axis=-1)
+    output = sort_events_by_x_and_y(events)
+    assert "[0, 1]" in output.keys()
+    assert np.allclose(output["[0, 1]"], expected[1])
+
+
+def test_continuous_data_to_events():
+    n_times, n_neurons = 20, 5
+    variables = ["V_m", "g_exc"]
+    times = 0.1 * np.arange(1, n_times + 1)
+    values = np.random.uniform(size=(n_times, len(variables), n_neurons))
+    values[values < 0.5] = 0.0
+    data = DataArray(values, dims=["Time", "Variable", "Neuron"],
+                     coords={"Time": times, "Variable": variables, "Neuron": np.arange(n_neurons)})
+    expected = _reference_continuous_data_to_events(data)
+    events = continuous_data_to_events(values, times.astype("f"), variables, np.arange(n_neurons))
+    assert list(events.keys()) == list(expected.keys())
+    assert events["times"].dtype == np.float32
+    assert events["senders"].dtype.kind == "i"
+    for key in expected.keys():
+        assert np.allclose(events[key], expected[key].astype("f"))
+    # Only nonzero values:
+    events = continuous_data_to_events(values, times, variables, np.arange(n_neurons), exclude_zeros=True)
+    times_inds = []
+    for i_var, var in enumerate(variables):
+        assert np.allclose(events[var], values[:, i_var][values[:, i_var] != 0.0])
+        times_inds.append(np.nonzero(values[:, i_var])[0])
+    assert np.allclose(events["times"], times[np.concatenate(times_inds)])
+    assert len(events["senders"]) == np.sum(values != 0.0)
+    # Empty data:
+    events = continuous_data_to_events(np.empty((0, 0, 0)), [], [], [])
+    assert len(events["times"]) == 0 and len(events["senders"]) == 0
+
+
+@pytest.mark.parametrize("n_events", [10 ** 6,
+                                      pytest.param(10 ** 7, marks=pytest.mark.slow),
+                                      pytest.param(10 ** 8, marks=pytest.mark.slow)])
+def test_benchmark_filter_events(benchmark, n_events):
+    events = _prepare_dummy_spikes_events(n_events, n_neurons=1000, t_end=1000.0)
+    benchmark.group = "filter_events"
+    benchmark(filter_events, events, times=[100.0, 900.0], exclude_times=[500.0, 600.0])
+
+
+@pytest.mark.parametrize("n_events", [10 ** 6,
+                                      pytest.param(10 ** 7, marks=pytest.mark.slow),
+                                      pytest.param(10 ** 8, marks=pytest.mark.slow)])
+def test_benchmark_sort_events_by_x_and_y(benchmark, n_events):
+    events = _prepare_dummy_spikes_events(n_events, n_neurons=1000, t_end=1000.0)
+    benchmark.group = "sort_events_by_x_and_y"
+    benchmark(sort_events_by_x_and_y, events)
+
+
+@pytest.mark.parametrize("n_times", [10 ** 3,
+                                     pytest.param(10 ** 5, marks=pytest.mark.slow)])
+def test_benchmark_continuous_data_to_events(benchmark, n_times):
+    # A 1000 neurons' population recorded from for n_times time points:
+    n_neurons = 1000
+    values = np.random.uniform(size=(n_times, 1, n_neurons))
+    benchmark.group = "continuous_data_to_events"
+    benchmark(continuous_data_to_events, values, 0.1 * np.arange(n_times), ["V_m"], np.arange(n_neurons))
+
+
+if __name__ == "__main__":
+    test_filter_events([10.0, 50.0], [])
+    test_sort_events_by_x_and_y()
+    test_continuous_data_to_events()
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.spiking_models.devices import InputDevice, SpikeRecorder, Multimeter, DeviceSet
+
+from tvb.contrib.scripts.utils.data_structures_utils import data_xarray_from_continuous_events
+
+
+class DummyDevice(object):
+
+    # Implementation of the abstract Device methods for devices that are not connected to any spiking simulator
+
+    def _init_dummy(self, neurons=()):
+        self._values_dict = {}
+        self._neurons = tuple(neurons)
+        self.n_calls = 0
+        self.n_get_connections_calls = 0
+
+    def connect(self, neurons):
+        self._neurons = tuple(self._neurons) + tuple(neurons)
+        self.connectivity_changed()
+
+    def _assert_device(self):
+        pass
+
+    def _print_neurons(self, neurons=None):
+        return ""
+
+    def Set(self, values_dict):
+        self.n_calls += 1
+        self._values_dict.update(values_dict)
+
+    def Get(self, attrs=None):
+        if attrs is None:
+            return self._values_dict
+        return self._values_dict[attrs]
+
+    def _GetConnections(self, **kwargs):
+        self.n_get_connections_calls += 1
+        return self._neurons
+
+    def _SetToConnections(self, values_dict, connections=None):
+        pass
+
+    def _GetFromConnections(self, attrs=None, connections=None):
+        return {}
+
+    @property
+    def neurons(self):
+        return self._neurons
+
+
+class DummyInputDevice(DummyDevice, InputDevice):
+
+    _array_parameters = ["spike_times"]
+
+    def __init__(self, device=None, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "dummy_input_device")
+        super(DummyInputDevice, self).__init__(device, *args, **kwargs)
+        self._init_dummy()
+
+
+class DummyOutputDevice(DummyDevice):
+
+    # Events are recorded as lists, as for most spiking simulators
+
+    def _init_dummy(self, neurons=(), record_from=()):
+        super(DummyOutputDevice, self)._init_dummy(neurons)
+        self._record_from = list(record_from)
+        self.reset()
+
+    def record(self, times, senders, **variables):
+        self._events["times"] += list(times)
+        self._events["senders"] += list(senders)
+        for var in self._record_from:
+            self._events[var] += list(variables[var])
+
+    @property
+    def events(self):
+        return self._events
+
+    @property
+    def number_of_events(self):
+        return len(self._events["times"])
+
+    def reset(self):
+        self._events = OrderedDict([("times", []), ("senders", [])] + [(var, []) for var in self._record_from])
+
+    @property
+    def record_from(self):
+        return self._record_from
+
+
+class DummySpikeRecorder(DummyOutputDevice, SpikeRecorder):
+
+    def __init__(self, device=None, neurons=(), *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "spike_recorder")
+        super(DummySpikeRecorder, self).__init__(device, *args, **kwargs)
+        self._init_dummy(neurons)
+
+
+class DummyMultimeter(DummyOutputDevice, Multimeter):
+
+    def __init__(self, device=None, neurons=(), record_from=("V_m", ), *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "multimeter")
+        super(DummyMultimeter, self).__init__(device, *args, **kwargs)
+        self._init_dummy(neurons, record_from)
+
+    def get_data(self, variables=None, name=None, dims_names=["Time", "Variable", "Neuron"],
+                 flatten_neurons_inds=True):
+        return data_xarray_from_continuous_events(self.events, self.events["times"], self.events["senders"],
+                                                  variables=self._determine_variables(variables),
+                                                  name=name, dims_names=dims_names)
+
+
+class DummyBulkInputDevice(DummyInputDevice):
+
+    n_bulk_calls = 0
+
+    @classmethod
+    def SetDevices(cls, devices, values_dicts):
+        cls.n_bulk_calls += 1
+        for device, values_dict in zip(devices, values_dicts):
+            device._values_dict.update(values_dict)
+
+
+def _prepare_dummy_device_set(n_devices=3, device_class=DummyInputDevice):
+    return DeviceSet("dummy", "dummy_input_device", [device_class() for _ in range(n_devices)])
+
+
+def test_device_set_Set():
+    n_devices = 3
+    device_set = _prepare_dummy_device_set(n_devices)
+    device_set.Set({"rate": np.arange(n_devices),
+                    "origin": 1.0,
+                    "spike_times": [[0.1]] * n_devices,
+                    "stop": [0.5]})
+    for i_dev, device in enumerate(device_set):
+        assert device.n_calls == 1
+        assert device.Get("rate") == i_dev
+        assert device.Get("origin") == 1.0
+        assert device.Get("stop") == 0.5
+        assert isinstance(device.Get("spike_times"), np.ndarray)
+        assert np.allclose(device.Get("spike_times"), [0.1])
+    # Array valued parameters not given per device are set equally to all devices:
+    device_set.Set({"spike_times": [0.1, 0.2]})
+    for device in device_set:
+        assert np.allclose(device.Get("spike_times"), [0.1, 0.2])
+    with pytest.raises(ValueError):
+        device_set.Set({"rate": [1.0, 2.0]})
+
+
+def test_device_set_Set_bulk(monkeypatch):
+    # The bulk calls' counter is shared by all tests using DummyBulkInputDevice:
+    monkeypatch.setattr(DummyBulkInputDevice, "n_bulk_calls", 0)
+    n_devices = 4
+    device_set = _prepare_dummy_device_set(n_devices, DummyBulkInputDevice)
+    device_set.Set({"rate": np.arange(n_devices)})
+    assert DummyBulkInputDevice.n_bulk_calls == 1
+    device_set.Set({"rate": np.arange(n_devices) + 1.0})
+    assert DummyBulkInputDevice.n_bulk_calls == 2
+    for i_dev, device in enumerate(device_set):
+        assert device.n_calls == 0
+        assert device.Get("rate") == i_dev + 1.0
+
+
+def test_device_set_connectivity_counts():
+    n_devices = 3
+    device_set = _prepare_dummy_device_set(n_devices)
+    assert device_set.number_of_connections == 0
+    assert device_set.number_of_neurons == 0
+    for i_dev, device in enumerate(device_set):
+        device.connect(range(i_dev + 1))
+    device_set.update()
+    n_calls = [device.n_get_connections_calls for device in device_set]
+    # Reading the counts, as long as the connectivity doesn't change, does not compute them again:
+    for _ in range(3):
+        assert device_set.number_of_connections == [1, 2, 3]
+        assert device_set.number_of_neurons == [1, 2, 3]
+        assert [device.number_of_connections for device in device_set] == [1, 2, 3]
+    assert [device.n_get_connections_calls for device in device_set] == n_calls
+    # Changing the connectivity of a device invalidates the cached counts of the device and of its DeviceSet...
+    device_set[0].connect([10, 11])
+    assert device_set.number_of_connections == [3, 2, 3]
+    assert device_set[0].number_of_neurons == 3
+    # ...but not the ones of any other device:
+    assert [device.n_get_connections_calls - n_call for device, n_call in zip(device_set, n_calls)] == [1, 0, 0]
+    other_device_set = _prepare_dummy_device_set(1)
+    other_device_set[0].connect([20])
+    assert other_device_set.number_of_connections == [1]
+    device_set[1].connect([12])
+    assert other_device_set.number_of_connections == [1]
+    assert other_device_set[0].n_get_connections_calls == 1
+    assert device_set.number_of_connections == [3, 3, 3]
+    # The connectivity version of a DeviceSet, or of a subset of it, is increased by its Devices:
+    device_subset = device_set[[1, 2]]
+    versions = device_set._connectivity_version, device_subset._connectivity_version
+    device_set[2].connect([13])
+    assert (device_set._connectivity_version, device_subset._connectivity_version) == \
+           (versions[0] + 1, versions[1] + 1)
+    assert device_subset.number_of_connections == [3, 4]
+
+
+def test_read_new_events():
+    device = DummySpikeRecorder(neurons=range(3))
+    events, cursor = device.read_new_events()
+    assert cursor == 0
+    assert len(events["times"]) == 0
+    device.record([0.1, 0.1, 0.2], [0, 1, 2])
+    events, cursor = device.read_new_events(cursor)
+    assert cursor == 3
+    assert np.allclose(events["times"], [0.1, 0.1, 0.2])
+    device.record([0.3], [1])
+    events, cursor = device.read_new_events(cursor, variables="senders")
+    assert cursor == 4
+    assert list(events.keys()) == ["senders"]
+    assert isinstance(events["senders"], np.ndarray)
+    assert np.all(events["senders"] == [1])
+    # After a reset, all events are new:
+    device.reset()
+    device.record([0.4], [2])
+    events, cursor = device.read_new_events(cursor)
+    assert cursor == 1
+    assert np.allclose(events["times"], [0.4])
+
+
+def test_multimeter_latest_window():
+    device = DummyMultimeter(neurons=range(2), record_from=["V_m", "g_exc"])
+    values, t_last = device.latest_window(0.0)
+    assert values.shape == (2, 0)
+    assert t_last == 0.0
+    device.record([0.1, 0.1, 0.2, 0.2], [1, 0, 1, 0], V_m=[-60.0, -70.0, -50.0, -60.0], g_exc=[1.0, 2.0, 3.0, 4.0])
+    values, t_last = device.latest_window(0.0)
+    assert t_last == 0.2
+    # Averaged across time, with neurons sorted by sender:
+    assert np.allclose(values, [[-65.0, -55.0], [3.0, 2.0]])
+    values, t_last = device.latest_window(t_last, variables=["g_exc"])
+    assert values.shape == (1, 0)
+    assert t_last == 0.2
+    # Only the last time point:
+    values, t_last = device.latest_window()
+    assert np.allclose(values, [[-60.0, -50.0], [4.0, 3.0]])
+    assert np.allclose(device.current_data().values, [[-60.0, -50.0], [4.0, 3.0]])
+    assert np.allclose(device.current_data_mean_values(), [-55.0, 3.5])
+
+
+if __name__ == "__main__":
+    test_device_set_Set()
+    test_device_set_Set_bulk()
+    test_device_set_connectivity_counts()
+    test_read_new_events()
+    test_multimeter_latest_window()
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+import json
+
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.interfaces.base import TVBSpikeNetInterface
+from tvb_multiscale.core.interfaces.spikeNet_to_tvb_interface import SpikeNetToTVBinterface
+from tvb_multiscale.core.interfaces.transforms import LinearTransform, FunctionTransform
+from tvb_multiscale.core.spiking_models.devices import DeviceSet
+
+from tests.core.test_devices import DummySpikeRecorder, DummyMultimeter
+
+
+N_TVB_SVS = 2
+
+
+class DummyTVBSpikeNetInterface(TVBSpikeNetInterface):
+    _available_input_devices = ["dc_generator", "poisson_generator"]
+    _current_input_devices = ["dc_generator"]
+    _spike_rate_input_devices = ["poisson_generator"]
+    _available_output_devices = ["spike_recorder", "multimeter", "voltmeter"]
+    _spike_rate_output_devices = ["spike_recorder"]
+    _multimeter_output_devices = ["multimeter", "voltmeter"]
+    _voltmeter_output_devices = ["voltmeter"]
+
+
+class DummyInputInterface(object):
+
+    def __init__(self, model, nodes_ids, tvb_sv_id=0, tvb_coupling_id=0, scale=np.array([1.0]), name="dummy"):
+        self.model = model
+        self.name = name
+        self.nodes_ids = nodes_ids
+        self.tvb_sv_id = tvb_sv_id
+        self.tvb_coupling_id = tvb_coupling_id
+        self.scale = scale
+        self.values = None
+
+    def set(self, values):
+        self.values = values
+
+    def set_window(self, values, dt):
+        self.window_values = values.copy()
+
+
+class DummyOutputInterface(object):
+
+    def __init__(self, model, nodes_ids, tvb_sv_id=0, scale=np.array([1.0]), name="dummy"):
+        self.model = model
+        self.name = name
+        self.nodes_ids = nodes_ids
+        self.tvb_sv_id = tvb_sv_id
+        self.scale = scale
+        self.values = np.random.uniform(size=(len(nodes_ids), ))
+
+    @property
+    def population_mean_spikes_number(self):
+        return self.values
+
+    @property
+    def current_population_mean_values(self):
+        return self.values
+
+
+def _prepare_transforms(number_of_nodes):
+    transforms = {}
+    for name, w in zip(["tvb_to_current", "tvb_to_potential", "tvb_to_spike_rate"], [1000.0, 1.0, 1000.0]):
+        transforms[name] = lambda state_variable, region_nodes_indices, weights=w * np.ones((number_of_nodes,)): \
+            state_variable[region_nodes_indices] * weights[region_nodes_indices]
+    for name, w in zip(["spikes_to_tvb", "spikes_sv_to_tvb", "potential_to_tvb"], [10.0, 1.0, 1.0]):
+        transforms[name] = lambda spikeNet_variable, region_nodes_indices, weights=w * np.ones((number_of_nodes,)): \
+            spikeNet_variable * weights[region_nodes_indices]
+    return transforms
+
+
+def _prepare_dummy_interface(n_interfaces=4, number_of_nodes=10, n_spiking_nodes=5):
+    spiking_nodes_ids = np.arange(n_spiking_nodes)
+    tvb_nodes_ids = np.arange(n_spiking_nodes, number_of_nodes)
+    interface = DummyTVBSpikeNetInterface()
+    interface.tvb_nodes_ids = tvb_nodes_ids
+    interface.spiking_nodes_ids = spiking_nodes_ids
+    interface.transforms = _prepare_transforms(number_of_nodes)
+    input_models = ["dc_generator", "poisson_generator", "current", "potential"]
+    output_models = ["spike_recorder", "multimeter", "voltmeter"]
+    interface.tvb_to_spikeNet_interfaces = \
+        [DummyInputInterface(input_models[i_int % len(input_models)], spiking_nodes_ids,
+                             tvb_sv_id=i_int % N_TVB_SVS, tvb_coupling_id=i_int % N_TVB_SVS,
+                             scale=np.random.uniform(size=(n_spiking_nodes,)))
+         for i_int in range(n_interfaces)]
+    interface.spikeNet_to_tvb_interfaces = \
+        [DummyOutputInterface(output_models[i_int % len(output_models)], spiking_nodes_ids,
+                              tvb_sv_id=i_int % N_TVB_SVS, scale=np.random.uniform(size=(n_spiking_nodes,)),
+                              name="dummy%d" % i_int)
+         for i_int in range(n_interfaces)]
+    interface.configure(None)
+    state = np.random.uniform(size=(N_TVB_SVS, number_of_nodes, 1))
+    coupling = np.random.uniform(size=(N_TVB_SVS, number_of_nodes, 1))
+    return interface, state, coupling
+
+
+def test_tvb_state_to_spikeNet():
+    interface, state, coupling = _prepare_dummy_interface()
+    interface.tvb_state_to_spikeNet(state, coupling, None)
+    for tvb_to_spikeNet_interface in interface.tvb_to_spikeNet_interfaces:
+        if tvb_to_spikeNet_interface.model in ["dc_generator", "poisson_generator"]:
+            values = state[tvb_to_spikeNet_interface.tvb_sv_id].squeeze()
+        else:
+            values = coupling[tvb_to_spikeNet_interface.tvb_coupling_id].squeeze()
+        if tvb_to_spikeNet_interface.model == "potential":
+            w = 1.0
+        else:
+            w = 1000.0
+        expected = tvb_to_spikeNet_interface.scale * w * values[tvb_to_spikeNet_interface.nodes_ids]
+        assert np.allclose(tvb_to_spikeNet_interface.values, expected)
+
+
+def test_spikeNet_state_to_tvb_state():
+    interface, state, coupling = _prepare_dummy_interface()
+    state = interface.spikeNet_state_to_tvb_state(state)
+    # The last interface writing to each state variable determines its values:
+    for spikeNet_to_tvb_interface in interface.spikeNet_to_tvb_interfaces[-N_TVB_SVS:]:
+        if spikeNet_to_tvb_interface.model == "spike_recorder":
+            w = 10.0
+        else:
+            w = 1.0
+        expected = spikeNet_to_tvb_interface.scale * w * spikeNet_to_tvb_interface.values
+        assert np.allclose(state[spikeNet_to_tvb_interface.tvb_sv_id, spikeNet_to_tvb_interface.nodes_ids, 0],
+                           expected)
+
+
+@pytest.mark.parametrize("n_interfaces", [1, 2, 4])
+def test_spikeNet_state_to_tvb_state_scatter(n_interfaces):
+    interface, state, coupling = _prepare_dummy_interface(n_interfaces)
+    # The reference, sequential, writes of the interfaces, the later ones overwriting the earlier ones:
+    expected = state.copy()
+    for spikeNet_to_tvb_interface, (_, _, transform_fun, scale, state_index) in \
+            zip(interface.spikeNet_to_tvb_interfaces, interface._spikeNet_to_tvb_plan):
+        expected[state_index] = scale * transform_fun(spikeNet_to_tvb_interface.values)
+    new_state = interface.spikeNet_state_to_tvb_state(state.copy())
+    assert np.allclose(new_state, expected)
+    scatter = interface._spikeNet_to_tvb_scatter
+    # The positions of the buffer to be written are needed only for interfaces writing to the same indices:
+    assert (scatter[4] is None) == (n_interfaces <= N_TVB_SVS)
+    # The scatter is reused as long as the shape of the TVB state does not change:
+    interface.spikeNet_state_to_tvb_state(state.copy())
+    assert interface._spikeNet_to_tvb_scatter is scatter
+    interface.spikeNet_state_to_tvb_state(np.concatenate([state, state], axis=-1))
+    assert interface._spikeNet_to_tvb_scatter is not scatter
+
+
+def _prepare_kernel_transforms(number_of_nodes):
+    # The same transformations as _prepare_transforms, as Transforms generating kernels:
+    transforms = {}
+    for name, w in zip(["tvb_to_current", "tvb_to_potential", "tvb_to_spike_rate"], [1000.0, 1.0, 1000.0]):
+        transforms[name] = LinearTransform(w * np.ones((number_of_nodes,)), from_tvb=True)
+    for name, w in zip(["spikes_to_tvb", "spikes_sv_to_tvb", "potential_to_tvb"], [10.0, 1.0, 1.0]):
+        transforms[name] = LinearTransform(w * np.ones((number_of_nodes,)), from_tvb=False)
+    return transforms
+
+
+@pytest.mark.parametrize("use_numba", [False, True])
+def test_transform_kernels(use_numba):
+    number_of_nodes = 10
+    nodes_ids = np.array([1, 3, 4, 8])
+    weights = np.random.uniform(size=(number_of_nodes,))
+    state_variable = np.random.uniform(size=(number_of_nodes,))
+    spikeNet_variable = np.random.uniform(size=nodes_ids.shape)
+    # Linear transforms with pre-sliced weights:
+    for transform, values, expected in \
+            [(LinearTransform(weights, from_tvb=True), state_variable, weights[nodes_ids] * state_variable[nodes_ids]),
+             (LinearTransform(weights, from_tvb=False), spikeNet_variable, weights[nodes_ids] * spikeNet_variable)]:
+        kernel = transform.kernel(nodes_ids)
+        assert np.allclose(kernel(values), expected)
+        out = np.zeros(nodes_ids.shape)
+        assert kernel.apply(values, out=out) is out
+        assert np.allclose(out, expected)
+        # Transforms can be still called as plain transformation functions:
+        assert np.allclose(transform(values, nodes_ids), expected)
+    # Function transforms, optionally compiled by numba:
+    transform = FunctionTransform(lambda x: 2.0 * x + 1.0, from_tvb=True, use_numba=use_numba)
+    assert isinstance(transform.fun, np.ufunc) == use_numba
+    kernel = transform.kernel(nodes_ids)
+    out = np.zeros(nodes_ids.shape)
+    assert kernel.apply(state_variable, out=out) is out
+    assert np.allclose(out, 2.0 * state_variable[nodes_ids] + 1.0)
+    assert np.allclose(kernel(state_variable), out)
+
+
+def test_exchange_with_transform_kernels():
+    interface, state, coupling = _prepare_dummy_interface()
+    # The reference exchange with plain transformation functions:
+    interface.tvb_state_to_spikeNet(state, coupling, None)
+    expected_values = [tvb_to_spikeNet_interface.values for tvb_to_spikeNet_interface in
+                       interface.tvb_to_spikeNet_interfaces]
+    expected_state = interface.spikeNet_state_to_tvb_state(state.copy())
+    interface.transforms = _prepare_kernel_transforms(state.shape[1])
+    interface.configure(None)
+    interface.tvb_state_to_spikeNet(state, coupling, None)
+    for tvb_to_spikeNet_interface, expected in zip(interface.tvb_to_spikeNet_interfaces, expected_values):
+        assert np.allclose(tvb_to_spikeNet_interface.values, expected)
+    assert np.allclose(interface.spikeNet_state_to_tvb_state(state.copy()), expected_state)
+
+
+def test_unsupported_interface_model():
+    interface, state, coupling = _prepare_dummy_interface()
+    interface.tvb_to_spikeNet_interfaces.append(DummyInputInterface("step_current_generator", [0]))
+    with pytest.raises(ValueError):
+        interface.configure(None)
+
+
+def test_windowed_exchange():
+    interface, state, coupling = _prepare_dummy_interface()
+    # The synchronization window is limited by the minimum delay:
+    assert interface.configure_synchronization(0.35, 0.5) == pytest.approx(0.3)
+    assert interface.synchronization_n_step == 3
+    assert interface.configure_synchronization(0.05) == pytest.approx(0.1)
+    interface.configure_synchronization(0.3)
+    n_step = interface.synchronization_n_step
+    states = np.random.uniform(size=(n_step, ) + state.shape)
+    couplings = np.random.uniform(size=(n_step, ) + coupling.shape)
+    interface.tvb_state_to_spikeNet_window(states, couplings, None)
+    for i_step in range(n_step):
+        # The same as a non windowed exchange for each time step of the window:
+        interface.tvb_state_to_spikeNet(states[i_step], couplings[i_step], None)
+        for tvb_to_spikeNet_interface in interface.tvb_to_spikeNet_interfaces:
+            assert tvb_to_spikeNet_interface.window_values.shape == (n_step, len(tvb_to_spikeNet_interface.nodes_ids))
+            assert np.allclose(tvb_to_spikeNet_interface.window_values[i_step], tvb_to_spikeNet_interface.values)
+    states = interface.spikeNet_state_to_tvb_window(states)
+    expected = interface.spikeNet_state_to_tvb_state(state)
+    for spikeNet_to_tvb_interface in interface.spikeNet_to_tvb_interfaces[-N_TVB_SVS:]:
+        indices = (spikeNet_to_tvb_interface.tvb_sv_id, spikeNet_to_tvb_interface.nodes_ids, 0)
+        if spikeNet_to_tvb_interface.model == "spike_recorder":
+            # The spikes of the window are divided equally among its time steps:
+            expected[indices] /= n_step
+        for i_step in range(n_step):
+            assert np.allclose(states[i_step][indices], expected[indices])
+
+
+def test_min_tvb_delay_of_sparse_connectivity():
+    from types import SimpleNamespace
+    from tvb_multiscale.core.interfaces.builders.base import TVBSpikeNetInterfaceBuilder
+    # Only nodes 0 -> 2 and 3 -> 1 are connected, whereas all unconnected pairs have zero delays:
+    weights = np.zeros((4, 4))
+    delays = np.zeros((4, 4))
+    weights[0, 2] = 1.0
+    delays[0, 2] = 2.5
+    weights[3, 1] = 0.5
+    delays[3, 1] = 1.5
+    builder = TVBSpikeNetInterfaceBuilder.__new__(TVBSpikeNetInterfaceBuilder)
+    builder.tvb_simulator = SimpleNamespace(connectivity=SimpleNamespace(weights=weights, delays=delays))
+    assert builder._min_tvb_delay([0, 3], [1, 2]) == 1.5
+    assert builder._min_tvb_delay([0], [1, 2]) == 2.5
+    # No connections do not limit the synchronization window:
+    assert builder._min_tvb_delay([1, 2], [0, 3]) is None
+    assert builder._min_tvb_delay([], [0]) is None
+
+
+def test_interface_stats():
+    interface, state, coupling = _prepare_dummy_interface(n_interfaces=3)
+    expected = interface.spikeNet_state_to_tvb_state(state.copy())
+    stats = interface.enable_stats()
+    n_steps = 2
+    for _ in range(n_steps):
+        interface.tvb_state_to_spikeNet(state, coupling, None)
+        new_state = interface.spikeNet_state_to_tvb_state(state.copy())
+    # The exchange is the same with the stats enabled:
+    assert np.allclose(new_state, expected)
+    for interface_id, tvb_to_spikeNet_interface in enumerate(interface.tvb_to_spikeNet_interfaces):
+        interface_stats = stats["tvb_to_spikeNet_%d_dummy" % interface_id]
+        assert tvb_to_spikeNet_interface.stats is interface_stats
+        assert list(interface_stats.phases.keys()) == ["transform", "set"]
+        for phase_stats in interface_stats.phases.values():
+            assert phase_stats.calls == n_steps
+            assert phase_stats.values == n_steps * len(tvb_to_spikeNet_interface.nodes_ids)
+            assert phase_stats.time >= 0.0
+    for interface_id in range(3):
+        interface_stats = stats["spikeNet_to_tvb_%d_dummy%d" % (interface_id, interface_id)]
+        assert list(interface_stats.phases.keys()) == ["readout", "transform"]
+        assert interface_stats["readout"].calls == n_steps
+    dumped = json.loads(stats.to_json())
+    assert dumped["tvb_to_spikeNet_0_dummy"]["set"]["calls"] == n_steps
+    # Disabling the stats stops accumulating them:
+    assert interface.disable_stats() is stats
+    interface.tvb_state_to_spikeNet(state, coupling, None)
+    assert stats["tvb_to_spikeNet_0_dummy"]["set"].calls == n_steps
+    assert all(tvb_to_spikeNet_interface.stats is None
+               for tvb_to_spikeNet_interface in interface.tvb_to_spikeNet_interfaces)
+    stats.reset()
+    assert stats["tvb_to_spikeNet_0_dummy"]["set"].calls == 0
+
+
+class DummyResetSpikeNetToTVBinterface(SpikeNetToTVBinterface):
+    _reset_devices_after_reading = True
+
+
+@pytest.mark.parametrize("interface_class", [SpikeNetToTVBinterface, DummyResetSpikeNetToTVBinterface])
+def test_spikeNet_to_tvb_interface_spikes(interface_class):
+    n_neurons = 4
+    devices = [DummySpikeRecorder(neurons=range(n_neurons)) for _ in range(2)]
+    interface = interface_class(None, 0, "dummy", "spike_recorder", nodes_ids=[0, 1], device_set=devices)
+    assert np.allclose(interface.population_mean_spikes_number, [0.0, 0.0])
+    devices[0].record([0.1, 0.1], [0, 1])
+    devices[1].record([0.1], [2])
+    assert np.allclose(interface.population_mean_spikes_number, [2.0 / n_neurons, 1.0 / n_neurons])
+    # Only the new events are counted at the next reading:
+    devices[0].record([0.2], [3])
+    assert np.allclose(interface.population_mean_spikes_number, [1.0 / n_neurons, 0.0])
+    assert np.allclose(interface.population_mean_spikes_number, [0.0, 0.0])
+    if interface_class._reset_devices_after_reading:
+        assert interface.do_for_all_devices("number_of_events") == [0, 0]
+    else:
+        assert interface.do_for_all_devices("number_of_events") == [3, 1]
+
+
+def test_spikeNet_to_tvb_interface_counting_only():
+    n_neurons = 2
+    devices = [DummySpikeRecorder(neurons=range(n_neurons)) for _ in range(2)]
+    interface = SpikeNetToTVBinterface(None, 0, "dummy", "spike_recorder", nodes_ids=[0, 1],
+                                       counting_only=True).from_device_set(DeviceSet("dummy", "spike_recorder",
+                                                                                     devices))
+    assert all(device.counting_only for device in devices)
+    for i_step in range(10):
+        devices[0].record([0.1 * i_step] * 2, [0, 1])
+        devices[1].record([0.1 * i_step], [0])
+        assert np.allclose(interface.population_mean_spikes_number, [2.0 / n_neurons, 1.0 / n_neurons])
+        # The devices are reset after every reading and only the counts are kept:
+        assert interface.do_for_all_devices("number_of_events") == [0, 0]
+        assert np.all(interface.spikes_counts == [2 * (i_step + 1), i_step + 1])
+
+
+@pytest.mark.parametrize("interface_class", [SpikeNetToTVBinterface, DummyResetSpikeNetToTVBinterface])
+def test_spikeNet_to_tvb_interface_multimeter(interface_class):
+    devices = [DummyMultimeter(neurons=range(2), record_from=["V_m"]) for _ in range(2)]
+    interface = interface_class(None, 0, "dummy", "multimeter", nodes_ids=[0, 1], device_set=devices)
+    assert np.allclose(interface.current_population_mean_values, [0.0, 0.0])
+    devices[0].record([0.1, 0.1], [0, 1], V_m=[-70.0, -60.0])
+    devices[1].record([0.1, 0.1], [0, 1], V_m=[-50.0, -50.0])
+    assert np.allclose(interface.current_population_mean_values, [-65.0, -50.0])
+    devices[0].record([0.2, 0.2], [0, 1], V_m=[-55.0, -55.0])
+    assert np.allclose(interface.current_population_mean_values, [-55.0, 0.0])
+
+
+@pytest.mark.parametrize("n_interfaces", [1, 10, 50])
+@pytest.mark.parametrize("number_of_nodes", [10, 100, 1000])
+def test_benchmark_exchange_step(benchmark, n_interfaces, number_of_nodes):
+    interface, state, coupling = _prepare_dummy_interface(n_interfaces, number_of_nodes, number_of_nodes // 2)
+
+    def exchange_step():
+        interface.tvb_state_to_spikeNet(state, coupling, None)
+        interface.spikeNet_state_to_tvb_state(state)
+
+    benchmark.group = "exchange_step_%d_interfaces" % n_interfaces
+    benchmark(exchange_step)
+
+
+if __name__ == "__main__":
+    test_tvb_state_to_spikeNet()
+    test_spikeNet_state_to_tvb_state()
+    test_unsupported_interface_model()
+    test_windowed_exchange()
+    for interface_class in [SpikeNetToTVBinterface, DummyResetSpikeNetToTVBinterface]:
+        test_spikeNet_to_tvb_interface_spikes(interface_class)
+        test_spikeNet_to_tvb_interface_multimeter(interface_class)
+    test_spikeNet_to_tvb_interface_counting_only()
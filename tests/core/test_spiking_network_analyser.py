@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.data_analysis.spiking_network_analyser import \
+    SpikingNetworkAnalyser, SPIKES_KERNELS, optimal_kernel_bandwidth
+
+
+def _poisson_spikes_times(rate, duration, seed=0):
+    # The spikes' times (ms) of a Poisson process of a rate (Hz):
+    rng = np.random.default_rng(seed)
+    spikes_times = np.cumsum(rng.exponential(1000.0 / rate, int(2 * rate * duration / 1000.0) + 10))
+    return spikes_times[spikes_times < duration]
+
+
+@pytest.mark.parametrize("kernel", list(SPIKES_KERNELS.keys()))
+def test_rate_time_series_kernels(kernel):
+    analyser = SpikingNetworkAnalyser(start_time=0.0, end_time=100.0, period=0.5,
+                                      spikes_kernel=kernel, spikes_kernel_width=5.0)
+    rate = analyser.compute_rate_time_series(np.array([50.0]))["rate_time_series"]
+    assert rate.dims == ("Time",)
+    assert np.allclose(rate.Time.values, np.arange(0.0, 100.0, 0.5))
+    # A single spike contributes a rate of 1 spike over the whole kernel:
+    assert np.sum(rate.values) * analyser.period / 1000.0 == pytest.approx(1.0, rel=0.05)
+    # ...around the spike time:
+    assert np.sum(rate.values * rate.Time.values) / np.sum(rate.values) == pytest.approx(50.0, abs=2.5)
+    if kernel == "gaussian":
+        # The kernel is truncated at 5 sigma:
+        time = rate.Time.values
+        expected = 1000.0 * np.exp(-0.5 * ((time - 50.0) / 5.0) ** 2) / (np.sqrt(2 * np.pi) * 5.0)
+        expected[np.abs(time - 50.0) > 25.0] = 0.0
+        assert np.allclose(rate.values, expected, atol=1e-9)
+    # Elephant's kernels' classes names are accepted as well:
+    assert np.allclose(analyser.compute_rate_time_series(np.array([50.0]),
+                                                         kernel=kernel.capitalize() + "Kernel")["rate_time_series"],
+                       rate)
+
+
+def test_rate_time_series_auto_kernel():
+    analyser = SpikingNetworkAnalyser(start_time=0.0, end_time=1000.0, period=1.0)
+    spikes_times = _poisson_spikes_times(100.0, 1000.0)
+    rate = analyser.compute_rate_time_series({"times": spikes_times})["rate_time_series"]
+    kernel_width = optimal_kernel_bandwidth(spikes_times)
+    assert 1.0 < kernel_width < 1000.0
+    # The rate is smoothed with a Gaussian kernel of the optimal width:
+    expected = analyser.compute_rate_time_series(spikes_times, kernel="gaussian",
+                                                 kernel_width=kernel_width)["rate_time_series"]
+    assert np.allclose(rate, expected)
+    # Away from the borders, the rate is the mean rate of the spikes' train:
+    assert np.mean(rate.values[300:700]) == pytest.approx(len(spikes_times), rel=0.1)
+    # A single spike has no optimal kernel width, and contributes a delta rate of 1 / sampling period:
+    assert optimal_kernel_bandwidth([10.0]) is None
+    rate = analyser.compute_rate_time_series(np.array([10.0]))["rate_time_series"]
+    assert rate.values[10] == 1000.0
+    assert np.sum(rate.values) == 1000.0
+    # No spikes result in a zero rate:
+    assert np.all(analyser.compute_rate_time_series(np.array([]))["rate_time_series"].values == 0.0)
+
+
+@pytest.mark.parametrize("kernel", ["auto", "exponential"])
+def test_spikes_rates_by_neuron(kernel):
+    analyser = SpikingNetworkAnalyser(start_time=0.0, end_time=500.0, period=1.0,
+                                      spikes_kernel=kernel, spikes_kernel_width=10.0)
+    spikes_times = [_poisson_spikes_times(rate, 500.0, seed) for seed, rate in enumerate([20.0, 50.0, 10.0])]
+    spikes = {"times": np.concatenate(spikes_times),
+              "senders": np.concatenate([np.full(times.shape, neuron)
+                                         for neuron, times in zip([3, 4, 5], spikes_times)])}
+    # The rates of all neurons are computed together,...
+    rates = analyser.compute_spikes_rates_by_neuron(spikes, number_of_neurons=3)["rate_time_series_by_neuron"]
+    assert rates.dims == ("Neuron", "Time")
+    assert list(rates.Neuron.values) == [3, 4, 5]
+    # ...as for each neuron separately:
+    for neuron, times in zip([3, 4, 5], spikes_times):
+        assert np.allclose(rates.sel(Neuron=neuron).values,
+                           analyser.compute_rate_time_series(times)["rate_time_series"].values)
+
+
+def test_benchmark_spikes_rates_by_neuron(benchmark):
+    analyser = SpikingNetworkAnalyser(start_time=0.0, end_time=1000.0, period=0.1,
+                                      spikes_kernel="gaussian", spikes_kernel_width=10.0)
+    spikes_times = [_poisson_spikes_times(20.0, 1000.0, seed) for seed in range(500)]
+    spikes = {"times": np.concatenate(spikes_times),
+              "senders": np.concatenate([np.full(times.shape, neuron) for neuron, times in enumerate(spikes_times)])}
+    rates = benchmark(analyser.compute_spikes_rates_by_neuron, spikes, number_of_neurons=500)
+    assert rates["rate_time_series_by_neuron"].shape == (500, 10000)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from tvb_multiscale.tvb_nest.nest_models.builders.base import NESTModelBuilder
+
+
+class DummySynapseCollection(object):
+
+    def __init__(self, connections):
+        self.connections = connections
+
+    def __len__(self):
+        return len(self.connections)
+
+    def get(self, attrs):
+        # As NEST, scalars are returned for a single connection:
+        if len(self.connections) == 1:
+            return dict([(attr, self.connections[0][attr]) for attr in attrs])
+        return dict([(attr, [conn[attr] for conn in self.connections]) for attr in attrs])
+
+
+class DummyNodeCollection(object):
+
+    def __init__(self, ids):
+        self.ids = np.array(ids)
+        self.params = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, inds):
+        return DummyNodeCollection(self.ids[inds])
+
+    def tolist(self):
+        return self.ids.tolist()
+
+    def set(self, params):
+        self.params.update(params)
+
+
+class DummyNESTInstance(object):
+
+    # A NEST instance that creates nodes and connects them one to one, recording its calls:
+
+    def __init__(self):
+        self.connections = []
+        self.synapse_models = []
+        self.connect_calls = []
+        self.create_calls = []
+        self.get_connections_calls = []
+        self.n_nodes = 0
+
+    def Create(self, model, n=1, params=None):
+        self.create_calls.append((model, n, params))
+        ids = DummyNodeCollection(np.arange(self.n_nodes + 1, self.n_nodes + n + 1))
+        self.n_nodes += n
+        return ids
+
+    def Connect(self, pre, post, conn_spec=None, syn_spec=None):
+        self.connect_calls.append((pre, post, conn_spec, syn_spec))
+        assert conn_spec["rule"] == "one_to_one"
+        synapse_model = syn_spec.get("synapse_model", "static_synapse")
+        if synapse_model not in self.synapse_models:
+            self.synapse_models.append(synapse_model)
+        for i_conn, (source, target) in enumerate(zip(pre, post)):
+            values = dict([(attr, np.broadcast_to(syn_spec.get(attr, default), (len(pre), ))[i_conn])
+                           for attr, default in zip(["weight", "delay", "receptor_type"], [1.0, 1.0, 0])])
+            self.connections.append({"source": int(source), "target": int(target), "target_thread": 0,
+                                     "synapse_id": self.synapse_models.index(synapse_model),
+                                     "port": len(self.connections), "synapse_model": synapse_model,
+                                     "weight": float(values["weight"]), "delay": float(values["delay"]),
+                                     "receptor": int(values["receptor_type"])})
+
+    def NodeCollection(self, ids):
+        return DummyNodeCollection(ids)
+
+    def GetConnections(self, source=None, target=None):
+        self.get_connections_calls.append((source, target))
+        connections = [conn for conn in self.connections
+                       if (source is None or conn["source"] in source.ids) and
+                          (target is None or conn["target"] in target.ids)]
+        # NEST does not return the connections in the order of their creation:
+        return DummySynapseCollection(sorted(connections, key=lambda conn: (conn["target"], conn["source"])))
+
+    def GetKernelStatus(self, attr):
+        if attr == "num_connections":
+            return len(self.connections)
+        elif attr == "resolution":
+            return 0.1
+        raise KeyError(attr)
+
+
+def _prepare_builder():
+    builder = NESTModelBuilder.__new__(NESTModelBuilder)
+    builder.nest_instance = DummyNESTInstance()
+    builder.bulk_connect_chunk_size = None
+    builder._connections_ids = {}
+    builder.default_kernel_config = {"data_path": "nest_recordings", "rng_seed": 3}
+    # 2 region nodes of an E and an I population of NEST nodes 1-3 and 4-6:
+    builder.spiking_nodes_ids = [0, 1]
+    builder._spiking_nodes_labels = ["node0", "node1"]
+    builder._spiking_brain = \
+        dict([(node_label, {"E": SimpleNamespace(_population=DummyNodeCollection([3 * i_node + 1, 3 * i_node + 2])),
+                            "I": SimpleNamespace(_population=DummyNodeCollection([3 * i_node + 3]))})
+              for i_node, node_label in enumerate(builder.spiking_nodes_labels)])
+    return builder
+
+
+def _connections(sources, targets, synapse_models, weight):
+    n_connections = len(sources)
+    return {"source": np.array(sources), "target": np.array(targets),
+            "weight": weight * np.ones((n_connections, )), "delay": np.ones((n_connections, )),
+            "receptor_type": np.zeros((n_connections, ), dtype="i"), "synapse_model": np.array(synapse_models)}
+
+
+def _sorted(connections):
+    inds = np.lexsort((connections["target"], connections["source"]))
+    return dict([(attr, np.asarray(values)[inds]) for attr, values in connections.items()])
+
+
+def test_connections_arrays():
+    builder = _prepare_builder()
+    # A within node connection type, a connection type among nodes,
+    # and another within node connection type among the same populations as the first one:
+    conns = [{"source": "E", "target": "I", "nodes": [0, 1]},
+             {"source": ["E", "I"], "target": "E", "source_nodes": [0], "target_nodes": [1]},
+             {"source": "E", "target": "I", "nodes": [0]}]
+    connections = [_connections([5, 1, 2], [6, 3, 3], ["static_synapse", "stdp_synapse", "static_synapse"], 2.0),
+                   _connections([3, 1], [4, 5], ["static_synapse", "static_synapse"], 3.0),
+                   _connections([1], [3], ["static_synapse"], 4.0)]
+    ranges = []
+    for conn, conns_arrays in zip(conns, connections):
+        start = builder._number_of_connections(conn)
+        builder._connect_arrays(conns_arrays)
+        ranges.append((start, builder._number_of_connections(conn)))
+    assert ranges == [(0, 3), (3, 5), (5, 6)]
+    # One array nest.Connect per synapse model:
+    assert [syn_spec["synapse_model"] for _, _, _, syn_spec in builder.nest_instance.connect_calls] == \
+           ["static_synapse", "stdp_synapse", "static_synapse", "static_synapse"]
+    # The connections of every connection type are read back from NEST,...
+    arrays = [builder._get_connections_arrays(start, stop, conn) for conn, (start, stop) in zip(conns, ranges)]
+    for conns_arrays, expected in zip(arrays, connections):
+        conns_arrays, expected = _sorted(conns_arrays), _sorted(expected)
+        for attr, values in expected.items():
+            assert np.array_equal(conns_arrays[attr], values)
+    # ...only among the populations of the connection type, and not of the whole network,
+    # and the identities of the connections are freed once read:
+    assert all([source is not None and target is not None
+                for source, target in builder.nest_instance.get_connections_calls])
+    assert builder.nest_instance.get_connections_calls[2][0].tolist() == [1, 2, 3]
+    assert builder.nest_instance.get_connections_calls[2][1].tolist() == [4, 5]
+    assert builder._connections_ids == {}
+    # ...so that a new network is connected identically from them:
+    new_builder = _prepare_builder()
+    for conns_arrays in arrays:
+        new_builder._connect_arrays(conns_arrays)
+    assert new_builder._number_of_connections() == 6
+    for attr in ["source", "target", "weight", "delay", "receptor", "synapse_model"]:
+        assert sorted([conn[attr] for conn in new_builder.nest_instance.connections]) == \
+               sorted([conn[attr] for conn in builder.nest_instance.connections])
+    assert builder._connectivity_cache_config() == [["rng_seed", [3]]]
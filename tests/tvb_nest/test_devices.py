@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from tvb_multiscale.tvb_nest.nest_models.devices import NESTSpikeRecorder, NESTMultimeter
+
+
+class DummyNESTRecorder(object):
+
+    # A NEST recording device that records to memory, counting the events copied from it:
+
+    def __init__(self, record_from=()):
+        self.record_from = list(record_from)
+        self.n_copied_events = 0
+        self._events = dict([(key, []) for key in ["times", "senders"] + self.record_from])
+
+    def record(self, times, senders, **variables):
+        self._events["times"] += list(times)
+        self._events["senders"] += list(senders)
+        for var in self.record_from:
+            self._events[var] += list(variables[var])
+
+    def get(self, attr):
+        if attr == "n_events":
+            return len(self._events["times"])
+        elif attr == "events":
+            self.n_copied_events += len(self._events["times"])
+            return dict([(key, np.array(values)) for key, values in self._events.items()])
+        elif attr == "record_from":
+            return self.record_from
+        raise KeyError(attr)
+
+    def set(self, values_dict):
+        if values_dict.get("n_events", None) == 0:
+            self._events = dict([(key, []) for key in self._events.keys()])
+
+
+def test_memory_spike_recorder_events():
+    nest_device = DummyNESTRecorder()
+    spike_recorder = NESTSpikeRecorder(nest_device, None, record_to="memory")
+    nest_device.record([1.0, 2.0], [1, 2])
+    assert spike_recorder.number_of_events == 2
+    nest_device.record([3.0, 4.0, 5.0], [1, 2, 3])
+    assert spike_recorder.number_of_events == 5
+    # All events are kept by the device, even if they are deleted from NEST memory:
+    events = spike_recorder.events
+    assert np.array_equal(events["times"], [1.0, 2.0, 3.0, 4.0, 5.0])
+    assert np.array_equal(events["senders"], [1, 2, 1, 2, 3])
+    assert nest_device.n_copied_events == 5
+    assert spike_recorder.number_of_events == 5
+    nest_device.record([6.0], [4])
+    assert np.array_equal(spike_recorder.events["times"], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    # Every event is copied from NEST only once:
+    assert nest_device.n_copied_events == 6
+    spike_recorder.reset()
+    assert spike_recorder.number_of_events == 0
+    assert len(spike_recorder.events["times"]) == 0
+
+
+def test_memory_spike_recorder_read_new_events():
+    nest_device = DummyNESTRecorder()
+    spike_recorder = NESTSpikeRecorder(nest_device, None, record_to="memory")
+    nest_device.record([1.0, 2.0], [1, 2])
+    events, cursor = spike_recorder.read_new_events()
+    assert np.array_equal(events["times"], [1.0, 2.0]) and cursor == 2
+    nest_device.record([3.0, 4.0, 5.0], [1, 2, 3])
+    events, cursor = spike_recorder.read_new_events(cursor)
+    assert np.array_equal(events["times"], [3.0, 4.0, 5.0])
+    assert np.array_equal(events["senders"], [1, 2, 3])
+    assert cursor == 5
+    # Only the new events are copied from NEST at every reading:
+    assert nest_device.n_copied_events == 5
+    events, cursor = spike_recorder.read_new_events(cursor, "times")
+    assert list(events.keys()) == ["times"] and len(events["times"]) == 0 and cursor == 5
+    # Cursors may point to events within previously read chunks:
+    nest_device.record([6.0], [4])
+    events, cursor = spike_recorder.read_new_events(3)
+    assert np.array_equal(events["times"], [4.0, 5.0, 6.0]) and cursor == 6
+    assert nest_device.n_copied_events == 6
+    # After a reset, all events are new:
+    spike_recorder.reset()
+    nest_device.record([7.0], [1])
+    events, cursor = spike_recorder.read_new_events(cursor)
+    assert np.array_equal(events["times"], [7.0]) and cursor == 1
+
+
+def test_memory_multimeter_latest_window():
+    nest_device = DummyNESTRecorder(["V_m"])
+    multimeter = NESTMultimeter(nest_device, None, record_to="memory")
+    nest_device.record([1.0, 1.0], [1, 2], V_m=[1.0, 2.0])
+    nest_device.record([2.0, 2.0], [1, 2], V_m=[3.0, 4.0])
+    values, t_last = multimeter.latest_window()
+    assert np.allclose(values, [[3.0, 4.0]]) and t_last == 2.0
+    nest_device.record([3.0, 3.0], [1, 2], V_m=[5.0, 6.0])
+    values, t_last = multimeter.latest_window(2.0)
+    assert np.allclose(values, [[5.0, 6.0]]) and t_last == 3.0
+    # Windows may extend to previously read events:
+    values, t_last = multimeter.latest_window(1.0)
+    assert np.allclose(values, [[4.0, 5.0]]) and t_last == 3.0
+    # Only the new events are copied from NEST at every reading:
+    assert nest_device.n_copied_events == 6
+    assert np.allclose(multimeter.events["V_m"], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
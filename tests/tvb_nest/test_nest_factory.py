@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from tvb_multiscale.tvb_nest.nest_models.builders.nest_factory import create_devices, connect_devices
+
+from tests.tvb_nest.test_connectivity_cache import DummyNESTInstance
+
+
+def test_create_and_connect_devices():
+    nest_instance = DummyNESTInstance()
+    populations = [SimpleNamespace(_population=nest_instance.Create("iaf_cond_alpha", n)) for n in [3, 2]]
+    nest_instance.create_calls = []
+    devices = create_devices("poisson_generator", 2, labels=["E0", "E1"], nest_instance=nest_instance)
+    recorders = create_devices("spike_recorder", 2, labels=["S0", "S1"], nest_instance=nest_instance)
+    # A single nest.Create call per model creates all the devices' nodes:
+    assert [call[:2] for call in nest_instance.create_calls] == [("poisson_generator", 2), ("spike_recorder", 2)]
+    assert [device.device.tolist() for device in devices + recorders] == [[6], [7], [8], [9]]
+    assert [device.label for device in devices + recorders] == ["E0", "E1", "S0", "S1"]
+    connect_devices([(devices[0], populations[0], None, 2.0, 1.0, None),
+                     (devices[1], populations[1], None, 3.0, 0.0, 1),
+                     (recorders[0], populations[0], lambda neurons: neurons[1:], 1.0, 1.0, 0),
+                     (recorders[1], populations[1], None, 1.0, 1.0, 0)],
+                    nest_instance=nest_instance)
+    # A single one_to_one nest.Connect call connects all the devices:
+    assert len(nest_instance.connect_calls) == 1
+    source, target, conn_spec, syn_spec = nest_instance.connect_calls[0]
+    assert conn_spec == {"rule": "one_to_one"}
+    assert syn_spec["synapse_model"] == "static_synapse"
+    assert np.array_equal(source, [6, 6, 6, 7, 7, 2, 3, 4, 5])
+    assert np.array_equal(target, [1, 2, 3, 4, 5, 8, 8, 9, 9])
+    assert np.allclose(syn_spec["weight"], [2.0, 2.0, 2.0, 3.0, 3.0, 1.0, 1.0, 1.0, 1.0])
+    # Delays are not smaller than the resolution:
+    assert np.allclose(syn_spec["delay"], [1.0, 1.0, 1.0, 0.1, 0.1, 1.0, 1.0, 1.0, 1.0])
+    assert np.array_equal(syn_spec["receptor_type"], [0, 0, 0, 1, 1, 0, 0, 0, 0])
+    assert nest_instance.GetKernelStatus("num_connections") == 9
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+from time import perf_counter
+
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.interfaces.cosimulation import CoSimulationDriver
+from tvb_multiscale.tvb_numpy.numpy_models.builders.base import NumPyModelBuilder
+from tvb_multiscale.tvb_numpy.interfaces.base import TVBNumPyInterface
+from tvb_multiscale.tvb_numpy.interfaces.builders.base import TVBNumPyInterfaceBuilder
+
+from tvb.simulator.simulator import Simulator
+from tvb.simulator.models.wilson_cowan import WilsonCowan
+from tvb.simulator.integrators import HeunDeterministic
+from tvb.simulator.monitors import Raw
+from tvb.datatypes.connectivity import Connectivity
+
+
+SPIKING_NODES = [0, 1]
+
+
+def _prepare_tvb_simulator():
+    # 3 nodes with TVB delays of 1 ms, i.e., 10 TVB time steps:
+    weights = np.array([[0.0, 1.0, 0.5], [1.0, 0.0, 0.5], [0.5, 0.5, 0.0]])
+    connectivity = Connectivity(weights=weights, tract_lengths=10.0 * np.ones((3, 3)), speed=np.array([10.0]),
+                                region_labels=np.array(["a", "b", "c"]),
+                                centres=np.zeros((3, 3)), areas=np.ones((3,)))
+    connectivity.configure()
+    simulator = Simulator(model=WilsonCowan(variables_of_interest=("E", "I")), connectivity=connectivity,
+                          integrator=HeunDeterministic(dt=0.1), monitors=(Raw(),),
+                          initial_conditions=0.3 * np.ones((11, 2, 3, 1)))
+    simulator.configure()
+    return simulator
+
+
+def _prepare_cosimulation(spikes_delay=0.0):
+    # A TVB node driving the excitatory populations of 2 spiking nodes with dc generators,
+    # and the spiking nodes' spikes transmitted back to TVB, recorded with a delay of spikes_delay:
+    simulator = _prepare_tvb_simulator()
+    model_builder = NumPyModelBuilder(simulator, SPIKING_NODES)
+    model_builder.populations = [{"label": "E", "model": "iaf_psc_exp", "scale": 0.2, "params": {}, "nodes": None}]
+    model_builder.populations_connections = []
+    model_builder.nodes_connections = []
+    model_builder.output_devices = []
+    model_builder.input_devices = []
+    spiking_network = model_builder.build_spiking_network()
+    interface_builder = TVBNumPyInterfaceBuilder(simulator, spiking_network, SPIKING_NODES, exclusive_nodes=True)
+    interface_builder.tvb_to_spikeNet_interfaces = \
+        [{"model": "dc_generator", "params": {}, "interface_weights": 2.0, "weights": 1.0, "delays": 1.0,
+          "receptor_type": 0, "connections": {"E": "E"}, "source_nodes": None, "target_nodes": None}]
+    interface_builder.spikeNet_to_tvb_interfaces = \
+        [{"model": "spike_recorder", "params": {}, "interface_weights": 1.0, "delays": spikes_delay,
+          "connections": {"E": "E"}, "nodes": None}]
+    interface = interface_builder.build_interface(TVBNumPyInterface())
+    interface.configure(simulator.model)
+    return simulator, spiking_network, interface
+
+
+def _prepare_driver(windowed, pipelined=False, spikes_delay=0.0):
+    simulator, spiking_network, interface = _prepare_cosimulation(spikes_delay)
+    n_step = interface.synchronization_n_step if windowed else 1
+    inputs = []
+    outputs = []
+
+    def tvb_integrate(state):
+        # The TVB states, including the spiking nodes' values, that TVB integrates from:
+        inputs.append(np.array(state[:, :, :, 0] if windowed else state[None, :, :, 0]))
+        simulator.current_state = state[-1] if windowed else state
+        (_, data), = simulator.run(simulation_length=n_step * simulator.integrator.dt)
+        outputs.append(data[:, :, :, 0].copy())
+        if windowed:
+            return data, None, None
+        return simulator.current_state, None, None
+
+    driver = CoSimulationDriver(interface, tvb_integrate, None if windowed else simulator.integrator.dt,
+                                pipelined=pipelined, windowed=windowed)
+    state = simulator.current_state
+    if windowed:
+        state = np.repeat(state[None], n_step, axis=0)
+    return simulator, driver, state, inputs, outputs
+
+
+def _cosimulate(windowed, n_steps=200):
+    simulator, driver, state, inputs, outputs = _prepare_driver(windowed)
+    interface = driver.tvb_spikeNet_interface
+    n_step = interface.synchronization_n_step if windowed else 1
+    driver.run(state, None, None, n_steps // n_step)
+    spikeNet_to_tvb_interface = interface.spikeNet_to_tvb_interfaces.iloc[0]
+    spike_recorders = [spikeNet_to_tvb_interface[node] for node in spikeNet_to_tvb_interface.devices()]
+    return {"windows": driver.windows_done, "n_step": n_step,
+            "tvb_steps": simulator.current_step, "spiking_time": interface.numpy_simulator.time,
+            "inputs": np.concatenate(inputs), "outputs": np.concatenate(outputs),
+            "spikes": np.array([spike_recorder.number_of_events for spike_recorder in spike_recorders]),
+            "neurons": np.array([spike_recorder.number_of_neurons for spike_recorder in spike_recorders])}
+
+
+def test_serial_vs_windowed_cosimulation():
+    serial, windowed = _cosimulate(False), _cosimulate(True)
+    # The synchronization window is limited by the TVB delays between TVB and spiking nodes:
+    assert windowed["n_step"] == 10
+    assert serial["windows"] == 200 and windowed["windows"] == 20
+    # Both simulate the same time, in TVB and in the spiking network:
+    for results in [serial, windowed]:
+        assert results["tvb_steps"] == serial["tvb_steps"]
+        assert results["spiking_time"] == pytest.approx(20.0)
+        assert results["outputs"].shape == (200, 2, 3)
+        # All spikes reach the TVB state of the spiking nodes, as spikes per neuron:
+        assert np.all(results["spikes"] > 0)
+        assert np.allclose(np.sum(results["inputs"][:, 0, SPIKING_NODES], axis=0),
+                           results["spikes"] / results["neurons"])
+    # The spiking network is driven similarly...
+    assert np.sum(windowed["spikes"]) == pytest.approx(np.sum(serial["spikes"]), rel=0.1)
+    # ...and so is the TVB node:
+    assert np.allclose(windowed["outputs"][:, :, 2], serial["outputs"][:, :, 2], atol=0.02)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_benchmark_cosimulation_driver(benchmark, pipelined):
+    # The wall-clock time of a windowed co-simulation with the NumPy backend,
+    # with the spiking network simulated after, or in parallel to, the TVB integration of every window.
+    # The spikes are recorded with the TVB delays, so that windows are not longer than the spiking minimum delay:
+    n_windows = 20
+    drivers = []
+
+    def setup(pipelined=pipelined):
+        _, driver, state, _, _ = _prepare_driver(True, pipelined, spikes_delay=1.0)
+        drivers.append(driver)
+        return (driver, state), {}
+
+    def cosimulate(driver, state):
+        return driver.run(state, None, None, n_windows)
+
+    args, _ = setup(False)
+    tic = perf_counter()
+    cosimulate(*args)
+    serial_time = perf_counter() - tic
+    benchmark.group = "numpy_cosimulation_driver"
+    benchmark.pedantic(cosimulate, setup=setup, rounds=3)
+    assert drivers[-1].pipelined == pipelined and drivers[-1].windows_done == n_windows
+    if benchmark.stats is not None:
+        benchmark.extra_info["speedup"] = serial_time / benchmark.stats.stats.mean
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pytest
+
+from tvb_multiscale.core.io.connectivity_cache import SpikingConnectivityCache
+from tvb_multiscale.core.spiking_models.builders.base import VectorizedProperty
+from tvb_multiscale.tvb_numpy.numpy_models.builders.base import NumPyModelBuilder
+
+from tvb.simulator.simulator import Simulator
+from tvb.simulator.models.wilson_cowan import WilsonCowan
+from tvb.simulator.monitors import Raw
+from tvb.datatypes.connectivity import Connectivity
+
+
+def _prepare_tvb_simulator(number_of_nodes):
+    weights = np.random.RandomState(0).uniform(size=(number_of_nodes, number_of_nodes))
+    np.fill_diagonal(weights, 0.0)
+    connectivity = Connectivity(weights=weights, tract_lengths=10 * weights + 1.0,
+                                region_labels=np.array(["region%d" % i_node for i_node in range(number_of_nodes)]),
+                                centres=np.zeros((number_of_nodes, 3)), areas=np.ones((number_of_nodes,)))
+    connectivity.configure()
+    simulator = Simulator(model=WilsonCowan(), connectivity=connectivity, monitors=(Raw(),))
+    simulator.configure()
+    return simulator
+
+
+def _prepare_builder(number_of_nodes, bulk_connect=False, bulk_connect_chunk_size=None,
+                     conn_spec={"rule": "fixed_indegree", "indegree": 5},
+                     scale=0.2, weight=lambda source_node, target_node: 1.0 + source_node,
+                     delay=lambda source_node, target_node: 1.0 + 0.1 * target_node, populations_connections=[],
+                     output_devices=[], configure=True):
+    builder = NumPyModelBuilder(_prepare_tvb_simulator(number_of_nodes), np.arange(number_of_nodes))
+    builder.populations = [{"label": "E", "model": "iaf_psc_exp", "scale": scale},
+                           {"label": "I", "model": "iaf_psc_exp", "scale": 0.05}]
+    builder.populations_connections = populations_connections
+    builder.nodes_connections = [{"source": "E", "target": ["E", "I"], "conn_spec": conn_spec,
+                                  "weight": weight, "delay": delay,
+                                  "receptor_type": 0, "source_nodes": None, "target_nodes": None}]
+    builder.bulk_connect = bulk_connect
+    builder.bulk_connect_chunk_size = bulk_connect_chunk_size
+    builder.output_devices = output_devices
+    if configure:
+        builder.configure()
+        builder.build_spiking_region_nodes()
+    return builder
+
+
+@pytest.mark.parametrize("bulk_connect_chunk_size", [None, 1000])
+@pytest.mark.parametrize("conn_spec", [{"rule": "fixed_indegree", "indegree": 5}, {"rule": "all_to_all"}])
+def test_bulk_connect_spiking_region_nodes(bulk_connect_chunk_size, conn_spec):
+    number_of_nodes = 5
+    builder = _prepare_builder(number_of_nodes, conn_spec=conn_spec)
+    builder.connect_spiking_region_nodes()
+    expected = builder.numpy_simulator.connections
+    builder = _prepare_builder(number_of_nodes, True, bulk_connect_chunk_size, conn_spec)
+    builder.connect_spiking_region_nodes()
+    connections = builder.numpy_simulator.connections
+    # The same connections, drawn in the same order, with the same random numbers:
+    for attr, values in expected.items():
+        assert np.array_equal(connections[attr], values)
+    # No connections within region nodes:
+    populations = builder._spiking_brain
+    nodes_of_neurons = np.zeros((builder.numpy_simulator._n_nodes,), dtype="i8")
+    for i_node, node_label in enumerate(builder.spiking_nodes_labels):
+        for population in populations[node_label].values:
+            nodes_of_neurons[np.array(population.neurons)] = i_node
+    assert np.all(nodes_of_neurons[connections["source"]] != nodes_of_neurons[connections["target"]])
+    assert np.allclose(connections["weight"], 1.0 + nodes_of_neurons[connections["source"]])
+
+
+def test_vectorized_property():
+    prop = VectorizedProperty(lambda source_nodes, target_nodes: 10 * source_nodes + target_nodes)
+    assert prop.per_element(np.array([0, 1, 2]), np.array([1, 2, 0])) == [1, 12, 20]
+    # It can be still called as a scalar property function:
+    assert prop(2, 1) == 21
+    # Distribution dictionaries are split per pair of nodes:
+    prop = VectorizedProperty(lambda source_nodes, target_nodes:
+                              {"distribution": "normal", "mu": 1.0 * source_nodes, "sigma": 0.1})
+    assert prop.per_element(np.array([1, 2]), np.array([0, 0])) == \
+        [{"distribution": "normal", "mu": 1.0, "sigma": 0.1}, {"distribution": "normal", "mu": 2.0, "sigma": 0.1}]
+    assert VectorizedProperty(lambda nodes: 3.0).per_element(np.arange(2)) == [3.0, 3.0]
+    with pytest.raises(ValueError):
+        VectorizedProperty(lambda nodes: np.ones((3,))).per_element(np.arange(2))
+
+
+def test_vectorized_builder_properties():
+    number_of_nodes = 5
+    populations_connections = [{"source": "E", "target": "I", "conn_spec": {"rule": "all_to_all"},
+                                "weight": 2.0, "delay": 1.0, "receptor_type": 0, "nodes": None}]
+    builder = _prepare_builder(number_of_nodes, scale=lambda node: 0.1 + 0.05 * node,
+                               populations_connections=populations_connections)
+    builder.connect_within_node_spiking_populations()
+    builder.connect_spiking_region_nodes()
+    expected = builder.numpy_simulator.connections
+    calls = []
+
+    def vectorized(fun):
+        def counted_fun(*nodes):
+            calls.append(len(nodes[0]))
+            return fun(*nodes)
+        return VectorizedProperty(counted_fun)
+
+    populations_connections[0]["weight"] = vectorized(lambda nodes: 2.0 * np.ones(nodes.shape))
+    builder = _prepare_builder(number_of_nodes, scale=vectorized(lambda nodes: 0.1 + 0.05 * nodes),
+                               weight=vectorized(lambda source_nodes, target_nodes: 1.0 + source_nodes),
+                               delay=vectorized(lambda source_nodes, target_nodes: 1.0 + 0.1 * target_nodes),
+                               populations_connections=populations_connections)
+    builder.connect_within_node_spiking_populations()
+    builder.connect_spiking_region_nodes()
+    connections = builder.numpy_simulator.connections
+    for attr, values in expected.items():
+        assert np.array_equal(connections[attr], values)
+    # One call per property, for all nodes, or pairs of nodes:
+    assert sorted(calls) == sorted([number_of_nodes, number_of_nodes] + 2 * [number_of_nodes ** 2])
+
+
+def test_connectivity_cache(tmpdir):
+    number_of_nodes = 5
+    populations_connections = [{"source": "E", "target": "I", "conn_spec": {"rule": "fixed_indegree", "indegree": 3},
+                                "weight": 2.0, "delay": 1.0, "receptor_type": 0, "nodes": None}]
+    weight = {"distribution": "normal", "mu": 1.0, "sigma": 0.1}
+
+    def build(connectivity_cache=None, **kwargs):
+        builder = _prepare_builder(number_of_nodes, weight=weight,
+                                   populations_connections=populations_connections, **kwargs)
+        builder.connectivity_cache = connectivity_cache
+        builder._spiking_brain = builder._spiking_brain.__class__()
+        builder.numpy_simulator.reset()
+        builder.build_spiking_brain()
+        return builder
+
+    expected = build()
+    expected_random = expected.numpy_simulator.rng.random(3)
+    cache = SpikingConnectivityCache(str(tmpdir))
+    # The first build connects the network by the connection rules, and writes the cache file:
+    builder = build(cache)
+    assert not cache.loaded
+    filepath = cache.filepath(cache.key(builder))
+    assert os.path.isfile(filepath)
+    assert not os.path.isfile(filepath + ".tmp")
+    # The rebuild loads the connections from file instead:
+    for bulk_connect_chunk_size in [None, 100]:
+        builder = build(cache, bulk_connect_chunk_size=bulk_connect_chunk_size)
+        assert cache.loaded
+        for attr, values in expected.numpy_simulator.connections.items():
+            assert np.array_equal(builder.numpy_simulator.connections[attr], values)
+        # ...and continues with the same random numbers:
+        assert np.array_equal(builder.numpy_simulator.rng.random(3), expected_random)
+    # A different configuration has a different key:
+    builder = build(cache, delay=lambda source_node, target_node: 2.0)
+    assert not cache.loaded
+    assert len(os.listdir(str(tmpdir))) == 2
+
+
+def test_connectivity_cache_key(tmpdir):
+    cache = SpikingConnectivityCache(str(tmpdir))
+
+    def key(source_inds):
+        populations_connections = [{"source": "E", "target": "I", "conn_spec": {"rule": "all_to_all"},
+                                    "weight": 1.0, "delay": 1.0, "receptor_type": 0,
+                                    "source_inds": source_inds, "nodes": None}]
+        return cache.key(_prepare_builder(3, populations_connections=populations_connections))
+
+    def first_neurons(n_neurons):
+        return lambda neurons: neurons[:n_neurons]
+
+    # Functions are hashed by their code, and not by their names, which are the same for all lambdas...
+    assert key(lambda neurons: neurons[:10]) != key(lambda neurons: neurons[:20])
+    assert key(lambda neurons: neurons[:10]) == key(lambda neurons: neurons[:10])
+    # ...and by their closure variables:
+    assert key(first_neurons(10)) != key(first_neurons(20))
+    assert key(first_neurons(10)) == key(first_neurons(10))
+
+
+def test_dry_run():
+    number_of_nodes = 5
+    populations_connections = [{"source": ["E", "I"], "target": "E", "conn_spec": {"rule": "all_to_all"},
+                                "weight": 1.0, "delay": 1.0, "receptor_type": [0, 1], "nodes": [0, 1, 2]}]
+    output_devices = [{"model": "spike_recorder", "params": {}, "connections": {"E_spikes": "E"}, "nodes": None},
+                      {"model": "multimeter", "params": {"record_from": ["V_m", "I"], "interval": 0.5},
+                       "connections": {"E_V_m": ["E", "I"]}, "nodes": [1, 3]}]
+    builder = _prepare_builder(number_of_nodes, scale=lambda node: 0.1 + 0.05 * node,
+                               populations_connections=populations_connections,
+                               output_devices=output_devices, configure=False)
+    estimate = builder.dry_run(firing_rate={"E": 5.0})
+    # The NumPy simulator is not touched:
+    assert builder.numpy_simulator is None
+    neurons = estimate["neurons"]
+    assert neurons.shape == (number_of_nodes, 2)
+    assert np.all(neurons["E"].values == np.round(100 * (0.1 + 0.05 * np.arange(number_of_nodes))))
+    assert np.all(neurons["I"].values == 5)
+    # Compare with the network actually built:
+    builder.configure()
+    builder.build_spiking_brain()
+    for node_label in builder.spiking_nodes_labels:
+        for population in builder._spiking_brain[node_label].values:
+            assert neurons.loc[node_label, population.label] == population.number_of_neurons
+    connections = builder.numpy_simulator.connections
+    nodes_of_neurons = np.zeros((builder.numpy_simulator._n_nodes,), dtype="i8")
+    for i_node, node_label in enumerate(builder.spiking_nodes_labels):
+        for population in builder._spiking_brain[node_label].values:
+            nodes_of_neurons[np.array(population.neurons)] = i_node
+    synapses = estimate["synapses"]
+    assert np.all(synapses.sum(axis=1).values ==
+                  np.bincount(nodes_of_neurons[connections["target"]], minlength=number_of_nodes))
+    # Both receptors of the within node connections are counted:
+    within = synapses.iloc[:, 0].values
+    assert np.all(within[:3] == 2 * (neurons["E"].values[:3] + neurons["I"].values[:3]) * neurons["E"].values[:3])
+    assert np.all(within[3:] == 0)
+    totals = estimate["totals"]
+    assert totals["number_of_synapses"] == builder.numpy_simulator.number_of_connections
+    assert totals["synapses_memory_bytes"] == 40 * totals["number_of_synapses"]
+    assert totals["number_of_neurons"] == neurons.values.sum()
+    # One spike recorder per node and one multimeter per node of the 2 nodes:
+    devices = estimate["output_devices"]
+    assert devices.loc["E_spikes", "number_of_devices"] == number_of_nodes
+    assert devices.loc["E_spikes", "number_of_connections"] == neurons["E"].sum()
+    assert devices.loc["E_spikes", "events_per_second"] == 5.0 * neurons["E"].sum()
+    n_recorded = neurons.iloc[[1, 3]].values.sum()
+    assert devices.loc["E_V_m", "number_of_devices"] == 2
+    assert devices.loc["E_V_m", "number_of_connections"] == n_recorded
+    assert devices.loc["E_V_m", "events_per_second"] == 2000.0 * n_recorded
+    assert devices.loc["E_V_m", "bytes_per_second"] == 2000.0 * n_recorded * (16 + 2 * 8)
+    assert totals["number_of_devices"] == number_of_nodes + 2
+
+
+@pytest.mark.parametrize("bulk_connect", [False, True])
+@pytest.mark.parametrize("number_of_nodes", [10, 30, pytest.param(68, marks=pytest.mark.slow)])
+def test_benchmark_connect_spiking_region_nodes(benchmark, number_of_nodes, bulk_connect):
+    # The build time of the connections among all pairs of spiking region nodes:
+    builders = []
+
+    def setup():
+        builders.append(_prepare_builder(number_of_nodes, bulk_connect))
+        return (builders[-1], ), {}
+
+    benchmark.group = "connect_spiking_region_nodes_%d_nodes" % number_of_nodes
+    benchmark.extra_info["number_of_nodes"] = number_of_nodes
+    benchmark.pedantic(NumPyModelBuilder.connect_spiking_region_nodes, setup=setup, rounds=3)
+    assert builders[-1].numpy_simulator.number_of_connections == \
+        number_of_nodes * (number_of_nodes - 1) * 5 * (20 + 5)
+
+
+if __name__ == "__main__":
+    test_bulk_connect_spiking_region_nodes(None, {"rule": "fixed_indegree", "indegree": 5})
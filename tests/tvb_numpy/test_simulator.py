@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from pandas import Series
+import pytest
+
+from tvb_multiscale.tvb_numpy.config import CONFIGURED
+from tvb_multiscale.tvb_numpy.numpy_simulator.simulator import NumPySimulator, csr_rows_indices
+from tvb_multiscale.tvb_numpy.numpy_models.population import NumPyPopulation
+from tvb_multiscale.tvb_numpy.numpy_models.brain import NumPyBrain
+from tvb_multiscale.tvb_numpy.numpy_models.devices import \
+    NumPySpikeRecorder, NumPyMultimeter, NumPyInhomogeneousPoissonGenerator
+from tvb_multiscale.tvb_numpy.numpy_models.network import NumPyNetwork
+from tvb_multiscale.tvb_numpy.numpy_models.region_node import NumPyRegionNode
+from tvb_multiscale.tvb_numpy.numpy_models.builders.numpy_factory import \
+    create_device, connect_device, create_devices, connect_devices
+from tvb_multiscale.core.spiking_models.builders.factory import \
+    build_and_connect_devices_one_to_many, build_and_connect_devices_single_device
+
+
+def test_csr_rows_indices():
+    indptr = np.array([0, 2, 2, 5, 6])
+    assert np.array_equal(csr_rows_indices(indptr, np.array([2, 0, 3])), [2, 3, 4, 0, 1, 5])
+    assert csr_rows_indices(indptr, np.array([1])).size == 0
+
+
+def test_lif_firing():
+    # A LIF neuron with a constant suprathreshold current fires regularly,
+    # with the interspike interval of the analytical solution, plus the refractory period:
+    simulator = NumPySimulator(dt=0.01)
+    neurons = simulator.create_neurons("iaf_psc_exp", 10, {"I_e": 500.0})
+    spike_recorder = simulator.create_device("spike_recorder")
+    simulator.connect(neurons, spike_recorder)
+    simulator.run(200.0)
+    params = neurons.get()
+    V_inf = params["E_L"][0] + params["I_e"][0] * params["tau_m"][0] / params["C_m"][0]
+    isi = params["t_ref"][0] + params["tau_m"][0] * \
+          np.log((V_inf - params["V_reset"][0]) / (V_inf - params["V_th"][0]))
+    events = spike_recorder.get("events")
+    assert np.unique(events["senders"]).tolist() == neurons.tolist()
+    times = events["times"][events["senders"] == neurons.global_id[0]]
+    assert np.allclose(np.diff(times), isi, atol=2 * simulator.dt)
+    # Resetting the recorder deletes its events:
+    spike_recorder.set({"n_events": 0})
+    assert spike_recorder.get("n_events") == 0
+
+
+@pytest.mark.parametrize("conn_spec, n_connections",
+                         [({"rule": "all_to_all"}, 200),
+                          ({"rule": "one_to_one"}, None),
+                          ({"rule": "fixed_indegree", "indegree": 3}, 60),
+                          ({"rule": "fixed_outdegree", "outdegree": 4, "allow_multapses": False}, 40),
+                          ({"rule": "fixed_total_number", "N": 50}, 50),
+                          ({"rule": "pairwise_bernoulli", "p": 1.0}, 200)])
+def test_connect(conn_spec, n_connections):
+    simulator = NumPySimulator()
+    sources = simulator.create_neurons("iaf_psc_exp", 10)
+    targets = simulator.create_neurons("iaf_psc_exp", 20 if n_connections else 10)
+    connections = simulator.connect(sources, targets, conn_spec,
+                                    {"weight": {"distribution": "uniform", "low": 1.0, "high": 2.0}, "delay": 1.5})
+    if n_connections is None:
+        n_connections = 10
+        assert np.array_equal(connections.source, sources.global_id)
+        assert np.array_equal(connections.target, targets.global_id)
+    assert len(connections) == n_connections
+    assert len(simulator.get_connections(source=sources, target=targets)) == n_connections
+    assert np.all(np.isin(connections.source, sources.global_id))
+    assert np.all(np.isin(connections.target, targets.global_id))
+    weights = connections.get("weight")
+    assert np.all(weights >= 1.0) and np.all(weights <= 2.0)
+    assert simulator.min_delay == 1.5
+    if conn_spec["rule"] == "fixed_outdegree":
+        for source in sources:
+            assert np.unique(connections.target[connections.source == source]).size == 4
+    connections.set({"weight": 3.0})
+    assert np.all(simulator.get_connections(source=sources).get("weight") == 3.0)
+    with pytest.raises(ValueError):
+        simulator.connect(sources, targets, syn_spec={"delay": 0.5 * simulator.dt})
+
+
+def test_spike_generator_delivery():
+    # A spike arrives to its target exactly after the connection's delay:
+    simulator = NumPySimulator(dt=0.1)
+    neuron = simulator.create_neurons("iaf_psc_exp", 1, {"tau_syn": 1000.0})
+    spike_generator = simulator.create_device("spike_generator", {"spike_times": [1.0], "spike_weights": [2.0]})
+    simulator.connect(spike_generator, neuron, syn_spec={"weight": 10.0, "delay": 0.5})
+    simulator.run(1.4)
+    assert neuron.get("I_syn")["I_syn"][0] == 0.0
+    simulator.run(0.1)
+    assert neuron.get("I_syn")["I_syn"][0] == pytest.approx(20.0, rel=1e-3)
+
+
+def test_poisson_generator_rate():
+    simulator = NumPySimulator(dt=0.1, seed=1)
+    neurons = simulator.create_neurons("iaf_psc_exp", 100)
+    parrots = simulator.create_neurons("poisson_neuron", 100, {"rate": 50.0})
+    poisson_generator = simulator.create_device("poisson_generator", {"rate": 10000.0})
+    spike_recorder = simulator.create_device("spike_recorder")
+    simulator.connect(poisson_generator, neurons)
+    simulator.connect(parrots, spike_recorder)
+    simulator.run(1000.0)
+    # The inputs of each neuron are decaying exponentially with tau_syn,
+    # so the mean synaptic current is rate (spikes/ms) * tau_syn (ms) * weight:
+    mean_I_syn = 10000.0 / 1000.0 * neurons.get("tau_syn")["tau_syn"][0]
+    assert np.mean(neurons.get("I_syn")["I_syn"]) == pytest.approx(mean_I_syn, rel=0.1)
+    # 100 neurons firing with a 50 Hz rate for 1 sec:
+    assert spike_recorder.get("n_events") == pytest.approx(5000, rel=0.1)
+
+
+def test_multimeter():
+    simulator = NumPySimulator(dt=0.1)
+    neurons = simulator.create_neurons("iaf_psc_exp", 5)
+    dc_generator = simulator.create_device("dc_generator", {"amplitude": 100.0, "start": 5.0})
+    multimeter = simulator.create_device("multimeter", {"record_from": ["V_m", "I_syn"], "interval": 1.0})
+    simulator.connect(dc_generator, neurons[:2])
+    simulator.connect(multimeter, neurons)
+    simulator.run(10.0)
+    simulator.run(10.0)
+    assert multimeter.get("n_events") == 20 * 5
+    assert np.allclose(multimeter.buffer.times, np.arange(1.0, 21.0))
+    V_m = multimeter.buffer.data[:, 0]
+    assert np.all(V_m[:5] == -70.0)
+    assert np.all(V_m[-1, :2] > -70.0) and np.all(V_m[-1, 2:] == -70.0)
+    assert np.allclose(V_m[-1], neurons.get("V_m")["V_m"])
+    events = multimeter.get("events")
+    assert len(events["times"]) == 100
+
+
+def test_numpy_network():
+    simulator = NumPySimulator(dt=0.1)
+    population = NumPyPopulation(simulator.create_neurons("iaf_psc_exp", 20), "E", "iaf_psc_exp", simulator)
+    simulator.connect(population.population, population.population, {"rule": "fixed_indegree", "indegree": 5},
+                      {"weight": 5.0, "delay": 1.0})
+    assert population.number_of_neurons == 20
+    population.Set({"I_e": np.linspace(0.0, 600.0, 20)})
+    assert np.allclose(population.Get(["I_e"])["I_e"], np.linspace(0.0, 600.0, 20))
+    assert np.all(population.GetFromConnections(["weight"], source_or_target="target")["weight"] == 5.0)
+    spike_recorder = create_device("spike_recorder", {"label": "E_spikes"}, numpy_simulator=simulator)
+    assert isinstance(spike_recorder, NumPySpikeRecorder)
+    connect_device(spike_recorder, population, None, numpy_simulator=simulator)
+    multimeter = create_device("multimeter", numpy_simulator=simulator)
+    assert isinstance(multimeter, NumPyMultimeter)
+    connect_device(multimeter, population, lambda neurons: neurons[:10], numpy_simulator=simulator)
+    generator = create_device("inhomogeneous_poisson_generator", numpy_simulator=simulator)
+    assert isinstance(generator, NumPyInhomogeneousPoissonGenerator)
+    connect_device(generator, population, None, weight=10.0, delay=1.0, numpy_simulator=simulator)
+    generator.Set({"rate_times": [0.1, 50.0], "rate_values": [1000.0, 0.0]})
+    network = NumPyNetwork(simulator, NumPyBrain(), Series(dtype="O"), Series(dtype="O"))
+    assert network.min_delay == simulator.dt
+    network.configure()
+    network.Run(100.0)
+    assert simulator.time == pytest.approx(100.0)
+    assert spike_recorder.number_of_events > 0
+    assert np.all(np.isin(spike_recorder.events["senders"], population.neurons))
+    assert len(multimeter.neurons) == 10
+    data = multimeter.get_data()
+    assert data.shape == (100, 1, 10)
+    values, t_last = multimeter.latest_window(95.0)
+    assert t_last == pytest.approx(100.0)
+    assert np.allclose(values[0], data.values[-5:, 0].mean(axis=0))
+    spike_recorder.reset()
+    assert spike_recorder.number_of_events == 0
+
+
+def _build_proxy_devices(single_device):
+    simulator = NumPySimulator(dt=0.1, seed=1)
+    nodes = Series(dtype="O")
+    for node_label in ["node0", "node1"]:
+        nodes[node_label] = NumPyRegionNode(node_label, Series(dtype="O"), simulator)
+        for pop_label, size in zip(["E", "I"], [8, 4]):
+            nodes[node_label][pop_label] = NumPyPopulation(simulator.create_neurons("iaf_psc_exp", size),
+                                                           pop_label, "iaf_psc_exp", simulator)
+    device_dict = {"model": "inhomogeneous_poisson_generator", "connections": {"R": ["E", "I"]},
+                   "nodes": ["node0", "node1"], "names": ["tvb0", "tvb1", "tvb2"],
+                   "weights": np.arange(6.0).reshape((3, 2)) + 1.0, "delays": 1.0, "receptor_type": 0}
+    if single_device:
+        devices = build_and_connect_devices_single_device(device_dict, create_devices, connect_devices,
+                                                          nodes, device_dict["names"], CONFIGURED,
+                                                          numpy_simulator=simulator)
+    else:
+        devices = build_and_connect_devices_one_to_many(device_dict, create_device, connect_device,
+                                                        nodes, device_dict["names"], CONFIGURED,
+                                                        numpy_simulator=simulator)
+    return simulator, devices["R"]
+
+
+def test_single_device_proxies(monkeypatch):
+    add_connections_calls = []
+    add_connections = NumPySimulator.add_connections
+
+    def counted_add_connections(self, connections):
+        add_connections_calls.append(len(connections["source"]))
+        return add_connections(self, connections)
+
+    monkeypatch.setattr(NumPySimulator, "add_connections", counted_add_connections)
+    simulator, devices = _build_proxy_devices(True)
+    # The channels of the single device are connected all together...
+    assert add_connections_calls == [3 * 2 * (8 + 4)]
+    expected_simulator, expected_devices = _build_proxy_devices(False)
+    # ...exactly as the devices built one by one:
+    assert list(devices.keys()) == list(expected_devices.keys()) == ["tvb0", "tvb1", "tvb2"]
+    for attr, values in expected_simulator.connections.items():
+        assert np.array_equal(simulator.connections[attr], values)
+    for device, expected_device in zip(devices.values, expected_devices.values):
+        assert isinstance(device, NumPyInhomogeneousPoissonGenerator)
+        assert device.label == expected_device.label
+        assert device.number_of_connections == expected_device.number_of_connections == 24
+        assert device.number_of_neurons == expected_device.number_of_neurons == 24
+    devices.Set({"rate_times": [[0.1], [0.1], [0.1]], "rate_values": [[10.0], [20.0], [30.0]]})
+    assert [device.Get(["rate_values"])["rate_values"][0] for device in devices.values] == [10.0, 20.0, 30.0]
+
+
+def test_benchmark_numpy_simulator_run(benchmark):
+    # A sparse, balanced network of 1000 LIF neurons, driven by Poisson generators:
+    simulator = NumPySimulator(dt=0.1)
+    excitatory = simulator.create_neurons("iaf_psc_exp", 800, {"I_e": 450.0})
+    inhibitory = simulator.create_neurons("iaf_psc_exp", 200, {"I_e": 450.0})
+    poisson_generator = simulator.create_device("poisson_generator", {"rate": 1000.0})
+    spike_recorder = simulator.create_device("spike_recorder")
+    for source, weight in zip([excitatory, inhibitory], [20.0, -80.0]):
+        simulator.connect(source, excitatory, {"rule": "fixed_indegree", "indegree": 50},
+                          {"weight": weight, "delay": {"distribution": "uniform", "low": 1.0, "high": 3.0}})
+        simulator.connect(source, inhibitory, {"rule": "fixed_indegree", "indegree": 50},
+                          {"weight": weight, "delay": {"distribution": "uniform", "low": 1.0, "high": 3.0}})
+    simulator.connect(poisson_generator, excitatory, syn_spec={"weight": 20.0})
+    simulator.connect(poisson_generator, inhibitory, syn_spec={"weight": 20.0})
+    simulator.connect(excitatory, spike_recorder)
+    simulator.prepare()
+    benchmark.group = "numpy_simulator"
+    benchmark(simulator.run, 50.0)
+    assert spike_recorder.get("n_events") > 0
+
+
+if __name__ == "__main__":
+    test_csr_rows_indices()
+    test_lif_firing()
+    test_spike_generator_delivery()
+    test_poisson_generator_rate()
+    test_multimeter()
+    test_numpy_network()
@@ -10,13 +10,13 @@ from xarray import DataArray
 from tvb_multiscale.core.config import initialize_logger
 from tvb_multiscale.core.spiking_models.network import SpikingNetwork
 from tvb_multiscale.core.utils.data_structures_utils import cross_dimensions_and_coordinates_MultiIndex, \
-    get_ordered_dimensions, get_caller_fun_name
+    get_ordered_dimensions, get_caller_fun_name, sort_events_by_x_and_y
 
 from tvb.basic.neotraits.api import HasTraits, Attr, Float
 from tvb.datatypes import connectivity
 
 from tvb.contrib.scripts.utils.data_structures_utils import \
-    ensure_list, concatenate_heterogeneous_DataArrays, sort_events_by_x_and_y
+    ensure_list, concatenate_heterogeneous_DataArrays
 from tvb.contrib.scripts.datatypes.time_series_xarray import TimeSeries, TimeSeriesRegion
 
 
@@ -34,6 +34,127 @@ def _get_safely_list_item(i_item, lst, default_output):
     return output
 
 
+# The probability density functions (in 1/ms) of the spikes' kernels for the instantaneous rate computation,
+# following the definitions of the elephant.kernels of the same name, for time t and width sigma (both in ms),
+# where sigma is the standard deviation of the kernel,
+# together with the median time of the kernel, in units of sigma,
+# which is used to center the asymmetric kernels on the spikes' times:
+
+
+def _gaussian_kernel(t, sigma):
+    return np.exp(-0.5 * (t / sigma) ** 2) / (np.sqrt(2 * np.pi) * sigma)
+
+
+def _exponential_kernel(t, sigma):
+    return np.where(t >= 0.0, np.exp(-np.maximum(t, 0.0) / sigma) / sigma, 0.0)
+
+
+def _rectangular_kernel(t, sigma):
+    half_width = np.sqrt(3.0) * sigma
+    return np.where(np.abs(t) < half_width, 0.5 / half_width, 0.0)
+
+
+def _triangular_kernel(t, sigma):
+    half_width = np.sqrt(6.0) * sigma
+    return np.maximum(1.0 - np.abs(t) / half_width, 0.0) / half_width
+
+
+SPIKES_KERNELS = {"gaussian": (_gaussian_kernel, 0.0),
+                  "exponential": (_exponential_kernel, np.log(2.0)),
+                  "rectangular": (_rectangular_kernel, 0.0),
+                  "boxcar": (_rectangular_kernel, 0.0),
+                  "triangular": (_triangular_kernel, 0.0)}
+
+
+def _fft_convolve(signals, kernel):
+    """Function to convolve the last dimension of an array of signals with an odd length kernel,
+       via the FFT, returning the central part of the convolution, of the same length as the signals."""
+    n_times = signals.shape[-1]
+    n_fft = n_times + kernel.shape[-1] - 1
+    result = np.fft.irfft(np.fft.rfft(signals, n_fft, axis=-1) * np.fft.rfft(kernel, n_fft, axis=-1), n_fft, axis=-1)
+    i_start = kernel.shape[-1] // 2
+    return result[..., i_start:i_start + n_times]
+
+
+def _fft_gaussian_smoothing(signal, width):
+    # Smoothing of a signal with a Gaussian kernel of a width in samples, in the frequency domain:
+    n_fft = int(2 ** np.ceil(np.log2(signal.size + 3 * width)))
+    freqs = np.arange(n_fft) / n_fft
+    freqs = np.concatenate([-freqs[:n_fft // 2], freqs[n_fft // 2:0:-1]])
+    smoothed = np.fft.ifft(np.fft.fft(signal, n_fft) * np.exp(-0.5 * (width * 2 * np.pi * freqs) ** 2), n_fft)
+    return smoothed[:signal.size]
+
+
+def _logexp(x):
+    return np.log(1 + np.exp(x)) if x < 1e2 else x
+
+
+def _ilogexp(x):
+    return np.log(np.exp(x) - 1) if x < 1e2 else x
+
+
+def optimal_kernel_bandwidth(spikes_times, max_number_of_times=1000, max_iterations=20, tolerance=1e-5):
+    """Function to compute the optimal width of a Gaussian kernel for the instantaneous rate of a spikes' train,
+       by minimizing the cost function of the method of Shimazaki and Shinomoto (2010),
+       with a golden section search, as elephant.statistics.optimal_kernel_bandwidth does.
+       Arguments:
+        - spikes_times: an array of spikes' times (ms)
+        - max_number_of_times: the maximum number (integer) of time points of the histogram of the spikes.
+                               Default = 1000
+        - max_iterations: the maximum number (integer) of iterations of the search. Default = 20
+        - tolerance: the relative tolerance (float) of the search. Default = 1e-5
+       Returns:
+        - the optimal kernel width (float, in ms),
+          or None, if the spikes' train has less than two distinct spikes' times
+    """
+    spikes_times = np.sort(np.asarray(spikes_times, dtype="f8").ravel())
+    isis = np.diff(spikes_times)
+    isis = isis[isis > 0.0]
+    if isis.size == 0:
+        return None
+    duration = spikes_times[-1] - spikes_times[0]
+    times = np.linspace(spikes_times[0], spikes_times[-1],
+                        int(np.minimum(int(duration / np.min(isis) + 0.5), max_number_of_times)))
+    if times.size < 2:
+        return None
+    dt = np.min(np.diff(times))
+    y_hist = np.histogram(spikes_times, np.concatenate([times - dt / 2, [times[-1] + dt / 2]]))[0].astype("f8")
+    n_spikes = np.sum(y_hist)
+    y_hist = y_hist / n_spikes / dt
+
+    def cost(width):
+        y_smoothed = np.abs(_fft_gaussian_smoothing(y_hist, width / dt))
+        return (np.sum(y_smoothed ** 2) * dt - 2 * np.sum(y_smoothed * y_hist) * dt
+                + 2 / np.sqrt(2 * np.pi) / width / n_spikes) * n_spikes * n_spikes
+
+    phi = (np.sqrt(5) + 1) / 2
+    a = _ilogexp(2 * dt)
+    b = _ilogexp(duration)
+    c1 = (phi - 1) * a + (2 - phi) * b
+    c2 = (2 - phi) * a + (phi - 1) * b
+    f1 = cost(_logexp(c1))
+    f2 = cost(_logexp(c2))
+    optimal_width = None
+    iteration = 0
+    while np.abs(b - a) > tolerance * (np.abs(c1) + np.abs(c2)) and iteration < max_iterations:
+        if f1 < f2:
+            b = c2
+            c2 = c1
+            c1 = (phi - 1) * a + (2 - phi) * b
+            f2 = f1
+            f1 = cost(_logexp(c1))
+            optimal_width = _logexp(c1)
+        else:
+            a = c1
+            c1 = c2
+            c2 = (2 - phi) * a + (phi - 1) * b
+            f1 = f2
+            f2 = cost(_logexp(c2))
+            optimal_width = _logexp(c2)
+        iteration += 1
+    return optimal_width
+
+
 class SpikingNetworkAnalyser(HasTraits):
 
     """SpikingNetworkAnalyser
@@ -78,6 +199,19 @@ class SpikingNetworkAnalyser(HasTraits):
                the start_time of computations is set as the maximum(start_time, transient).
                In all other cases, the start_time of computations is given as start_time + transient.""")
 
+    spikes_kernel = Attr(field_type=str, default="auto", required=True,
+                         label="Spikes' kernel",
+                         doc="""The kernel used to compute instantaneous rates from spikes' trains, 
+                                one of "gaussian", "exponential", "rectangular" (or "boxcar"), "triangular",
+                                or "auto" (default), for a Gaussian kernel of optimal width,
+                                computed for every spikes' train.""")
+
+    spikes_kernel_width = Float(
+        label="Kernel/window length",
+        default=None,
+        required=False,
+        doc="""Kernel or sliding window time length (ms)""")
+
     time_series_output_type = Attr(field_type=str, default="array", required=True,
                                    label="Output type option for time series results.",
                                    doc="""The output type of the results, which can be either 'array' (Default), 
@@ -501,22 +635,108 @@ class SpikingNetworkAnalyser(HasTraits):
                     np.sum(spikes_times == spike_time) / self.period
         return result
 
-    def compute_rate_time_series(self, spikes, **kwargs):
+    def _get_spikes_kernel(self, kernel=None):
+        """A method to return the name of the spikes' kernel of the instantaneous rate computation.
+           Arguments:
+            - kernel: the name (string) of the kernel, possibly ending with "Kernel", as elephant's kernels' classes.
+                      Default=None, in which case the spikes_kernel attribute is used.
+           Returns:
+            - the lower case name (string) of the kernel, i.e., a key of SPIKES_KERNELS, or "auto"
+        """
+        kernel = str(self.spikes_kernel if kernel is None else kernel).lower()
+        if kernel.endswith("kernel"):
+            kernel = kernel[:-len("kernel")]
+        if kernel != "auto" and kernel not in SPIKES_KERNELS:
+            raise ValueError("Spikes' kernel %s is not one of the available kernels %s!"
+                             % (kernel, str(["auto"] + list(SPIKES_KERNELS.keys()))))
+        return kernel
+
+    def _compute_kernel(self, kernel, sigma, cutoff=5.0):
+        """A method to compute a spikes' kernel at the time points of the sampling period,
+           within cutoff * sigma around its median time.
+           Arguments:
+            - kernel: the name (string) of the kernel, i.e., a key of SPIKES_KERNELS
+            - sigma: the width (float, in ms) of the kernel
+            - cutoff: the time (float), in units of sigma, where the kernel is truncated. Default = 5.0
+           Returns:
+            - an array of odd length of the values of the kernel (1/ms)
+        """
+        kernel_fun, median = SPIKES_KERNELS[kernel]
+        n_half = int(np.ceil(cutoff * sigma / self.period))
+        return kernel_fun(np.arange(-n_half, n_half + 1) * self.period + median * sigma, sigma)
+
+    def _compute_rates_time_series(self, spikes_times, t_start, t_stop, kernel=None, kernel_width=None):
+        """A method to compute the instantaneous spiking rate time series of several spikes' trains together.
+           The spikes of all trains are binned by the sampling period with a single numpy.bincount,
+           and then, the binned spikes' trains are convolved with the spikes' kernel via the FFT,
+           all together, if the kernel's width is given, or else, each one with its own optimal kernel width.
+           Spikes' trains with less than two distinct spikes' times, for which the optimal kernel width
+           cannot be computed, contribute the number of spikes of every time bin / sampling period.
+           Arguments:
+            - spikes_times: a sequence (list, tuple) of arrays of spikes' times, one per spikes' train
+            - t_start: the start time (float, in ms) of the time series
+            - t_stop: the end time (float, in ms) of the time series
+            - kernel: the name (string) of the kernel. Default=None, in which case the spikes_kernel attribute is used.
+            - kernel_width: the width (float, in ms) of the kernel.
+                            Default=None, in which case the spikes_kernel_width attribute is used.
+           Returns:
+            - the time vector array
+            - an array of the rates (in Hz) of dimensions (spikes' trains, Time)
+        """
+        time = np.arange(t_start, t_stop + self._fmin_resolution, self.period)
+        n_times = time.size
+        spikes_times = [np.asarray(spikes, dtype="f8").ravel() for spikes in spikes_times]
+        n_trains = len(spikes_times)
+        trains_inds = np.concatenate([np.full(spikes.shape, i_train, dtype="i8")
+                                      for i_train, spikes in enumerate(spikes_times)] + [np.array([], dtype="i8")])
+        all_spikes_times = np.concatenate(spikes_times + [np.array([], dtype="f8")])
+        inside = np.logical_and(all_spikes_times >= t_start, all_spikes_times <= t_stop)
+        time_inds = np.minimum(np.floor((all_spikes_times[inside] - time[0]) / self.period).astype("i8"), n_times - 1)
+        # All spikes' trains are binned together, by their (spikes' train, time bin) flat index:
+        binned_spikes_trains = np.bincount(trains_inds[inside] * n_times + time_inds,
+                                           minlength=n_trains * n_times).reshape((n_trains, n_times)).astype("f8")
+        kernel = self._get_spikes_kernel(kernel)
+        if kernel_width is None:
+            kernel_width = self.spikes_kernel_width
+        if kernel != "auto" and kernel_width:
+            rates = _fft_convolve(binned_spikes_trains, self._compute_kernel(kernel, kernel_width)[None])
+        else:
+            if kernel == "auto":
+                kernel = "gaussian"
+            # The delta rate, for the spikes' trains without an optimal kernel width:
+            rates = binned_spikes_trains / self.period
+            for i_train, spikes in enumerate(spikes_times):
+                kernel_width = optimal_kernel_bandwidth(spikes[np.logical_and(spikes >= t_start, spikes <= t_stop)])
+                if kernel_width:
+                    rates[i_train] = _fft_convolve(binned_spikes_trains[i_train],
+                                                   self._compute_kernel(kernel, kernel_width))
+        return time, 1000.0 * rates
+
+    def compute_rate_time_series(self, spikes, number_of_neurons=1, **kwargs):
         """A method to compute instantaneous spiking rate time series,
-           using the elephant.statistics.instantaneous_rate method.
+           by binning the spikes' times by the sampling period,
+           and convolving the binned spikes' train with the spikes' kernel,
+           similarly to the elephant.statistics.instantaneous_rate method,
+           but without neo and quantities.
            Arguments:
-            - spikes: a Spike Train instance or
-                      an array of spikes' times or
+            - spikes: an array of spikes' times or
                       a dict with a key-value pair of "times" and spikes' times array
             - number_of_neurons=1: the number (integer) of neurons
-            **kwargs: keyword arguments for the method that computes the rate
+            **kwargs: keyword arguments for the method that computes the rate,
+                      i.e., "kernel" and "kernel_width", see _compute_rates_time_series
            Returns:
             - a dictionary of the following key-value pair(s):
              "rate_time_series": a xarray.DataArray of dimensions (Time,)
-             "spikes_train": the Spike Train used for the computation
+             "spikes_train": the spikes' times used for the computation
         """
-        # TODO: implement a method not using elephant
-        raise NotImplementedError
+        res_type = self._get_comput_res_type()
+        spikes_times = self._get_spikes_times_from_spikes_events(spikes)
+        t_start, t_stop = self._assert_start_end_times_from_spikes_times(spikes_times)
+        time, rates = self._compute_rates_time_series([spikes_times], t_start, t_stop,
+                                                      kernel=kwargs.get("kernel", None),
+                                                      kernel_width=kwargs.get("kernel_width", None))
+        return {res_type: DataArray(rates[0], dims=["Time"], coords={"Time": time}),
+                self.spikes_train_name: spikes_times}
 
     def compute_mean_rate_time_series(self, spikes, number_of_neurons=1, **kwargs):
         """A method to compute populations' mean instantaneous spiking rate time series.
@@ -565,6 +785,17 @@ class SpikingNetworkAnalyser(HasTraits):
         rates = OrderedDict()
         if len(neurons) < number_of_neurons:
             neurons = np.arange(number_of_neurons)
+        if getattr(rate_method, "__func__", None) is SpikingNetworkAnalyser.compute_rate_time_series \
+                and self.start_time is not None and self.end_time is not None:
+            # If the time vector is common to all neurons,
+            # the native instantaneous rates of all neurons are computed together:
+            spikes_times_by_neuron = spikes_times_by_neuron + [[]] * (len(neurons) - len(spikes_times_by_neuron))
+            t_start, t_stop = self._assert_start_end_times_from_spikes_times([])
+            time, rates = self._compute_rates_time_series(spikes_times_by_neuron, t_start, t_stop,
+                                                          kernel=kwargs.get("kernel", None),
+                                                          kernel_width=kwargs.get("kernel_width", None))
+            return {res_type: DataArray(rates, dims=["Neuron", "Time"],
+                                        coords={"Neuron": np.array(neurons), "Time": time})}
         for i_neuron, neuron in enumerate(neurons):
             if len(spikes_times_by_neuron):
                 spikes_times = spikes_times_by_neuron.pop(0)
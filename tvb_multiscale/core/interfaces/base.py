@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 
 from collections import OrderedDict
+from itertools import repeat
+from time import perf_counter
 
 import numpy as np
 from tvb_multiscale.core.config import CONFIGURED, initialize_logger, LINE
+from tvb_multiscale.core.interfaces.stats import CoSimulationStats, NO_STATS, no_timer
+from tvb_multiscale.core.interfaces.transforms import Transform, CallableKernel
 from tvb_multiscale.core.spiking_models.devices import \
     InputDeviceDict, OutputDeviceDict, OutputSpikeDeviceDict, OutputContinuousTimeDeviceDict
 
 from tvb.contrib.scripts.utils.data_structures_utils \
-    import is_integer, concatenate_heterogeneous_DataArrays
+    import is_integer, ensure_list, concatenate_heterogeneous_DataArrays
 
 
 LOG = initialize_logger(__name__)
@@ -43,6 +47,25 @@ class TVBSpikeNetInterface(object):
     spikeNet_to_tvb_sv_interfaces_ids = []
     spikeNet_to_tvb_params = OrderedDict()
 
+    # The per time step exchange plans, precompiled at configuration time
+    _tvb_to_spikeNet_plan = None
+    _spikeNet_to_tvb_plan = None
+    # The single scatter write of the Spiking Network -> TVB exchange, precomputed for a given TVB state shape:
+    _spikeNet_to_tvb_scatter = None
+
+    # The synchronization window of a windowed co-simulation, in time and in TVB time steps:
+    synchronization_time = None
+    synchronization_n_step = 1
+    # The (synchronization_n_step x nodes) buffers of the windowed exchange, one per interface:
+    _tvb_to_spikeNet_window_buffers = None
+    _spikeNet_to_tvb_window_buffers = None
+
+    # The per interface and per phase timers and counters, None when disabled:
+    stats = None
+    # The InterfaceStats of the steps of the exchange plans:
+    _tvb_to_spikeNet_stats = None
+    _spikeNet_to_tvb_stats = None
+
     def __init__(self, config=CONFIGURED):
         self.config = config
         LOG.info("%s created!" % self.__class__)
@@ -119,53 +142,286 @@ class TVBSpikeNetInterface(object):
                 self.spikeNet_to_tvb_params[interface.name] += interface.nodes_ids
             self.spikeNet_to_tvb_params[interface.name] = \
                 np.unique(self.spikeNet_to_tvb_params[interface.name]).tolist()
+        # Precompile the per time step exchange plans:
+        self._tvb_to_spikeNet_plan = self._build_tvb_to_spikeNet_plan()
+        self._spikeNet_to_tvb_plan = self._build_spikeNet_to_tvb_plan()
+        self._spikeNet_to_tvb_scatter = None
+        self._tvb_to_spikeNet_window_buffers = None
+        self._spikeNet_to_tvb_window_buffers = None
+        if self.stats is not None:
+            self._build_stats()
 
-    def tvb_state_to_spikeNet(self, state, coupling, stimulus):
-        # Apply TVB -> Spiking Network input at time t before integrating time step t -> t+dt
+    def enable_stats(self, stats=None):
+        """This method enables the per interface and per phase timers and counters
+           of the TVB <-> Spiking Network exchange, i.e.,
+           the time spent, the number of calls, the number of values transmitted and of events read,
+           for the transformation, the setting and the readout of every interface.
+           When the stats are disabled (default), the exchange methods use a no-op timer and no-op stats.
+           Arguments:
+            stats: a CoSimulationStats instance to accumulate the stats to.
+                   Default = None, corresponding to a new CoSimulationStats instance
+           Returns:
+            the CoSimulationStats instance, which can be dumped to JSON with its to_json() method
+        """
+        if stats is None:
+            stats = CoSimulationStats()
+        self.stats = stats
+        self._build_stats()
+        return self.stats
+
+    def disable_stats(self):
+        """This method disables the timers and counters of the TVB <-> Spiking Network exchange.
+           Returns:
+            the CoSimulationStats instance accumulated so far, or None, if the stats were not enabled
+        """
+        stats = self.stats
+        self.stats = None
+        self._tvb_to_spikeNet_stats = None
+        self._spikeNet_to_tvb_stats = None
+        for interface in list(self.tvb_to_spikeNet_interfaces) + list(self.spikeNet_to_tvb_interfaces):
+            interface.stats = None
+        return stats
+
+    def _build_stats(self):
+        if self._tvb_to_spikeNet_plan is None:
+            self._tvb_to_spikeNet_plan = self._build_tvb_to_spikeNet_plan()
+        if self._spikeNet_to_tvb_plan is None:
+            self._spikeNet_to_tvb_plan = self._build_spikeNet_to_tvb_plan()
+        # The interfaces share their InterfaceStats with the respective steps of the exchange plans,
+        # so that they can add the stats of their own phases, e.g., of their devices' Set or readout:
+        self._tvb_to_spikeNet_stats = []
+        for interface_id, interface in enumerate(self.tvb_to_spikeNet_interfaces):
+            interface.stats = self.stats.interface("tvb_to_spikeNet_%d_%s" % (interface_id, interface.name))
+            self._tvb_to_spikeNet_stats.append(interface.stats)
+        self._spikeNet_to_tvb_stats = []
+        for interface_id, interface in enumerate(self.spikeNet_to_tvb_interfaces):
+            interface.stats = self.stats.interface("spikeNet_to_tvb_%d_%s" % (interface_id, interface.name))
+            if interface_id in self.spikeNet_to_tvb_sv_interfaces_ids:
+                self._spikeNet_to_tvb_stats.append(interface.stats)
+        self._tvb_to_spikeNet_stats = tuple(self._tvb_to_spikeNet_stats)
+        self._spikeNet_to_tvb_stats = tuple(self._spikeNet_to_tvb_stats)
+
+    def configure_synchronization(self, tvb_to_spikeNet_min_delay=None, spikeNet_to_tvb_min_delay=None):
+        """This method sets the synchronization window of a windowed co-simulation,
+           as the largest integer number of TVB time steps that does not exceed
+           the minimum delays of the TVB -> Spiking Network and Spiking Network -> TVB couplings,
+           so that data exchanged at the end of a window cannot affect the other simulator within the same window.
+           Arguments:
+            tvb_to_spikeNet_min_delay: the minimum delay of TVB -> Spiking Network coupling.
+                                       Default = None, corresponding to the Spiking Network's minimum delay
+            spikeNet_to_tvb_min_delay: the minimum delay of Spiking Network -> TVB coupling.
+                                       Default = None, corresponding to the Spiking Network's minimum delay
+           Returns:
+            the synchronization time
+        """
+        min_delays = [delay for delay in [tvb_to_spikeNet_min_delay, spikeNet_to_tvb_min_delay]
+                      if delay is not None]
+        if len(min_delays) == 0:
+            min_delays = [self.spikeNet_min_delay]
+        # Allow for rounding errors of delays that are multiples of dt:
+        self.synchronization_n_step = int(np.maximum(1, np.floor(np.min(min_delays) / self.dt + 1e-6)))
+        self.synchronization_time = self.synchronization_n_step * self.dt
+        self._tvb_to_spikeNet_window_buffers = None
+        self._spikeNet_to_tvb_window_buffers = None
+        LOG.info("Synchronization window of %d TVB time steps (%g ms)!"
+                 % (self.synchronization_n_step, self.synchronization_time))
+        return self.synchronization_time
+
+    def _build_window_buffers(self):
+        if self._tvb_to_spikeNet_plan is None:
+            self._tvb_to_spikeNet_plan = self._build_tvb_to_spikeNet_plan()
+        if self._spikeNet_to_tvb_plan is None:
+            self._spikeNet_to_tvb_plan = self._build_spikeNet_to_tvb_plan()
+        self._tvb_to_spikeNet_window_buffers = \
+            tuple(np.zeros((self.synchronization_n_step, len(ensure_list(interface.nodes_ids))))
+                  for interface in self.tvb_to_spikeNet_interfaces)
+        self._spikeNet_to_tvb_window_buffers = \
+            tuple(np.zeros((self.synchronization_n_step, len(state_index[1])))
+                  for _, _, _, _, state_index in self._spikeNet_to_tvb_plan)
+
+    def _bind_transform(self, transform_name, nodes_ids):
+        # Bind the region nodes' indices of an interface to the transformation,
+        # so that no indexing arguments need to be handled at every time step.
+        # Transforms generate kernels with their weights and indices prepared in advance,
+        # whereas any other transformation function is wrapped to the same apply(values, out) signature:
+        transform = self.transforms[transform_name]
+        if isinstance(transform, Transform):
+            return transform.kernel(nodes_ids)
+        return CallableKernel(transform, nodes_ids)
+
+    def _build_tvb_to_spikeNet_plan(self):
+        """This method precompiles the TVB -> Spiking Network exchange plan,
+           so that all model checks, transformations' binding and indexing happen only once, at configuration time.
+           Returns:
+            a tuple of steps, one per interface, each of which is a tuple of
+            (from_state boolean, TVB variable index, bound transformation function, scale, interface set method)
+        """
+        plan = []
         for interface in self.tvb_to_spikeNet_interfaces:
             if interface.model in self._available_input_devices:
-                values = state[interface.tvb_sv_id].squeeze()  # if we need the state variable
+                # if we need the state variable
+                from_state = True
+                tvb_var_id = interface.tvb_sv_id
                 if interface.model in self._current_input_devices:
-                    transform_fun = self.transforms["tvb_to_current"]
                     # We assume that current is a mean field quantity
                     # applied equally and in parallel
                     # to all target neurons of the spiking populations
                     # This is why no scaling has been applied
                     # for the synaptic weight from the dc_generator device, representing a TVB node,
                     # to the target spiking node
-                    # For this output TVB state variable:
-                    # ...transmit it to the corresponding devices of the spiking network,
-                    # ...which represent each TVB node
+                    transform_name = "tvb_to_current"
                 elif interface.model in self._spike_rate_input_devices:
                     # Rate is already a meanfield quantity.
                     # All neurons of the target spiking populations
                     # will receive the same spike rate.
                     # No further scaling is required with the population size (number of neurons)
-                    # For this output TVB state variable:
-                    # ...convert to spiking rate for every TVB node..
-                    # For this output TVB state variable:
-                    # ...convert to spiking rate for every TVB node...
-                    transform_fun = self.transforms["tvb_to_spike_rate"]
+                    transform_name = "tvb_to_spike_rate"
+                else:
+                    raise ValueError("Interface model %s is not supported yet!" % interface.model)
             elif interface.model in PARAMETERS:
-                values = coupling[interface.tvb_coupling_id].squeeze()
-                if interface.model == "current":
-                    transform_fun = self.transforms["tvb_to_current"]
-                    # We assume that current is a mean field quantity
-                    # applied equally and in parallel
-                    # to all target neurons of the spiking populations
-                    # Instantaneous transmission. TVB history is used to buffer delayed communication.
-                elif interface.model == "potential":
-                    transform_fun = self.transforms["tvb_to_potential"]
-                    # We assume that potential is a mean field quantity
-                    # applied equally and in parallel
-                    # to all target neurons of the spiking populations
-                    # Instantaneous transmission. TVB history is used to buffer delayed communication.
+                # if we need the coupling variable.
+                # Instantaneous transmission. TVB history is used to buffer delayed communication.
+                from_state = False
+                tvb_var_id = interface.tvb_coupling_id
+                # We assume that current or potential are mean field quantities
+                # applied equally and in parallel
+                # to all target neurons of the spiking populations
+                transform_name = "tvb_to_%s" % interface.model
+            else:
+                raise ValueError("Interface model %s is not supported yet!" % interface.model)
+            nodes_ids = np.array(ensure_list(interface.nodes_ids)).astype("i")
+            plan.append((from_state, tvb_var_id, self._bind_transform(transform_name, nodes_ids),
+                         np.array(interface.scale), interface.set))
+        return tuple(plan)
+
+    def _build_spikeNet_to_tvb_plan(self):
+        """This method precompiles the Spiking Network -> TVB exchange plan,
+           so that all model checks, transformations' binding and indexing happen only once, at configuration time.
+           Returns:
+            a tuple of steps, one per interface, each of which is a tuple of
+            (interface, name of the interface property to read, bound transformation function, scale,
+             index of the TVB state to write to)
+        """
+        plan = []
+        # The interfaces are indexed by position, whether they are held in a list or in a pandas.Series:
+        spikeNet_to_tvb_interfaces = list(self.spikeNet_to_tvb_interfaces)
+        for interface_id in self.spikeNet_to_tvb_sv_interfaces_ids:
+            interface = spikeNet_to_tvb_interfaces[interface_id]
+            if interface.model in self._spike_rate_output_devices:
+                # The number of spikes has to be converted to a spike rate via division:
+                #  by the total number of neurons to convert it to a mean field quantity,
+                #  and by the time step dt, which is already included in the spikes_to_tvb scaling.
+                transform_name = "spikes_to_tvb"
+                values_property = "population_mean_spikes_number"
+            elif interface.model in self._voltmeter_output_devices:
+                transform_name = "potential_to_tvb"
+                values_property = "current_population_mean_values"
+            elif interface.model in self._multimeter_output_devices:
+                transform_name = "spikes_sv_to_tvb"
+                values_property = "current_population_mean_values"
+            # TODO: add any other possible Spiking Network output devices to TVB parameters interfaces here!
             else:
                 raise ValueError("Interface model %s is not supported yet!" % interface.model)
+            # Instantaneous transmission. TVB history is used to buffer delayed communication.
+            nodes_ids = np.array(ensure_list(interface.nodes_ids)).astype("i")
+            # The scale is written in place to the float buffers of the exchange, even if built as an object array:
+            plan.append((interface, values_property, self._bind_transform(transform_name, nodes_ids),
+                         np.array(interface.scale, dtype="f8"), (interface.tvb_sv_id, nodes_ids, 0)))
+        return tuple(plan)
+
+    def _build_spikeNet_to_tvb_scatter(self, state_shape):
+        """This method precomputes the flat indices into the TVB state of the values of all
+           Spiking Network -> TVB interfaces together, and a preallocated buffer for these values,
+           so that they are written to the TVB state with a single scatter per time step.
+           Arguments:
+            state_shape: the shape of the TVB state
+           Returns:
+            a tuple of (state shape, flat indices into the TVB state, values' buffer,
+                        tuple of views of the buffer, one per step of the exchange plan,
+                        positions of the buffer to be written, or None, if all flat indices are unique)
+        """
+        if self._spikeNet_to_tvb_plan is None:
+            self._spikeNet_to_tvb_plan = self._build_spikeNet_to_tvb_plan()
+        flat_indices = [np.ravel_multi_index((tvb_sv_id, nodes_ids, mode), state_shape).astype("i8").ravel()
+                        for _, _, _, _, (tvb_sv_id, nodes_ids, mode) in self._spikeNet_to_tvb_plan]
+        buffer = np.zeros((np.sum([indices.size for indices in flat_indices], dtype="i"),))
+        stops = np.cumsum([indices.size for indices in flat_indices], dtype="i")
+        views = tuple(buffer[stop - indices.size:stop] for indices, stop in zip(flat_indices, stops))
+        flat_indices = np.concatenate(flat_indices + [np.array([], dtype="i8")])
+        positions = None
+        if np.unique(flat_indices).size < flat_indices.size:
+            # As for the interfaces' writes in sequence, the last value written to each index of the state prevails:
+            _, last_positions = np.unique(flat_indices[::-1], return_index=True)
+            positions = np.sort(flat_indices.size - 1 - last_positions)
+            flat_indices = flat_indices[positions]
+        return state_shape, flat_indices, buffer, views, positions
+
+    def _scatter_spikeNet_to_tvb_state(self, state, scatter):
+        _, flat_indices, buffer, _, positions = scatter
+        if positions is None:
+            np.put(state, flat_indices, buffer)
+        else:
+            np.put(state, flat_indices, buffer[positions])
+
+    def _get_timer_and_stats(self, interfaces_stats):
+        """This method returns the timer and the InterfaceStats of the steps of an exchange plan,
+           i.e., perf_counter and the interfaces' stats, if the stats are enabled,
+           or a no-op timer and no-op stats otherwise, so that the exchange methods time their phases
+           with the same code, whether the stats are enabled or not.
+           Arguments:
+            interfaces_stats: the sequence of the InterfaceStats of the steps of an exchange plan
+           Returns:
+            the timer function and an iterable of (no-op) InterfaceStats
+        """
+        if self.stats is None:
+            return no_timer, repeat(NO_STATS)
+        return perf_counter, interfaces_stats
+
+    def tvb_state_to_spikeNet(self, state, coupling, stimulus):
+        # Apply TVB -> Spiking Network input at time t before integrating time step t -> t+dt
+        if self._tvb_to_spikeNet_plan is None:
+            self._tvb_to_spikeNet_plan = self._build_tvb_to_spikeNet_plan()
+        timer, interfaces_stats = self._get_timer_and_stats(self._tvb_to_spikeNet_stats)
+        for (from_state, tvb_var_id, transform_fun, scale, set_fun), interface_stats in \
+                zip(self._tvb_to_spikeNet_plan, interfaces_stats):
+            tic = timer()
+            if from_state:
+                values = state[tvb_var_id].squeeze()
+            else:
+                values = coupling[tvb_var_id].squeeze()
             # General form: interface_scale_weight * transformation_of(TVB_state_values)
-            values = interface.scale * \
-                     transform_fun(values, interface.nodes_ids)
-            interface.set(values)
+            values = scale * transform_fun(values)
+            toc = timer()
+            interface_stats.phase("transform").add(toc - tic, values.size)
+            set_fun(values)
+            interface_stats.phase("set").add(timer() - toc, values.size)
+
+    def tvb_state_to_spikeNet_window(self, states, couplings, stimulus):
+        """This method applies the TVB -> Spiking Network input of a whole synchronization window,
+           by setting each interface once, with the values of all the TVB time steps of the window.
+           Arguments:
+            states: the TVB states of the window, of shape (synchronization_n_step, variables, nodes, modes)
+            couplings: the TVB couplings of the window, of shape (synchronization_n_step, variables, nodes, modes)
+            stimulus: the TVB stimulus
+        """
+        if self._tvb_to_spikeNet_window_buffers is None:
+            self._build_window_buffers()
+        timer, interfaces_stats = self._get_timer_and_stats(self._tvb_to_spikeNet_stats)
+        for (from_state, tvb_var_id, transform_fun, scale, set_fun), interface, buffer, interface_stats in \
+                zip(self._tvb_to_spikeNet_plan, self.tvb_to_spikeNet_interfaces,
+                    self._tvb_to_spikeNet_window_buffers, interfaces_stats):
+            tic = timer()
+            if from_state:
+                values = states
+            else:
+                values = couplings
+            for i_step in range(buffer.shape[0]):
+                transform_fun(values[i_step, tvb_var_id].squeeze(), out=buffer[i_step])
+            buffer *= scale
+            toc = timer()
+            interface_stats.phase("transform").add(toc - tic, buffer.size)
+            interface.set_window(buffer, self.dt)
+            interface_stats.phase("set").add(timer() - toc, buffer.size)
 
     # Deprecated
     # def spikeNet_state_to_tvb_parameter(self, model):
@@ -196,28 +452,51 @@ class TVBSpikeNetInterface(object):
 
     def spikeNet_state_to_tvb_state(self, state):
         # Apply Spiking Network -> TVB state input at time t+dt after integrating time step t -> t+dt
-        for interface_id in self.spikeNet_to_tvb_sv_interfaces_ids:
-            interface = self.spikeNet_to_tvb_interfaces[interface_id]
-            # Update TVB state
-            if interface.model in self._spike_rate_output_devices:
-                # The number of spikes has to be converted to a spike rate via division:
-                #  by the total number of neurons to convert it to a mean field quantity,
-                #  and by the time step dt, which is already included in the spikes_to_tvb scaling.
-                # Instantaneous transmission. TVB history is used to buffer delayed communication.
-                transform_fun = self.transforms["spikes_to_tvb"]
-                values = interface.population_mean_spikes_number
-            elif interface.model == self._multimeter_output_devices:
-                # Instantaneous transmission. TVB history is used to buffer delayed communication.
-                transform_fun = self.transforms["spikes_sv_to_tvb"]
-                values = interface.current_population_mean_values
-            elif interface.model == self._voltmeter_output_devices:
-                # Instantaneous transmission. TVB history is used to buffer delayed communication.
-                transform_fun = self.transforms["potential_to_tvb"]
-                values = interface.current_population_mean_values
-            # TODO: add any other possible Spiking Network output devices to TVB parameters interfaces here!
-            else:
-                raise ValueError("Interface model %s is not supported yet!" % interface.model)
+        scatter = self._spikeNet_to_tvb_scatter
+        if scatter is None or scatter[0] != state.shape:
+            scatter = self._spikeNet_to_tvb_scatter = self._build_spikeNet_to_tvb_scatter(state.shape)
+        timer, interfaces_stats = self._get_timer_and_stats(self._spikeNet_to_tvb_stats)
+        # Gather the values of all interfaces into the buffer of the scatter...
+        for (interface, values_property, transform_fun, scale, _), values_buffer, interface_stats in \
+                zip(self._spikeNet_to_tvb_plan, scatter[3], interfaces_stats):
+            tic = timer()
+            values = getattr(interface, values_property)
+            toc = timer()
+            interface_stats.phase("readout").add(toc - tic, np.size(values))
             # General form: interface_scale_weight * transformation_of(SpikeNet_state_values)
-            state[interface.tvb_sv_id, interface.nodes_ids, 0] = \
-                interface.scale * transform_fun(values,  interface.nodes_ids)
+            transform_fun(values, out=values_buffer)
+            values_buffer *= scale
+            interface_stats.phase("transform").add(timer() - toc, np.size(values))
+        # ...and write them all to the TVB state at once:
+        self._scatter_spikeNet_to_tvb_state(state, scatter)
         return state
+
+    def spikeNet_state_to_tvb_window(self, states):
+        """This method applies the Spiking Network -> TVB input of a whole synchronization window,
+           by reading each interface once, for all the TVB time steps of the window.
+           Spiking Network values are read as averages over the window.
+           Therefore, the spikes' numbers of the window are divided equally among its time steps.
+           Arguments:
+            states: the TVB states of the window, of shape (synchronization_n_step, variables, nodes, modes)
+           Returns:
+            the updated TVB states
+        """
+        if self._spikeNet_to_tvb_window_buffers is None:
+            self._build_window_buffers()
+        timer, interfaces_stats = self._get_timer_and_stats(self._spikeNet_to_tvb_stats)
+        for (interface, values_property, transform_fun, scale, (tvb_sv_id, nodes_ids, mode)), buffer, \
+            interface_stats in zip(self._spikeNet_to_tvb_plan, self._spikeNet_to_tvb_window_buffers,
+                                   interfaces_stats):
+            tic = timer()
+            values = getattr(interface, values_property)
+            toc = timer()
+            interface_stats.phase("readout").add(toc - tic, np.size(values))
+            if values_property == "population_mean_spikes_number":
+                values = values / buffer.shape[0]
+            # The same values for all time steps of the window:
+            transform_fun(values, out=buffer[0])
+            buffer[0] *= scale
+            buffer[1:] = buffer[0]
+            states[:, tvb_sv_id, nodes_ids, mode] = buffer
+            interface_stats.phase("transform").add(timer() - toc, buffer.size)
+        return states
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from pandas import Series
+from pandas import Series, concat
 import numpy as np
 
 from tvb_multiscale.core.config import initialize_logger
@@ -9,6 +9,7 @@ from tvb_multiscale.core.interfaces.builders.tvb_to_spikeNet_device_interface_bu
 from tvb_multiscale.core.interfaces.builders.tvb_to_spikeNet_parameter_interface_builder import \
     TVBtoSpikeNetParameterInterfaceBuilder
 from tvb_multiscale.core.interfaces.builders.spikeNet_to_tvb_interface_builder import SpikeNetToTVBInterfaceBuilder
+from tvb_multiscale.core.interfaces.transforms import Transform, LinearTransform, FunctionTransform
 from tvb_multiscale.core.spiking_models.network import SpikingNetwork
 from tvb_multiscale.core.spiking_models.devices import InputDeviceDict
 
@@ -32,10 +33,11 @@ class TVBSpikeNetInterfaceBuilder(object):
     spiking_network = []
 
     # TVB <-> Spiking Network transformations' weights/funs
-    # If set as weights, they will become a transformation function of
-    # lambda state, regions_indices: w[regions_indices] * state[regions_indices]
-    # If set as a function of lambda state: fun(state), it will become a vector function of:
-    # lambda state, regions_indices: np.array([fun(state[index]) for index in regions_indices)])
+    # If set as weights, they will become a LinearTransform, the kernels of which compute
+    # w[regions_indices] * state[regions_indices], with the weights sliced in advance.
+    # If set as a vectorized function of lambda state: fun(state), it will become a FunctionTransform,
+    # the kernels of which compute fun(state[regions_indices]), compiled by numba if use_numba is True.
+    # If set as a Transform instance, it will be used as it is.
     # TVB -> Spiking Network
     w_tvb_to_spike_rate = 1000.0  # (e.g., spike rate in NEST is in spikes/sec, assuming TVB rate is spikes/ms)
     w_tvb_to_current = 1000.0  # (1000.0 (nA -> pA), because I_e, and dc_generator amplitude in NEST are in pA)
@@ -54,6 +56,12 @@ class TVBSpikeNetInterfaceBuilder(object):
     w_spikes_var_to_tvb = 1.0
     # We return from a Spiking Network multimeter or voltmeter the membrane potential in mV
     w_potential_to_tvb = 1.0
+    # Set to True to compile the transformation functions with numba:
+    use_numba = False
+    # Set to True to build the TVB proxy nodes' devices of every TVB -> Spiking Network interface
+    # as the channels of a single multi-channel device, which is created, connected and set in a vectorized way,
+    # unless a "single_device" entry of an interface says otherwise:
+    single_device_interfaces = False
 
     # The Spiking Network nodes where TVB input is directed
     tvb_to_spikeNet_interfaces = []
@@ -91,10 +99,11 @@ class TVBSpikeNetInterfaceBuilder(object):
             raise ValueError("Input simulator_tvb is not a Simulator object!\n%s" % str(tvb_simulator))
 
         # TVB <-> Spiking Network transformations' weights/funs
-        # If set as weights, they will become a transformation function of
-        # lambda state, regions_indices: w[regions_indices] * state[regions_indices]
-        # If set as a function of lambda state: fun(state), it will become a vector function of:
-        # lambda state, regions_indices: np.array([fun(state[index]) for index in regions_indices)])
+        # If set as weights, they will become a LinearTransform, the kernels of which compute
+        # w[regions_indices] * state[regions_indices], with the weights sliced in advance.
+        # If set as a vectorized function of lambda state: fun(state), it will become a FunctionTransform,
+        # the kernels of which compute fun(state[regions_indices]), compiled by numba if use_numba is True.
+        # If set as a Transform instance, it will be used as it is.
         # TVB -> Spiking Network
         self.w_tvb_to_spike_rate = 1000.0  # (e.g., spike rate in NEST is in spikes/sec, assuming TVB rate is spikes/ms)
         self.w_tvb_to_current = 1000.0  # (1000.0 (nA -> pA), because I_e, and dc_generator amplitude in NEST are in pA)
@@ -113,6 +122,8 @@ class TVBSpikeNetInterfaceBuilder(object):
         self.w_spikes_var_to_tvb = 1.0
         # We return from a Spiking Network multimeter or voltmeter the membrane potential in mV
         self.w_potential_to_tvb = 1.0
+        self.use_numba = False
+        self.single_device_interfaces = False
 
         if spiking_to_tvb_interfaces is not None:
             self.spikeNet_to_tvb_interfaces = ensure_list(spiking_to_tvb_interfaces)
@@ -162,39 +173,30 @@ class TVBSpikeNetInterfaceBuilder(object):
     def assert_delay(self, delay):
         return np.maximum(0.0, delay)
 
+    def _prepare_transform(self, prop, dummy, from_tvb):
+        transform = getattr(self, prop)
+        if isinstance(transform, Transform):
+            # If the property is already set as a Transform:
+            return transform
+        elif hasattr(transform, "__call__"):
+            # If the property is set as a function:
+            return FunctionTransform(transform, from_tvb=from_tvb, use_numba=self.use_numba)
+        else:
+            # If the property is set just as a weight:
+            setattr(self, prop, dummy * transform)
+            return LinearTransform(getattr(self, prop), from_tvb=from_tvb)
+
     def _prepare_tvb_to_spikeNet_transform_fun(self, prop, dummy):
         # This method sets tranformations of TVB state
         # to be applied before communication towards Spiking Network
         # In the simplest case, nothing happens...
-        transform_fun = prop.split("w_")[1]
-        if hasattr(getattr(self, prop), "__call__"):
-            # If the property is already set as a function:
-            return {transform_fun:
-                        lambda state_variable, region_nodes_indices=None:
-                            getattr(self, prop)(state_variable[region_nodes_indices])}
-        else:
-            # If the property is set just as a weight:
-            setattr(self, prop, dummy * getattr(self, prop))
-            return {transform_fun:
-                        lambda state_variable, region_nodes_indices, weights=getattr(self, prop):
-                            state_variable[region_nodes_indices] * weights[region_nodes_indices]}
+        return {prop.split("w_")[1]: self._prepare_transform(prop, dummy, from_tvb=True)}
 
     def _prepare_spikeNet_to_tvb_transform_fun(self, prop, dummy):
         # This method sets tranformations of Spiking Network state
         # to be applied before communication towards TVB
         # In the simplest case, nothing happens...
-        transform_fun = prop.split("w_")[1]
-        if hasattr(getattr(self, prop), "__call__"):
-            # If the property is already set as a function:
-            return {transform_fun:
-                        lambda spikeNet_variable, region_nodes_indices=None:
-                            getattr(self, prop)(spikeNet_variable)}
-        else:
-            # If the property is set just as a weight:
-            setattr(self, prop, dummy * getattr(self, prop))
-            return {transform_fun:
-                        lambda spikeNet_variable, region_nodes_indices, weights=getattr(self, prop):
-                            spikeNet_variable * weights[region_nodes_indices]}
+        return {prop.split("w_")[1]: self._prepare_transform(prop, dummy, from_tvb=False)}
 
     def generate_transforms(self):
         dummy = np.ones((self.number_of_nodes, ))
@@ -239,27 +241,27 @@ class TVBSpikeNetInterfaceBuilder(object):
             if model in self._input_device_dict.keys():
 
                 ids[0] += 1
-                tvb_spikeNet_interface.tvb_to_spikeNet_interfaces = \
-                    tvb_spikeNet_interface.tvb_to_spikeNet_interfaces.append(
-                        self._tvb_to_spikNet_device_interface_builder([],
-                                                                      self.spiking_network,
-                                                                      self.spiking_nodes_ids, self.tvb_nodes_ids,
-                                                                      self.tvb_model, self.tvb_weights, self.tvb_delays,
-                                                                      self.tvb_connectivity.region_labels, self.tvb_dt,
-                                                                      self.exclusive_nodes,
-                                                                      self.config).build_interface(interface, ids[0])
-                                                                            )
+                # A copy of the user's configuration, with the builder's default for single_device:
+                interface = dict(interface,
+                                 single_device=interface.get("single_device", self.single_device_interfaces))
+                tvb_to_spikeNet_interface = \
+                    self._tvb_to_spikNet_device_interface_builder([],
+                                                                  self.spiking_network,
+                                                                  self.spiking_nodes_ids, self.tvb_nodes_ids,
+                                                                  self.tvb_model, self.tvb_weights, self.tvb_delays,
+                                                                  self.tvb_connectivity.region_labels, self.tvb_dt,
+                                                                  self.exclusive_nodes,
+                                                                  self.config).build_interface(interface, ids[0])
             else:
                 ids[1] += 1
-                tvb_spikeNet_interface.tvb_to_spikeNet_interfaces = \
-                    tvb_spikeNet_interface.tvb_to_spikeNet_interfaces.append(
-                            self._tvb_to_spikeNet_parameter_interface_builder([],
-                                                                              self.spiking_network,
-                                                                              self.spiking_nodes_ids, self.tvb_nodes_ids,
-                                                                              self.tvb_model, self.exclusive_nodes,
-                                                                              self.config).build_interface(interface,
-                                                                                                           ids[1])
-                                                                            )
+                tvb_to_spikeNet_interface = \
+                    self._tvb_to_spikeNet_parameter_interface_builder([],
+                                                                      self.spiking_network,
+                                                                      self.spiking_nodes_ids, self.tvb_nodes_ids,
+                                                                      self.tvb_model, self.exclusive_nodes,
+                                                                      self.config).build_interface(interface, ids[1])
+            tvb_spikeNet_interface.tvb_to_spikeNet_interfaces = \
+                concat([tvb_spikeNet_interface.tvb_to_spikeNet_interfaces, tvb_to_spikeNet_interface])
 
         tvb_spikeNet_interface.spikeNet_to_tvb_interfaces = \
             self._spikeNet_to_tvb_interface_builder(self.spikeNet_to_tvb_interfaces,
@@ -268,4 +270,19 @@ class TVBSpikeNetInterfaceBuilder(object):
                                                     self.tvb_model, self.exclusive_nodes,
                                                     self.config).build_interfaces()
 
+        # The synchronization window of a windowed co-simulation is limited by
+        # the minimum TVB delays between TVB and Spiking Network nodes, in both directions:
+        tvb_spikeNet_interface.configure_synchronization(
+            self._min_tvb_delay(self.tvb_nodes_ids, self.spiking_nodes_ids),
+            self._min_tvb_delay(self.spiking_nodes_ids, self.tvb_nodes_ids))
+
         return tvb_spikeNet_interface
+
+    def _min_tvb_delay(self, source_nodes, target_nodes):
+        source_nodes = np.array(source_nodes, dtype="i")
+        target_nodes = np.array(target_nodes, dtype="i")
+        # Only the delays of connected pairs of nodes limit the synchronization window:
+        connected = self.tvb_weights[source_nodes][:, target_nodes] > 0.0
+        if not np.any(connected):
+            return None
+        return np.min(self.tvb_delays[source_nodes][:, target_nodes][connected])
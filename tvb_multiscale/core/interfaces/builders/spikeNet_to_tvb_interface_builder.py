@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from abc import ABCMeta, abstractmethod
 from six import add_metaclass
-from pandas import Series
+from pandas import Series, concat
 import numpy as np
 
 from tvb_multiscale.core.config import CONFIGURED, initialize_logger
@@ -52,6 +52,8 @@ class SpikeNetToTVBInterfaceBuilder(object):
             # get simulated in TVB and again update SpikeNet via a TVB -> SpikeNet interface?
             # Will it depend on whether there is also a directly coupling of that NEST node with other NEST nodes?
             assert np.all(spiking_node not in self.tvb_nodes_ids for spiking_node in spiking_nodes)
+        # Spike rate interfaces can keep only a per node counter of spikes:
+        counting_only = interface.pop("counting_only", False)
         interface_weight_fun = property_to_fun(interface.pop("interface_weights", 1.0))
         delay_fun = property_to_fun(interface.pop("delays", 0.0))
         # Default behavior for any region node and any combination of populations
@@ -73,7 +75,7 @@ class SpikeNetToTVBInterfaceBuilder(object):
         # Convert TVB node index to interface SpikeNet node index:
         interface["nodes"] = [np.where(self.spiking_nodes_ids == spiking_node)[0][0]
                               for spiking_node in spiking_nodes]
-        device_set = self.build_and_connect_devices([interface], self.spiking_network.brain_regions)[0]
+        device_set = self.build_and_connect_devices([interface], self.spiking_network.brain_regions).iloc[0]
         try:
             # The index of the TVB state variable that is targeted
             tvb_sv_id = self.tvb_model.state_variables.index(device_set.name)
@@ -85,12 +87,13 @@ class SpikeNetToTVBInterfaceBuilder(object):
         interface_index = "%d_%s<-%s" % (interface_id, device_set.name, str(list(interface["connections"].values())[0]))
         spikeNet_to_tvb_interface[interface_index] = \
             self._build_target_class(self.spiking_network, tvb_sv_id, nodes_ids=spiking_nodes,
-                                     scale=interface_weights).from_device_set(device_set, device_set.name)
+                                     scale=interface_weights, counting_only=counting_only
+                                     ).from_device_set(device_set, device_set.name)
         return spikeNet_to_tvb_interface
 
     def build_interfaces(self):
         spikeNet_to_tvb_interfaces = Series()
         for id, interface in enumerate(self.interfaces):
             spikeNet_to_tvb_interfaces = \
-                spikeNet_to_tvb_interfaces.append(self.build_interface(interface, id))
+                concat([spikeNet_to_tvb_interfaces, self.build_interface(interface, id)])
         return spikeNet_to_tvb_interfaces
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from abc import ABCMeta, abstractmethod
 from six import add_metaclass
-from pandas import Series
+from pandas import Series, concat
 import numpy as np
 
 from tvb_multiscale.core.config import CONFIGURED, initialize_logger
@@ -128,7 +128,7 @@ class TVBtoSpikeNetDeviceInterfaceBuilder(object):
         interface["neurons_inds"] = neurons_inds
         interface["nodes"] = [np.where(self.spiking_nodes_ids == trg_node)[0][0] for trg_node in target_nodes]
         # Generate the devices => "proxy TVB nodes":
-        device_set = self.build_and_connect_devices([interface], self.spiking_network.brain_regions)[0]
+        device_set = self.build_and_connect_devices([interface], self.spiking_network.brain_regions).iloc[0]
         tvb_to_spikeNet_interface = Series()
         try:
             # The TVB state variable index linked to the interface to build
@@ -151,5 +151,5 @@ class TVBtoSpikeNetDeviceInterfaceBuilder(object):
     def build(self):
         tvb_to_spikeNet_interfaces = Series()
         for id, interface in enumerate(self.interfaces):
-            tvb_to_spikeNet_interfaces = tvb_to_spikeNet_interfaces.append(self.build_interface(interface, id))
+            tvb_to_spikeNet_interfaces = concat([tvb_to_spikeNet_interfaces, self.build_interface(interface, id)])
         return tvb_to_spikeNet_interfaces
\ No newline at end of file
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from six import string_types
-from pandas import Series
+from pandas import Series, concat
 import numpy as np
 
 from tvb_multiscale.core.config import CONFIGURED, initialize_logger
@@ -80,5 +80,5 @@ class TVBtoSpikeNetParameterInterfaceBuilder(object):
     def build(self):
         tvb_to_spikeNet_interfaces = Series()
         for id, interface in enumerate(self.interfaces):
-            tvb_to_spikeNet_interfaces = tvb_to_spikeNet_interfaces.append(self.build_interface(interface, id))
+            tvb_to_spikeNet_interfaces = concat([tvb_to_spikeNet_interfaces, self.build_interface(interface, id)])
         return tvb_to_spikeNet_interfaces
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+from threading import Thread
+from time import perf_counter
+
+import numpy as np
+
+from tvb_multiscale.core.config import initialize_logger
+
+from tvb.contrib.scripts.utils.log_error_utils import raise_value_error
+
+
+LOG = initialize_logger(__name__)
+
+
+class CoSimulationDriver(object):
+
+    """CoSimulationDriver class to run a co-simulation of TVB and a spiking network, coupled via a
+       TVBSpikeNetInterface, for a number of synchronization windows of synchronization_time duration each.
+       - In the default serial mode, for every window,
+         the TVB state is transmitted to the spiking network, the spiking network is simulated,
+         its state is transmitted back to TVB, and, finally, TVB integrates the window.
+       - In the opt-in pipelined mode, the spiking network is simulated for window k in a worker thread,
+         while TVB integrates window k, using the spiking network's state of window k-1.
+         Therefore, the spiking network's state reaches TVB with the delay of one synchronization window,
+         which is causally valid only if the synchronization time does not exceed
+         the minimum delay of the spiking network.
+         Data are exchanged between TVB and the spiking network only when the worker thread is idle,
+         i.e., after it has finished window k-1 and before it starts window k,
+         whereas the TVB state arrays are never modified by the worker thread.
+         The speedup with respect to the serial mode depends on how much the spiking simulator
+         (and TVB's integration) release the Python GIL during the simulation.
+       - In the opt-in windowed mode, which can be combined with any of the above,
+         data are exchanged once per synchronization window of many TVB time steps,
+         i.e., with TVB states and couplings of shape (synchronization_n_step, variables, nodes, modes),
+         via the window exchange methods of the TVBSpikeNetInterface,
+         and the spiking network is simulated with one Run call for the whole window.
+       If the stats of the tvb_spikeNet_interface are enabled, with its enable_stats() method,
+       the driver adds the timers of the TVB integration and of the spiking network simulation
+       to them, as the "tvb_integration" and "spikeNet_run" phases of the "cosimulation" InterfaceStats.
+       In serial mode, a CoSimulationCheckpointer can write checkpoints of the co-simulation
+       at the end of the synchronization windows, every checkpoint period of simulated time,
+       and the co-simulation can resume from the last checkpoint, with the resume() method.
+    """
+
+    tvb_spikeNet_interface = None
+    tvb_integrate_fun = None
+    run_spiking_simulator = None
+    synchronization_time = 0.1
+    pipelined = False
+    windowed = False
+    checkpointer = None
+
+    # The simulated time (ms) and the number of synchronization windows completed:
+    time = 0.0
+    windows_done = 0
+
+    _tvb_state_to_spikeNet = None
+    _spikeNet_state_to_tvb_state = None
+
+    _worker = None
+    _worker_exception = None
+    # True if the spiking network's state of the last simulated window has not been transmitted to TVB yet:
+    _spiking_window_pending = False
+
+    # The InterfaceStats of the driver, None when the stats of the tvb_spikeNet_interface are disabled:
+    _stats = None
+
+    def __init__(self, tvb_spikeNet_interface, tvb_integrate_fun, synchronization_time=None,
+                 pipelined=False, run_spiking_simulator=None, windowed=False, checkpointer=None):
+        """Constructor of the CoSimulationDriver.
+           Arguments:
+            tvb_spikeNet_interface: the TVBSpikeNetInterface instance coupling TVB and the spiking network
+            tvb_integrate_fun: a function that integrates TVB for one synchronization window,
+                               with signature state, coupling, stimulus = tvb_integrate_fun(state),
+                               where state is the TVB state at the start of the window,
+                               and the outputs are the ones to be transmitted to the spiking network
+                               at the start of the next window.
+                               In windowed mode, state and outputs include all TVB time steps of the window.
+            synchronization_time: the duration of the synchronization window (ms).
+                                  Default = None, corresponding to the synchronization time
+                                  of the tvb_spikeNet_interface, which is required in windowed mode.
+            pipelined: boolean flag to run the spiking network simulation
+                       in parallel to the TVB integration. Default = False
+            run_spiking_simulator: a function to simulate the spiking network
+                                   for the duration of the synchronization window.
+                                   Default = None, corresponding to the Run method of the spiking network
+                                   of the tvb_spikeNet_interface
+            windowed: boolean flag to exchange data once per synchronization window of many TVB time steps.
+                      Default = False
+            checkpointer: a CoSimulationCheckpointer instance to write checkpoints of the co-simulation,
+                          which is possible only in serial mode. Default = None
+        """
+        self.tvb_spikeNet_interface = tvb_spikeNet_interface
+        self.tvb_integrate_fun = tvb_integrate_fun
+        self.windowed = windowed
+        if self.windowed:
+            if tvb_spikeNet_interface.synchronization_time is None:
+                tvb_spikeNet_interface.configure_synchronization()
+            if synchronization_time is None:
+                synchronization_time = tvb_spikeNet_interface.synchronization_time
+            elif not np.isclose(synchronization_time, tvb_spikeNet_interface.synchronization_time):
+                raise_value_error("Synchronization time %g ms is not equal to the one of the interface (%g ms)!"
+                                  % (synchronization_time, tvb_spikeNet_interface.synchronization_time))
+            self._tvb_state_to_spikeNet = tvb_spikeNet_interface.tvb_state_to_spikeNet_window
+            self._spikeNet_state_to_tvb_state = tvb_spikeNet_interface.spikeNet_state_to_tvb_window
+        else:
+            if synchronization_time is None:
+                raise_value_error("A synchronization time is required for a non windowed co-simulation!")
+            self._tvb_state_to_spikeNet = tvb_spikeNet_interface.tvb_state_to_spikeNet
+            self._spikeNet_state_to_tvb_state = tvb_spikeNet_interface.spikeNet_state_to_tvb_state
+        self.synchronization_time = synchronization_time
+        if run_spiking_simulator is None:
+            run_spiking_simulator = tvb_spikeNet_interface.spiking_network.Run
+        self.run_spiking_simulator = run_spiking_simulator
+        self.pipelined = pipelined
+        if self.pipelined:
+            self._assert_pipelining()
+        if checkpointer is not None and self.pipelined:
+            # In pipelined mode, there is always a spiking network's window, which has not been transmitted to TVB:
+            raise_value_error("Checkpointing is not possible for a pipelined co-simulation!")
+        self.checkpointer = checkpointer
+        self.time = 0.0
+        self.windows_done = 0
+        self._worker = None
+        self._worker_exception = None
+        self._spiking_window_pending = False
+
+    def _assert_pipelining(self):
+        min_delay = self.tvb_spikeNet_interface.spikeNet_min_delay
+        if self.synchronization_time > min_delay and not np.isclose(self.synchronization_time, min_delay):
+            raise_value_error("Pipelined co-simulation requires a synchronization time (%g ms) "
+                              "not longer than the spiking network's minimum delay (%g ms)!"
+                              % (self.synchronization_time, min_delay))
+
+    def _integrate_tvb(self, state):
+        if self._stats is None:
+            return self.tvb_integrate_fun(state)
+        tic = perf_counter()
+        output = self.tvb_integrate_fun(state)
+        self._stats.phase("tvb_integration").add(perf_counter() - tic)
+        return output
+
+    def _run_spiking_simulator(self):
+        if self._stats is None:
+            return self.run_spiking_simulator(self.synchronization_time)
+        tic = perf_counter()
+        self.run_spiking_simulator(self.synchronization_time)
+        self._stats.phase("spikeNet_run").add(perf_counter() - tic)
+
+    def _run_spiking_simulator_in_worker(self):
+        try:
+            self._run_spiking_simulator()
+        except Exception as e:
+            self._worker_exception = e
+
+    def _start_worker(self):
+        self._worker_exception = None
+        self._worker = Thread(target=self._run_spiking_simulator_in_worker, name="spiking_simulator_worker")
+        self._worker.start()
+
+    def _join_worker(self):
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+            if self._worker_exception is not None:
+                exception = self._worker_exception
+                self._worker_exception = None
+                raise exception
+
+    def _window_done(self):
+        self.windows_done += 1
+        self.time = self.windows_done * self.synchronization_time
+
+    def _run_serial(self, state, coupling, stimulus, n_windows):
+        for _ in range(n_windows):
+            self._tvb_state_to_spikeNet(state, coupling, stimulus)
+            self._run_spiking_simulator()
+            state = self._spikeNet_state_to_tvb_state(state)
+            state, coupling, stimulus = self._integrate_tvb(state)
+            self._window_done()
+            if self.checkpointer is not None and self.checkpointer.is_due(self.time):
+                self.checkpointer.write(self, state, coupling, stimulus)
+        return state, coupling, stimulus
+
+    def _run_pipelined(self, state, coupling, stimulus, n_windows):
+        try:
+            for _ in range(n_windows):
+                self._join_worker()
+                self._tvb_state_to_spikeNet(state, coupling, stimulus)
+                if self._spiking_window_pending:
+                    # Transmit the spiking network's state of the previous window to TVB:
+                    state = self._spikeNet_state_to_tvb_state(state)
+                self._start_worker()
+                self._spiking_window_pending = True
+                state, coupling, stimulus = self._integrate_tvb(state)
+                self._window_done()
+        finally:
+            self._join_worker()
+        return state, coupling, stimulus
+
+    def run(self, state, coupling, stimulus, n_windows=1):
+        """Method to run the co-simulation for a number of synchronization windows.
+           In pipelined mode, the spiking network's state of the last window is transmitted to TVB
+           at the start of the next call of this method.
+           Arguments:
+            state: the TVB state at the start of the co-simulation
+            coupling: the TVB coupling at the start of the co-simulation
+            stimulus: the TVB stimulus at the start of the co-simulation
+            n_windows: the number of synchronization windows to simulate. Default = 1
+           Returns:
+            the TVB state, coupling and stimulus at the end of the co-simulation
+        """
+        stats = getattr(self.tvb_spikeNet_interface, "stats", None)
+        if stats is None:
+            self._stats = None
+        else:
+            self._stats = stats.interface("cosimulation")
+        if self.pipelined:
+            return self._run_pipelined(state, coupling, stimulus, n_windows)
+        else:
+            return self._run_serial(state, coupling, stimulus, n_windows)
+
+    def resume(self):
+        """Method to resume the co-simulation from the last checkpoint of the checkpointer,
+           after the TVB simulator, the spiking network and the interfaces have been built and configured again.
+           The co-simulation continues then with the run() method,
+           for the synchronization windows that have not been completed yet, i.e.,
+           state, coupling, stimulus = driver.resume()
+           driver.run(state, coupling, stimulus, n_windows - driver.windows_done)
+           Returns:
+            the TVB state, coupling and stimulus at the start of the first window not completed yet
+        """
+        if self.checkpointer is None:
+            raise_value_error("A checkpointer is required to resume a co-simulation!")
+        return self.checkpointer.restore(self)
@@ -8,7 +8,7 @@ from tvb_multiscale.core.config import initialize_logger
 from tvb_multiscale.core.spiking_models.devices import DeviceSet
 
 from tvb.contrib.scripts.utils.log_error_utils import raise_value_error
-from tvb.contrib.scripts.utils.data_structures_utils import extract_integer_intervals
+from tvb.contrib.scripts.utils.data_structures_utils import extract_integer_intervals, ensure_list
 
 
 LOG = initialize_logger(__name__)
@@ -19,8 +19,22 @@ class SpikeNetToTVBinterface(DeviceSet):
     # This class implements an interface that sends Spiking Network state to TVB
     # via output/measuring devices
 
+    # The numbers of events already read from each device, i.e., the cursors of the incremental events' readout:
+    _events_cursors = None
+    # Set to True for spiking simulators where devices have to be reset after every reading:
+    _reset_devices_after_reading = False
+    # The times of the last samples already read from each (multimeter) device:
+    _latest_times = None
+    # Set to True for spike rate interfaces that need only the numbers of spikes of the devices,
+    # which are then reset after every reading, so that their memory does not grow with the simulated time:
+    counting_only = False
+    # The total numbers of spikes counted for each device:
+    _spikes_counts = None
+    # The InterfaceStats of the interface, set by TVBSpikeNetInterface.enable_stats(), None when disabled:
+    stats = None
+
     def __init__(self, spiking_network, tvb_sv_id, name="", model="",
-                 nodes_ids=[], scale=np.array([1.0]), device_set=None):
+                 nodes_ids=[], scale=np.array([1.0]), device_set=None, counting_only=False):
         super(SpikeNetToTVBinterface, self).__init__(name, model, device_set)
         self.spiking_network = spiking_network
         self.tvb_sv_id = tvb_sv_id  # The index of the TVB state variable linked to this interface
@@ -28,6 +42,10 @@ class SpikeNetToTVBinterface(DeviceSet):
         # (i.e., region i implemented in Spiking Network updates the region i in TVB):
         self.nodes_ids = nodes_ids
         self.scale = scale  # a scaling weight
+        self._events_cursors = None
+        self._latest_times = None
+        self._spikes_counts = None
+        self.counting_only = counting_only
         if len(self.model):
             LOG.info("%s of model %s for %s created!" % (self.__class__, self.model, self.name))
 
@@ -56,6 +74,131 @@ class SpikeNetToTVBinterface(DeviceSet):
         if isinstance(name, string_types):
             self.name = name
         self.update_model()
+        self._events_cursors = None
+        self._latest_times = None
+        self._spikes_counts = None
+        if self.counting_only:
+            self.set_counting_only()
         return self
 
+    @property
+    def events_cursors(self):
+        """The numbers of events already read from each device."""
+        if self._events_cursors is None or len(self._events_cursors) != self.number_of_nodes:
+            self.reset_events_cursors()
+        return self._events_cursors
+
+    def reset_events_cursors(self):
+        self._events_cursors = np.zeros((self.number_of_nodes,), dtype="i")
+
+    @property
+    def latest_times(self):
+        """The times of the last samples already read from each (multimeter) device."""
+        if self._latest_times is None or len(self._latest_times) != self.number_of_nodes:
+            self._latest_times = -np.inf * np.ones((self.number_of_nodes,))
+        return self._latest_times
+
+    @property
+    def spikes_counts(self):
+        """The total numbers of spikes counted for each device since the start of the simulation."""
+        if self._spikes_counts is None or len(self._spikes_counts) != self.number_of_nodes:
+            self._spikes_counts = np.zeros((self.number_of_nodes,), dtype="int64")
+        return self._spikes_counts
+
+    def set_counting_only(self, counting_only=True):
+        """This method sets the counting only mode of the interface and of its spike recording devices.
+           Arguments:
+            counting_only: boolean flag. Default = True
+        """
+        self.counting_only = counting_only
+        for node in self.devices():
+            self[node].counting_only = counting_only
+
+    def _after_reading(self):
+        if self._reset_devices_after_reading or self.counting_only:
+            self.do_for_all_devices("reset")
+            self.reset_events_cursors()
+
+    def read_new_events_numbers(self):
+        """This method returns the numbers of events of each device recorded since the last reading,
+           and advances the events' cursors.
+           Returns:
+            a numpy array of the numbers of new events, one per device
+        """
+        cursors = self.events_cursors
+        numbers_of_events = np.array(self.do_for_all_devices("number_of_events"), dtype="i")
+        # Devices that have been reset since the last reading hold only new events:
+        cursors = np.where(numbers_of_events < cursors, 0, cursors)
+        self._events_cursors = numbers_of_events
+        self._after_reading()
+        numbers_of_events = numbers_of_events - cursors
+        self._spikes_counts = self.spikes_counts + numbers_of_events
+        if self.stats is not None:
+            self.stats.phase("events_read").add(events=np.sum(numbers_of_events))
+        return numbers_of_events
+
+    def read_new_events_per_device(self, variables=None):
+        """This method returns the events of each device recorded since the last reading,
+           and advances the events' cursors.
+           Arguments:
+            variables: sequence (list, tuple, array) of variables to be included in the output.
+                       Default=None, corresponds to all recorded variables.
+           Returns:
+            a list of dictionaries of numpy arrays of the new events, one per device
+        """
+        cursors = self.events_cursors
+        events, self._events_cursors = self.read_new_events(cursors, variables)
+        if self.stats is not None:
+            # Devices that have been reset since the last reading hold only new events:
+            self.stats.phase("events_read").add(
+                events=np.sum(self._events_cursors - np.where(self._events_cursors < cursors, 0, cursors)))
+        self._after_reading()
+        return events
+
+    def _population_mean(self, values):
+        values = np.asarray(values, dtype="f8")
+        # The numbers of neurons of the nodes, broadcast along any other dimensions of the values:
+        number_of_neurons = (np.array(self.number_of_neurons) * np.ones((self.number_of_nodes, ))).reshape(
+            (self.number_of_nodes, ) + (1, ) * (values.ndim - 1))
+        # Nodes without any neurons get a mean of 0.0:
+        return np.divide(values, number_of_neurons, out=np.zeros_like(values), where=number_of_neurons > 0)
+
+    @property
+    def population_mean_spikes_number(self):
+        """The number of new spikes of each device, divided by its number of neurons."""
+        return self._population_mean(self.read_new_events_numbers()).flatten()
+
+    @property
+    def population_mean_spikes_activity(self):
+        """The sum of the new spikes' weights of each device, divided by its number of neurons."""
+        values = []
+        for node, events in zip(self.devices(), self.read_new_events_per_device()):
+            values.append(np.sum([np.sum(events[var]) for var in self[node].spikes_vars]))
+        return self._population_mean(values).flatten()
+
+    @property
+    def current_population_mean_values(self):
+        """The mean of the new values of each device, for each variable the device records from."""
+        # Unlike discrete spike events, for continuous multimeter events
+        # we assume that the new events are of size n_time_steps * n_neurons,
+        # and, unlike spike weights' time series,
+        # we compute mean absolute activity and not a rate
+        # (i.e., with division by number of time points instead of time)
+        values = []
+        latest_times = self.latest_times
+        n_values = 0
+        for i_node, node in enumerate(self.devices()):
+            device = self[node]
+            window, latest_times[i_node] = device.latest_window(latest_times[i_node])
+            if window.size:
+                values.append(np.nanmean(window, axis=1))
+                n_values += window.size
+            else:
+                values.append(np.zeros((len(ensure_list(device.record_from)),)))
+        self._after_reading()
+        if self.stats is not None:
+            # The values read are the window means of each variable and neuron of the devices:
+            self.stats.phase("values_read").add(values=n_values)
+        return np.array(values).flatten()
+
 
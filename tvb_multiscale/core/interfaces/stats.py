@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import json
+from collections import OrderedDict
+
+
+class PhaseStats(object):
+
+    """PhaseStats class to accumulate the timer and the counters of one phase of an interface,
+       i.e., the number of calls, the total time (sec) spent,
+       and the numbers of values transmitted and of events read."""
+
+    __slots__ = ("calls", "time", "values", "events")
+
+    def __init__(self):
+        self.reset()
+
+    def __repr__(self):
+        return "%s(calls=%d, time=%g, values=%d, events=%d)" % \
+               (self.__class__.__name__, self.calls, self.time, self.values, self.events)
+
+    def add(self, time=0.0, values=0, events=0):
+        """Method to accumulate one call of the phase.
+           Arguments:
+            time: the time (sec) spent by the call. Default = 0.0
+            values: the number of values transmitted by the call. Default = 0
+            events: the number of events read by the call. Default = 0
+        """
+        self.calls += 1
+        self.time += time
+        self.values += int(values)
+        self.events += int(events)
+
+    def reset(self):
+        self.calls = 0
+        self.time = 0.0
+        self.values = 0
+        self.events = 0
+
+    def to_dict(self):
+        return OrderedDict([("calls", self.calls), ("time", self.time),
+                            ("values", self.values), ("events", self.events)])
+
+
+class InterfaceStats(object):
+
+    """InterfaceStats class to hold the PhaseStats of the phases of one interface, by phase name."""
+
+    def __init__(self, name=""):
+        self.name = name
+        self.phases = OrderedDict()
+
+    def __repr__(self):
+        return "%s(%s: %s)" % (self.__class__.__name__, self.name, list(self.phases.keys()))
+
+    def __getitem__(self, phase):
+        return self.phases[phase]
+
+    def phase(self, phase):
+        """Method to get the PhaseStats of a phase, which are created the first time the phase is accessed."""
+        phase_stats = self.phases.get(phase, None)
+        if phase_stats is None:
+            phase_stats = PhaseStats()
+            self.phases[phase] = phase_stats
+        return phase_stats
+
+    @property
+    def time(self):
+        return sum([phase_stats.time for phase_stats in self.phases.values()])
+
+    def reset(self):
+        for phase_stats in self.phases.values():
+            phase_stats.reset()
+
+    def to_dict(self):
+        return OrderedDict([(phase, phase_stats.to_dict()) for phase, phase_stats in self.phases.items()])
+
+
+class NoStats(object):
+
+    """NoStats class to stand in for both the InterfaceStats and the PhaseStats of an interface
+       when the stats are disabled, so that the exchange methods can time their phases unconditionally."""
+
+    __slots__ = ()
+
+    def phase(self, phase):
+        return self
+
+    def add(self, time=0.0, values=0, events=0):
+        pass
+
+
+NO_STATS = NoStats()
+
+
+def no_timer():
+    """The timer of the exchange methods when the stats are disabled."""
+    return 0.0
+
+
+class CoSimulationStats(object):
+
+    """CoSimulationStats class to hold the InterfaceStats of all the interfaces of a TVBSpikeNetInterface,
+       and of the co-simulation driver, by interface name.
+       It is returned by TVBSpikeNetInterface.enable_stats(),
+       and it can be dumped to JSON at the end of a (co-)simulation."""
+
+    def __init__(self):
+        self.interfaces = OrderedDict()
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, list(self.interfaces.keys()))
+
+    def __getitem__(self, interface):
+        return self.interfaces[interface]
+
+    def interface(self, name):
+        """Method to get the InterfaceStats of an interface, which are created the first time they are accessed."""
+        interface_stats = self.interfaces.get(name, None)
+        if interface_stats is None:
+            interface_stats = InterfaceStats(name)
+            self.interfaces[name] = interface_stats
+        return interface_stats
+
+    def reset(self):
+        for interface_stats in self.interfaces.values():
+            interface_stats.reset()
+
+    def to_dict(self):
+        return OrderedDict([(name, interface_stats.to_dict()) for name, interface_stats in self.interfaces.items()])
+
+    def to_json(self, filepath=None, indent=2):
+        """Method to dump the stats to JSON.
+           Arguments:
+            filepath: the path of a file to write the JSON to. Default = None, for no file to be written
+            indent: the indentation of the JSON. Default = 2
+           Returns:
+            the JSON string
+        """
+        output = json.dumps(self.to_dict(), indent=indent)
+        if filepath is not None:
+            with open(filepath, "w") as f:
+                f.write(output)
+        return output
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from tvb_multiscale.core.config import initialize_logger
+
+try:
+    from numba import vectorize
+except ImportError:
+    vectorize = None
+
+
+LOG = initialize_logger(__name__)
+
+
+# TVB <-> Spiking Network transformations are generated by the TVBSpikeNetInterfaceBuilder as Transform objects,
+# for all region nodes, and bound to the region nodes of each interface, as TransformKernel objects,
+# when the TVBSpikeNetInterface precompiles its exchange plans.
+# Thus, weights are sliced and indices are prepared only once, at configuration time,
+# and kernels write their output directly to preallocated arrays, if any.
+
+
+class TransformKernel(object):
+
+    """TransformKernel is the base class of TVB <-> Spiking Network transformations
+       bound to the region nodes of an interface."""
+
+    def apply(self, values, out=None):
+        """Method to apply the transformation.
+           Arguments:
+            values: the array of values to be transformed
+            out: an array to write the output to. Default = None, for a new output array
+           Returns:
+            the output array
+        """
+        raise NotImplementedError
+
+    def __call__(self, values, out=None):
+        return self.apply(values, out)
+
+
+class LinearKernel(TransformKernel):
+
+    """LinearKernel multiplies the values, or the values of the region nodes indices, if any,
+       by the weights of the region nodes, which are sliced in advance."""
+
+    def __init__(self, weights, indices=None):
+        self.weights = np.array(weights, dtype="f8")
+        if indices is None:
+            self.indices = None
+        else:
+            self.indices = np.array(indices, dtype="i8")
+
+    def apply(self, values, out=None):
+        if self.indices is not None:
+            values = values[self.indices]
+        return np.multiply(values, self.weights, out=out)
+
+
+class FunctionKernel(TransformKernel):
+
+    """FunctionKernel applies a vectorized function to the values,
+       or to the values of the region nodes indices, if any.
+       If the function is a numpy ufunc (e.g., compiled with numba), it writes its output to out directly."""
+
+    def __init__(self, fun, indices=None):
+        self.fun = fun
+        if indices is None:
+            self.indices = None
+        else:
+            self.indices = np.array(indices, dtype="i8")
+        self._is_ufunc = isinstance(fun, np.ufunc)
+
+    def apply(self, values, out=None):
+        if self.indices is not None:
+            values = values[self.indices]
+        if self._is_ufunc:
+            return self.fun(values, out=out)
+        if out is None:
+            return self.fun(values)
+        out[...] = self.fun(values)
+        return out
+
+
+class CallableKernel(TransformKernel):
+
+    """CallableKernel binds the region nodes indices to a transformation function of signature
+       fun(values, region_nodes_indices), for user defined transformations that are not Transform objects."""
+
+    def __init__(self, fun, indices=None):
+        self.fun = fun
+        self.indices = indices
+
+    def apply(self, values, out=None):
+        if out is None:
+            return self.fun(values, region_nodes_indices=self.indices)
+        out[...] = self.fun(values, region_nodes_indices=self.indices)
+        return out
+
+
+class Transform(object):
+
+    """Transform is the base class of TVB <-> Spiking Network transformations of all region nodes.
+       from_tvb is True for the transformations of TVB values of all region nodes,
+       which have to be indexed by the region nodes of an interface,
+       and False for the transformations of Spiking Network values, which are already the ones of the interface."""
+
+    from_tvb = True
+
+    def kernel(self, region_nodes_indices):
+        """Method to generate the TransformKernel of the region nodes of an interface.
+           Arguments:
+            region_nodes_indices: the indices of the region nodes of the interface
+           Returns:
+            a TransformKernel instance
+        """
+        raise NotImplementedError
+
+    def __call__(self, values, region_nodes_indices=None):
+        # Transforms can be also called as plain transformation functions:
+        return self.kernel(region_nodes_indices).apply(values)
+
+    def _kernel_indices(self, region_nodes_indices):
+        if self.from_tvb and region_nodes_indices is not None:
+            return region_nodes_indices
+        return None
+
+
+class LinearTransform(Transform):
+
+    """LinearTransform multiplies values with weights, which are either scalar, or one per region node."""
+
+    def __init__(self, weights, from_tvb=True):
+        self.weights = np.array(weights, dtype="f8")
+        self.from_tvb = from_tvb
+
+    def kernel(self, region_nodes_indices):
+        weights = self.weights
+        if weights.size > 1 and region_nodes_indices is not None:
+            weights = weights[region_nodes_indices]
+        return LinearKernel(weights, self._kernel_indices(region_nodes_indices))
+
+
+class FunctionTransform(Transform):
+
+    """FunctionTransform applies a vectorized function to values.
+       With use_numba = True, the function is compiled by numba to a numpy ufunc of float64 values,
+       which requires it to be written for scalar values."""
+
+    def __init__(self, fun, from_tvb=True, use_numba=False):
+        if use_numba and not isinstance(fun, np.ufunc):
+            if vectorize is None:
+                LOG.warning("numba is not available! Transformation function %s will not be compiled!" % str(fun))
+            else:
+                # The numpy ufunc underlying the DUFunc of numba, the only signature of which is compiled already:
+                fun = vectorize(["float64(float64)"])(fun).ufunc
+        self.fun = fun
+        self.from_tvb = from_tvb
+
+    def kernel(self, region_nodes_indices):
+        return FunctionKernel(self.fun, self._kernel_indices(region_nodes_indices))
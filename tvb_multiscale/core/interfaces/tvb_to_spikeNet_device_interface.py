@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from time import perf_counter
+
 from six import string_types
 from pandas import unique
 import numpy as np
@@ -18,6 +20,9 @@ class TVBtoSpikeNetDeviceInterface(DeviceSet):
     # This class implements an interface that sends TVB state to the Spiking Network
     # via input/stimulating devices that play the role of TVB region node proxies
 
+    # The InterfaceStats of the interface, set by TVBSpikeNetInterface.enable_stats(), None when disabled:
+    stats = None
+
     def __init__(self, spiking_network, name="", model="", dt=0.1, tvb_sv_id=None,
                  nodes_ids=[], target_nodes=[], scale=np.array([1.0]), device_set=None):
         super(TVBtoSpikeNetDeviceInterface, self).__init__(name, model, device_set)
@@ -65,6 +70,18 @@ class TVBtoSpikeNetDeviceInterface(DeviceSet):
         self.update_model()
         return self
 
+    def Set(self, value_dict, nodes=None):
+        if self.stats is None:
+            return super(TVBtoSpikeNetDeviceInterface, self).Set(value_dict, nodes)
+        tic = perf_counter()
+        super(TVBtoSpikeNetDeviceInterface, self).Set(value_dict, nodes)
+        if nodes is None:
+            n_devices = self.number_of_nodes
+        else:
+            n_devices = len(ensure_list(nodes))
+        # The values transmitted are counted as one per parameter and device:
+        self.stats.phase("devices_Set").add(perf_counter() - tic, len(value_dict) * n_devices)
+
     def _assert_input_size(self, values):
         values = ensure_list(values)
         n_vals = len(values)
@@ -74,3 +91,12 @@ class TVBtoSpikeNetDeviceInterface(DeviceSet):
         elif n_vals == 1:
             values *= self.number_of_nodes
         return values
+
+    def set_window(self, values, dt):
+        """Method to set the values of a whole synchronization window of TVB time steps.
+           By default, the mean of the values across the window's time steps is set.
+           Arguments:
+            values: an array of shape (number of time steps, number of nodes)
+            dt: the TVB time step
+        """
+        self.set(np.mean(values, axis=0))
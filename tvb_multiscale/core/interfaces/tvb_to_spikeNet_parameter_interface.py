@@ -81,3 +81,12 @@ class TVBtoSpikeNetParameterInterface(Series):
     def set(self, values):
         for node, value in zip(self.nodes, self._assert_input_size(values)):
             self[node].Set({self.parameter: value})
+
+    def set_window(self, values, dt):
+        """Method to set the values of a whole synchronization window of TVB time steps.
+           By default, the mean of the values across the window's time steps is set.
+           Arguments:
+            values: an array of shape (number of time steps, number of nodes)
+            dt: the TVB time step
+        """
+        self.set(np.mean(values, axis=0))
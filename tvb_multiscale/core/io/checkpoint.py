@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import h5py
+import numpy
+
+from tvb_multiscale.core.config import initialize_logger
+from tvb_multiscale.core.interfaces.spikeNet_to_tvb_interface import SpikeNetToTVBinterface
+
+from tvb.contrib.scripts.utils.log_error_utils import raise_value_error
+from tvb.contrib.scripts.utils.data_structures_utils import ensure_list
+
+
+class CoSimulationCheckpointer(object):
+
+    """CoSimulationCheckpointer class to write HDF5 checkpoints of a co-simulation, run by a CoSimulationDriver,
+       every checkpoint_period ms of simulated time, and to restore a co-simulation from the last checkpoint,
+       so that a crashed or preempted co-simulation can resume without re-running the completed windows.
+       A checkpoint holds:
+       - the simulated time and the number of synchronization windows completed,
+       - the TVB state, coupling and stimulus to be passed to the next window,
+       - the history buffer, the current state and step, and the noise's random state of the TVB simulator, if any,
+       - the total numbers of spikes counted by the Spiking Network -> TVB interfaces,
+       - the values of the spiking_state_variables of all populations of the spiking network, if any.
+       Checkpoints are written to a temporary file first, which then replaces the previous checkpoint,
+       so that a crash during writing does not corrupt the last checkpoint.
+       The spiking network has to be rebuilt before resuming, since the state of a spiking simulator
+       cannot be written to file in general. Its devices are new then,
+       and, therefore, the events' cursors of the interfaces are reset, instead of being restored.
+    """
+
+    logger = initialize_logger(__name__)
+
+    path = ""
+    checkpoint_period = 100.0
+    tvb_simulator = None
+    spiking_state_variables = []
+    # The simulated time of the last checkpoint written or restored:
+    last_checkpoint_time = 0.0
+
+    def __init__(self, path, checkpoint_period=100.0, tvb_simulator=None, spiking_state_variables=[]):
+        """Constructor of the CoSimulationCheckpointer.
+           Arguments:
+            path: the path of the HDF5 checkpoint file
+            checkpoint_period: the period (ms of simulated time) of writing checkpoints. Default = 100.0
+            tvb_simulator: the TVB Simulator instance, the history and current state of which have to be restored.
+                           Default = None
+            spiking_state_variables: a sequence of the names of the state variables
+                                     of the spiking network's neurons to be restored, e.g., ["V_m"].
+                                     Default = [], for no spiking network state to be restored
+        """
+        self.path = path
+        self.checkpoint_period = checkpoint_period
+        self.tvb_simulator = tvb_simulator
+        self.spiking_state_variables = ensure_list(spiking_state_variables)
+        self.last_checkpoint_time = 0.0
+
+    def is_due(self, time):
+        # Allow for rounding errors of times that are multiples of the synchronization time:
+        return time - self.last_checkpoint_time >= self.checkpoint_period - 1e-6
+
+    @property
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def _spiking_populations(self, spiking_network):
+        for region_label, region_node in spiking_network.brain_regions.items():
+            for population_label, population in region_node.items():
+                yield "%s/%s" % (region_label, population_label), population
+
+    @staticmethod
+    def _write_datasets(group, datasets):
+        for name, value in datasets.items():
+            if value is not None:
+                group.create_dataset(name, data=numpy.asarray(value))
+
+    def _write_tvb_simulator(self, group):
+        group.attrs["current_step"] = self.tvb_simulator.current_step
+        self._write_datasets(group, {"current_state": self.tvb_simulator.current_state,
+                                     "history": self.tvb_simulator.history.buffer})
+        noise = getattr(self.tvb_simulator.integrator, "noise", None)
+        if noise is not None:
+            _, keys, pos, has_gauss, cached_gaussian = noise.random_stream.get_state()
+            group.create_dataset("noise_random_state", data=keys)
+            group["noise_random_state"].attrs["pos"] = pos
+            group["noise_random_state"].attrs["has_gauss"] = has_gauss
+            group["noise_random_state"].attrs["cached_gaussian"] = cached_gaussian
+
+    def write(self, driver, state, coupling, stimulus):
+        """Method to write a checkpoint of the co-simulation at the end of a synchronization window.
+           Arguments:
+            driver: the CoSimulationDriver instance running the co-simulation
+            state: the TVB state to be passed to the next window
+            coupling: the TVB coupling to be passed to the next window
+            stimulus: the TVB stimulus to be passed to the next window
+        """
+        temp_path = self.path + ".tmp"
+        with h5py.File(temp_path, "w") as h5_file:
+            h5_file.attrs["time"] = driver.time
+            h5_file.attrs["windows_done"] = driver.windows_done
+            h5_file.attrs["synchronization_time"] = driver.synchronization_time
+            self._write_datasets(h5_file.create_group("tvb"),
+                                 {"state": state, "coupling": coupling, "stimulus": stimulus})
+            if self.tvb_simulator is not None:
+                self._write_tvb_simulator(h5_file.create_group("tvb_simulator"))
+            group = h5_file.create_group("interfaces")
+            for interface_id, interface in enumerate(driver.tvb_spikeNet_interface.spikeNet_to_tvb_interfaces):
+                if isinstance(interface, SpikeNetToTVBinterface):
+                    group.create_dataset(str(interface_id), data=interface.spikes_counts)
+            if len(self.spiking_state_variables):
+                group = h5_file.create_group("spiking_network")
+                for population_label, population in \
+                        self._spiking_populations(driver.tvb_spikeNet_interface.spiking_network):
+                    self._write_datasets(group.create_group(population_label),
+                                         population.Get(self.spiking_state_variables))
+        os.replace(temp_path, self.path)
+        self.last_checkpoint_time = driver.time
+        self.logger.info("Checkpoint of the co-simulation at %g ms has been written to file: %s"
+                         % (driver.time, self.path))
+
+    def _restore_tvb_simulator(self, group):
+        self.tvb_simulator.current_step = int(group.attrs["current_step"])
+        self.tvb_simulator.current_state = group["current_state"][()]
+        self.tvb_simulator.history.buffer[:] = group["history"][()]
+        if "noise_random_state" in group:
+            dataset = group["noise_random_state"]
+            self.tvb_simulator.integrator.noise.random_stream.set_state(
+                ("MT19937", dataset[()], int(dataset.attrs["pos"]),
+                 int(dataset.attrs["has_gauss"]), float(dataset.attrs["cached_gaussian"])))
+
+    def restore(self, driver):
+        """Method to restore the co-simulation from the last checkpoint.
+           The TVB simulator (if any), the spiking network and the interfaces of the driver
+           have to be built and configured in the same way as for the checkpointed co-simulation.
+           Arguments:
+            driver: the CoSimulationDriver instance to resume the co-simulation
+           Returns:
+            the TVB state, coupling and stimulus to be passed to the next window
+        """
+        with h5py.File(self.path, "r") as h5_file:
+            if not numpy.isclose(h5_file.attrs["synchronization_time"], driver.synchronization_time):
+                raise_value_error("The synchronization time of the checkpoint (%g ms) "
+                                  "is not equal to the one of the co-simulation (%g ms)!"
+                                  % (h5_file.attrs["synchronization_time"], driver.synchronization_time))
+            driver.time = float(h5_file.attrs["time"])
+            driver.windows_done = int(h5_file.attrs["windows_done"])
+            outputs = [h5_file["tvb"][name][()] if name in h5_file["tvb"] else None
+                       for name in ["state", "coupling", "stimulus"]]
+            if self.tvb_simulator is not None:
+                self._restore_tvb_simulator(h5_file["tvb_simulator"])
+            for interface_id, interface in enumerate(driver.tvb_spikeNet_interface.spikeNet_to_tvb_interfaces):
+                if isinstance(interface, SpikeNetToTVBinterface):
+                    interface._spikes_counts = h5_file["interfaces"][str(interface_id)][()]
+                    # The devices of the rebuilt spiking network hold only new events:
+                    interface.reset_events_cursors()
+                    interface._latest_times = None
+            if len(self.spiking_state_variables):
+                group = h5_file["spiking_network"]
+                for population_label, population in \
+                        self._spiking_populations(driver.tvb_spikeNet_interface.spiking_network):
+                    population.Set(dict([(var, group[population_label][var][()])
+                                         for var in self.spiking_state_variables]))
+        self.last_checkpoint_time = driver.time
+        self.logger.info("The co-simulation has been restored from the checkpoint at %g ms of file: %s"
+                         % (driver.time, self.path))
+        return tuple(outputs)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+import tempfile
+from types import CodeType, FunctionType, MethodType
+from functools import partial
+
+import numpy
+
+from tvb_multiscale.core.config import initialize_logger
+
+from tvb.contrib.scripts.utils.log_error_utils import raise_value_error
+from tvb.contrib.scripts.utils.data_structures_utils import ensure_list
+
+
+class SpikingConnectivityCache(object):
+
+    """SpikingConnectivityCache class to write the realised connectivity of a spiking network,
+       i.e., the arrays of the source and target ids, weights, delays and receptor types of the neurons' connections
+       of every connection type, to a compressed npz file, keyed by a hash of the builder's configuration,
+       and to connect a rebuilt spiking network from that file, instead of re-evaluating the connection rules.
+       The hash is computed from the configured populations and connections,
+       with their properties evaluated for every region node, or pair of region nodes,
+       the TVB connectivity weights and delays, and the spiking simulator specific configuration (e.g., the seed),
+       as returned by SpikingModelBuilder._connectivity_cache_config.
+       Therefore, the property functions of the builder have to be deterministic for the cache to be ever used.
+       Files are written to a temporary file first, which then replaces the cache file,
+       so that a crash during writing does not leave a corrupted cache file behind.
+       The spiking simulator specific builder has to implement
+       _number_of_connections, _get_connections_arrays and _connect_arrays, see SpikingModelBuilder.
+    """
+
+    logger = initialize_logger(__name__)
+
+    path = ""
+    # True if the connectivity was loaded from file by the last build:
+    loaded = False
+
+    def __init__(self, path):
+        """Constructor of the SpikingConnectivityCache.
+           Arguments:
+            path: the path of the directory of the npz cache files
+        """
+        self.path = path
+        self.loaded = False
+
+    @staticmethod
+    def _update_hash(hash, value, _functions=()):
+        # Update the hash with a value of the configuration, recursively for containers.
+        # Arrays are hashed by their bytes, since their repr is truncated for large arrays,
+        # and functions by their code, default arguments and closure variables,
+        # since their repr includes their memory address, and all lambdas share the same qualified name.
+        # _functions are the functions being hashed already, so that recursive closures are hashed only once:
+        if isinstance(value, dict):
+            hash.update(b"{")
+            for key in sorted(value.keys(), key=str):
+                hash.update(repr(key).encode())
+                SpikingConnectivityCache._update_hash(hash, value[key], _functions)
+            hash.update(b"}")
+        elif isinstance(value, (list, tuple)):
+            hash.update(b"[")
+            for val in value:
+                SpikingConnectivityCache._update_hash(hash, val, _functions)
+            hash.update(b"]")
+        elif isinstance(value, numpy.ndarray):
+            if value.dtype == "O":
+                SpikingConnectivityCache._update_hash(hash, value.tolist(), _functions)
+            else:
+                hash.update(("%s%s" % (value.dtype.str, str(value.shape))).encode())
+                hash.update(numpy.ascontiguousarray(value).tobytes())
+        elif isinstance(value, partial):
+            SpikingConnectivityCache._update_hash(hash, [value.func, value.args, value.keywords], _functions)
+        elif isinstance(value, MethodType):
+            SpikingConnectivityCache._update_hash(hash, value.__func__, _functions)
+        elif isinstance(value, FunctionType):
+            hash.update(("%s.%s" % (value.__module__, value.__qualname__)).encode())
+            if value in _functions:
+                return
+            closure = [cell.cell_contents for cell in value.__closure__ or ()]
+            SpikingConnectivityCache._update_hash(hash, [value.__code__, value.__defaults__,
+                                                         value.__kwdefaults__, closure],
+                                                  _functions + (value, ))
+        elif isinstance(value, CodeType):
+            # Nested code objects, e.g., of lambdas defined within a function, are part of co_consts:
+            hash.update(value.co_code)
+            SpikingConnectivityCache._update_hash(hash, [value.co_consts, value.co_names], _functions)
+        else:
+            hash.update(repr(value).encode())
+
+    def key(self, builder):
+        """Method to compute the key of the connectivity of a configured SpikingModelBuilder.
+           Arguments:
+            builder: the SpikingModelBuilder instance, configured already
+           Returns:
+            the hexadecimal SHA1 hash (string) of the builder's configuration
+        """
+        hash = hashlib.sha1()
+        self._update_hash(hash, builder._connectivity_cache_items())
+        return hash.hexdigest()
+
+    def filepath(self, key):
+        return os.path.join(self.path, "connectivity_%s.npz" % key)
+
+    def connect(self, builder):
+        """Method to connect all populations of the spiking brain of a SpikingModelBuilder,
+           which have been built already, first within, and then, among region nodes,
+           either from the cache file of the builder's configuration, if it exists, or by the connection rules,
+           writing then the realised connectivity to the cache file.
+           Arguments:
+            builder: the SpikingModelBuilder instance
+        """
+        self.loaded = False
+        try:
+            builder._number_of_connections()
+        except NotImplementedError:
+            self.logger.warning("%s does not support caching of the connectivity! "
+                                "The spiking network will be connected by the connection rules!"
+                                % builder.__class__.__name__)
+            builder.connect_within_node_spiking_populations()
+            builder.connect_spiking_region_nodes()
+            return
+        filepath = self.filepath(self.key(builder))
+        if os.path.isfile(filepath):
+            self.load(builder, filepath)
+        else:
+            self.save(builder, filepath, self._connect_and_count(builder))
+
+    @staticmethod
+    def _connection_types(builder):
+        return [("populations_connection%d" % i_conn, conn, builder._connect_within_node_populations)
+                for i_conn, conn in enumerate(ensure_list(builder._populations_connections))] + \
+               [("nodes_connection%d" % i_conn, conn, builder._connect_region_nodes_populations)
+                for i_conn, conn in enumerate(ensure_list(builder._nodes_connections))]
+
+    def _connect_and_count(self, builder):
+        # Connect every connection type, recording the range of the connections created for each one:
+        ranges = []
+        for label, conn, connect_fun in self._connection_types(builder):
+            start = builder._number_of_connections(conn)
+            connect_fun(conn)
+            ranges.append((label, start, builder._number_of_connections(conn)))
+        return ranges
+
+    def save(self, builder, filepath, ranges):
+        """Method to write the realised connectivity of a SpikingModelBuilder to a cache file.
+           Arguments:
+            builder: the SpikingModelBuilder instance, the spiking brain of which is connected already
+            filepath: the path of the npz file
+            ranges: a list of (connection type label, start, stop) tuples,
+                    of the ranges of the connections of every connection type
+        """
+        arrays = {"connection_types": numpy.array([label for label, _, _ in ranges], dtype="U")}
+        connection_types = dict([(label, conn) for label, conn, _ in self._connection_types(builder)])
+        for label, start, stop in ranges:
+            for attr, values in builder._get_connections_arrays(start, stop, connection_types[label]).items():
+                arrays["%s__%s" % (label, attr)] = numpy.asarray(values)
+        random_state = builder._get_random_state()
+        if random_state is not None:
+            arrays["random_state"] = numpy.array(json.dumps(random_state))
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        # A unique temporary file, so that concurrent writers of the same cache file do not corrupt each other's:
+        fd, temp_filepath = tempfile.mkstemp(dir=self.path, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                numpy.savez_compressed(file, **arrays)
+            os.replace(temp_filepath, filepath)
+        except BaseException:
+            os.remove(temp_filepath)
+            raise
+        self.logger.info("The connectivity of the spiking network has been written to %s" % filepath)
+
+    def load(self, builder, filepath):
+        """Method to connect the spiking brain of a SpikingModelBuilder from a cache file.
+           Arguments:
+            builder: the SpikingModelBuilder instance, the spiking brain of which has been built already
+            filepath: the path of the npz file
+        """
+        connection_types = [label for label, _, _ in self._connection_types(builder)]
+        with numpy.load(filepath) as file:
+            if list(file["connection_types"]) != connection_types:
+                raise_value_error("The connection types %s of the cache file %s "
+                                  "are not the ones %s of the builder's configuration!"
+                                  % (str(list(file["connection_types"])), filepath, str(connection_types)))
+            for label in connection_types:
+                prefix = "%s__" % label
+                builder._connect_arrays(dict([(name[len(prefix):], file[name])
+                                              for name in file.files if name.startswith(prefix)]))
+            if "random_state" in file.files:
+                builder._set_random_state(json.loads(str(file["random_state"])))
+        self.loaded = True
+        self.logger.info("The connectivity of the spiking network has been loaded from %s" % filepath)
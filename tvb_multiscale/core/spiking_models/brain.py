@@ -50,6 +50,9 @@ class SpikingBrain(Series, HasTraits):
     def __getitem__(self, items):
         if isinstance(items, string_types) or is_integer(items):
             return super(SpikingBrain, self).__getitem__(items)
+        if not isinstance(items, slice) and len(items) and all(is_integer(item) for item in items):
+            # Sequences of integers index regions by position:
+            return SpikingBrain(input_brain=self.iloc[list(items)])
         return SpikingBrain(input_brain=super(SpikingBrain, self).__getitem__(items))
 
     def _loop_generator(self, reg_inds_or_lbls=None):
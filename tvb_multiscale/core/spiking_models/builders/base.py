@@ -3,7 +3,7 @@ from abc import ABCMeta, abstractmethod
 from six import string_types
 from collections import OrderedDict
 import numpy as np
-from pandas import Series
+from pandas import Series, DataFrame
 
 from tvb_multiscale.core.config import CONFIGURED, initialize_logger
 from tvb_multiscale.core.spiking_models.brain import SpikingBrain
@@ -38,6 +38,21 @@ class SpikingModelBuilder(object):
 
     population_order = 100
 
+    # Set to True to connect the spiking region nodes with a few array-based connect calls per connection type,
+    # instead of one connect call per pair of region nodes and populations:
+    bulk_connect = False
+    # The maximum number of neurons' connections per array-based connect call (None for no limit):
+    bulk_connect_chunk_size = None
+    # Set to a SpikingConnectivityCache instance to load the connectivity of the spiking network from file,
+    # if it has been written already for the same configuration, or to write it to file, otherwise:
+    connectivity_cache = None
+
+    # Rough memory footprints (bytes) of a neuron, a synapse, and a recorded event (time and sender),
+    # used by dry_run, to be set by spiking simulator specific builders:
+    neuron_memory_bytes = 1000
+    synapse_memory_bytes = 48
+    recorder_event_bytes = 16
+
     # User inputs:
     tvb_simulator = None
     spiking_nodes_ids = []
@@ -90,6 +105,9 @@ class SpikingModelBuilder(object):
         # If there is only the Raw monitor, then self.monitor_period = self.tvb_dt
         self.monitor_period = tvb_simulator.monitors[-1].period
         self.population_order = 100
+        self.bulk_connect = False
+        self.bulk_connect_chunk_size = None
+        self.connectivity_cache = None
         self._models = []
         self._spiking_brain = SpikingBrain()
 
@@ -158,6 +176,41 @@ class SpikingModelBuilder(object):
         """
         pass
 
+    def connect_populations_in_bulk(self, populations_pairs, src_inds_fun, trg_inds_fun, conn_params):
+        """Method to connect many pairs of SpikingPopulation instances in the SpikingNetwork,
+           with the same connectivity pattern, e.g., all pairs of populations of a connection among region nodes.
+           This default implementation connects the pairs one by one.
+           Spiking simulator specific builders that can connect arrays of neurons should override it,
+           in order to connect all pairs with a few connect calls.
+           Arguments:
+            populations_pairs: a sequence of (source SpikingPopulation, target SpikingPopulation, synapse_params)
+                               tuples, where synapse_params is a dict of parameters of the synapses
+                               among the neurons of the two populations, as in connect_two_populations
+            src_inds_fun: a function that selects a subset of the souce population neurons
+            trg_inds_fun: a function that selects a subset of the target population neurons
+            conn_params: a dict of parameters of the connectivity pattern among the neurons of the two populations,
+                         excluding weight and delay ones
+        """
+        for source, target, synapse_params in populations_pairs:
+            self.connect_two_populations(source, src_inds_fun, target, trg_inds_fun, conn_params, synapse_params)
+
+    def _connect_in_chunks(self, connect_fun, connections):
+        """Method to call an array-based connect function for chunks of
+           at most bulk_connect_chunk_size neurons' connections.
+           Arguments:
+            connect_fun: a function of a dict of arrays of equal size, one per attribute of the connections
+            connections: a dict of arrays of equal size, one per attribute of the connections, e.g.,
+                         the source and target neurons, the weights and the delays
+        """
+        n_connections = len(list(connections.values())[0])
+        chunk_size = self.bulk_connect_chunk_size
+        if chunk_size is None or chunk_size >= n_connections:
+            connect_fun(connections)
+            return
+        for start in range(0, n_connections, int(chunk_size)):
+            connect_fun(dict([(attr, values[start:start + int(chunk_size)])
+                              for attr, values in connections.items()]))
+
     @abstractmethod
     def build_and_connect_devices(self, devices):
         """A method to build and connect to the network all devices in the input configuration dict."""
@@ -507,85 +560,243 @@ class SpikingModelBuilder(object):
         self._configure_output_devices()
         self._configure_input_devices()
 
+    @staticmethod
+    def _vectorized_properties(configuration, properties, *nodes):
+        """Method to evaluate the VectorizedProperty instances among the properties of a configuration dict
+           with a single call each, for all the nodes, or pairs of source and target nodes, given.
+           Arguments:
+            configuration: a configured population or connection dict
+            properties: a sequence of the names of the properties to be evaluated
+            *nodes: an array of nodes' indices, or two arrays of source and target nodes' indices
+           Returns:
+            a dict of the lists of the values of every node, or pair of nodes, by property name
+        """
+        return dict([(prop, configuration[prop].per_element(*nodes))
+                     for prop in properties if isinstance(configuration[prop], VectorizedProperty)])
+
+    @staticmethod
+    def _property_value(configuration, prop, vectorized, i_element, *node):
+        # The value of a property, either already evaluated by _vectorized_properties,
+        # or computed now, as a scalar property function of one node, or of one pair of nodes:
+        if prop in vectorized:
+            return vectorized[prop][i_element]
+        return configuration[prop](*node)
+
+    def _population_size(self, population, vectorized, i_node, node_id):
+        # The number of neurons of a population at a Spiking node:
+        return int(np.round(self._property_value(population, "scale", vectorized, i_node, node_id)
+                            * self.population_order))
+
     def build_spiking_region_nodes(self, *args, **kwargs):
         """Method to build all spiking populations with each brain region node."""
+        # Evaluate vectorized populations' properties once for all Spiking nodes:
+        vectorized = [self._vectorized_properties(population, ["scale", "params"], self.spiking_nodes_ids)
+                      for population in self._populations]
         # For every Spiking node
-        for node_id, node_label in zip(self.spiking_nodes_ids, self.spiking_nodes_labels):
+        for i_node, (node_id, node_label) in enumerate(zip(self.spiking_nodes_ids, self.spiking_nodes_labels)):
             self._spiking_brain[node_label] = self.build_spiking_region_node(node_label)
             # ...and every population in it...
             for iP, population in enumerate(self._populations):
                 # ...if this population exists in this node...
                 if node_id in population["nodes"]:
                     # ...generate this population in this node...
-                    size = int(np.round(population["scale"](node_id) * self.population_order))
+                    size = self._population_size(population, vectorized[iP], i_node, node_id)
                     self._spiking_brain[node_label][population["label"]] = \
                         self.build_spiking_population(population["label"], population["model"], size,
-                                                      params=population["params"](node_id),
+                                                      params=self._property_value(population, "params",
+                                                                                  vectorized[iP], i_node, node_id),
                                                       *args, **kwargs)
 
+    def _spiking_region_nodes_by_index(self):
+        # The spiking brain region nodes by node index, looked up once, instead of once per region node:
+        return dict([(node_id, self._spiking_brain[node_label])
+                     for node_id, node_label in zip(self.spiking_nodes_ids, self.spiking_nodes_labels)])
+
+    def _connect_within_node_populations(self, conn):
+        """Method to connect the populations of a connection withing each one of its Spiking brain region nodes."""
+        spiking_nodes = self._spiking_region_nodes_by_index()
+        # Evaluate vectorized connection's properties once for all nodes of this connection:
+        vectorized = self._vectorized_properties(conn, ["weight", "delay", "receptor_type", "params"],
+                                                 np.array(conn["nodes"]))
+        # ...and for every brain region node where this connection will be created:
+        for i_element, node_index in enumerate(conn["nodes"]):
+            node = spiking_nodes[node_index]
+            # ...create a synapse parameters dictionary, from the configured inputs:
+            syn_spec = self.set_synapse(
+                conn["synapse_model"],
+                self._property_value(conn, "weight", vectorized, i_element, node_index),
+                self._assert_delay(self._property_value(conn, "delay", vectorized, i_element, node_index)),
+                self._property_value(conn, "receptor_type", vectorized, i_element, node_index),
+                self._property_value(conn, "params", vectorized, i_element, node_index)
+                )
+            # ...and for every combination of source...
+            for pop_src in ensure_list(conn["source"]):
+                # ...and target populations of this connection...
+                for pop_trg in ensure_list(conn["target"]):
+                    # ...connect the two populations:
+                    self.connect_two_populations(
+                        node[pop_src], conn["source_inds"],
+                        node[pop_trg], conn["target_inds"],
+                        conn["conn_spec"], syn_spec
+                    )
+
     def connect_within_node_spiking_populations(self):
         """Method to connect all populations withing each Spiking brain region node."""
         # For every different type of connections between distinct Spiking nodes' populations
         for i_conn, conn in enumerate(ensure_list(self._populations_connections)):
-            # ...and for every brain region node where this connection will be created:
-            for node_index in conn["nodes"]:
-                i_node = np.where(self.spiking_nodes_ids == node_index)[0][0]
+            self._connect_within_node_populations(conn)
+
+    def _nodes_connection_populations_pairs(self, conn):
+        """Method to generate the (source population, target population, synapse parameters) tuples
+           of a connection among Spiking brain region nodes, for every distinct pair of its region nodes,
+           and every combination of its source and target populations."""
+        spiking_nodes = self._spiking_region_nodes_by_index()
+        # Evaluate vectorized connection's properties once for all pairs of Spiking nodes:
+        source_nodes = np.array(conn["source_nodes"])
+        target_nodes = np.array(conn["target_nodes"])
+        vectorized = self._vectorized_properties(conn, ["weight", "delay", "receptor_type"],
+                                                 np.repeat(source_nodes, target_nodes.size),
+                                                 np.tile(target_nodes, source_nodes.size))
+        i_pair = -1
+        # ...form the connection for every distinct pair of Spiking nodes
+        for source_index in conn["source_nodes"]:
+            # ...get the source spiking brain region node:
+            source_node = spiking_nodes[source_index]
+            for target_index in conn["target_nodes"]:
+                i_pair += 1
+                # ...get the target spiking brain region node:
+                target_node = spiking_nodes[target_index]
                 # ...create a synapse parameters dictionary, from the configured inputs:
-                syn_spec = self.set_synapse(conn["synapse_model"],
-                                            conn['weight'](node_index),
-                                            self._assert_delay(conn['delay'](node_index)),
-                                            conn['receptor_type'](node_index),
-                                            conn["params"](node_index)
-                                            )
-                # ...and for every combination of source...
-                for pop_src in ensure_list(conn["source"]):
-                    # ...and target populations of this connection...
-                    for pop_trg in ensure_list(conn["target"]):
-                        # ...connect the two populations:
-                        self.connect_two_populations(
-                            self._spiking_brain[i_node][pop_src], conn["source_inds"],
-                            self._spiking_brain[i_node][pop_trg], conn["target_inds"],
-                            conn["conn_spec"], syn_spec
-                        )
+                syn_spec = self.set_synapse(
+                    conn["synapse_model"],
+                    self._property_value(conn, "weight", vectorized, i_pair, source_index, target_index),
+                    self._property_value(conn, "delay", vectorized, i_pair, source_index, target_index),
+                    self._property_value(conn, "receptor_type", vectorized, i_pair, source_index, target_index)
+                    )
+                if source_index == target_index:
+                    # ...as long as this is not a within node connection...
+                    continue
+                for conn_src in ensure_list(conn["source"]):
+                    # ...and for every combination of source...
+                    src_pop = source_node[conn_src]
+                    for conn_trg in ensure_list(conn["target"]):
+                        # ...and target population...
+                        yield src_pop, target_node[conn_trg], syn_spec
+
+    def _connect_region_nodes_populations(self, conn):
+        """Method to connect the populations of a connection among its Spiking brain region nodes.
+           If bulk_connect is True, all pairs of populations are connected together,
+           see connect_populations_in_bulk."""
+        if self.bulk_connect:
+            self.connect_populations_in_bulk(list(self._nodes_connection_populations_pairs(conn)),
+                                             conn["source_inds"], conn["target_inds"], conn['conn_spec'])
+        else:
+            for src_pop, trg_pop, syn_spec in self._nodes_connection_populations_pairs(conn):
+                self.connect_two_populations(src_pop, conn["source_inds"],
+                                             trg_pop, conn["target_inds"],
+                                             conn['conn_spec'], syn_spec)
 
     def connect_spiking_region_nodes(self):
         """Method to connect all Spiking brain region nodes among them."""
         # For every different type of connections between distinct Spiking region nodes' populations
         for i_conn, conn in enumerate(ensure_list(self._nodes_connections)):
-            # ...form the connection for every distinct pair of Spiking nodes
-            for source_index in conn["source_nodes"]:
-                # ...get the source spiking brain region indice:
-                i_source_node = np.where(self.spiking_nodes_ids == source_index)[0][0]
-                for target_index in conn["target_nodes"]:
-                    # ...get the target spiking brain region indice:
-                    i_target_node = np.where(self.spiking_nodes_ids == target_index)[0][0]
-                    # ...create a synapse parameters dictionary, from the configured inputs:
-                    syn_spec = self.set_synapse(conn["synapse_model"],
-                                                conn["weight"](source_index, target_index),
-                                                conn["delay"](source_index, target_index),
-                                                conn["receptor_type"](source_index, target_index)
-                                                )
-                    if source_index != target_index:
-                        # ...and as long as this is not a within node connection...
-                        for conn_src in ensure_list(conn["source"]):
-                            # ...and for every combination of source...
-                            src_pop = self._spiking_brain[i_source_node][conn_src]
-                            for conn_trg in ensure_list(conn["target"]):
-                                # ...and target population...
-                                trg_pop = self._spiking_brain[i_target_node][conn_trg]
-                                self.connect_two_populations(src_pop, conn["source_inds"],
-                                                             trg_pop, conn["target_inds"],
-                                                             conn['conn_spec'], syn_spec)
+            self._connect_region_nodes_populations(conn)
 
     def build_spiking_brain(self):
         """Method to build and connect all Spiking brain region nodes,
            first withing, and then, among them.
+           If a connectivity_cache is set, the connections are loaded from its cache file, if any,
+           or written to it after being created, see SpikingConnectivityCache.
         """
         self.build_spiking_region_nodes()
+        if self.connectivity_cache is not None:
+            self.connectivity_cache.connect(self)
+            return
         self.connect_within_node_spiking_populations()
         # Connect Spiking nodes among each other
         self.connect_spiking_region_nodes()
 
+    # The methods below are used by the SpikingConnectivityCache
+    # and have to be implemented by spiking simulator specific builders that support caching of the connectivity:
+
+    def _number_of_connections(self, conn=None):
+        """Method to return the number of all neurons' connections of the spiking network created so far.
+           Arguments:
+            conn: the configuration of the connection type, the connections of which are about to be,
+                  or have just been, created, if the number is counted for the connectivity cache. Default = None
+        """
+        raise NotImplementedError
+
+    def _get_connections_arrays(self, start, stop, conn=None):
+        """Method to return the attributes of the neurons' connections, in the order of their creation.
+           Arguments:
+            start: the index of the first connection
+            stop: the index after the last connection
+            conn: the configuration of the connection type of the connections. Default = None
+           Returns:
+            a dict of arrays of equal size, one per attribute of the connections, e.g.,
+            the source and target neurons, the weights, the delays and the receptor types
+        """
+        raise NotImplementedError
+
+    def _connect_arrays(self, connections):
+        """Method to create neurons' connections, as returned by _get_connections_arrays.
+           Arguments:
+            connections: a dict of arrays of equal size, one per attribute of the connections
+        """
+        raise NotImplementedError
+
+    def _get_random_state(self):
+        # The JSON serializable state of the random number generator of the spiking simulator, if any,
+        # so that a network connected from a cache file continues with the random numbers of a new one:
+        return None
+
+    def _set_random_state(self, random_state):
+        pass
+
+    def _connectivity_cache_config(self):
+        """Method to return the spiking simulator specific configuration items,
+           which determine the connectivity of the spiking network, e.g., the seed of the random number generator."""
+        return []
+
+    @staticmethod
+    def _properties_per_element(configuration, properties, *nodes):
+        # The values of the properties of a configuration for every node, or pair of nodes:
+        values = OrderedDict()
+        for prop in properties:
+            if isinstance(configuration[prop], VectorizedProperty):
+                values[prop] = configuration[prop].per_element(*nodes)
+            else:
+                values[prop] = [configuration[prop](*node) for node in zip(*nodes)]
+        return values
+
+    def _connectivity_cache_items(self):
+        """Method to return the configuration items which determine the connectivity of the spiking network,
+           with the properties evaluated for every region node, or pair of region nodes,
+           the hash of which is the key of the connectivity in a SpikingConnectivityCache."""
+        items = [self.__class__.__name__, self.spiking_nodes_ids, self.spiking_nodes_labels, self.spiking_dt,
+                 self.population_order, self.tvb_weights, self.tvb_delays]
+        for population in self._populations:
+            nodes = np.array(population["nodes"])
+            items.append([population["label"], population["model"], nodes,
+                          self._properties_per_element(population, ["scale", "params"], nodes)])
+        for conn in ensure_list(self._populations_connections):
+            nodes = np.array(conn["nodes"])
+            items.append([conn["source"], conn["target"], conn["synapse_model"], conn["conn_spec"],
+                          conn["source_inds"], conn["target_inds"], nodes,
+                          self._properties_per_element(conn, ["weight", "delay", "receptor_type", "params"],
+                                                       nodes)])
+        for conn in ensure_list(self._nodes_connections):
+            source_nodes = np.array(conn["source_nodes"])
+            target_nodes = np.array(conn["target_nodes"])
+            items.append([conn["source"], conn["target"], conn["synapse_model"], conn["conn_spec"],
+                          conn["source_inds"], conn["target_inds"], source_nodes, target_nodes,
+                          self._properties_per_element(conn, ["weight", "delay", "receptor_type"],
+                                                       np.repeat(source_nodes, target_nodes.size),
+                                                       np.tile(target_nodes, source_nodes.size))])
+        items.append(self._connectivity_cache_config())
+        return items
+
     def _build_and_connect_devices(self, devices):
         """Method to build and connect input or output devices, organized by
            - the variable they measure or stimulate (pandas.Series), and the
@@ -629,6 +840,197 @@ class SpikingModelBuilder(object):
         self._input_devices = self.build_and_connect_input_devices()
         return self.build()
 
+    # The methods below estimate the size of the spiking network, without building it:
+
+    def _expected_number_of_connections(self, n_src, n_trg, src_is_trg, conn_spec):
+        """Method to compute the expected number of the neurons' connections between two populations,
+           for a connectivity rule following the conventions of NEST.
+           Spiking simulator specific builders with different connectivity rules should override it.
+           Arguments:
+            n_src: number (int) of source neurons
+            n_trg: number (int) of target neurons
+            src_is_trg: a (bool) flag to determine if the source and target populations are the same one
+            conn_spec: a dict of parameters of the connectivity pattern among the neurons of the two populations
+           Returns:
+            the expected number (int) of connections
+        """
+        rule = conn_spec.get("rule", "all_to_all")
+        if rule == "one_to_one":
+            return np.minimum(n_src, n_trg)
+        elif rule == "fixed_indegree":
+            return conn_spec["indegree"] * n_trg
+        elif rule == "fixed_outdegree":
+            return conn_spec["outdegree"] * n_src
+        elif rule == "fixed_total_number":
+            return conn_spec["N"]
+        n_all = n_src * n_trg
+        if src_is_trg and not conn_spec.get("allow_autapses", True):
+            n_all -= n_src
+        if rule == "pairwise_bernoulli":
+            return int(np.round(conn_spec["p"] * n_all))
+        return n_all
+
+    @staticmethod
+    def _dry_run_number_of_neurons(size, inds_fun):
+        # The number of the neurons of a population selected by a function of its neurons,
+        # which is applied to the neurons' indices instead, since the neurons are not created:
+        if inds_fun is None:
+            return size
+        try:
+            return len(inds_fun(np.arange(size)))
+        except Exception:
+            return size
+
+    def _dry_run_neurons(self):
+        labels = list(OrderedDict.fromkeys([population["label"] for population in self._populations]))
+        sizes = np.zeros((len(self.spiking_nodes_ids), len(labels)), dtype="i8")
+        for population in self._populations:
+            vectorized = self._vectorized_properties(population, ["scale"], self.spiking_nodes_ids)
+            i_pop = labels.index(population["label"])
+            for i_node, node_id in enumerate(self.spiking_nodes_ids):
+                if node_id in population["nodes"]:
+                    sizes[i_node, i_pop] += self._population_size(population, vectorized, i_node, node_id)
+        return DataFrame(sizes, index=list(self.spiking_nodes_labels), columns=labels)
+
+    def _dry_run_populations_synapses(self, conn, neurons_src, neurons_trg, n_receptors):
+        # The expected number of synapses of a connection between the populations of two Spiking nodes:
+        n_synapses = 0
+        for pop_src in ensure_list(conn["source"]):
+            n_src = self._dry_run_number_of_neurons(int(neurons_src.get(pop_src, 0)), conn["source_inds"])
+            for pop_trg in ensure_list(conn["target"]):
+                n_trg = self._dry_run_number_of_neurons(int(neurons_trg.get(pop_trg, 0)), conn["target_inds"])
+                if n_src and n_trg:
+                    n_synapses += n_receptors * \
+                                  self._expected_number_of_connections(n_src, n_trg, pop_src == pop_trg and
+                                                                       neurons_src.name == neurons_trg.name,
+                                                                       conn["conn_spec"])
+        return n_synapses
+
+    def _dry_run_synapses(self, neurons):
+        synapses = OrderedDict()
+        nodes_inds = dict([(node_id, i_node) for i_node, node_id in enumerate(self.spiking_nodes_ids)])
+        for conn in ensure_list(self._populations_connections):
+            label = "within %s" % self._connection_label(conn)
+            synapses[label] = synapses.get(label, np.zeros((neurons.shape[0],), dtype="i8"))
+            nodes = np.array(conn["nodes"])
+            vectorized = self._vectorized_properties(conn, ["receptor_type"], nodes)
+            for i_element, node_index in enumerate(nodes):
+                node_neurons = neurons.iloc[nodes_inds[node_index]]
+                n_receptors = len(ensure_list(
+                    self._property_value(conn, "receptor_type", vectorized, i_element, node_index)))
+                synapses[label][nodes_inds[node_index]] += \
+                    self._dry_run_populations_synapses(conn, node_neurons, node_neurons, n_receptors)
+        for conn in ensure_list(self._nodes_connections):
+            label = "among %s" % self._connection_label(conn)
+            synapses[label] = synapses.get(label, np.zeros((neurons.shape[0],), dtype="i8"))
+            source_nodes = np.array(conn["source_nodes"])
+            target_nodes = np.array(conn["target_nodes"])
+            vectorized = self._vectorized_properties(conn, ["receptor_type"],
+                                                     np.repeat(source_nodes, target_nodes.size),
+                                                     np.tile(target_nodes, source_nodes.size))
+            i_pair = -1
+            for source_index in source_nodes:
+                for target_index in target_nodes:
+                    i_pair += 1
+                    if source_index == target_index:
+                        continue
+                    n_receptors = len(ensure_list(self._property_value(conn, "receptor_type", vectorized, i_pair,
+                                                                       source_index, target_index)))
+                    # Synapses are counted for the target region node:
+                    synapses[label][nodes_inds[target_index]] += \
+                        self._dry_run_populations_synapses(conn, neurons.iloc[nodes_inds[source_index]],
+                                                           neurons.iloc[nodes_inds[target_index]], n_receptors)
+        return DataFrame(synapses, index=neurons.index)
+
+    def _dry_run_devices(self, devices, neurons, firing_rate=None):
+        # The numbers of devices and their connections, and, if firing_rate is given, for output devices,
+        # the numbers of events, i.e., spikes, or samples of the recorded variables, and their bytes, per second:
+        rows = OrderedDict()
+        for device in devices:
+            connections = device["connections"]
+            if isinstance(connections, string_types):
+                connections = {connections: list(neurons.columns)}
+            params = device.get("params", {})
+            n_names = len(ensure_list(device.get("names", [None])))
+            spikes = device["model"].find("spike") > -1
+            n_variables = len(ensure_list(params.get("record_from", [])))
+            # Samples per second, for the default sampling interval of 1.0 ms:
+            samples_rate = 1000.0 / params.get("interval", 1.0)
+            for quantity, populations in connections.items():
+                row = OrderedDict([("model", device["model"]), ("number_of_devices", 0),
+                                   ("number_of_connections", 0)])
+                if firing_rate is not None:
+                    row.update([("events_per_second", 0.0), ("bytes_per_second", 0.0)])
+                # One device per target region node, or one device per name, for all target region nodes:
+                row["number_of_devices"] = len(device["nodes"]) if device.get("names", None) is None else n_names
+                for i_node, node_index in enumerate(device["nodes"]):
+                    for pop in ensure_list(populations):
+                        n_neurons = n_names * self._dry_run_number_of_neurons(
+                            int(neurons.iloc[node_index].get(pop, 0)), device["neurons_fun"][i_node])
+                        row["number_of_connections"] += n_neurons
+                        if firing_rate is None:
+                            continue
+                        if spikes:
+                            rate = firing_rate.get(pop, 0.0) if isinstance(firing_rate, dict) else firing_rate
+                            row["events_per_second"] += n_neurons * rate
+                            row["bytes_per_second"] += n_neurons * rate * self.recorder_event_bytes
+                        else:
+                            row["events_per_second"] += n_neurons * samples_rate
+                            row["bytes_per_second"] += \
+                                n_neurons * samples_rate * (self.recorder_event_bytes + 8 * n_variables)
+                rows[quantity] = row
+        columns = ["model", "number_of_devices", "number_of_connections"]
+        if firing_rate is not None:
+            columns += ["events_per_second", "bytes_per_second"]
+        return DataFrame(list(rows.values()), index=list(rows.keys()), columns=columns)
+
+    def dry_run(self, firing_rate=10.0):
+        """Method to estimate the numbers of neurons, synapses and devices of the spiking network,
+           per region node and in total, as well as the memory of its neurons and synapses,
+           and the volume of the events recorded by its output devices per second of simulated time,
+           without building the network, i.e., without any call to the spiking simulator.
+           Only the builder itself is configured, not the spiking simulator.
+           The numbers of synapses are the expected ones of the connectivity rules.
+           The memory and events' volume are rough estimates,
+           based on neuron_memory_bytes, synapse_memory_bytes and recorder_event_bytes.
+           Arguments:
+            firing_rate: the expected mean firing rate (spikes/sec) of the neurons recorded by spike recorders,
+                         either a scalar, or a dict of rates by population label. Default = 10.0
+           Returns:
+            an OrderedDict of
+            - "neurons": a pandas.DataFrame of the numbers of neurons per region node and population,
+            - "synapses": a pandas.DataFrame of the numbers of synapses per target region node and connection,
+            - "output_devices": a pandas.DataFrame of the numbers of devices, of their connections,
+                                and of the events and bytes recorded per second, per recorded quantity,
+            - "input_devices": a pandas.DataFrame of the numbers of devices and of their connections,
+                               per stimulated quantity,
+            - "totals": a pandas.Series of the total numbers and estimates.
+        """
+        SpikingModelBuilder.configure(self)
+        neurons = self._dry_run_neurons()
+        synapses = self._dry_run_synapses(neurons)
+        output_devices = self._dry_run_devices(self._output_devices, neurons, firing_rate)
+        input_devices = self._dry_run_devices(self._input_devices, neurons)
+        n_neurons = int(neurons.values.sum())
+        n_synapses = int(synapses.values.sum())
+        totals = Series(OrderedDict(
+            [("number_of_neurons", n_neurons),
+             ("number_of_synapses", n_synapses),
+             ("number_of_devices", int(output_devices["number_of_devices"].sum() +
+                                       input_devices["number_of_devices"].sum())),
+             ("number_of_devices_connections", int(output_devices["number_of_connections"].sum() +
+                                                   input_devices["number_of_connections"].sum())),
+             ("neurons_memory_bytes", n_neurons * self.neuron_memory_bytes),
+             ("synapses_memory_bytes", n_synapses * self.synapse_memory_bytes),
+             ("events_per_second", float(output_devices["events_per_second"].sum())),
+             ("recorded_bytes_per_second", float(output_devices["bytes_per_second"].sum()))]))
+        self.logger.info("Dry run of %s:\nNeurons per region node:\n%s\nSynapses per target region node:\n%s\n"
+                         "Output devices:\n%s\nInput devices:\n%s\nTotals:\n%s"
+                         % (self.__class__.__name__, str(neurons), str(synapses),
+                            str(output_devices), str(input_devices), str(totals)))
+        return OrderedDict([("neurons", neurons), ("synapses", synapses), ("output_devices", output_devices),
+                            ("input_devices", input_devices), ("totals", totals)])
+
 
 def node_key_index_and_label(node, labels):
     if isinstance(node, string_types):
@@ -652,6 +1054,58 @@ def node_key_index_and_label(node, labels):
 # per spiking node or spiking nodes' connection
 
 
+class VectorizedProperty(object):
+
+    """VectorizedProperty wraps a builder property function of arrays of nodes' indices,
+       i.e., fun(nodes) for populations and within node connections,
+       or fun(source_nodes, target_nodes) for connections among region nodes,
+       so that builders evaluate it with a single call for all nodes, or pairs of nodes,
+       instead of once per node, or pair of nodes. The function has to return either
+       - a scalar, common to all nodes,
+       - a sequence (e.g., a numpy array) of one value per node,
+       - a dictionary (e.g., of a distribution, or of parameters) of sequences of one value per node,
+         or of values common to all nodes, e.g., {"distribution": "normal", "mu": mu_array, "sigma": 0.1}.
+       A VectorizedProperty can be still called as a scalar property function of one node, or pair of nodes.
+    """
+
+    def __init__(self, fun):
+        self.fun = fun
+
+    def __call__(self, *node):
+        return self.per_element(*[np.array([node_index]) for node_index in node])[0]
+
+    def per_element(self, *nodes):
+        """Method to evaluate the property for arrays of nodes' indices.
+           Arguments:
+            *nodes: an array of nodes' indices, or two arrays of source and target nodes' indices, of equal size
+           Returns:
+            a list of the values of the property, one per node, or pair of nodes
+        """
+        nodes = [np.asarray(node) for node in nodes]
+        n_elements = nodes[0].size
+        values = self.fun(*nodes)
+        if isinstance(values, dict):
+            values = dict([(key, self._per_element_values(value, n_elements, False))
+                           for key, value in values.items()])
+            return [dict([(key, value[i_element] if isinstance(value, list) else value)
+                          for key, value in values.items()])
+                    for i_element in range(n_elements)]
+        return self._per_element_values(values, n_elements)
+
+    @staticmethod
+    def _per_element_values(values, n_elements, broadcast_scalar=True):
+        if isinstance(values, string_types) or np.ndim(values) == 0:
+            if broadcast_scalar:
+                return [values] * n_elements
+            return values
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        values = list(values)
+        if len(values) != n_elements:
+            raise_value_error("Vectorized property returned %d values for %d nodes!" % (len(values), n_elements))
+        return values
+
+
 def property_per_node(property, nodes, nodes_labels):
     if hasattr(property, "__call__") and nodes:
         property_per_node = OrderedDict()
@@ -2,7 +2,7 @@
 import os
 
 import numpy as np
-from pandas import Series
+from pandas import Series, concat
 from six import string_types
 
 from tvb_multiscale.core.config import CONFIGURED, initialize_logger
@@ -109,7 +109,8 @@ def build_and_connect_device(device, create_device_fun, connect_device_fun, node
     for pop in ensure_list(populations):
         device = connect_device_fun(device, node[pop], inds_fun,
                                     weight, delay, receptor_type, config=config, **kwargs)
-    device._number_of_connections = device.number_of_connections
+    # Cache the numbers of connections and neurons of the connected device:
+    device.update_connectivity_counts()
     return device
 
 
@@ -174,29 +175,103 @@ def build_and_connect_devices_one_to_many(device_dict, create_device_fun, connec
                         connect_device_fun(devices[pop_var][dev_name], node[pop], neurons_funs[i_dev, i_node],
                                            weights[i_dev, i_node], delays[i_dev, i_node], receptor_types[i_dev, i_node],
                                            config=config, **kwargs)
+            # Cache the numbers of connections and neurons of the connected device:
+            devices[pop_var][dev_name].update_connectivity_counts()
+        devices[pop_var].update()
+    return devices
+
+
+def build_and_connect_devices_single_device(device_dict, create_devices_fun, connect_devices_fun, spiking_nodes,
+                                            names, config=CONFIGURED, **kwargs):
+    """This function will create a DeviceSet for a measuring (output) or input (stimulating) quantity,
+       whereby each device will target more than one SpikingRegionNode instances,
+       e.g. as it is the case a TVB "proxy" node, like build_and_connect_devices_one_to_many does,
+       but with all devices created as the channels of a single multi-channel device,
+       by a single call of create_devices_fun, and connected by a single call of connect_devices_fun,
+       so that the spiking simulator can create them, connect them and set them in a vectorized way.
+       Arguments:
+        device_dict: a dictionary of properties for the devices to build
+        create_devices_fun: a function to build the channels, with arguments
+                            (device_model, number_of_channels, params, labels, config, **kwargs),
+                            returning a list of Device class instances, one per channel
+        connect_devices_fun: a function to connect the channels, with arguments (connections, config, **kwargs),
+                             where connections is a list of
+                             (device, population, neurons_inds_fun, weight, delay, receptor_type) tuples
+        spiking_nodes: the SpikingRegionNode instances (pandas.Series) of the spiking network
+        names: the names (labels) of the devices, i.e., of the channels
+        config: a configuration class instance. Default = CONFIGURED (default configuration)
+        **kwargs: other possible keyword arguments, to be passed to the device builder and connector.
+       Returns:
+        a pandas.Series of the DeviceSet instances built for every variable
+    """
+    devices = Series()
+    # Determine the connections from variables to measure/stimulate to Spiking node populations
+    connections, device_target_nodes = _get_connections(device_dict, spiking_nodes)
+    # Determine the device's parameters and connections' properties
+    weights, delays, receptor_types, neurons_funs = \
+        _get_device_props_with_correct_shape(device_dict, (len(names), len(device_target_nodes)))
+    # For every Spiking population variable to be stimulated or measured...
+    for pop_var, populations in connections.items():
+        populations = ensure_list(populations)
+        # This set of devices will be for variable pop_var...
+        devices[pop_var] = DeviceSet(pop_var, device_dict["model"])
+        # ...created all together as the channels of a single device...
+        try:
+            channels = create_devices_fun(device_dict["model"], len(names), params=device_dict.get("params", None),
+                                          labels=["%s_%s" % (pop_var, dev_name) for dev_name in names],
+                                          config=config, **kwargs)
+        except Exception as e:
+            raise ValueError("Failed to set device %s!\n%s" % (str(device_dict["model"]), str(e)))
+        # ...and connected all together to every target region node and populations' group:
+        channels_connections = []
+        for i_dev, channel in enumerate(channels):
+            for i_node, node in enumerate(device_target_nodes):
+                for pop in populations:
+                    channels_connections.append((channel, node[pop], neurons_funs[i_dev, i_node],
+                                                 weights[i_dev, i_node], delays[i_dev, i_node],
+                                                 receptor_types[i_dev, i_node]))
+        connect_devices_fun(channels_connections, config=config, **kwargs)
+        for dev_name, channel in zip(names, channels):
+            # Cache the numbers of connections and neurons of the connected channel:
+            channel.update_connectivity_counts()
+            devices[pop_var][dev_name] = channel
         devices[pop_var].update()
     return devices
 
 
 def build_and_connect_devices(devices_input_dicts, create_device_fun, connect_device_fun, spiking_nodes,
-                              config=CONFIGURED, **kwargs):
+                              config=CONFIGURED, create_devices_fun=None, connect_devices_fun=None, **kwargs):
     """A method to build the final ANNarchyNetwork class based on the already created constituents.
        Build and connect devices by
        the variable they measure or stimulate, and population(s) they target (pandas.Series)
        and target node (pandas.Series) where they refer to.
+       Devices with names, and a True "single_device" entry, are built as the channels of a single device,
+       with build_and_connect_devices_single_device, if the spiking simulator specific
+       create_devices_fun and connect_devices_fun functions are given.
     """
     devices = Series()
     for device_dict in ensure_list(devices_input_dicts):
         # For every distinct quantity to be measured from Spiking or stimulated towards Spiking nodes...
         dev_names = device_dict.get("names", None)
         if dev_names is None:  # If no devices' names are given...
-            devices = devices.append(
-                            build_and_connect_devices_one_to_one(device_dict, create_device_fun, connect_device_fun,
-                                                                 spiking_nodes, config=config, **kwargs)
-                                              )
+            devices = concat([devices,
+                              build_and_connect_devices_one_to_one(device_dict, create_device_fun, connect_device_fun,
+                                                                   spiking_nodes, config=config, **kwargs)])
+        elif device_dict.get("single_device", False):
+            if create_devices_fun is None or connect_devices_fun is None:
+                LOG.warning("Building devices %s as a single device is not supported by this spiking simulator! "
+                            "Building one device per name instead!" % str(device_dict.get("model", "")))
+                devices = concat([devices,
+                                  build_and_connect_devices_one_to_many(device_dict, create_device_fun,
+                                                                        connect_device_fun, spiking_nodes, dev_names,
+                                                                        config=config, **kwargs)])
+            else:
+                devices = concat([devices,
+                                  build_and_connect_devices_single_device(device_dict, create_devices_fun,
+                                                                          connect_devices_fun, spiking_nodes, dev_names,
+                                                                          config=config, **kwargs)])
         else:
-            devices = devices.append(
-                            build_and_connect_devices_one_to_many(device_dict, create_device_fun, connect_device_fun,
-                                                                  spiking_nodes, dev_names, config=config, **kwargs)
-                                              )
+            devices = concat([devices,
+                              build_and_connect_devices_one_to_many(device_dict, create_device_fun, connect_device_fun,
+                                                                    spiking_nodes, dev_names, config=config, **kwargs)])
     return devices
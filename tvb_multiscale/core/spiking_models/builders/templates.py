@@ -62,6 +62,9 @@ Set different entries in the SpikingNetwork builder for populations that differ
 "model": the model of the synapse
 "conn_spec": the dictionary of the connectivity model and parameters (See NEST)
 or in their source_nodes and target_nodes ranges
+Functions of arrays of "source_nodes", "target_nodes", e.g., tvb_weight and tvb_delay below,
+can be wrapped by a VectorizedProperty (see tvb_multiscale.core.spiking_models.builders.base),
+so that they are evaluated with a single call for all pairs of region nodes.
 """
 
 
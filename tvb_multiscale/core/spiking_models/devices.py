@@ -3,19 +3,21 @@ from abc import ABCMeta, abstractmethod
 from six import string_types
 from copy import deepcopy
 from collections import OrderedDict
+from weakref import WeakValueDictionary
 
 import pandas as pd
 import xarray as xr
 import numpy as np
 
 from tvb_multiscale.core.config import initialize_logger, LINE
-from tvb_multiscale.core.utils.data_structures_utils import filter_events, summarize, flatten_neurons_inds_in_DataArray
+from tvb_multiscale.core.utils.data_structures_utils import \
+    filter_events, sort_events_by_x_and_y, summarize, flatten_neurons_inds_in_DataArray
 
-from tvb.basic.neotraits.api import HasTraits, Attr, Int, List
+from tvb.basic.neotraits.api import HasTraits, Attr, Int
 
 from tvb.contrib.scripts.utils.log_error_utils import raise_value_error
 from tvb.contrib.scripts.utils.data_structures_utils import \
-    ensure_list, list_of_dicts_to_dict_of_lists, sort_events_by_x_and_y, data_xarray_from_continuous_events, is_integer
+    ensure_list, list_of_dicts_to_dict_of_lists, data_xarray_from_continuous_events, is_integer
 
 
 LOG = initialize_logger(__name__)
@@ -49,6 +51,20 @@ class Device(HasTraits):
     # _delay_attr = "delay"
     # _receptor_attr = "receptor"
 
+    # The names of the parameters that take an array of values per device, e.g., spike times.
+    # All other parameters are assumed to take a scalar value per device.
+    # Modify accordingly in the inheriting classes.
+    _array_parameters = []
+
+    # The version of the device's connectivity,
+    # which has to be increased (via connectivity_changed()) whenever its connections are created or removed.
+    # The cached numbers of connections and neurons are computed again only if they are older than it.
+    _connectivity_version = 0
+    _counts_version = -1
+    # The DeviceSets the device belongs to, by their ids, weakly referenced,
+    # the connectivity versions of which are increased together with the device's one:
+    _device_sets = None
+
     def __init__(self, device=None, *args, **kwargs):
         self.device = device   # a device object, depending on its simulator implementation
         super(Device, self).__init__()
@@ -56,6 +72,9 @@ class Device(HasTraits):
         self.model = kwargs.pop("model", "device")
         self._number_of_connections = 0
         self._number_of_neurons = 0
+        self._connectivity_version = 0
+        self._counts_version = -1
+        self._device_sets = WeakValueDictionary()
 
     def __repr__(self):
         output = "%s - Model: %s\n%s" % (self.__class__.__name__, self.model, self.device.__str__())
@@ -145,6 +164,18 @@ class Device(HasTraits):
         """
         pass
 
+    @classmethod
+    def SetDevices(cls, devices, values_dicts):
+        """Method to set attributes of several devices of the same model.
+           This default implementation sets each device in turn.
+           Inheriting classes should override it, if the spiking simulator can set all devices in one call.
+           Arguments:
+            devices: a sequence (list, tuple) of Device instances
+            values_dicts: a sequence (list, tuple) of dictionaries of attributes names' and values, one per device.
+        """
+        for device, values_dict in zip(devices, values_dicts):
+            device.Set(values_dict)
+
     def get_attributes(self):
         """Method to get all attributes of the device.
            Returns:
@@ -166,6 +197,21 @@ class Device(HasTraits):
         """
         return len(self.neurons)
 
+    def connectivity_changed(self):
+        """Method to declare that the connections from/to the device have changed,
+           which invalidates the cached numbers of connections and neurons of the device,
+           and of the DeviceSets it belongs to, but not of any other device."""
+        self._connectivity_version += 1
+        for device_set in list(self._device_sets.values()):
+            device_set._connectivity_version += 1
+
+    def update_connectivity_counts(self):
+        """Method to compute and cache the numbers of connections and neurons of the device,
+           for its current connectivity version."""
+        self._number_of_connections = self.get_number_of_connections()
+        self._number_of_neurons = self.get_number_of_neurons()
+        self._counts_version = self._connectivity_version
+
     def SetToConnections(self, values_dict):
         """Method to set attributes of the connections from/to the device.
            Arguments:
@@ -271,15 +317,15 @@ class Device(HasTraits):
     @property
     def number_of_connections(self):
         """Method to get the number of all connections from/to the device."""
-        if not self._number_of_connections:
-            self._number_of_connections = self.get_number_of_connections()
+        if self._counts_version != self._connectivity_version:
+            self.update_connectivity_counts()
         return self._number_of_connections
 
     @property
     def number_of_neurons(self):
         """Method to get the number of all neurons connected from/to the device."""
-        if not self._number_of_neurons:
-            self._number_of_neurons = self.get_number_of_neurons()
+        if self._counts_version != self._connectivity_version:
+            self.update_connectivity_counts()
         return self._number_of_neurons
 
     @property
@@ -409,6 +455,32 @@ class OutputDevice(Device):
                 events[var] = []
         return events
 
+    def read_new_events(self, cursor=0, variables=None):
+        """This method will return only the events recorded after a cursor, i.e., the ones not read yet,
+           as numpy arrays, without copying the whole history of events.
+            Arguments:
+                cursor: the number of events already read, i.e., the index of the first new event. Default = 0.
+                        If the device has been reset since (i.e., it holds less events than the cursor),
+                        all its events are new.
+                variables: sequence (list, tuple, array) of variables to be included in the output,
+                           assumed to correspond to keys of the events dict.
+                           Default=None, corresponds to all keys of events.
+            Returns:
+              the dictionary of numpy arrays of the new events, and the new cursor
+        """
+        events = self.events
+        n_events = len(events["times"])
+        if cursor > n_events:
+            cursor = 0
+        if variables is None:
+            variables = events.keys()
+        else:
+            variables = ensure_list(variables)
+        new_events = OrderedDict()
+        for var in variables:
+            new_events[var] = np.asarray(events[var])[cursor:]
+        return new_events, n_events
+
     @property
     @abstractmethod
     def events(self):
@@ -441,6 +513,10 @@ class SpikeRecorder(OutputDevice):
 
     """OutputDevice class to wrap around a spike recording device"""
 
+    # If True, the recorder needs to provide only the number of the spikes it records, and not their events,
+    # so that spiking simulator specific recorders may keep only a counter:
+    counting_only = False
+
     def __init__(self, device, *args, **kwargs):
         kwargs["model"] = kwargs.pop("model", "spike_recorder")
         super(SpikeRecorder, self).__init__(device, *args, **kwargs)
@@ -719,22 +795,63 @@ class Multimeter(OutputDevice):
         if name is None:
             name = self.model
         coords = OrderedDict()
-        events = self.events
-        times = events["times"]
         coords[dims_names[0]] = self._determine_variables(variables)
         if flatten_neurons_inds:
             coords[dims_names[1]] = np.arange(self.number_of_neurons)
         else:
             coords[dims_names[1]] = np.array(self.neurons)
         data = np.zeros((len(coords[dims_names[0]]), self.number_of_neurons))
-        if len(times) > 0:
-            senders_sorted_inds = np.argsort(events["senders"])
-            # Get only the last time stamp events:
-            output_inds = events["times"] == events["times"][-1]
-            for i_var, var in enumerate(coords[dims_names[0]]):
-                data[i_var][:, senders_sorted_inds] = events[var][output_inds]
+        # Get only the last time stamp samples:
+        values = self.latest_window(None, coords[dims_names[0]])[0]
+        if values.size:
+            data[:] = values
         return xr.DataArray(data, coords=coords, dims=list(coords.keys()), name=name)
 
+    def _get_window_events(self, t_from=None):
+        """This method returns the events that latest_window selects the samples recorded after t_from from.
+           By default, all events of the multimeter are returned,
+           but spiking simulator specific multimeters may return only the latest ones.
+           Arguments:
+            t_from: the time after which (excluded) recorded samples are needed.
+                    Default = None, corresponding to the samples of the last recorded time point only.
+           Returns:
+            the dictionary of events
+        """
+        return self.events
+
+    def latest_window(self, t_from=None, variables=None):
+        """This method returns the data recorded by the multimeter after a given time,
+           averaged across the time points of that window, for each variable and neuron.
+           Arguments:
+            t_from: the time after which (excluded) recorded samples are returned.
+                    Default = None, corresponding to the samples of the last recorded time point only.
+            variables: a sequence of variables' names (strings) to be selected.
+                       Default = None, corresponds to all variables the multimeter records from.
+           Returns:
+            a numpy array of shape (number of variables, number of neurons), with neurons sorted by sender,
+            which is empty along the neurons' dimension if no samples have been recorded after t_from, and
+            the time of the last recorded sample, or t_from, if there is no such sample
+        """
+        variables = self._determine_variables(variables)
+        events = self._get_window_events(t_from)
+        times = np.asarray(events["times"])
+        if times.size == 0:
+            return np.zeros((len(variables), 0)), t_from
+        t_last = times.max()
+        if t_from is None:
+            window = times == t_last
+        else:
+            window = times > t_from
+        if not np.any(window):
+            return np.zeros((len(variables), 0)), t_from
+        neurons, neurons_inds, n_samples = \
+            np.unique(np.asarray(events["senders"])[window], return_inverse=True, return_counts=True)
+        values = np.empty((len(variables), len(neurons)))
+        for i_var, var in enumerate(variables):
+            values[i_var] = np.bincount(neurons_inds, weights=np.asarray(events[var])[window],
+                                        minlength=len(neurons)) / n_samples
+        return values, t_last
+
     def current_data_mean(self, variables=None, name=None, dim_name="Variable"):
         """This method returns the last time point of the data recorded by the multimeter, averaged across neurons.
            Arguments:
@@ -1099,9 +1216,13 @@ class DeviceSet(pd.Series, HasTraits):
     model = Attr(field_type=str, default="", required=True,
                  label="DeviceSet's model", doc="""Label of DeviceSet's devices' model""")
 
-    _number_of_connections = List(of=int, default=(),
-                                  label="Number of connections",
-                                  doc="""The number of total connections of the DeviceSet""")
+    # The cached numbers of connections and neurons of each Device of the DeviceSet,
+    # (0 if there are none at all), and the connectivity version of the DeviceSet they correspond to.
+    # The connectivity version is increased by the Devices of the DeviceSet whenever their connectivity changes:
+    _number_of_connections = 0
+    _number_of_neurons = 0
+    _connectivity_version = 0
+    _counts_version = -1
 
     def __init__(self, label="", model="", device_set=None, **kwargs):
         pd.Series.__init__(self, device_set, name=str(label), **kwargs)
@@ -1110,6 +1231,9 @@ class DeviceSet(pd.Series, HasTraits):
         if np.any([not isinstance(device, Device) for device in self]):
             raise ValueError("Input device_set is not a Series of Device objects!:\n%s" %
                              str(device_set))
+        self._connectivity_version = 0
+        self._counts_version = -1
+        self._register_to_devices()
         self.update_model()
         LOG.info("%s of model %s for %s created!" % (self.__class__, self.model, self.name))
 
@@ -1123,7 +1247,7 @@ class DeviceSet(pd.Series, HasTraits):
         or a single Device if the argument is an integer indice or a string label."""
         if isinstance(items, string_types) or is_integer(items):
             return super(DeviceSet, self).__getitem__(items)
-        return DeviceSet(name=self.name, model=self.model, device_set=super(DeviceSet, self).__getitem__(items))
+        return DeviceSet(label=self.name, model=self.model, device_set=super(DeviceSet, self).__getitem__(items))
 
     def _repr(self):
         return "%s - Name: %s, Model: %s" % \
@@ -1225,26 +1349,44 @@ class DeviceSet(pd.Series, HasTraits):
                 values_dict.update({device: val})
         return self._return_by_type(values_dict, return_type, concatenation_index_name, name)
 
+    def update_connectivity_counts(self):
+        """This method will compute and cache the numbers of connections and neurons of each Device of the DeviceSet,
+           for the current connectivity version of the DeviceSet."""
+        self._number_of_connections = self.do_for_all_devices("number_of_connections")
+        if np.sum(self._number_of_connections) == 0:
+            self._number_of_connections = 0
+        self._number_of_neurons = self.do_for_all_devices("number_of_neurons")
+        if np.sum(self._number_of_neurons) == 0:
+            self._number_of_neurons = 0
+        self._counts_version = self._connectivity_version
+
+    def _register_to_devices(self):
+        # Register the DeviceSet to its Devices, so that they increase its connectivity version together with theirs:
+        for device in self.values:
+            device._device_sets[id(self)] = self
+
     @property
     def number_of_connections(self):
         """This method will return the total number of connections of each Device of the DeviceSet.
+           The numbers are cached and computed again only if the connectivity has changed since,
+           or via the update() method, if the Devices of the DeviceSet have changed.
            Returns:
             a list of Devices' numbers of connections
         """
-        self._number_of_connections = self.do_for_all_devices("number_of_connections")
-        if np.sum(self._number_of_connections) == 0:
-            self._number_of_connections = 0
+        if self._counts_version != self._connectivity_version:
+            self.update_connectivity_counts()
         return self._number_of_connections
 
     @property
     def number_of_neurons(self):
-        """This method will return the total number of connections of each Device of the DeviceSet.
+        """This method will return the total number of neurons connected to each Device of the DeviceSet.
+           The numbers are cached and computed again only if the connectivity has changed since,
+           or via the update() method, if the Devices of the DeviceSet have changed.
            Returns:
-            a list of Devices' numbers of connections
+            a list of Devices' numbers of neurons
         """
-        self._number_of_neurons = self.do_for_all_devices("number_of_neurons")
-        if np.sum(self._number_of_neurons) == 0:
-            self._number_of_neurons = 0
+        if self._counts_version != self._connectivity_version:
+            self.update_connectivity_counts()
         return self._number_of_neurons
 
     @property
@@ -1328,6 +1470,30 @@ class DeviceSet(pd.Series, HasTraits):
         """
         return self.record_from_per_node()
 
+    def read_new_events(self, cursors=None, variables=None, nodes=None):
+        """This method will return only the events recorded by (a subset of) all Devices of the DeviceSet
+           after their respective cursors, i.e., the ones not read yet, as numpy arrays,
+           without copying the whole history of events.
+           Arguments:
+            cursors: a sequence of the numbers of events already read from each Device.
+                     Default = None, corresponding to all events being new.
+            variables: sequence (list, tuple, array) of variables to be included in the output.
+                       Default=None, corresponds to all recorded variables.
+            nodes: a subselection of Device nodes of the DeviceSet the action should be performed upon
+           Returns:
+            a list of dictionaries of numpy arrays of the new events, one per Device,
+            and a numpy array of the new cursors
+        """
+        devices = self.devices(nodes)
+        if cursors is None:
+            cursors = np.zeros((len(devices),), dtype="i")
+        events = []
+        new_cursors = np.zeros((len(devices),), dtype="i")
+        for i_dev, (device, cursor) in enumerate(zip(devices, cursors)):
+            device_events, new_cursors[i_dev] = self[device].read_new_events(cursor, variables)
+            events.append(device_events)
+        return events, new_cursors
+
     def update_model(self):
         """Assert that all Devices of the set are of the same model."""
         if len(self) > 0:
@@ -1338,9 +1504,11 @@ class DeviceSet(pd.Series, HasTraits):
     def update(self, device_set=None):
         if device_set:
             super(DeviceSet, self).update(device_set)
+        self._register_to_devices()
         self.update_model()
-        self._number_of_connections = self.do_for_all_devices("get_number_of_connections")
-        self._number_of_neurons = self.do_for_all_devices("get_number_of_neurons")
+        # The Devices, and therefore the connectivity, of the DeviceSet might have changed:
+        self._connectivity_version += 1
+        self.update_connectivity_counts()
 
     def Get(self, attrs=None, nodes=None, return_type="dict", name=None):
         """A method to get attributes from (a subset of) all Devices of the DevoceSet.
@@ -1365,39 +1533,54 @@ class DeviceSet(pd.Series, HasTraits):
                 values_dict.update({attr: this_attr})
         return self._return_by_type(values_dict, return_type, name)
 
+    def _get_values_dicts(self, value_dict, n_devices, array_parameters=None):
+        """Method to split a dictionary of attributes' values to one dictionary per Device.
+           Values given as sequences (list, tuple, numpy.ndarray) are distributed to the Devices in order,
+           whereas all other values are set equally to all Devices.
+           Arguments:
+            value_dict: dict of attributes and values to be set
+            n_devices: the number of Devices
+            array_parameters: the names of the parameters that take an array of values per Device.
+                              Their values are distributed in order only if their length equals n_devices.
+                              Default = None, i.e., all parameters are scalar per Device.
+           Returns:
+            a list of dicts of attributes and values, one per Device
+        """
+        array_parameters = ensure_list(array_parameters or [])
+        values_dicts = [dict() for _ in range(n_devices)]
+        for key, val in value_dict.items():
+            if isinstance(val, (list, tuple, np.ndarray)):
+                n_vals = len(val)
+                if key in array_parameters:
+                    if n_vals == n_devices:
+                        # Good for spike times and weights of spike generator
+                        vals = [np.array(v) * np.ones(1) for v in val]
+                    else:
+                        vals = [np.array(val)] * n_devices
+                elif n_vals == n_devices:
+                    # Good for amplitude of dc generator and rate of poisson generator
+                    vals = val
+                elif n_vals == 1:
+                    vals = [val[0]] * n_devices
+                else:
+                    raise_value_error("Values' number %d of scalar parameter %s is neither equal to 1 "
+                                      "nor equal to devices' number %d!" % (n_vals, key, n_devices))
+            else:
+                vals = [val] * n_devices
+            for values_dict, v in zip(values_dicts, vals):
+                values_dict[key] = v
+        return values_dicts
+
     def Set(self, value_dict, nodes=None):
         """A method to set attributes to (a subset of) all Devices of the DeviceSet.
+           Which parameters are array-valued and which scalar per Device is determined by
+           the _array_parameters of the Devices' model, and all Devices are set with a single call to SetDevices.
             value_dict: dict of attributes and values to be set
             nodes: a subselection of Device nodes of the DeviceSet the action should be performed upon
         """
-        # A method to set attributes to all devices of the set
-        # TODO: find a nice way to treat arrays or lists attributes.
-        #  Some NEST device attributes have to be arrays and some scalars,
-        #  but we don't know what is what beforehand...
-        def get_scalar_dict1(din, index):
-            dout = dict()
-            for key, val in din.items():
-                try:
-                    dout[key] = val[index] * np.ones(1)
-                except:
-                    dout[key] = val
-            return dout
-
-        def get_scalar_dict2(din, index):
-            dout = dict()
-            for key, val in din.items():
-                try:
-                    dout[key] = val[index]
-                except:
-                    dout[key] = val
-            return dout
-
-        for i_n, node in enumerate(self.devices(nodes)):
-            try:
-                # Good for spike times and weights of spike generator
-                value_dict_i_n = get_scalar_dict1(value_dict, i_n)
-                self[node].Set(value_dict_i_n)
-            except:
-                # Good for amplitude of dc generator and rate of poisson generator
-                value_dict_i_n = get_scalar_dict2(value_dict, i_n)
-                self[node].Set(value_dict_i_n)
+        devices = [self[node] for node in self.devices(nodes)]
+        if len(devices) == 0:
+            return
+        device_class = devices[0].__class__
+        device_class.SetDevices(devices,
+                                self._get_values_dicts(value_dict, len(devices), device_class._array_parameters))
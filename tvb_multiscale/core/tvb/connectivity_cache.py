@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import os
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from tvb_multiscale.core.config import initialize_logger
+
+from tvb.datatypes.connectivity import Connectivity
+
+
+class ConnectivityCache(object):
+
+    """ConnectivityCache is a content-addressed cache of TVB Connectivity instances,
+       loaded from a file and preprocessed, e.g., by a SimulatorBuilder.
+       The key of a connectivity is the hash of the content of the file and of the preprocessing options,
+       so that a modified file, or different options, never return a stale connectivity.
+       The arrays of the preprocessed connectivities are kept in memory,
+       for the maxsize least recently used keys, and, if a path is given,
+       also written to npz files in that directory, to be shared by different processes, e.g., of a parameter sweep.
+       Every get returns a new, independent, Connectivity instance, which can be modified freely.
+    """
+
+    logger = initialize_logger(__name__)
+
+    # The attributes of a Connectivity that are cached, if not None:
+    attributes = ["region_labels", "weights", "undirected", "tract_lengths", "speed",
+                  "centres", "cortical", "hemispheres", "orientations", "areas"]
+
+    maxsize = 16
+    path = None
+
+    def __init__(self, maxsize=16, path=None):
+        """Constructor of the ConnectivityCache.
+           Arguments:
+            maxsize: the maximum number (int) of connectivities to be kept in memory. Default = 16
+            path: the path of the directory of the npz cache files.
+                  Default = None, for the connectivities to be cached only in memory
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self._connectivities = OrderedDict()
+        # The hashes of the files' content, by path, modification time and size:
+        self._files_hashes = {}
+
+    def clear(self):
+        self._connectivities = OrderedDict()
+        self._files_hashes = {}
+
+    def file_hash(self, filepath):
+        """Method to compute the hash of the content of a file,
+           which is computed only once for every modification of the file.
+           Arguments:
+            filepath: the path of the file
+           Returns:
+            the hexadecimal SHA1 hash (string) of the content of the file
+        """
+        stat = os.stat(filepath)
+        file_key = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+        if file_key not in self._files_hashes:
+            hash = hashlib.sha1()
+            with open(filepath, "rb") as file:
+                for chunk in iter(lambda: file.read(1 << 20), b""):
+                    hash.update(chunk)
+            self._files_hashes[file_key] = hash.hexdigest()
+        return self._files_hashes[file_key]
+
+    def key(self, filepath, options):
+        """Method to compute the key of a preprocessed connectivity.
+           Arguments:
+            filepath: the path of the connectivity file
+            options: a dict of the preprocessing options
+           Returns:
+            the hexadecimal SHA1 hash (string) of the content of the file and of the options
+        """
+        hash = hashlib.sha1(self.file_hash(filepath).encode())
+        hash.update(repr(sorted(options.items())).encode())
+        return hash.hexdigest()
+
+    def filepath(self, key):
+        return os.path.join(self.path, "connectivity_%s.npz" % key)
+
+    def _arrays(self, connectivity):
+        # Copies of the cached attributes of a connectivity:
+        arrays = OrderedDict()
+        for attr in self.attributes:
+            value = getattr(connectivity, attr, None)
+            if value is not None:
+                arrays[attr] = np.array(value)
+        return arrays
+
+    def _connectivity(self, arrays):
+        # A new Connectivity instance with copies of the cached arrays:
+        connectivity = Connectivity()
+        for attr, value in arrays.items():
+            value = np.array(value)
+            # The boolean undirected flag is cached as a 0-d array:
+            setattr(connectivity, attr, value.item() if attr == "undirected" else value)
+        connectivity.configure()
+        return connectivity
+
+    def _load(self, key):
+        if self.path is None or not os.path.isfile(self.filepath(key)):
+            return None
+        with np.load(self.filepath(key)) as file:
+            arrays = OrderedDict([(attr, file[attr]) for attr in self.attributes if attr in file.files])
+        self.logger.info("Preprocessed connectivity loaded from %s" % self.filepath(key))
+        return arrays
+
+    def _save(self, key, arrays):
+        if self.path is None:
+            return
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        # A unique temporary file, so that concurrent writers of the same cache file do not corrupt each other's:
+        fd, temp_filepath = tempfile.mkstemp(dir=self.path, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez_compressed(file, **arrays)
+            os.replace(temp_filepath, self.filepath(key))
+        except BaseException:
+            os.remove(temp_filepath)
+            raise
+
+    def get(self, filepath, options, preprocess_fun):
+        """Method to return a preprocessed connectivity,
+           from memory, or from an npz file of the cache directory, if any,
+           or else, by loading and preprocessing it, and then caching it.
+           Arguments:
+            filepath: the path of the connectivity file
+            options: a dict of the preprocessing options, which determine the result of preprocess_fun
+            preprocess_fun: a function that takes the loaded Connectivity and returns it preprocessed
+           Returns:
+            a new Connectivity instance
+        """
+        key = self.key(filepath, options)
+        arrays = self._connectivities.pop(key, None)
+        if arrays is None:
+            arrays = self._load(key)
+            if arrays is None:
+                arrays = self._arrays(preprocess_fun(Connectivity.from_file(filepath)))
+                self._save(key, arrays)
+        # (Re)insert it as the most recently used connectivity...
+        self._connectivities[key] = arrays
+        # ...and remove the least recently used ones, if more than maxsize:
+        while len(self._connectivities) > self.maxsize:
+            self._connectivities.popitem(last=False)
+        return self._connectivity(arrays)
+
+
+# The cache shared by all SimulatorBuilder instances by default:
+CONNECTIVITY_CACHE = ConnectivityCache()
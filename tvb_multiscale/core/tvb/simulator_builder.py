@@ -5,6 +5,7 @@ from six import string_types
 import numpy as np
 
 from tvb_multiscale.core.config import CONFIGURED
+from tvb_multiscale.core.tvb.connectivity_cache import CONNECTIVITY_CACHE
 
 from tvb.datatypes.connectivity import Connectivity
 from tvb.simulator.cosimulator import CoSimulator
@@ -23,6 +24,8 @@ class SimulatorBuilder(object):
        - remove the self-connections or brain region nodes (diagonal of connectivity matrix)
        - set integrator (including noise and integration step),
        - set monitor (including model's variables of interest and period)
+       Connectivities loaded from file are preprocessed only once for the same file and options,
+       and then copied from the connectivity_cache (a ConnectivityCache instance, or None for no caching).
     """
 
     cosimulation = True
@@ -34,6 +37,7 @@ class SimulatorBuilder(object):
     symmetric_connectome = False
     remove_self_connections = False
     delays_flag = True
+    connectivity_cache = CONNECTIVITY_CACHE
     model = ReducedWongWangExcIOInhI
     variables_of_interest = None
     integrator = HeunStochastic
@@ -53,24 +57,32 @@ class SimulatorBuilder(object):
         self.ceil_connectivity = 1.0
         self.symmetric_connectome = False
         self.delays_flag = True
+        self.connectivity_cache = CONNECTIVITY_CACHE
         self.model = ReducedWongWangExcIOInhI
         self.integrator = HeunStochastic
         self.dt = 0.1
         self.noise_strength = 0.001
         self.monitor_period = 1.0
 
-    def build(self, **model_params):
-        """This method will build the TVB simulator, based on the builder's properties.
+    def _connectivity_options(self):
+        # The options that determine the result of preprocess_connectivity,
+        # including the builder's class, since subclasses may override preprocess_connectivity:
+        return {"builder": type(self).__module__ + "." + type(self).__qualname__,
+                "dt": self.dt,
+                "remove_self_connections": self.remove_self_connections,
+                "scale_connectivity_weights": self.scale_connectivity_weights,
+                "symmetric_connectome": self.symmetric_connectome,
+                "scale_connectivity_weights_by_percentile": self.scale_connectivity_weights_by_percentile,
+                "ceil_connectivity": self.ceil_connectivity,
+                "delays_flag": self.delays_flag}
+
+    def preprocess_connectivity(self, connectivity):
+        """This method will normalize and configure a connectivity, based on the builder's properties.
            Arguments:
-            - **model_params: keyword arguments to modify the default model parameters
+            - connectivity: the TVB Connectivity instance, which is modified in place
            Returns:
-            - the TVB simulator built, but not yet configured.
+            - the preprocessed and configured connectivity
         """
-        # Load, normalize and configure connectivity
-        if isinstance(self.connectivity, string_types):
-            connectivity = Connectivity.from_file(self.connectivity)
-        else:
-            connectivity = self.connectivity
         # Given that
         # idelays = numpy.rint(delays / dt).astype(numpy.int32)
         # and delays = tract_lengths / speed
@@ -92,6 +104,24 @@ class SimulatorBuilder(object):
             connectivity.configure()  # to set speed
             connectivity.tract_lengths = minimum_tract_length * np.ones(connectivity.tract_lengths.shape)
         connectivity.configure()
+        return connectivity
+
+    def build(self, **model_params):
+        """This method will build the TVB simulator, based on the builder's properties.
+           Arguments:
+            - **model_params: keyword arguments to modify the default model parameters
+           Returns:
+            - the TVB simulator built, but not yet configured.
+        """
+        # Load, normalize and configure connectivity
+        if isinstance(self.connectivity, string_types):
+            if self.connectivity_cache is None:
+                connectivity = self.preprocess_connectivity(Connectivity.from_file(self.connectivity))
+            else:
+                connectivity = self.connectivity_cache.get(self.connectivity, self._connectivity_options(),
+                                                           self.preprocess_connectivity)
+        else:
+            connectivity = self.preprocess_connectivity(self.connectivity)
 
         # Build model:
         model = self.model(**model_params)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+import numpy as np
+from xarray import DataArray
+
+
+class SpikesBuffer(object):
+
+    """SpikesBuffer class to hold spike events in a columnar way,
+       i.e., as one array of spikes' times and one array of the respective senders' integer ids.
+       The arrays are preallocated and grow geometrically when full,
+       so that appending spikes has an amortised constant cost per spike,
+       and reading them out returns contiguous arrays, without any Python list (re)allocation.
+       It can be used by any recorder that reads spikes from a spiking simulator in chunks."""
+
+    def __init__(self, initial_capacity=1024, times_dtype="f8", senders_dtype="i8", growth_factor=2.0):
+        if growth_factor <= 1.0:
+            raise ValueError("The growth factor of a %s has to be > 1.0, but it is %g!"
+                             % (self.__class__.__name__, growth_factor))
+        self._growth_factor = growth_factor
+        self._initial_capacity = max(int(initial_capacity), 1)
+        self._times = np.empty((self._initial_capacity, ), dtype=times_dtype)
+        self._senders = np.empty((self._initial_capacity, ), dtype=senders_dtype)
+        self._n_events = 0
+
+    def __len__(self):
+        return self._n_events
+
+    @property
+    def number_of_events(self):
+        return self._n_events
+
+    @property
+    def capacity(self):
+        return self._times.shape[0]
+
+    @property
+    def times(self):
+        """The spikes' times, as a read-only view of the buffer."""
+        times = self._times[:self._n_events]
+        times.flags.writeable = False
+        return times
+
+    @property
+    def senders(self):
+        """The spikes' senders' ids, as a read-only view of the buffer."""
+        senders = self._senders[:self._n_events]
+        senders.flags.writeable = False
+        return senders
+
+    def _grow(self, n_events):
+        """Method to reallocate the buffer arrays so that they can hold at least n_events,
+           growing their capacity geometrically."""
+        capacity = self.capacity
+        while capacity < n_events:
+            capacity = int(np.ceil(capacity * self._growth_factor))
+        for attr in ["_times", "_senders"]:
+            old = getattr(self, attr)
+            new = np.empty((capacity, ), dtype=old.dtype)
+            new[:self._n_events] = old[:self._n_events]
+            setattr(self, attr, new)
+
+    def append(self, times, senders):
+        """Method to append spike events to the buffer.
+           Arguments:
+            times: a sequence of spikes' times
+            senders: a sequence of senders' ids of the same size as times,
+                     or a single sender id, which is broadcast to all spikes' times.
+        """
+        times = np.asarray(times).ravel()
+        n_new = times.size
+        if n_new == 0:
+            return
+        n_events = self._n_events + n_new
+        if n_events > self.capacity:
+            self._grow(n_events)
+        self._times[self._n_events:n_events] = times
+        self._senders[self._n_events:n_events] = senders
+        self._n_events = n_events
+
+    def append_from_dict(self, senders_times, times_scale=1.0):
+        """Method to append spike events to the buffer from a dictionary of spikes' times per sender,
+           as returned by the recorders of some spiking simulators (e.g., ANNarchy.Monitor.get("spike")).
+           Arguments:
+            senders_times: a dictionary of {sender id: sequence of spikes' times}
+            times_scale: a scaling factor for the spikes' times, e.g., dt to convert time steps to ms. Default = 1.0
+        """
+        if len(senders_times) == 0:
+            return
+        senders = np.fromiter(senders_times.keys(), dtype=self._senders.dtype, count=len(senders_times))
+        times = [np.asarray(sender_times).ravel() for sender_times in senders_times.values()]
+        n_spikes = np.array([sender_times.size for sender_times in times])
+        if n_spikes.sum() == 0:
+            return
+        times = np.concatenate(times)
+        if times_scale != 1.0:
+            times = times * times_scale
+        self.append(times, np.repeat(senders, n_spikes))
+
+    def get_events(self):
+        """Method to get a copy of the spike events of the buffer.
+           Returns:
+            an events' dictionary of arrays of spikes' "times" and "senders"
+        """
+        return OrderedDict([("times", self._times[:self._n_events].copy()),
+                            ("senders", self._senders[:self._n_events].copy())])
+
+    def clear(self, shrink=False):
+        """Method to empty the buffer.
+           Arguments:
+            shrink: if True, the buffer's capacity is reduced back to its initial one. Default = False.
+        """
+        self._n_events = 0
+        if shrink and self.capacity > self._initial_capacity:
+            self._times = np.empty((self._initial_capacity, ), dtype=self._times.dtype)
+            self._senders = np.empty((self._initial_capacity, ), dtype=self._senders.dtype)
+
+
+class TimeSeriesBuffer(object):
+
+    """TimeSeriesBuffer class to hold continuous time data of shape (Time, Variable, Neuron),
+       read from a spiking simulator's recorder in chunks of consecutive time points.
+       New chunks are only appended to a list, together with their time points,
+       at a constant cost per read, independent of the length of the data already recorded.
+       The chunks are concatenated along time only when the data are requested."""
+
+    def __init__(self, variables=None, neurons=None):
+        self._variables = variables
+        self._neurons = neurons
+        self._chunks = []
+        self._times_chunks = []
+        self._n_times = 0
+
+    @property
+    def variables(self):
+        return self._variables
+
+    @property
+    def neurons(self):
+        return self._neurons
+
+    @property
+    def number_of_times(self):
+        return self._n_times
+
+    @property
+    def shape(self):
+        if self._n_times == 0:
+            return (0, 0, 0)
+        return (self._n_times, ) + self._chunks[0].shape[1:]
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def append(self, data, times, variables=None, neurons=None):
+        """Method to append a chunk of data to the buffer.
+           Arguments:
+            data: an array of shape (Time, Variable, Neuron)
+            times: a sequence of the time points of the chunk of data
+            variables: the labels of the variables of the chunk of data.
+                       Default = None, corresponding to the variables already set to the buffer.
+            neurons: the labels of the neurons of the chunk of data.
+                     Default = None, corresponding to the neurons already set to the buffer.
+        """
+        data = np.asarray(data)
+        if data.shape[0] == 0:
+            return
+        times = np.asarray(times)
+        if times.shape[0] != data.shape[0]:
+            raise ValueError("Adding data of time length %d with a time vector of length %d!"
+                             % (data.shape[0], times.shape[0]))
+        for attr, labels in zip(["_variables", "_neurons"], [variables, neurons]):
+            if labels is not None:
+                if getattr(self, attr) is None:
+                    setattr(self, attr, labels)
+                elif np.any(np.asarray(getattr(self, attr)) != np.asarray(labels)):
+                    raise ValueError("Adding data with %s %s different from the buffer's ones %s!"
+                                     % (attr[1:], str(labels), str(getattr(self, attr))))
+        if self._n_times and data.shape[1:] != self._chunks[0].shape[1:]:
+            raise ValueError("Adding data of shape %s incompatible with the buffer's data shape %s!"
+                             % (str(data.shape), str(self.shape)))
+        self._chunks.append(data)
+        self._times_chunks.append(times)
+        self._n_times += data.shape[0]
+
+    def _consolidate(self):
+        """Method to concatenate all chunks along time to a single one,
+           so that repeated readouts without new data do not concatenate them again."""
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks, axis=0)]
+            self._times_chunks = [np.concatenate(self._times_chunks)]
+
+    @property
+    def times(self):
+        if self._n_times == 0:
+            return np.array([])
+        self._consolidate()
+        return self._times_chunks[0]
+
+    @property
+    def data(self):
+        if self._n_times == 0:
+            return np.empty((0, 0, 0))
+        self._consolidate()
+        return self._chunks[0]
+
+    def get_window(self, t_from=None):
+        """Method to get only the data recorded after a given time,
+           without concatenating the chunks recorded before it.
+           Arguments:
+            t_from: the time after which (excluded) recorded data are returned.
+                    Default = None, corresponding to the data of the last recorded time point only.
+           Returns:
+            the vector of the time points and the array of shape (Time, Variable, Neuron) of the data
+        """
+        if self._n_times == 0:
+            return np.array([]), np.empty((0, 0, 0))
+        if t_from is None:
+            return self._times_chunks[-1][-1:], self._chunks[-1][-1:]
+        times = []
+        chunks = []
+        for chunk_times, chunk in zip(reversed(self._times_chunks), reversed(self._chunks)):
+            i_from = np.searchsorted(chunk_times, t_from, side="right")
+            if i_from < chunk_times.shape[0]:
+                times.append(chunk_times[i_from:])
+                chunks.append(chunk[i_from:])
+            if i_from > 0:
+                break
+        if len(times) == 0:
+            return np.array([]), np.empty((0, ) + self._chunks[0].shape[1:])
+        return np.concatenate(times[::-1]), np.concatenate(chunks[::-1], axis=0)
+
+    def to_DataArray(self, name=None, dims_names=["Time", "Variable", "Neuron"]):
+        """Method to materialize the data of the buffer to a xarray.DataArray.
+           Arguments:
+            name: label of output. Default = None
+            dims_names: sequence of dimensions' labels (strings) for the output array.
+                        Default = ["Time", "Variable", "Neuron"]
+           Returns:
+            a xarray DataArray with the output data
+        """
+        if self._n_times == 0:
+            return DataArray(np.empty((0, 0, 0)), dims=dims_names,
+                             coords={dim: [] for dim in dims_names}, name=name)
+        return DataArray(self.data, dims=dims_names,
+                         coords={dims_names[0]: self.times,
+                                 dims_names[1]: self._variables,
+                                 dims_names[2]: self._neurons},
+                         name=name)
+
+    def clear(self):
+        """Method to empty the buffer, keeping its variables' and neurons' labels."""
+        self._chunks = []
+        self._times_chunks = []
+        self._n_times = 0
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from inspect import stack
+from collections.abc import Hashable
 from itertools import product
 from collections import OrderedDict
 from six import string_types
@@ -12,7 +13,7 @@ from xarray import DataArray
 
 
 from tvb.contrib.scripts.utils.data_structures_utils import \
-    ensure_list, flatten_list, is_integer, extract_integer_intervals
+    ensure_list, is_integer, extract_integer_intervals
 
 
 def get_caller_fun_name(caller_id=1):
@@ -39,6 +40,23 @@ def flatten_neurons_inds_in_DataArray(data_array, neurons_dim_label="Neuron"):
     return data_array
 
 
+def _in_values_mask(x, values):
+    """This function returns a boolean mask of whether each value of an array x is
+       within a sequence of values, or within an interval, if values is of length 2,
+       where None stands for an open interval end.
+    """
+    values = list(values)
+    if len(values) == 2:
+        mask = np.ones(x.shape, dtype="bool")
+        if values[0] is not None:
+            mask &= x >= values[0]
+        if values[1] is not None:
+            mask &= x <= values[1]
+        return mask
+    else:
+        return np.isin(x, values)
+
+
 def filter_events(events, variables=None, times=None, exclude_times=[]):
     """This method will select/exclude part of the measured events, depending on user inputs
         Arguments:
@@ -47,29 +65,15 @@ def filter_events(events, variables=None, times=None, exclude_times=[]):
                        assumed to correspond to keys of the events dict.
                        Default=None, corresponds to all keys of events.
             times: sequence (list, tuple, array) of times the events of which should be included in the output.
+                   If it is of length 2, it is considered to be a time interval, with None standing for an open end.
                      Default = None, corresponds to all events' times.
             exclude_times: sequence (list, tuple, array) of times
-                             the events of which should be excluded from the output. Default = [].
+                             the events of which should be excluded from the output,
+                             or a time interval, like for times. Default = [].
         Returns:
               the filtered dictionary (of arrays per attribute) of events
     """
 
-    def in_fun(values):
-        # Function to return a boolean about whether a value is
-        # within a sequence or an interval (len(values) == 2) of values:
-        if len(values) == 2:
-            if values[0] is not None:
-                if values[1] is not None:
-                    return lambda x: x >= values[0] and x <= values[1]
-                else:
-                    return lambda x: x >= values[0]
-            elif values[1] is not None:
-                return lambda x: x <= values[0]
-            else:
-                return lambda x: x
-        else:
-            return lambda x: x in values
-
     # The variables to return:
     if variables is None:
         variables = events.keys()
@@ -77,31 +81,134 @@ def filter_events(events, variables=None, times=None, exclude_times=[]):
     # The events:
     output_events = OrderedDict()
 
-    events_times = np.array(events["times"])
+    events_times = np.asarray(events["times"])
 
-    n_events = len(events["times"])
+    n_events = len(events_times)
     if n_events > 0:
         # As long as there are events:
         # If we (un)select times...
+        inds = np.ones((n_events,), dtype="bool")
         if times is not None and len(times) > 0:
-            in_times = in_fun(flatten_list(times))
-        else:
-            in_times = lambda x: True
+            inds &= _in_values_mask(events_times, times)
         if exclude_times is not None and len(exclude_times) > 0:
-            not_in_exclude_times = lambda x: not in_fun(flatten_list(exclude_times))(x)
-        else:
-            not_in_exclude_times = lambda x: True
-        inds = np.logical_and(np.ones((n_events,)),
-                              [in_times(time) and not_in_exclude_times(time)
-                               for time in events_times])
+            inds &= ~_in_values_mask(events_times, exclude_times)
         for var in ensure_list(variables):
-            output_events[var] = events[var][inds]
+            output_events[var] = np.asarray(events[var])[inds]
     else:
         for var in ensure_list(variables):
             output_events[var] = []
     return output_events
 
 
+def sort_events_by_x_and_y(events, x="senders", y="times",
+                           filter_x=None, filter_y=None, exclude_x=[], exclude_y=[], hashfun=str):
+    """This method will group the values of the events' attribute y by the values of the events' attribute x,
+       e.g., the spikes' times by sender neuron.
+        Arguments:
+            events: dictionary of events
+            x: the events' attribute to group by. Default = "senders"
+            y: the events' attribute to be grouped. Default = "times"
+            filter_x: sequence (list, tuple, array) of values of x to be included in the output.
+                      Default = None, corresponds to all unique values of x.
+            filter_y: sequence (list, tuple, array) of values of y the events of which should be included.
+                      Default = None, corresponds to all events.
+            exclude_x: sequence (list, tuple, array) of values of x to be excluded from the output. Default = [].
+            exclude_y: sequence (list, tuple, array) of values of y the events of which should be excluded.
+                       Default = [].
+            hashfun: a function to generate the output's keys for values of x that are not hashable
+                     (e.g., neurons' indices that are sequences). Default = str.
+        Returns:
+            an ordered dictionary of sorted arrays of y values, with the values of x as keys
+    """
+    xs = np.asarray(events[x])
+    ys = np.asarray(events[y])
+    # Select the events based on the values of y:
+    if len(ys) and (filter_y is not None or len(exclude_y) > 0):
+        inds = np.ones((len(ys),), dtype="bool")
+        if filter_y is not None:
+            inds &= np.isin(ys, list(filter_y))
+        if len(exclude_y) > 0:
+            inds &= ~np.isin(ys, list(exclude_y))
+        xs = xs[inds]
+        ys = ys[inds]
+    # Group the values of y by the unique values of x, via one sorting:
+    if len(xs):
+        if xs.ndim > 1:
+            # e.g., for neurons' indices of the form (population index, neuron index):
+            unique_xs, xs_inds = np.unique(xs, axis=0, return_inverse=True)
+        else:
+            unique_xs, xs_inds = np.unique(xs, return_inverse=True)
+        xs_inds = xs_inds.reshape((-1,))
+        # Group by x with one (stable, integer) sorting, and then sort the (much smaller) groups by y:
+        grouped_ys = np.split(ys[np.argsort(xs_inds, kind="stable")],
+                              np.cumsum(np.bincount(xs_inds, minlength=len(unique_xs)))[:-1])
+        grouped_ys = [np.sort(group_ys) for group_ys in grouped_ys]
+        grouped_ys = OrderedDict(zip([hashfun(xlbl) if not isinstance(xlbl, Hashable) else xlbl
+                                      for xlbl in unique_xs.tolist()], grouped_ys))
+    else:
+        unique_xs = xs
+        grouped_ys = OrderedDict()
+    # The output's values of x:
+    if filter_x is None:
+        xlabels = unique_xs.tolist()
+    else:
+        filter_x = np.asarray(list(filter_x))
+        if filter_x.ndim > 1:
+            xlabels = np.unique(filter_x, axis=0).tolist()
+        else:
+            xlabels = np.unique(filter_x).tolist()
+    sorted_events = OrderedDict()
+    for xlbl in xlabels:
+        if xlbl in exclude_x:
+            continue
+        if not isinstance(xlbl, Hashable):
+            key = hashfun(xlbl)
+        else:
+            key = xlbl
+        sorted_events[key] = grouped_ys.get(key, np.array([]))
+    return sorted_events
+
+
+def continuous_data_to_events(data, times, variables, senders, exclude_zeros=False):
+    """This function converts continuous time data to an events' dictionary,
+       by broadcasting the time and senders' vectors, without iterating over time points and senders.
+       Arguments:
+        - data: an array of shape (Time, Variable, Neuron)
+        - times: a vector of the time points of the data
+        - variables: a sequence of the labels of the variables of the data
+        - senders: a vector of the labels of the neurons of the data
+        - exclude_zeros: boolean flag to include only the nonzero values of each variable,
+                         with the times and senders of all variables concatenated in the order of variables.
+                         Default = False, corresponding to all (time, neuron) samples, in time major order.
+       Returns:
+        - events: a dictionary of arrays of "times", "senders" and of each one of the variables
+    """
+    data = np.asarray(data)
+    times = np.asarray(times)
+    senders = np.asarray(senders)
+    events = OrderedDict()
+    if exclude_zeros:
+        times_inds = []
+        senders_inds = []
+        for i_var, var in enumerate(variables):
+            var_times_inds, var_senders_inds = np.nonzero(data[:, i_var, :])
+            events[var] = data[var_times_inds, i_var, var_senders_inds]
+            times_inds.append(var_times_inds)
+            senders_inds.append(var_senders_inds)
+        times_inds = np.concatenate(times_inds) if len(times_inds) else np.array([], dtype="i")
+        senders_inds = np.concatenate(senders_inds) if len(senders_inds) else np.array([], dtype="i")
+        events["times"] = times[times_inds]
+        events["senders"] = senders[senders_inds]
+    else:
+        n_times = data.shape[0]
+        n_senders = data.shape[-1]
+        events["times"] = np.repeat(times[:n_times], n_senders)
+        events["senders"] = np.tile(senders[:n_senders], n_times)
+        for i_var, var in enumerate(variables):
+            events[var] = data[:, i_var, :].ravel()
+    return events
+
+
 def summarize(results, digits=None):
 
     def unique_floats_fun(vals):
@@ -5,6 +5,8 @@ import importlib
 from six import string_types
 from copy import deepcopy
 
+import numpy as np
+
 from tvb_multiscale.tvb_annarchy.config import CONFIGURED, initialize_logger
 from tvb_multiscale.tvb_annarchy.annarchy_models.devices import \
     ANNarchyInputDeviceDict, ANNarchyOutputDeviceDict, ANNarchyInputDevice # , ANNarchyACCurrentInjector
@@ -257,6 +259,59 @@ def create_device(device_model, params=None, config=CONFIGURED, annarchy_instanc
         return annarchy_device
 
 
+def create_devices(device_model, number_of_devices, params=None, labels=None, config=CONFIGURED,
+                   annarchy_instance=None, **kwargs):
+    """function to create several ANNarchyDevice instances of the same model,
+       as the channels of a single multi-channel device.
+       For input devices, a single ANNarchy Population (e.g., one PoissonPopulation) of number_of_devices * size
+       neurons is created, where size is the size (geometry) of each device (default = 1),
+       and each channel is an ANNarchyInputDevice wrapping an ANNarchy PopulationView of size neurons of it.
+       Since they are views of the same population,
+       they can be set all together on the population, see ANNarchyInputDevice.SetDevices.
+       Output devices are created one by one, since they are populated by ANNarchy Monitors only when connected.
+       Arguments:
+        device_model: name (string) of the device model
+        number_of_devices: the number (int) of devices to create
+        params: dictionary of parameters of the devices and/or their synapse. Default = None
+        labels: a sequence of the labels (strings) of the devices. Default = None
+        config: configuration class instance. Default: imported default CONFIGURED object.
+        annarchy_instance: the ANNarchy instance. Default = None, which raises an error.
+       Returns:
+        a list of the ANNarchyDevice instances
+    """
+    if annarchy_instance is None:
+        raise_value_error("There is no ANNarchy instance!")
+    if labels is None:
+        labels = [""] * number_of_devices
+    if device_model not in ANNarchyInputDeviceDict.keys():
+        return [create_device(device_model, params=params, config=config, annarchy_instance=annarchy_instance,
+                              label=label, **kwargs)
+                for label in labels]
+    # Get the default parameters for this device, and update them with any user provided parameters:
+    default_params = deepcopy(config.ANNARCHY_INPUT_DEVICES_PARAMS_DEF.get(device_model, {}))
+    if isinstance(params, dict):
+        default_params.update(deepcopy(params))
+    default_params.pop("label", None)
+    size = int(np.prod(default_params.pop("geometry", 1)))
+    # The device population is named by the common prefix of the labels of its channels, if any:
+    default_params["name"] = os.path.commonprefix(list(labels)).strip("_") or device_model
+    # Create the population of all channels...
+    population = create_population(device_model, annarchy_instance, size=number_of_devices * size,
+                                   params=deepcopy(default_params),
+                                   import_path=kwargs.get("import_path", config.MYMODELS_IMPORT_PATH))
+    population_ind = get_population_ind(population, annarchy_instance)
+    # ...and wrap each group of size neurons of it, as an ANNarchy PopulationView, with an ANNarchyInputDevice:
+    annarchy_devices = []
+    for i_dev, label in enumerate(labels):
+        annarchy_device = ANNarchyInputDeviceDict[device_model](None, label=label,
+                                                                annarchy_instance=annarchy_instance)
+        annarchy_device._population = population[i_dev * size:(i_dev + 1) * size]
+        annarchy_device._population_ind = population_ind
+        annarchy_device.params = deepcopy(default_params)
+        annarchy_devices.append(annarchy_device)
+    return annarchy_devices
+
+
 def connect_input_device(annarchy_device, population, neurons_inds_fun=None,
                          weight=1.0, delay=0.0, receptor_type="exc",
                          import_path=CONFIGURED.MYMODELS_IMPORT_PATH):
@@ -345,8 +400,8 @@ def connect_input_device(annarchy_device, population, neurons_inds_fun=None,
     annarchy_device.projections_pre.append(proj)
     population.projections_post.append(proj)
     # Update the number of connected neurons to the device:
-    annarchy_device._number_of_connections = annarchy_device.get_number_of_connections()
-    annarchy_device._number_of_neurons = annarchy_device.get_number_of_neurons()
+    annarchy_device.connectivity_changed()
+    annarchy_device.update_connectivity_counts()
     return annarchy_device
 
 
@@ -368,8 +423,8 @@ def connect_output_device(annarchy_device, population, neurons_inds_fun=None):
     monitor.name = "%s_%d" % (annarchy_device.label, len(annarchy_device.monitors) + 1)
     annarchy_device.monitors[monitor] = neurons
     # Update the number of connections and connected neurons to the device:
-    annarchy_device._number_of_connections = annarchy_device.get_number_of_connections()
-    annarchy_device._number_of_neurons = annarchy_device.get_number_of_neurons()
+    annarchy_device.connectivity_changed()
+    annarchy_device.update_connectivity_counts()
     return annarchy_device
 
 
@@ -395,3 +450,19 @@ def connect_device(annarchy_device, population, neurons_inds_fun=None,
                                     import_path=kwargs.pop("import_path", config.MYMODELS_IMPORT_PATH))
     else:
         return connect_output_device(annarchy_device, population, neurons_inds_fun)
+
+
+def connect_devices(devices_connections, config=CONFIGURED, **kwargs):
+    """This function connects several ANNarchy Device instances, e.g., the channels of a multi-channel device,
+       to ANNarchyPopulation instances.
+       Since every ANNarchy Projection connects a (view of a) source population to a (view of a) target population,
+       one Projection is created for every channel and target population, as by connect_device.
+       Arguments:
+        devices_connections: a list of
+                             (annarchy_device, population, neurons_inds_fun, weight, delay, receptor_type) tuples,
+                             see connect_device
+        config: configuration class instance. Default: imported default CONFIGURED object.
+    """
+    for annarchy_device, population, neurons_inds_fun, weight, delay, receptor_type in devices_connections:
+        connect_device(annarchy_device, population, neurons_inds_fun, weight, delay,
+                       "exc" if receptor_type is None else receptor_type, config=config, **kwargs)
@@ -2,6 +2,8 @@
 
 from copy import deepcopy
 
+import numpy as np
+
 from tvb_multiscale.tvb_annarchy.config import CONFIGURED, initialize_logger
 from tvb_multiscale.tvb_annarchy.annarchy_models.population import ANNarchyPopulation
 from tvb_multiscale.tvb_annarchy.annarchy_models.region_node import ANNarchyRegionNode
@@ -73,6 +75,22 @@ class ANNarchyModelBuilder(SpikingModelBuilder):
         return {'synapse_model': syn_model, 'weights': weights,
                 'delays': delays, 'target': target, 'params': params}
 
+    def _expected_number_of_connections(self, n_src, n_trg, src_is_trg, conn_spec):
+        # The expected number of connections of the ANNarchy connection methods:
+        method = conn_spec.get("method", "all_to_all").lower()
+        if method == "one_to_one":
+            return np.minimum(n_src, n_trg)
+        elif method == "fixed_number_pre":
+            return conn_spec["number"] * n_trg
+        elif method == "fixed_number_post":
+            return conn_spec["number"] * n_src
+        n_all = n_src * n_trg
+        if src_is_trg and not conn_spec.get("allow_self_connections", False):
+            n_all -= n_src
+        if method == "fixed_probability":
+            return int(np.round(conn_spec["probability"] * n_all))
+        return n_all
+
     def _assert_model(self, model):
         return assert_model(model, self.annarchy_instance, self._models_import_path)
 
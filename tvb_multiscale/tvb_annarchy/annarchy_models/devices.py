@@ -8,7 +8,9 @@ import numpy as np
 
 from tvb_multiscale.core.spiking_models.devices import \
    Device, InputDevice, OutputDevice, SpikeRecorder, Multimeter, SpikeMultimeter
-from tvb_multiscale.core.utils.data_structures_utils import flatten_neurons_inds_in_DataArray
+from tvb_multiscale.core.utils.data_structures_utils import \
+    flatten_neurons_inds_in_DataArray, continuous_data_to_events
+from tvb_multiscale.core.utils.buffers import SpikesBuffer, TimeSeriesBuffer
 
 from tvb_multiscale.tvb_annarchy.annarchy_models.population import ANNarchyPopulation
 
@@ -97,7 +99,16 @@ class ANNarchyDevice(Device):
 class ANNarchyInputDevice(ANNarchyDevice, InputDevice, ANNarchyPopulation):
     __metaclass__ = ABCMeta
 
-    """ANNarchyInputDevice class to wrap around an ANNarchy.Population, acting as an input (stimulating) device"""
+    """ANNarchyInputDevice class to wrap around an ANNarchy.Population, acting as an input (stimulating) device,
+       or around an ANNarchy.PopulationView, if the device is a channel of a multi-channel device,
+       see tvb_multiscale.tvb_annarchy.annarchy_models.builders.annarchy_factory.create_devices"""
+
+    from ANNarchy import Population, PopulationView
+
+    _population = Attr(field_type=object, default=None, required=False,
+                       label="ANNarchy.Population or ANNarchy.PopulationView",
+                       doc="""Instance of ANNarchy.Population, or of ANNarchy.PopulationView
+                              of the population of a multi-channel device""")
 
     params = {}
 
@@ -112,8 +123,19 @@ class ANNarchyInputDevice(ANNarchyDevice, InputDevice, ANNarchyPopulation):
 
     def _assert_device(self):
         if self.annarchy_instance is not None and self._population is not None:
-            from ANNarchy import Population
-            assert isinstance(self._population, Population)
+            assert isinstance(self._population, (self.Population, self.PopulationView))
+
+    @property
+    def is_channel(self):
+        """True if the device is a channel, i.e., an ANNarchy.PopulationView, of a multi-channel device."""
+        return isinstance(self._population, self.PopulationView)
+
+    def _get_population_ind(self):
+        from tvb_multiscale.tvb_annarchy.annarchy_models.builders.annarchy_factory import get_population_ind
+        # The channels of a multi-channel device have the indice of the population of the device:
+        if self.is_channel:
+            return get_population_ind(self._population.population, self.annarchy_instance)
+        return get_population_ind(self._population, self.annarchy_instance)
 
     @property
     def annarchy_model(self):
@@ -130,6 +152,45 @@ class ANNarchyInputDevice(ANNarchyDevice, InputDevice, ANNarchyPopulation):
         """
         ANNarchyPopulation.Set(self, values_dict)
 
+    @classmethod
+    def SetDevices(cls, devices, values_dicts):
+        """Method to set attributes of several devices of the same model.
+           If they are all channels of the same multi-channel device,
+           i.e., ANNarchy.PopulationViews of the same ANNarchy.Population, see annarchy_factory.create_devices,
+           they are set with a single set call, on the population, or on a view of all their neurons,
+           whereby every attribute is set as one array of the values of all these neurons,
+           i.e., of the lists of values, for the _array_parameters (e.g., spike_times) of the devices.
+           Otherwise, each device is set in turn.
+           Arguments:
+            devices: a sequence (list, tuple) of ANNarchyInputDevice instances
+            values_dicts: a sequence (list, tuple) of dictionaries of attributes names' and values, one per device.
+        """
+        devices = list(devices)
+        if len(devices) < 2 or not np.all([device.is_channel for device in devices]) or \
+                np.any([device._population.population is not devices[0]._population.population
+                        for device in devices]):
+            super(ANNarchyInputDevice, cls).SetDevices(devices, values_dicts)
+            return
+        population = devices[0]._population.population
+        ranks = [np.array(device._population.ranks) for device in devices]
+        sizes = [len(device_ranks) for device_ranks in ranks]
+        ranks = np.concatenate(ranks)
+        # The neurons have to be sorted by rank:
+        inds = np.argsort(ranks, kind="stable")
+        ranks = ranks[inds]
+        values = {}
+        for attr in values_dicts[0].keys():
+            if attr in cls._array_parameters:
+                neurons_values = [np.array(values_dict[attr]).tolist()
+                                  for values_dict, size in zip(values_dicts, sizes) for _ in range(size)]
+                values[attr] = [neurons_values[ind] for ind in inds]
+            else:
+                values[attr] = np.repeat([values_dict[attr] for values_dict in values_dicts], sizes)[inds]
+        if ranks.size == population.size and np.all(ranks == np.arange(population.size)):
+            population.set(values)
+        else:
+            population[ranks.tolist()].set(values)
+
     def Get(self, attrs=None):
         """Method to get attributes of the device.
            Arguments:
@@ -210,6 +271,8 @@ class ANNarchySpikeSourceArray(ANNarchyInputDevice, InputDevice):
     """ANNarchySpikeSourceArray class to wrap around an ANNarchy.SpikeSourceArray,
        acting as an input (stimulating) device, by sending spikes to target neurons."""
 
+    _array_parameters = ["spike_times"]
+
     def __init__(self, device=None, label="", annarchy_instance=None, **kwargs):
         super(ANNarchySpikeSourceArray, self).__init__(device, label, "SpikeSourceArray",
                                                        annarchy_instance, **kwargs)
@@ -575,10 +638,11 @@ class ANNarchyMonitor(ANNarchyOutputDevice, Multimeter):
     """ANNarchyMonitor class to wrap around ANNarchy.Monitor instances,
        acting as an output device of continuous time quantities."""
 
-    _data = Attr(field_type=DataArray, label="Data buffer",
-                 default=DataArray(np.empty((0, 0, 0)), dims=["Time", "Variable", "Neuron"]),
-                 required=True,
-                 doc="""A DataArray buffer holding the data read from the Monitors""")
+    _buffers = List(of=TimeSeriesBuffer, label="Monitors' data buffers", default=(),
+                    doc="""A list of TimeSeriesBuffer instances (one per Monitor) for holding the chunks of data
+                          read from the Monitors""")
+
+    _data = None  # The DataArray of the data of all Monitors, materialized from the buffers upon request
 
     def __init__(self, monitors=None, label="", model="Monitor",
                  annarchy_instance=None, run_tvb_multiscale_init=True, **kwargs):
@@ -621,22 +685,39 @@ class ANNarchyMonitor(ANNarchyOutputDevice, Multimeter):
 
     def _record(self):
         """Method to get data from ANNarchy.Monitor instances,
-           and merge and store them to the _data buffer of xarray.DataArray type."""
-        for monitor, population in self.monitors.items():
+           and append them as new chunks to the TimeSeriesBuffer instances of the _buffers."""
+        for i_m, (monitor, population) in enumerate(self.monitors.items()):
+            if len(self._buffers) <= i_m:
+                self._buffers += (TimeSeriesBuffer(), )
             data = monitor.get()
             variables = list(data.keys())
             data = np.array(list(data.values()))
             if data.size > 0:
                 data = data.transpose((1, 0, 2))
-                data = DataArray(data,
-                                 dims=["Time", "Variable", "Neuron"],
-                                 coords={"Time": self._compute_times(monitor.times(), data.shape[0]), "Variable": variables,
-                                         "Neuron": self._get_senders(population, population.ranks)},
-                                 name=self.label)
-                if self._data.size:
-                    self._data = combine_by_coords([self._data, data], fill_value=np.nan)
+                buffer = self._buffers[i_m]
+                if buffer.neurons is None:
+                    neurons = self._get_senders(population, population.ranks)
                 else:
-                    self._data = data
+                    neurons = None
+                buffer.append(data, self._compute_times(monitor.times(), data.shape[0]), variables, neurons)
+                self._data = None
+
+    def _get_data_array(self):
+        """Method to materialize the data of all Monitors' buffers to a single xarray.DataArray,
+           only if new data have been recorded since the last time it was called.
+           Returns:
+            a xarray DataArray with dimensions ["Time", "Variable", "Neuron"]
+        """
+        if self._data is None:
+            data = [buffer.to_DataArray() for buffer in self._buffers if buffer.number_of_times]
+            if len(data) == 0:
+                self._data = TimeSeriesBuffer().to_DataArray()
+            elif len(data) == 1:
+                self._data = data[0]
+            else:
+                self._data = combine_by_coords(data, fill_value=np.nan)
+            self._data.name = self.label
+        return self._data
 
     def get_data(self, variables=None, name=None, dims_names=["Time", "Variable", "Neuron"], flatten_neurons_inds=True):
         """This method returns time series' data recorded by the multimeter.
@@ -650,10 +731,9 @@ class ANNarchyMonitor(ANNarchyOutputDevice, Multimeter):
             a xarray DataArray with the output data
         """
         self._record()
+        data = self._get_data_array()
         if variables:
-            data = self._data.loc[:, variables]
-        else:
-            data = self._data
+            data = data.loc[:, variables]
         if np.any(data.dims != dims_names):
             data = data.rename(dict(zip(data.dims, dims_names)))
         if flatten_neurons_inds:
@@ -668,28 +748,50 @@ class ANNarchyMonitor(ANNarchyOutputDevice, Multimeter):
     def events(self):
         """Method to convert and place continuous time data measured from Monitors, to an events dictionary."""
         self._record()
-        variables = self._data.coords["Variable"].values
-        data = self._data.stack(Var=("Time", "Neuron"))
-        times_senders = np.array([[float(var[0]), var[1]] for var in data.coords["Var"].values]).astype("O")
-        events = dict()
-        events["times"] = np.array(times_senders[:, 0]).astype("f")
-        events["senders"] = times_senders[:, 1]
-        del times_senders
-        for i_var, var in enumerate(variables):
-            events[var] = data[i_var].values
+        data = self._get_data_array()
+        events = continuous_data_to_events(data.values, data.coords["Time"].values.astype("f"),
+                                           data.coords["Variable"].values.tolist(), data.coords["Neuron"].values)
         return events
 
+    def latest_window(self, t_from=None, variables=None):
+        """This method returns the data recorded by the Monitors after a given time,
+           averaged across the time points of that window, for each variable and neuron,
+           reading only the latest chunks of the Monitors' buffers.
+           Arguments:
+            t_from: the time after which (excluded) recorded samples are returned.
+                    Default = None, corresponding to the samples of the last recorded time point only.
+            variables: a sequence of variables' names (strings) to be selected.
+                       Default = None, corresponds to all variables the Monitors record from.
+           Returns:
+            a numpy array of shape (number of variables, number of neurons),
+            which is empty along the neurons' dimension if no samples have been recorded after t_from, and
+            the time of the last recorded sample, or t_from, if there is no such sample
+        """
+        self._record()
+        variables = self._determine_variables(variables)
+        values = []
+        t_last = None
+        for buffer in self._buffers:
+            times, data = buffer.get_window(t_from)
+            if len(times) == 0:
+                continue
+            variables_inds = [list(buffer.variables).index(var) for var in variables]
+            values.append(data[:, variables_inds].mean(axis=0))
+            t_last = times[-1] if t_last is None else max(t_last, times[-1])
+        if len(values) == 0:
+            return np.zeros((len(variables), 0)), t_from
+        return np.concatenate(values, axis=1), t_last
+
     @property
     def number_of_events(self):
         self._record()
-        if self._data is None:
-            return 0
-        return self._data.shape[0] * self._data.shape[-1]  # times x neurons
+        return int(np.sum([buffer.shape[0] * buffer.shape[-1] for buffer in self._buffers]))  # times x neurons
 
     def reset(self):
         self._record()
-        self._data = DataArray(np.empty((0, 0, 0)),
-                               dims=["Time", "Variable", "Neuron"])
+        for buffer in self._buffers:
+            buffer.clear()
+        self._data = None
 
 
 class ANNarchySpikeMonitor(ANNarchyOutputDevice, SpikeRecorder):
@@ -697,10 +799,12 @@ class ANNarchySpikeMonitor(ANNarchyOutputDevice, SpikeRecorder):
     """ANNarchySpikeMonitor class to wrap around ANNarchy.Monitor instances,
        acting as an output device of spike discrete events."""
 
-    _data = List(of=dict, label="SpikeMonitor data buffer", default=(),
-                 doc="""A list of dictionaries (one per Monitor) for holding the spike events
+    _data = List(of=SpikesBuffer, label="SpikeMonitor data buffer", default=(),
+                 doc="""A list of SpikesBuffer instances (one per Monitor) for holding the spike events
                        read from the Monitors""")
 
+    _number_of_counted_spikes = 0  # The number of spikes counted, instead of recorded, in counting only mode
+
     def __init__(self, monitors=None, label="", annarchy_instance=None, run_tvb_multiscale_init=True, **kwargs):
         if run_tvb_multiscale_init:
             SpikeRecorder.__init__(self, monitors, label=self.label)
@@ -710,16 +814,18 @@ class ANNarchySpikeMonitor(ANNarchyOutputDevice, SpikeRecorder):
 
     def _record(self):
         """Method to get discrete spike events' data from ANNarchy.Monitor instances,
-           and merge and store them to the _data buffer."""
+           and append them to the SpikesBuffer instances of the _data buffer."""
+        if self.counting_only:
+            # Only count the spikes, without keeping their times and senders:
+            for monitor in self.monitors.keys():
+                self._number_of_counted_spikes += \
+                    int(np.sum([len(spikes_times) for spikes_times in monitor.get("spike").values()]))
+            return
         dt = self.dt
-        for i_m, (monitor, population) in enumerate(self.monitors.items()):
+        for i_m, monitor in enumerate(self.monitors.keys()):
             if len(self._data) <= i_m:
-                self._data += (OrderedDict(), )
-            spikes = monitor.get("spike")
-            senders = self._get_senders(population, list(spikes.keys()))
-            for sender, spikes_times in zip(senders, list(spikes.values())):
-                self._data[i_m].update({sender:
-                                            self._data[i_m].get(sender, []) + (np.array(spikes_times) * dt).tolist()})
+                self._data += (SpikesBuffer(), )
+            self._data[i_m].append_from_dict(monitor.get("spike"), times_scale=dt)
 
     @property
     def events(self):
@@ -727,26 +833,32 @@ class ANNarchySpikeMonitor(ANNarchyOutputDevice, SpikeRecorder):
            and to return them in a events dictionary."""
         self._record()
         events = OrderedDict()
-        events["times"] = []
-        events["senders"] = []
-        for i_m, monitor_data in enumerate(self._data):
-            for sender, spikes_times in monitor_data.items():
-                events["times"] += spikes_times
-                events["senders"] += [sender] * len(spikes_times)
+        if len(self._data) == 0:
+            events["times"] = np.array([])
+            events["senders"] = np.array([])
+            return events
+        events["times"] = np.concatenate([monitor_data.times for monitor_data in self._data])
+        if len(self.monitors) > 1:
+            # Senders are labelled as "<population index>_<neuron rank>":
+            populations = self.annarchy_instance.Global._network[0]["populations"]
+            events["senders"] = \
+                np.concatenate([np.char.add("%d_" % populations.index(population),
+                                            monitor_data.senders.astype("U"))
+                                for monitor_data, population in zip(self._data, self.monitors.values())])
+        else:
+            events["senders"] = self._data[0].senders.copy()
         return events
 
     @property
     def number_of_events(self):
         self._record()
-        n_events = 0
-        for i_m, monitor_data in enumerate(self._data):
-            for sender, spikes_times in monitor_data.items():
-                n_events += len(spikes_times)
-        return n_events
+        return int(np.sum([len(monitor_data) for monitor_data in self._data])) + self._number_of_counted_spikes
 
     def reset(self):
         self._record()
-        self._data = ()
+        for monitor_data in self._data:
+            monitor_data.clear()
+        self._number_of_counted_spikes = 0
 
 
 class ANNarchySpikeMultimeter(ANNarchyMonitor, ANNarchySpikeMonitor, SpikeMultimeter):
@@ -754,12 +866,6 @@ class ANNarchySpikeMultimeter(ANNarchyMonitor, ANNarchySpikeMonitor, SpikeMultim
     """ANNarchySpikeMultimeter class to wrap around ANNarchy.Monitor instances,
        acting as an output device of continuous time spike weights' variables."""
 
-    _data = Attr(field_type=DataArray, label="Data buffer",
-                 default=DataArray(np.empty((0, 0, 0, 0)),
-                                   dims=["Time", "Variable", "Population", "Neuron"]),
-                 required=True,
-                 doc="""A DataArray buffer holding the data read from the Monitors""")
-
     def __init__(self, monitors, label="", annarchy_instance=None, **kwargs):
         SpikeMultimeter.__init__(self, monitors, model="spike_multimeter", label=self.label)
         ANNarchyMonitor.__init__(self, monitors, label, "spike_multimeter", annarchy_instance,
@@ -776,18 +882,10 @@ class ANNarchySpikeMultimeter(ANNarchyMonitor, ANNarchySpikeMonitor, SpikeMultim
         """Method to record continuous time spike weights' data from ANNarchy.Monitor instances,
            and to return them in a discrete events dictionary."""
         self._record()
-        data = self._data.stack(Var=tuple(self._data.dims))
-        coords = dict(data.coords)
-        events = dict()
-        inds = []
-        for var in coords["Variable"]:
-            var_inds = np.where(data.loc[var].values != 0)[0]
-            events[var] = data.loc[var].values[var_inds]
-            inds += var_inds
-        events["times"] = data.coords["Time"].values[inds]
-        events["senders"] = np.array([(pop, neuron)
-                                      for pop, neuron in zip(data.coords["Population"].values.tolist(),
-                                                             data.coords["Neuron"].values.tolist())])[inds]
+        data = self._get_data_array()
+        events = continuous_data_to_events(data.values, data.coords["Time"].values,
+                                           data.coords["Variable"].values.tolist(), data.coords["Neuron"].values,
+                                           exclude_zeros=True)
         return events
 
     def reset(self):
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from tvb_multiscale.tvb_annarchy.interfaces.tvb_to_annarchy_devices_interface import INPUT_INTERFACES_DICT
-from tvb_multiscale.tvb_annarchy.annarchy_models.builders.annarchy_factory import create_device, connect_device
+from tvb_multiscale.tvb_annarchy.annarchy_models.builders.annarchy_factory import \
+    create_device, connect_device, create_devices, connect_devices
 
 from tvb_multiscale.core.interfaces.builders.tvb_to_spikeNet_device_interface_builder import \
     TVBtoSpikeNetDeviceInterfaceBuilder
@@ -28,4 +29,5 @@ class TVBtoANNarchyDeviceInterfaceBuilder(TVBtoSpikeNetDeviceInterfaceBuilder):
 
     def build_and_connect_devices(self, devices, nodes, *args, **kwargs):
         return build_and_connect_devices(devices, create_device, connect_device,
-                                         nodes, self.config, annarchy_instance=self.annarchy_instance)
+                                         nodes, self.config, create_devices_fun=create_devices,
+                                         connect_devices_fun=connect_devices, annarchy_instance=self.annarchy_instance)
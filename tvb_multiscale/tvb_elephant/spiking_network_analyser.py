@@ -10,7 +10,7 @@ from tvb_multiscale.core.config import initialize_logger
 from tvb_multiscale.core.data_analysis.spiking_network_analyser \
     import SpikingNetworkAnalyser as SpikingNetworkAnalyzerBase
 
-from tvb.basic.neotraits.api import Attr, Float
+from tvb.basic.neotraits.api import Attr
 
 
 LOG = initialize_logger(__name__)
@@ -26,14 +26,6 @@ class SpikingNetworkAnalyser(SpikingNetworkAnalyzerBase):
          (numpy.array, xarray.DataArray, TVB TimeSeries, pandas.Series of xarray.DataArray)
        """
 
-    spikes_kernel = Attr(field_type=str, default="auto", required=True)
-
-    spikes_kernel_width = Float(
-        label="Kernel/window length",
-        default=None,
-        required=False,
-        doc="""Kernel or sliding window time length (ms)""")
-
     elephant_mean_firing_rate = Attr(field_type=bool, default=True, required=True,
                                      label="elephant mean firing rate flag",
                                      doc="""If elephant_mean_firing_rate is True (default), 
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from tvb_multiscale.tvb_nest.interfaces.tvb_to_nest_devices_interface import INPUT_INTERFACES_DICT
-from tvb_multiscale.tvb_nest.nest_models.builders.nest_factory import create_device, connect_device
+from tvb_multiscale.tvb_nest.nest_models.builders.nest_factory import \
+    create_device, connect_device, create_devices, connect_devices
 from tvb_multiscale.core.interfaces.builders.tvb_to_spikeNet_device_interface_builder import \
     TVBtoSpikeNetDeviceInterfaceBuilder
 from tvb_multiscale.core.spiking_models.builders.factory import build_and_connect_devices
@@ -30,4 +31,5 @@ class TVBtoNESTDeviceInterfaceBuilder(TVBtoSpikeNetDeviceInterfaceBuilder):
 
     def build_and_connect_devices(self, devices, nodes, *args, **kwargs):
         return build_and_connect_devices(devices, create_device, connect_device,
-                                         nodes, self.config, nest_instance=self.nest_instance)
+                                         nodes, self.config, create_devices_fun=create_devices,
+                                         connect_devices_fun=connect_devices, nest_instance=self.nest_instance)
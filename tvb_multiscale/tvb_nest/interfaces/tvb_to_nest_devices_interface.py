@@ -17,20 +17,38 @@ class TVBtoNESTDeviceInterface(TVBtoSpikeNetDeviceInterface):
 
 class TVBtoNESTDCGeneratorInterface(TVBtoNESTDeviceInterface):
 
-    def set(self, values):
+    def set(self, values, duration=None):
+        # The values are applied for the Spiking Network's run that follows,
+        # i.e., for a TVB time step, or for the given duration:
+        if duration is None:
+            duration = self.dt
         self.Set({"amplitude": self._assert_input_size(values),
                   "origin": self.nest_instance.GetKernelStatus("time"),
-                  "start": self.nest_instance.GetKernelStatus("min_delay"),
-                  "stop": self.dt})
+                  "start": 0.0,
+                  "stop": duration})
+
+    def set_window(self, values, dt):
+        # The mean values are applied for the whole synchronization window:
+        values = np.array(values)
+        self.set(np.mean(values, axis=0), values.shape[0] * dt)
 
 
 class TVBtoNESTPoissonGeneratorInterface(TVBtoNESTDeviceInterface):
 
-    def set(self, values):
+    def set(self, values, duration=None):
+        # The values are applied for the Spiking Network's run that follows,
+        # i.e., for a TVB time step, or for the given duration:
+        if duration is None:
+            duration = self.dt
         self.Set({"rate": np.maximum([0], self._assert_input_size(values)),
                   "origin": self.nest_instance.GetKernelStatus("time"),
-                  "start": self.nest_instance.GetKernelStatus("min_delay"),
-                  "stop": self.dt})
+                  "start": 0.0,
+                  "stop": duration})
+
+    def set_window(self, values, dt):
+        # The mean values are applied for the whole synchronization window:
+        values = np.array(values)
+        self.set(np.mean(values, axis=0), values.shape[0] * dt)
 
 
 class TVBtoNESTInhomogeneousPoissonGeneratorInterface(TVBtoNESTDeviceInterface):
@@ -43,13 +61,21 @@ class TVBtoNESTInhomogeneousPoissonGeneratorInterface(TVBtoNESTDeviceInterface):
                                   self.nest_instance.GetKernelStatus("resolution")]] * self.number_of_nodes,
                   "rate_values": values})
 
+    def set_window(self, values, dt):
+        # One rate per TVB time step of the synchronization window:
+        values = np.maximum(0.0, np.array(values)).T
+        rate_times = (self.nest_instance.GetKernelStatus("time") + self.nest_instance.GetKernelStatus("resolution")
+                      + dt * np.arange(values.shape[1])).tolist()
+        self.Set({"rate_times": [rate_times] * self.number_of_nodes,
+                  "rate_values": values.tolist()})
+
 
 class TVBtoNESTSpikeGeneratorInterface(TVBtoNESTDeviceInterface):
 
     def set(self, values):
         values = self._assert_input_size(values)
         # TODO: change this so that rate corresponds to number of spikes instead of spikes' weights
-        self.Set({"spikes_times": np.ones((self.number_of_nodes,)) *
+        self.Set({"spike_times": np.ones((self.number_of_nodes,)) *
                                   self.nest_instance.GetKernelStatus("min_delay"),
                   "origin": self.nest_instance.GetKernelStatus("time"),
                   "spike_weights": values})
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
+from collections import OrderedDict
 from copy import deepcopy
+from functools import partial
 
 import numpy as np
 
@@ -33,11 +35,15 @@ class NESTModelBuilder(SpikingModelBuilder):
     nest_instance = None
     modules_to_install = []
     _spiking_brain = NESTBrain()
+    # The identities of the connections among the populations of every connection type,
+    # existing at every number of connections counted for the connectivity cache:
+    _connections_ids = {}
 
     def __init__(self, tvb_simulator, nest_nodes_ids, nest_instance=None, config=CONFIGURED, logger=LOG):
         super(NESTModelBuilder, self).__init__(tvb_simulator, nest_nodes_ids, config, logger)
         self.nest_instance = nest_instance
         self._spiking_brain = NESTBrain()
+        self._connections_ids = {}
         # Setting NEST defaults from config
         self.default_kernel_config = self.config.DEFAULT_NEST_KERNEL_CONFIG
 
@@ -46,6 +52,7 @@ class NESTModelBuilder(SpikingModelBuilder):
         if self.nest_instance is None:
             self.nest_instance = load_nest(self.config, self.logger)
         self.nest_instance.ResetKernel()  # This will restart NEST!
+        self._connections_ids = {}
         self.nest_instance.set_verbosity(self.config.NEST_VERBOCITY)  # don't print all messages from NEST
         kernel_config = deepcopy(self.default_kernel_config)
         # Printing the time progress should only be used when the simulation is run on a local machine:
@@ -200,6 +207,9 @@ class NESTModelBuilder(SpikingModelBuilder):
                                 src_is_trg=(pop_src.population == pop_trg.population),
                                 config=self.config, **conn_spec)[0]
 
+    def _expected_number_of_connections(self, n_src, n_trg, src_is_trg, conn_spec):
+        return create_conn_spec(n_src=n_src, n_trg=n_trg, src_is_trg=src_is_trg, config=self.config, **conn_spec)[1]
+
     def set_synapse(self, syn_model, weight, delay, receptor_type, params={}):
         """Method to set the synaptic model, the weight, the delay,
            the synaptic receptor type, and other possible synapse parameters
@@ -253,6 +263,163 @@ class NESTModelBuilder(SpikingModelBuilder):
                                        get_populations_neurons(pop_trg, trg_inds_fun),
                                        conn_spec, syn_spec)
 
+    def _bulk_connections_pairs(self, pop_src, src_inds_fun, pop_trg, trg_inds_fun, conn_spec):
+        """Method to compute the source and target node ids of all connections of two NESTPopulation instances,
+           for the deterministic all_to_all and one_to_one connectivity rules,
+           or to return None, for any other connectivity rule, the connections of which have to be drawn by NEST."""
+        rule = conn_spec.get("rule", "all_to_all")
+        if rule not in ["all_to_all", "one_to_one"]:
+            return None
+        sources = np.array(get_populations_neurons(pop_src, src_inds_fun).tolist(), dtype="i8")
+        targets = np.array(get_populations_neurons(pop_trg, trg_inds_fun).tolist(), dtype="i8")
+        if rule == "all_to_all":
+            sources, targets = np.repeat(sources, targets.size), np.tile(targets, sources.size)
+        elif sources.size != targets.size:
+            raise_value_error("Cannot connect one to one %d source with %d target neurons!"
+                              % (sources.size, targets.size))
+        if not conn_spec.get("allow_autapses", True):
+            keep = sources != targets
+            sources, targets = sources[keep], targets[keep]
+        return sources, targets
+
+    def connect_populations_in_bulk(self, populations_pairs, src_inds_fun, trg_inds_fun, conn_spec):
+        """Method to connect many pairs of NESTPopulation instances in the SpikingNetwork.
+           The connections of the pairs with an all_to_all or one_to_one connectivity rule,
+           and with scalar weights and delays, are gathered into arrays of source and target node ids,
+           weights, delays and receptor types, and created with one_to_one nest.Connect calls of those arrays,
+           one per synapse model, in chunks of at most bulk_connect_chunk_size connections.
+           The rest of the pairs, i.e., with probabilistic connectivity rules, or with distributions of weights
+           or delays, are connected one by one, so that NEST draws their connections.
+           Arguments:
+            populations_pairs: a sequence of (source NESTPopulation, target NESTPopulation, syn_spec) tuples
+            src_inds_fun: a function that selects a subset of the souce population neurons
+            trg_inds_fun: a function that selects a subset of the target population neurons
+            conn_spec: a dict of parameters of the connectivity pattern among the neurons of the two populations,
+                       excluding weight and delay ones
+        """
+        connections = OrderedDict()
+        for pop_src, pop_trg, syn_spec in populations_pairs:
+            pairs = None
+            if not isinstance(syn_spec["weight"], dict) and not isinstance(syn_spec["delay"], dict) \
+                    and set(syn_spec.keys()) <= set(["synapse_model", "weight", "delay", "receptor_type"]):
+                pairs = self._bulk_connections_pairs(pop_src, src_inds_fun, pop_trg, trg_inds_fun,
+                                                     self._prepare_conn_spec(pop_src, pop_trg, conn_spec))
+            if pairs is None:
+                self.connect_two_populations(pop_src, src_inds_fun, pop_trg, trg_inds_fun, conn_spec, syn_spec)
+                continue
+            syn_spec = self._prepare_syn_spec(dict(syn_spec))
+            n_connections = pairs[0].size
+            model_connections = connections.setdefault(syn_spec["synapse_model"], OrderedDict())
+            for receptor in ensure_list(syn_spec["receptor_type"]):
+                for attr, values, dtype in zip(["source", "target", "weight", "delay", "receptor_type"],
+                                               pairs + (syn_spec["weight"], syn_spec.get("delay", 0.0), receptor),
+                                               ["i8", "i8", "f8", "f8", "i8"]):
+                    model_connections.setdefault(attr, []).append(
+                        np.broadcast_to(np.asarray(values, dtype=dtype), (n_connections,)))
+        for synapse_model, model_connections in connections.items():
+            self._connect_in_chunks(partial(self._connect_synapse_model_arrays, synapse_model),
+                                    OrderedDict([(attr, np.concatenate(values))
+                                                 for attr, values in model_connections.items()]))
+
+    def _connect_synapse_model_arrays(self, synapse_model, connections):
+        """Method to create neurons' connections of a synapse model with a single one_to_one nest.Connect call.
+           Arguments:
+            synapse_model: the name of the synapse model
+            connections: a dict of arrays of equal size of the source and target node ids,
+                         and of the weights, delays and receptor types of the connections
+        """
+        syn_spec = {"synapse_model": synapse_model, "weight": connections["weight"],
+                    "receptor_type": connections["receptor_type"]}
+        if synapse_model != "rate_connection_instantaneous":
+            syn_spec["delay"] = connections["delay"]
+        self.nest_instance.Connect(connections["source"], connections["target"], {"rule": "one_to_one"}, syn_spec)
+
+    # NEST identifies a connection by its source and target node ids, target thread, synapse model id and port:
+    _connection_id_attrs = ["source", "target", "target_thread", "synapse_id", "port"]
+
+    def _connection_type_neurons(self, conn):
+        # The neurons of all source and of all target populations of a connection type, as NodeCollections:
+        spiking_nodes = self._spiking_region_nodes_by_index()
+        if "source_nodes" in conn:
+            nodes = [conn["source_nodes"], conn["target_nodes"]]
+        else:
+            nodes = [conn["nodes"], conn["nodes"]]
+        neurons = []
+        for populations, populations_nodes in zip([conn["source"], conn["target"]], nodes):
+            neurons.append(self.nest_instance.NodeCollection(np.unique(np.concatenate(
+                [np.array(get_populations_neurons(spiking_nodes[node_index][population]).tolist(), dtype="i8")
+                 for node_index in ensure_list(populations_nodes)
+                 for population in ensure_list(populations)])).tolist()))
+        return neurons
+
+    def _get_connections_status(self, attrs, conn=None):
+        # The attributes of all neurons' connections of the network,
+        # or only of the ones among the populations of a connection type, as arrays:
+        if conn is None:
+            connections = self.nest_instance.GetConnections()
+        else:
+            source, target = self._connection_type_neurons(conn)
+            connections = self.nest_instance.GetConnections(source=source, target=target)
+        if len(connections) == 0:
+            return OrderedDict([(attr, np.array([])) for attr in attrs])
+        status = connections.get(attrs)
+        return OrderedDict([(attr, np.array(ensure_list(status[attr]))) for attr in attrs])
+
+    def _number_of_connections(self, conn=None):
+        number_of_connections = self.nest_instance.GetKernelStatus("num_connections")
+        # NEST does not return the connections in the order of their creation.
+        # Therefore, the connections among the populations of a connection type are identified
+        # right before and after their creation,
+        # so that the ones created in between can be selected by _get_connections_arrays:
+        if conn is not None:
+            status = self._get_connections_status(self._connection_id_attrs, conn)
+            self._connections_ids[(id(conn), number_of_connections)] = \
+                set(zip(*[status[attr].tolist() for attr in self._connection_id_attrs]))
+        return number_of_connections
+
+    def _get_connections_arrays(self, start, stop, conn=None):
+        """Method to return the attributes of the neurons' connections of a connection type created between two counts.
+           Arguments:
+            start: the number of connections, as returned by _number_of_connections, before their creation
+            stop: the number of connections, as returned by _number_of_connections, after their creation
+            conn: the configuration of the connection type, as given to _number_of_connections
+           Returns:
+            a dict of arrays of equal size of the source and target node ids, the weights, the delays,
+            the receptor types and the synapse models of the connections
+        """
+        if conn is None:
+            raise_value_error("The configuration of the connection type is required "
+                              "to get the arrays of its connections from NEST!")
+        status = self._get_connections_status(self._connection_id_attrs +
+                                              ["weight", "delay", "receptor", "synapse_model"], conn)
+        # The identities of the connections are not needed anymore once their arrays are read:
+        new_ids = self._connections_ids.pop((id(conn), stop)) - self._connections_ids.pop((id(conn), start))
+        inds = np.array([i_conn for i_conn, conn_id in
+                         enumerate(zip(*[status[attr].tolist() for attr in self._connection_id_attrs]))
+                         if conn_id in new_ids], dtype="i8")
+        return OrderedDict([("source", status["source"][inds].astype("i8")),
+                            ("target", status["target"][inds].astype("i8")),
+                            ("weight", status["weight"][inds].astype("f8")),
+                            ("delay", status["delay"][inds].astype("f8")),
+                            ("receptor_type", status["receptor"][inds].astype("i8")),
+                            ("synapse_model", status["synapse_model"][inds].astype("U"))])
+
+    def _connect_arrays(self, connections):
+        # One array nest.Connect per synapse model, in chunks of at most bulk_connect_chunk_size connections:
+        synapse_models = np.asarray(connections["synapse_model"])
+        for synapse_model in np.unique(synapse_models):
+            inds = synapse_models == synapse_model
+            self._connect_in_chunks(partial(self._connect_synapse_model_arrays, str(synapse_model)),
+                                    OrderedDict([(attr, np.asarray(connections[attr])[inds])
+                                                 for attr in ["source", "target", "weight", "delay",
+                                                              "receptor_type"]]))
+
+    def _connectivity_cache_config(self):
+        # The seeds and the numbers of processes of the NEST kernel determine the connections drawn by NEST:
+        return [[key, np.array(ensure_list(value)).tolist()]
+                for key, value in sorted(self.default_kernel_config.items())
+                if "seed" in key or key in ["total_num_virtual_procs", "local_num_threads"]]
+
     def build_spiking_region_node(self, label="", input_node=None, *args, **kwargs):
         """This methods builds a NESTRegionNode instance,
            which consists of a pandas.Series of all SpikingPopulation instances,
@@ -4,6 +4,7 @@ import os
 import sys
 import shutil
 from copy import deepcopy
+from collections import OrderedDict
 
 import numpy as np
 
@@ -213,25 +214,9 @@ def device_to_dev_model(device):
         return device
 
 
-def create_device(device_model, params=None, config=CONFIGURED, nest_instance=None, **kwargs):
-    """Method to create a NESTDevice.
-       Arguments:
-        device_model: name (string) of the device model
-        params: dictionary of parameters of device and/or its synapse. Default = None
-        config: configuration class instance. Default: imported default CONFIGURED object.
-        nest_instance: the NEST instance.
-                       Default = None, in which case we are going to load one, and also return it in the output
-       Returns:
-        the NESTDevice class, and optionally, the NEST instance if it is loaded here.
-    """
-    if nest_instance is None:
-        nest_instance = load_nest(config=config)
-        return_nest = True
-    else:
-        return_nest = False
+def _get_device_model_and_params(device_model, params=None, label="", config=CONFIGURED):
     # Assert the model name...
     device_model = device_to_dev_model(device_model)
-    label = kwargs.pop("label", "")
     if device_model in NESTInputDeviceDict.keys():
         devices_dict = NESTInputDeviceDict
         default_params = deepcopy(config.NEST_INPUT_DEVICES_PARAMS_DEF.get(device_model, {}))
@@ -250,6 +235,27 @@ def create_device(device_model, params=None, config=CONFIGURED, nest_instance=No
         label = default_params.pop("label", label)
     else:
         label = default_params.get("label", label)
+    return devices_dict, device_model, default_params, label
+
+
+def create_device(device_model, params=None, config=CONFIGURED, nest_instance=None, **kwargs):
+    """Method to create a NESTDevice.
+       Arguments:
+        device_model: name (string) of the device model
+        params: dictionary of parameters of device and/or its synapse. Default = None
+        config: configuration class instance. Default: imported default CONFIGURED object.
+        nest_instance: the NEST instance.
+                       Default = None, in which case we are going to load one, and also return it in the output
+       Returns:
+        the NESTDevice class, and optionally, the NEST instance if it is loaded here.
+    """
+    if nest_instance is None:
+        nest_instance = load_nest(config=config)
+        return_nest = True
+    else:
+        return_nest = False
+    devices_dict, device_model, default_params, label = \
+        _get_device_model_and_params(device_model, params, kwargs.pop("label", ""), config)
     # TODO: a better solution for the strange error with inhomogeneous poisson generator
     try:
         nest_device_id = nest_instance.Create(device_model, params=default_params)
@@ -264,27 +270,43 @@ def create_device(device_model, params=None, config=CONFIGURED, nest_instance=No
         return nest_device
 
 
-def connect_device(nest_device, population, neurons_inds_fun, weight=1.0, delay=0.0, receptor_type=0,
-                   nest_instance=None, config=CONFIGURED, **kwargs):
-    """This method connects a NESTDevice to a NESTPopulation instance.
+def create_devices(device_model, number_of_devices, params=None, labels=None, config=CONFIGURED,
+                   nest_instance=None, **kwargs):
+    """Method to create several NESTDevice instances of the same model,
+       as the channels of a single multi-channel device,
+       i.e., with a single NEST.Create call, returning a NodeCollection of number_of_devices nodes,
+       each one of which is wrapped by a NESTDevice.
+       Since they are consecutive nodes of the same model,
+       they can be set all together by a single NodeCollection.set call, see NESTDevice.SetDevices.
        Arguments:
-        nest_device: the NESTDevice instance
-        population: the NESTPopulation instance
-        neurons_inds_fun: a function to return a NESTPopulation or a subset thereof of the target population.
-                          Default = None.
-        weight: the weights of the connection. Default = 1.0.
-        delay: the delays of the connection. Default = 0.0.
-        receptor_type: type of the synaptic receptor. Default = 0.
+        device_model: name (string) of the device model
+        number_of_devices: the number (int) of devices to create
+        params: dictionary of parameters of the devices and/or their synapse. Default = None
+        labels: a sequence of the labels (strings) of the devices. Default = None
         config: configuration class instance. Default: imported default CONFIGURED object.
-        nest_instance: instance of NEST. Default = None, in which case the one of the nest_device is used.
+        nest_instance: the NEST instance. Default = None, which raises an error.
        Returns:
-        the connected NESTDevice
+        a list of the NESTDevice instances
     """
-    if receptor_type is None:
-        receptor_type = 0
     if nest_instance is None:
         raise_value_error("There is no NEST instance!")
-    resolution = nest_instance.GetKernelStatus("resolution")
+    if labels is None:
+        labels = [""] * number_of_devices
+    devices_dict, device_model, default_params, label = \
+        _get_device_model_and_params(device_model, params, labels[0], config)
+    nest_devices_ids = nest_instance.Create(device_model, number_of_devices, params=default_params)
+    if device_model in NESTOutputDeviceDict.keys():
+        nest_devices_ids.set({"label": list(labels)})
+    nest_devices = []
+    for i_dev, label in enumerate(labels):
+        default_params["label"] = label
+        nest_devices.append(devices_dict[device_model](nest_devices_ids[i_dev:i_dev + 1], nest_instance,
+                                                       **default_params))
+    return nest_devices
+
+
+def _assert_device_delay(delay, resolution):
+    # Make sure that the delay of a device's connection is not smaller than the NEST simulation resolution:
     if isinstance(delay, dict):
         if delay["low"] < resolution:
             delay["low"] = resolution
@@ -297,11 +319,87 @@ def connect_device(nest_device, population, neurons_inds_fun, weight=1.0, delay=
             delay = resolution
             warning("Delay %f is smaller than the NEST simulation resolution %f!\n"
                     "Setting minimum delay equal to resolution!" % (delay, resolution))
-    syn_spec = {"weight": weight, "delay": delay, "receptor_type": receptor_type}
+    return delay
+
+
+def _device_syn_spec(weight, delay, receptor_type, resolution, config=CONFIGURED):
+    # The synapse specification of the connections of a device:
+    if receptor_type is None:
+        receptor_type = 0
+    return {"synapse_model": config.DEFAULT_CONNECTION["synapse_model"],
+            "weight": weight, "delay": _assert_device_delay(delay, resolution), "receptor_type": receptor_type}
+
+
+def _device_connection_nodes(nest_device, population, neurons_inds_fun):
+    # The source and target nodes of the connections of a device:
     neurons = get_populations_neurons(population, neurons_inds_fun)
     if nest_device.model == "spike_recorder":
-        #                     source  ->  target
-        nest_instance.Connect(neurons, nest_device.device, syn_spec=syn_spec)
-    else:
-        nest_instance.Connect(nest_device.device, neurons, syn_spec=syn_spec)
+        #      source  ->  target
+        return neurons, nest_device.device
+    return nest_device.device, neurons
+
+
+def connect_device(nest_device, population, neurons_inds_fun, weight=1.0, delay=0.0, receptor_type=0,
+                   nest_instance=None, config=CONFIGURED, **kwargs):
+    """This method connects a NESTDevice to a NESTPopulation instance.
+       Arguments:
+        nest_device: the NESTDevice instance
+        population: the NESTPopulation instance
+        neurons_inds_fun: a function to return a NESTPopulation or a subset thereof of the target population.
+                          Default = None.
+        weight: the weights of the connection. Default = 1.0.
+        delay: the delays of the connection. Default = 0.0.
+        receptor_type: type of the synaptic receptor. Default = 0.
+        config: configuration class instance. Default: imported default CONFIGURED object.
+        nest_instance: instance of NEST. Default = None, in which case the one of the nest_device is used.
+       Returns:
+        the connected NESTDevice
+    """
+    if nest_instance is None:
+        raise_value_error("There is no NEST instance!")
+    syn_spec = _device_syn_spec(weight, delay, receptor_type, nest_instance.GetKernelStatus("resolution"), config)
+    source, target = _device_connection_nodes(nest_device, population, neurons_inds_fun)
+    nest_instance.Connect(source, target, syn_spec=syn_spec)
+    nest_device.connectivity_changed()
     return nest_device
+
+
+def connect_devices(devices_connections, nest_instance=None, config=CONFIGURED, **kwargs):
+    """This method connects several NESTDevice instances, e.g., the channels of a multi-channel device,
+       to NESTPopulation instances, with a single one_to_one NEST.Connect call of the arrays of
+       the source and target nodes, weights, delays and receptor types of all connections.
+       The connections of devices of more than one node, or with weights or delays given as distributions,
+       are made by connect_device, one by one.
+       Arguments:
+        devices_connections: a list of
+                             (nest_device, population, neurons_inds_fun, weight, delay, receptor_type) tuples,
+                             see connect_device
+        nest_instance: instance of NEST. Default = None, which raises an error.
+        config: configuration class instance. Default: imported default CONFIGURED object.
+    """
+    if nest_instance is None:
+        raise_value_error("There is no NEST instance!")
+    resolution = nest_instance.GetKernelStatus("resolution")
+    connections = OrderedDict([(attr, []) for attr in ["source", "target", "weight", "delay", "receptor_type"]])
+    connected_devices = []
+    for nest_device, population, neurons_inds_fun, weight, delay, receptor_type in devices_connections:
+        if len(nest_device.device) != 1 or isinstance(weight, dict) or isinstance(delay, dict):
+            connect_device(nest_device, population, neurons_inds_fun, weight, delay, receptor_type,
+                           nest_instance=nest_instance, config=config)
+            continue
+        syn_spec = _device_syn_spec(weight, delay, receptor_type, resolution, config)
+        source, target = [np.array(nodes.tolist(), dtype="i8")
+                          for nodes in _device_connection_nodes(nest_device, population, neurons_inds_fun)]
+        shape = (max(source.size, target.size), )
+        for attr, values, dtype in zip(connections.keys(),
+                                       [source, target, syn_spec["weight"], syn_spec["delay"],
+                                        syn_spec["receptor_type"]],
+                                       ["i8", "i8", "f8", "f8", "i8"]):
+            connections[attr].append(np.broadcast_to(np.asarray(values, dtype=dtype), shape))
+        connected_devices.append(nest_device)
+    if len(connected_devices):
+        syn_spec = OrderedDict([(attr, np.concatenate(values)) for attr, values in connections.items()])
+        syn_spec["synapse_model"] = config.DEFAULT_CONNECTION["synapse_model"]
+        nest_instance.Connect(syn_spec.pop("source"), syn_spec.pop("target"), {"rule": "one_to_one"}, syn_spec)
+        for nest_device in connected_devices:
+            nest_device.connectivity_changed()
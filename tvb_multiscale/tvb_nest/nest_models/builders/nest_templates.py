@@ -73,6 +73,13 @@ def random_uniform_tvb_delay(source_node, target_node, tvb_delays, low=0.0, high
     return random_uniform_delay(tvb_delay(source_node, target_node, tvb_delays), low, high, sigma)
 
 
+def random_normal_tvb_weights(source_nodes, target_nodes, tvb_weights, scale=1.0, sigma=0.1):
+    # Vectorized version of random_normal_tvb_weight, for arrays of source and target nodes,
+    # to be wrapped by a VectorizedProperty (zero weights result to distributions of zero mean and sigma):
+    weights = scale * tvb_weights[source_nodes, target_nodes]
+    return {"distribution": "normal", "mu": weights, "sigma": sigma * np.abs(weights)}
+
+
 def set_between_nodes_connection_receptor_type(source_node, target_node):
     return int(0)
     # return int
@@ -82,6 +89,12 @@ def receptor_by_source_region(source_node, target_node, start=1):
     return int(start + source_node)
 
 
+def receptors_by_source_region(source_nodes, target_nodes, start=1):
+    # Vectorized version of receptor_by_source_region, for arrays of source and target nodes,
+    # to be wrapped by a VectorizedProperty:
+    return (start + np.asarray(source_nodes)).astype("i")
+
+
 """
 Template used to set input/stimulation devices parameters towards region nodes:
 Functions are accepted only for:
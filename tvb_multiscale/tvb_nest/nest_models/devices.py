@@ -2,6 +2,7 @@
 
 import os
 from abc import ABCMeta
+from collections import OrderedDict
 import glob
 
 import numpy as np
@@ -72,6 +73,23 @@ class NESTDevice(Device):
         """
         self.device.set(values_dict)
 
+    @classmethod
+    def SetDevices(cls, devices, values_dicts):
+        """Method to set attributes of several devices of the same model,
+           with a single call to NodeCollection.set for all of them.
+           Arguments:
+            devices: a sequence (list, tuple) of NESTDevice instances
+            values_dicts: a sequence (list, tuple) of dictionaries of attributes names' and values, one per device.
+        """
+        global_ids = [device.device.tolist() for device in devices]
+        if len(devices) < 2 or np.any([len(gids) != 1 for gids in global_ids]):
+            super(NESTDevice, cls).SetDevices(devices, values_dicts)
+            return
+        # NodeCollections have to be sorted:
+        global_ids = np.array(global_ids).flatten()
+        inds = np.argsort(global_ids)
+        devices[0].nest_instance.NodeCollection(global_ids[inds].tolist()).set([values_dicts[ind] for ind in inds])
+
     def Get(self, attrs=None):
         """Method to get attributes of the device.
            Arguments:
@@ -200,6 +218,8 @@ class NESTInhomogeneousPoissonGenerator(NESTInputDevice):
 
     """NESTInhomogeneousPoissonGenerator class to wrap around a NEST inhomogeneous_poisson_generator device"""
 
+    _array_parameters = ["rate_times", "rate_values"]
+
     def __init__(self, device, nest_instance, *args, **kwargs):
         kwargs["model"] = kwargs.pop("model", "inhomogeneous_poisson_generator")
         super(NESTInhomogeneousPoissonGenerator, self).__init__(device, nest_instance, *args, **kwargs)
@@ -236,6 +256,8 @@ class NESTSpikeGenerator(NESTInputDevice):
 
     """NESTSpikeGenerator class to wrap around a NEST spike_generator device"""
 
+    _array_parameters = ["spike_times", "spike_weights", "spike_multiplicities"]
+
     def __init__(self, device, nest_instance, *args, **kwargs):
         kwargs["model"] = kwargs.pop("model", "spike_generator")
         super(NESTSpikeGenerator, self).__init__(device, nest_instance, *args, **kwargs)
@@ -263,6 +285,8 @@ class NESTStepCurrentGenerator(NESTInputDevice):
 
     """NESTStepCurrentGenerator class to wrap around a NEST step_current_generator device"""
 
+    _array_parameters = ["amplitude_times", "amplitude_values"]
+
     def __init__(self, device, nest_instance, *args, **kwargs):
         kwargs["model"] = kwargs.pop("model", "step_current_generator")
         super(NESTStepCurrentGenerator, self).__init__(device, nest_instance, *args, **kwargs)
@@ -281,6 +305,8 @@ class NESTStepRateGenerator(NESTInputDevice):
 
     """NESTStepRateGenerator class to wrap around a NEST step_rate_generator device"""
 
+    _array_parameters = ["amplitude_times", "amplitude_values"]
+
     def __init__(self, device, nest_instance, *args, **kwargs):
         kwargs["model"] = kwargs.pop("model", "step_rate_generator")
         super(NESTStepRateGenerator, self).__init__(device, nest_instance, *args, **kwargs)
@@ -335,13 +361,25 @@ class NESTOutputDevice(NESTDevice, OutputDevice):
 
     """NESTOutputDevice class to wrap around a NEST output (recording) device"""
 
+    # Events recorded to memory are transferred from NEST only once, in chunks of the events recorded since
+    # the previous transfer, which are then deleted from NEST memory:
+    _record_to_memory = False
+    _events_chunks = []
+    _events_chunks_starts = []
+    _number_of_transferred_events = 0
+
     def __init__(self, device, nest_instance, *args, **kwargs):
         kwargs["model"] = kwargs.pop("model", "nest_output_device")
         super(NESTOutputDevice, self).__init__(device, nest_instance, *args, **kwargs)
+        self._events_chunks = []
+        self._events_chunks_starts = []
+        self._number_of_transferred_events = 0
         if kwargs.get("record_to", "ascii") == "ascii":
+            self._record_to_memory = False
             self._get_events = self._get_events_from_ascii
             self._reset = self._delete_events_in_ascii_files
         else:
+            self._record_to_memory = True
             self._get_events = self._get_events_from_memory
             self._reset = self._delete_events_in_memory
 
@@ -366,8 +404,40 @@ class NESTOutputDevice(NESTDevice, OutputDevice):
                 events[key] = events[key] + this_file_events[key]
         return events
 
+    def _transfer_events_from_memory(self):
+        # Move the events recorded in NEST memory since the previous transfer to a new chunk of events,
+        # and delete them from NEST memory, so that every event is copied from NEST only once:
+        if self.device.get("n_events"):
+            events = self.device.get("events")
+            self._events_chunks.append(OrderedDict([(key, np.asarray(values)) for key, values in events.items()]))
+            self._events_chunks_starts.append(self._number_of_transferred_events)
+            self._number_of_transferred_events += len(self._events_chunks[-1]["times"])
+            self.device.set({"n_events": 0})
+
+    def _concatenate_events_chunks(self, i_chunk=0, i_event=0, variables=None):
+        # Concatenate the events of the chunks starting from the event i_event of the chunk i_chunk:
+        if variables is None:
+            variables = list(self._empty_events.keys())
+        events = OrderedDict()
+        for var in variables:
+            values = [chunk[var] for chunk in self._events_chunks[i_chunk:]]
+            if len(values):
+                events[var] = np.concatenate(values)[i_event:]
+            else:
+                events[var] = np.array([])
+        return events
+
     def _get_events_from_memory(self):
-        return self.device.get("events")
+        self._transfer_events_from_memory()
+        if len(self._events_chunks) > 1:
+            # Concatenate all chunks to a single one,
+            # so that repeated readouts without new events do not concatenate them again:
+            self._events_chunks = [self._concatenate_events_chunks()]
+            self._events_chunks_starts = [0]
+        events = self._concatenate_events_chunks()
+        for key, values in events.items():
+            events[key] = values.copy()
+        return events
 
     @property
     def events(self):
@@ -375,6 +445,8 @@ class NESTOutputDevice(NESTDevice, OutputDevice):
 
     @property
     def number_of_events(self):
+        if self._record_to_memory:
+            return self._number_of_transferred_events + self.device.get("n_events")
         return self.device.get("n_events")
 
     @property
@@ -386,9 +458,39 @@ class NESTOutputDevice(NESTDevice, OutputDevice):
             truncate_ascii_file_after_header(filepath, header_chars="#")
 
     def _delete_events_in_memory(self):
-        # TODO: find how to reset recorders!
-        pass
-        # self.device.n_events = 0
+        # Setting the number of events to 0 deletes all events recorded in memory:
+        self.device.set({"n_events": 0})
+        self._events_chunks = []
+        self._events_chunks_starts = []
+        self._number_of_transferred_events = 0
+
+    def read_new_events(self, cursor=0, variables=None):
+        """This method will return only the events recorded after a cursor, i.e., the ones not read yet,
+           as numpy arrays. For devices recording to memory, only the events recorded since the previous reading
+           are copied from NEST, and only the chunks of events after the cursor are concatenated.
+            Arguments:
+                cursor: the number of events already read, i.e., the index of the first new event. Default = 0.
+                        If the device has been reset since (i.e., it holds less events than the cursor),
+                        all its events are new.
+                variables: sequence (list, tuple, array) of variables to be included in the output,
+                           assumed to correspond to keys of the events dict.
+                           Default=None, corresponds to all keys of events.
+            Returns:
+              the dictionary of numpy arrays of the new events, and the new cursor
+        """
+        if not self._record_to_memory:
+            return super(NESTOutputDevice, self).read_new_events(cursor, variables)
+        self._transfer_events_from_memory()
+        n_events = self._number_of_transferred_events
+        if cursor > n_events:
+            cursor = 0
+        if variables is not None:
+            variables = ensure_list(variables)
+        if len(self._events_chunks) == 0:
+            return self._concatenate_events_chunks(variables=variables), n_events
+        i_chunk = np.searchsorted(self._events_chunks_starts, cursor, side="right") - 1
+        return self._concatenate_events_chunks(i_chunk, cursor - self._events_chunks_starts[i_chunk],
+                                               variables), n_events
 
     def reset(self):
         self._reset()
@@ -437,6 +539,27 @@ class NESTMultimeter(NESTOutputDevice, Multimeter):
     def record_from(self):
         return [str(name) for name in self.device.get('record_from')]
 
+    def _get_window_events(self, t_from=None):
+        """This method returns the events that latest_window selects the samples recorded after t_from from.
+           For multimeters recording to memory, only the latest chunks of events,
+           which may include samples recorded after t_from, are concatenated,
+           and the events recorded since the previous reading are the only ones copied from NEST.
+           Arguments:
+            t_from: the time after which (excluded) recorded samples are needed.
+                    Default = None, corresponding to the samples of the last recorded time point only.
+           Returns:
+            the dictionary of events
+        """
+        if not self._record_to_memory:
+            return self.events
+        self._transfer_events_from_memory()
+        i_chunk = len(self._events_chunks) - 1
+        if t_from is not None:
+            # The chunks are ordered in time:
+            while i_chunk > 0 and self._events_chunks[i_chunk]["times"][0] > t_from:
+                i_chunk -= 1
+        return self._concatenate_events_chunks(max(i_chunk, 0))
+
     def get_data(self, variables=None, name=None, dims_names=["Time", "Variable", "Neuron"], flatten_neurons_inds=True):
         """This method returns time series' data recorded by the multimeter.
            Arguments:
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from tvb_multiscale.core.config import Config as ConfigBase
+from tvb_multiscale.core.utils.log_utils import initialize_logger as initialize_logger_base
+
+
+TVB_NUMPY_DIR = os.path.abspath(__file__).split("tvb_numpy")[0]
+WORKING_DIR = os.environ.get("WORKING_DIR", os.getcwd())
+
+
+class Config(ConfigBase):
+    # WORKING DIRECTORY:
+    TVB_NUMPY_DIR = TVB_NUMPY_DIR
+    WORKING_DIR = WORKING_DIR
+
+    NUMPY_SEED = 0
+
+    DEFAULT_MODEL = "iaf_psc_exp"
+
+    # Delays should be at least equal to the NumPy simulator time resolution
+    DEFAULT_CONNECTION = {"synapse_model": "static_synapse", "weight": 1.0, "delay": 1.0, 'receptor_type': 0,
+                          "source_inds": None, "target_inds": None, "params": {},
+                          "conn_spec": {"allow_autapses": True, 'allow_multapses': True, 'rule': "all_to_all",
+                                        "indegree": None, "outdegree": None, "N": None, "p": 0.1}}
+
+    DEFAULT_TVB_TO_NUMPY_INTERFACE = "inhomogeneous_poisson_generator"
+    DEFAULT_NUMPY_TO_TVB_INTERFACE = "spike_recorder"
+
+    # Available NumPy simulator output devices for the interface and their default properties
+    NUMPY_OUTPUT_DEVICES_PARAMS_DEF = {"multimeter": {"record_from": ["V_m"], "interval": 1.0},
+                                       "voltmeter": {"record_from": ["V_m"], "interval": 1.0},
+                                       "spike_recorder": {}}
+
+    NUMPY_INPUT_DEVICES_PARAMS_DEF = {"spike_generator": {},
+                                      "poisson_generator": {},
+                                      "inhomogeneous_poisson_generator": {},
+                                      "dc_generator": {}}
+
+    def __init__(self, output_base=None, separate_by_run=False, initialize_logger=True):
+        super(Config, self).__init__(output_base, separate_by_run, initialize_logger)
+        self.TVB_NUMPY_DIR = TVB_NUMPY_DIR
+        self.WORKING_DIR = WORKING_DIR
+
+
+CONFIGURED = Config(initialize_logger=False)
+
+
+def initialize_logger(name, target_folder=None):
+    if target_folder is None:
+        target_folder = Config().out.FOLDER_LOGS
+    return initialize_logger_base(name, target_folder)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from tvb_multiscale.tvb_numpy.config import CONFIGURED
+from tvb_multiscale.tvb_numpy.numpy_models.devices import \
+    NumPyInputDeviceDict, NumPySpikeInputDeviceDict, NumPyCurrentInputDeviceDict, \
+    NumPyOutputDeviceDict, NumPyOutputSpikeDeviceDict, NumPyOutputContinuousTimeDeviceDict
+from tvb_multiscale.core.interfaces.base import TVBSpikeNetInterface
+
+
+class TVBNumPyInterface(TVBSpikeNetInterface):
+    _available_input_devices = NumPyInputDeviceDict.keys()
+    _current_input_devices = NumPyCurrentInputDeviceDict.keys()
+    _spike_rate_input_devices = NumPySpikeInputDeviceDict.keys()
+    _available_output_devices = NumPyOutputDeviceDict.keys()
+    _spike_rate_output_devices = NumPyOutputSpikeDeviceDict.keys()
+    _multimeter_output_devices = NumPyOutputContinuousTimeDeviceDict.keys()
+    _voltmeter_output_devices = ["voltmeter"]
+
+    def __init__(self, config=CONFIGURED):
+        super(TVBNumPyInterface, self).__init__(config)
+
+    @property
+    def numpy_simulator(self):
+        return self.spiking_network.numpy_simulator
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from tvb_multiscale.tvb_numpy.numpy_models.devices import NumPyInputDeviceDict
+from tvb_multiscale.tvb_numpy.interfaces.builders.tvb_to_numpy_devices_interface_builder import \
+    TVBtoNumPyDeviceInterfaceBuilder
+from tvb_multiscale.tvb_numpy.interfaces.builders.tvb_to_numpy_parameter_interface_builder import \
+    TVBtoNumPyParameterInterfaceBuilder
+from tvb_multiscale.tvb_numpy.interfaces.builders.numpy_to_tvb_interface_builder import NumPytoTVBInterfaceBuilder
+from tvb_multiscale.core.interfaces.builders.base import TVBSpikeNetInterfaceBuilder
+
+
+class TVBNumPyInterfaceBuilder(TVBSpikeNetInterfaceBuilder):
+    _tvb_to_spikNet_device_interface_builder = TVBtoNumPyDeviceInterfaceBuilder
+    _tvb_to_spikeNet_parameter_interface_builder = TVBtoNumPyParameterInterfaceBuilder
+    _spikeNet_to_tvb_interface_builder = NumPytoTVBInterfaceBuilder
+    _input_device_dict = NumPyInputDeviceDict
+
+    # TVB <-> Spiking Network transformations' weights/funs,
+    # with the same units as for NEST (see tvb_multiscale.tvb_nest.interfaces.builders.base):
+    # TVB -> Spiking Network
+    w_tvb_to_spike_rate = 1000.0  # (spike rate in the NumPy simulator is in spikes/sec)
+    w_tvb_to_current = 1000.0  # (1000.0 (nA -> pA), because I_e, and dc_generator amplitude are in pA)
+    w_tvb_to_potential = 1.0  # assuming mV in both Spiking Network and TVB
+    # TVB <- Spiking Network
+    w_spikes_to_tvb = 1.0
+    w_spikes_var_to_tvb = 1.0
+    w_potential_to_tvb = 1.0
+
+    @property
+    def numpy_simulator(self):
+        return self.spiking_network.numpy_simulator
+
+    @property
+    def config(self):
+        return self.spiking_network.config
+
+    @property
+    def spikeNet_min_delay(self):
+        return self.numpy_simulator.min_delay
+
+    def assert_delay(self, delay):
+        return np.maximum(self.spikeNet_min_delay, delay)
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+from tvb_multiscale.tvb_numpy.interfaces.numpy_to_tvb_interface import NumPytoTVBinterface
+from tvb_multiscale.tvb_numpy.numpy_models.builders.numpy_factory import create_device, connect_device
+from tvb_multiscale.core.spiking_models.builders.factory import build_and_connect_devices
+from tvb_multiscale.core.interfaces.builders.spikeNet_to_tvb_interface_builder import SpikeNetToTVBInterfaceBuilder
+
+
+class NumPytoTVBInterfaceBuilder(SpikeNetToTVBInterfaceBuilder):
+    _build_target_class = NumPytoTVBinterface
+
+    @property
+    def numpy_simulator(self):
+        return self.spiking_network.numpy_simulator
+
+    def build_and_connect_devices(self, devices, nodes, *args, **kwargs):
+        return build_and_connect_devices(devices, create_device, connect_device,
+                                         nodes, self.config, numpy_simulator=self.numpy_simulator)
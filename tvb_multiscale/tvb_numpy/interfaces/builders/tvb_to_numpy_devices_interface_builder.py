@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+from tvb_multiscale.tvb_numpy.interfaces.tvb_to_numpy_devices_interface import INPUT_INTERFACES_DICT
+from tvb_multiscale.tvb_numpy.numpy_models.builders.numpy_factory import \
+    create_device, connect_device, create_devices, connect_devices
+from tvb_multiscale.core.interfaces.builders.tvb_to_spikeNet_device_interface_builder import \
+    TVBtoSpikeNetDeviceInterfaceBuilder
+from tvb_multiscale.core.spiking_models.builders.factory import build_and_connect_devices
+
+
+class TVBtoNumPyDeviceInterfaceBuilder(TVBtoSpikeNetDeviceInterfaceBuilder):
+    _available_input_device_interfaces = INPUT_INTERFACES_DICT
+
+    @property
+    def numpy_simulator(self):
+        return self.spiking_network.numpy_simulator
+
+    @property
+    def spiking_dt(self):
+        try:
+            return self.numpy_simulator.dt
+        except:
+            return super(TVBtoNumPyDeviceInterfaceBuilder, self).spiking_dt
+
+    @property
+    def min_delay(self):
+        try:
+            return self.numpy_simulator.min_delay
+        except:
+            return self.default_min_delay
+
+    def build_and_connect_devices(self, devices, nodes, *args, **kwargs):
+        return build_and_connect_devices(devices, create_device, connect_device,
+                                         nodes, self.config, create_devices_fun=create_devices,
+                                         connect_devices_fun=connect_devices, numpy_simulator=self.numpy_simulator)
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+from tvb_multiscale.tvb_numpy.interfaces.tvb_to_numpy_parameters_interface import TVBtoNumPyParameterInterface
+from tvb_multiscale.core.interfaces.builders.tvb_to_spikeNet_parameter_interface_builder import \
+    TVBtoSpikeNetParameterInterfaceBuilder
+
+
+class TVBtoNumPyParameterInterfaceBuilder(TVBtoSpikeNetParameterInterfaceBuilder):
+    _build_target_class = TVBtoNumPyParameterInterface
+
+    @property
+    def numpy_simulator(self):
+        return self.spiking_network.numpy_simulator
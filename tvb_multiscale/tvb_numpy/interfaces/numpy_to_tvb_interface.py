@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+from tvb_multiscale.core.interfaces.spikeNet_to_tvb_interface import SpikeNetToTVBinterface
+
+
+class NumPytoTVBinterface(SpikeNetToTVBinterface):
+
+    # NumPy simulator devices keep all their events in memory,
+    # and only the events recorded after the cursors of the last reading are read at every time step.
+
+    @property
+    def numpy_simulator(self):
+        return self.spiking_network.numpy_simulator
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from tvb_multiscale.core.interfaces.tvb_to_spikeNet_device_interface import TVBtoSpikeNetDeviceInterface
+
+
+# Each interface has its own set(values) method, depending on the underlying device:
+
+
+class TVBtoNumPyDeviceInterface(TVBtoSpikeNetDeviceInterface):
+
+    @property
+    def numpy_simulator(self):
+        return self.spiking_network.numpy_simulator
+
+
+class TVBtoNumPyDCGeneratorInterface(TVBtoNumPyDeviceInterface):
+
+    def set(self, values, duration=None):
+        # The values are applied for the Spiking Network's run that follows,
+        # i.e., for a TVB time step, or for the given duration:
+        if duration is None:
+            duration = self.dt
+        self.Set({"amplitude": self._assert_input_size(values),
+                  "origin": self.numpy_simulator.time,
+                  "start": 0.0,
+                  "stop": duration})
+
+    def set_window(self, values, dt):
+        # The mean values are applied for the whole synchronization window:
+        values = np.array(values)
+        self.set(np.mean(values, axis=0), values.shape[0] * dt)
+
+
+class TVBtoNumPyPoissonGeneratorInterface(TVBtoNumPyDeviceInterface):
+
+    def set(self, values, duration=None):
+        # The values are applied for the Spiking Network's run that follows,
+        # i.e., for a TVB time step, or for the given duration:
+        if duration is None:
+            duration = self.dt
+        self.Set({"rate": np.maximum([0], self._assert_input_size(values)),
+                  "origin": self.numpy_simulator.time,
+                  "start": 0.0,
+                  "stop": duration})
+
+    def set_window(self, values, dt):
+        # The mean values are applied for the whole synchronization window:
+        values = np.array(values)
+        self.set(np.mean(values, axis=0), values.shape[0] * dt)
+
+
+class TVBtoNumPyInhomogeneousPoissonGeneratorInterface(TVBtoNumPyDeviceInterface):
+
+    def set(self, values):
+        values = np.maximum([0], self._assert_input_size(values)).tolist()
+        for i_val, val in enumerate(values):
+            values[i_val] = [val]
+        self.Set({"rate_times": [[self.numpy_simulator.time + self.numpy_simulator.dt]] * self.number_of_nodes,
+                  "rate_values": values})
+
+    def set_window(self, values, dt):
+        # One rate per TVB time step of the synchronization window:
+        values = np.maximum(0.0, np.array(values)).T
+        rate_times = (self.numpy_simulator.time + self.numpy_simulator.dt + dt * np.arange(values.shape[1])).tolist()
+        self.Set({"rate_times": [rate_times] * self.number_of_nodes,
+                  "rate_values": values.tolist()})
+
+
+class TVBtoNumPySpikeGeneratorInterface(TVBtoNumPyDeviceInterface):
+
+    def set(self, values):
+        values = self._assert_input_size(values)
+        self.Set({"spike_times": np.ones((self.number_of_nodes,)) * self.numpy_simulator.min_delay,
+                  "origin": self.numpy_simulator.time,
+                  "spike_weights": values})
+
+
+INPUT_INTERFACES_DICT = {"dc_generator": TVBtoNumPyDCGeneratorInterface,
+                         "poisson_generator": TVBtoNumPyPoissonGeneratorInterface,
+                         "inhomogeneous_poisson_generator": TVBtoNumPyInhomogeneousPoissonGeneratorInterface,
+                         "spike_generator": TVBtoNumPySpikeGeneratorInterface}
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from tvb_multiscale.tvb_numpy.config import CONFIGURED, initialize_logger
+from tvb_multiscale.tvb_numpy.numpy_simulator.models import NUMPY_NEURON_MODELS
+from tvb_multiscale.tvb_numpy.numpy_models.population import NumPyPopulation
+from tvb_multiscale.tvb_numpy.numpy_models.region_node import NumPyRegionNode
+from tvb_multiscale.tvb_numpy.numpy_models.brain import NumPyBrain
+from tvb_multiscale.tvb_numpy.numpy_models.network import NumPyNetwork
+from tvb_multiscale.tvb_numpy.numpy_models.builders.numpy_factory import \
+    load_numpy_simulator, get_populations_neurons, create_conn_spec, create_device, connect_device
+from tvb_multiscale.core.spiking_models.builders.factory import build_and_connect_devices
+from tvb_multiscale.core.spiking_models.builders.base import SpikingModelBuilder
+
+from tvb.contrib.scripts.utils.log_error_utils import raise_value_error
+from tvb.contrib.scripts.utils.data_structures_utils import ensure_list
+
+
+LOG = initialize_logger(__name__)
+
+
+class NumPyModelBuilder(SpikingModelBuilder):
+
+    """This is the base class of a NumPyModelBuilder,
+       which builds a NumPyNetwork of the reference NumPy simulator from user configuration inputs.
+       The builder is half way opionionated.
+    """
+
+    config = CONFIGURED
+    numpy_simulator = None
+    _spiking_brain = NumPyBrain()
+
+    # A connection consists of the 5 int64 or float64 attributes of CONNECTIONS_ATTRS,
+    # and a neuron of a few float64 state variables and parameters:
+    neuron_memory_bytes = 64
+    synapse_memory_bytes = 40
+
+    def __init__(self, tvb_simulator, numpy_nodes_ids, numpy_simulator=None, config=CONFIGURED, logger=LOG):
+        super(NumPyModelBuilder, self).__init__(tvb_simulator, numpy_nodes_ids, config, logger)
+        self.numpy_simulator = numpy_simulator
+        self._spiking_brain = NumPyBrain()
+
+    def _configure_numpy_simulator(self):
+        # Setting or creating a NumPy simulator instance:
+        if self.numpy_simulator is None:
+            self.numpy_simulator = load_numpy_simulator(self.config, self.logger)
+        self._update_spiking_dt()
+        self._update_default_min_delay()
+        # This will delete any network of the NumPy simulator!
+        self.numpy_simulator.reset(dt=self.spiking_dt, seed=self.config.NUMPY_SEED)
+
+    def _confirm_numpy_models(self, models):
+        """This method will confirm the existence of the input neural and synapse models in the NumPy simulator.
+           Arguments:
+            models: a sequence (list, tuple) of the names (strings) of the models to be confirmed
+        """
+        for model in ensure_list(models):
+            # The NumPy simulator has only static synapses:
+            if model not in NUMPY_NEURON_MODELS and model != "static_synapse":
+                raise_value_error("Neuron model %s is not one of the NumPy simulator's neuron models %s!"
+                                  % (model, str(list(NUMPY_NEURON_MODELS.keys()))))
+
+    def configure(self):
+        self._configure_numpy_simulator()
+        super(NumPyModelBuilder, self).configure()
+        self._confirm_numpy_models(self._models)
+
+    def build_spiking_population(self, label, model, size, params):
+        """This methods builds a NumPyPopulation instance,
+           which represents a population of spiking neurons of the same neural model,
+           and residing at a particular brain region node.
+           Arguments:
+            label: name (string) of the population
+            model: name (string) of the neural model
+            size: number (integer) of the neurons of this population
+            params: dictionary of parameters of the neural model to be set upon creation
+           Returns:
+            a NumPyPopulation class instance
+        """
+        return NumPyPopulation(self.numpy_simulator.create_neurons(model, int(np.round(size)), params=params),
+                               label, model, self.numpy_simulator)
+
+    @property
+    def min_delay(self):
+        try:
+            return self.numpy_simulator.min_delay
+        except:
+            return self.default_min_delay
+
+    def _get_min_delay(self, delay):
+        """A method to get the minimum delay, also from a distribution dictionary."""
+        if isinstance(delay, dict):
+            if delay.get("distribution", None) == "uniform":
+                return delay["low"]
+            raise_value_error("Only uniform distribution is allowed for delays to make sure that > min_delay!\n"
+                              "The delay given is %s!" % str(delay))
+        return np.min(delay)
+
+    def _assert_delay(self, delay):
+        """A method to assert that the delay is not smaller than the NumPy simulator's time step."""
+        if self._get_min_delay(delay) < self.spiking_dt:
+            raise_value_error("Coupling spiking neurons with delay = %s < NumPy integration step = %f "
+                              "is not possible!\n" % (str(delay), self.spiking_dt))
+        return delay
+
+    def _prepare_conn_spec(self, pop_src, pop_trg, conn_spec):
+        return create_conn_spec(n_src=pop_src.number_of_neurons, n_trg=pop_trg.number_of_neurons,
+                                src_is_trg=(pop_src.population == pop_trg.population),
+                                config=self.config, **conn_spec)[0]
+
+    def _expected_number_of_connections(self, n_src, n_trg, src_is_trg, conn_spec):
+        return create_conn_spec(n_src=n_src, n_trg=n_trg, src_is_trg=src_is_trg, config=self.config, **conn_spec)[1]
+
+    def set_synapse(self, syn_model, weight, delay, receptor_type, params={}):
+        """Method to set the synaptic model, the weight, the delay,
+           the synaptic receptor type, and other possible synapse parameters
+           to a synapse_params dictionary.
+           Arguments:
+            - syn_model: the name (string) of the synapse model
+            - weight: the weight of the synapse
+            - delay: the delay of the connection,
+            - receptor_type: the receptor type
+            - params: a dict of possible synapse parameters
+           Returns:
+            a dictionary of the whole synapse configuration
+        """
+        syn_spec = {'synapse_model': syn_model, 'weight': weight, 'delay': delay, 'receptor_type': receptor_type}
+        syn_spec.update(params)
+        return syn_spec
+
+    def connect_two_populations(self, pop_src, src_inds_fun, pop_trg, trg_inds_fun, conn_spec, syn_spec):
+        """Method to connect two NumPyPopulation instances in the SpikingNetwork.
+           Arguments:
+            source: the source NumPyPopulation of the connection
+            src_inds_fun: a function that selects a subset of the souce population neurons
+            target: the target NumPyPopulation of the connection
+            trg_inds_fun: a function that selects a subset of the target population neurons
+            conn_params: a dict of parameters of the connectivity pattern among the neurons of the two populations,
+                         excluding weight and delay ones
+            synapse_params: a dict of parameters of the synapses among the neurons of the two populations,
+                            including weight, delay and synaptic receptor type ones
+        """
+        # Prepare the parameters of connectivity:
+        conn_spec = self._prepare_conn_spec(pop_src, pop_trg, conn_spec)
+        # Prepare the parameters of the synapse:
+        syn_spec = dict(syn_spec)
+        syn_spec["delay"] = self._assert_delay(syn_spec["delay"])
+        # We might create the same connection multiple times for different synaptic receptors...
+        receptors = ensure_list(syn_spec["receptor_type"])
+        for receptor in receptors:
+            syn_spec["receptor_type"] = receptor
+            self.numpy_simulator.connect(get_populations_neurons(pop_src, src_inds_fun),
+                                         get_populations_neurons(pop_trg, trg_inds_fun),
+                                         conn_spec, syn_spec)
+
+    def connect_populations_in_bulk(self, populations_pairs, src_inds_fun, trg_inds_fun, conn_spec):
+        """Method to connect many pairs of NumPyPopulation instances in the SpikingNetwork,
+           by drawing the connections of all pairs first, and then creating them all together,
+           in chunks of at most bulk_connect_chunk_size connections.
+           The connections are drawn in the same order as by connect_two_populations for every pair.
+           Arguments:
+            populations_pairs: a sequence of (source NumPyPopulation, target NumPyPopulation, syn_spec) tuples
+            src_inds_fun: a function that selects a subset of the souce population neurons
+            trg_inds_fun: a function that selects a subset of the target population neurons
+            conn_spec: a dict of parameters of the connectivity pattern among the neurons of the two populations,
+                       excluding weight and delay ones
+        """
+        connections = []
+        for pop_src, pop_trg, syn_spec in populations_pairs:
+            pair_conn_spec = self._prepare_conn_spec(pop_src, pop_trg, conn_spec)
+            syn_spec = dict(syn_spec)
+            syn_spec["delay"] = self._assert_delay(syn_spec["delay"])
+            for receptor in ensure_list(syn_spec["receptor_type"]):
+                syn_spec["receptor_type"] = receptor
+                connections.append(
+                    self.numpy_simulator.draw_connections(get_populations_neurons(pop_src, src_inds_fun),
+                                                          get_populations_neurons(pop_trg, trg_inds_fun),
+                                                          pair_conn_spec, syn_spec))
+        if len(connections):
+            self._connect_in_chunks(self.numpy_simulator.add_connections,
+                                    dict([(attr, np.concatenate([conns[attr] for conns in connections]))
+                                          for attr in connections[0].keys()]))
+
+    def _number_of_connections(self, conn=None):
+        return self.numpy_simulator.number_of_connections
+
+    def _get_connections_arrays(self, start, stop, conn=None):
+        return dict([(attr, values[start:stop]) for attr, values in self.numpy_simulator.connections.items()])
+
+    def _connect_arrays(self, connections):
+        self._connect_in_chunks(self.numpy_simulator.add_connections, connections)
+
+    def _get_random_state(self):
+        return self.numpy_simulator.rng.bit_generator.state
+
+    def _set_random_state(self, random_state):
+        self.numpy_simulator.rng.bit_generator.state = random_state
+
+    def _connectivity_cache_config(self):
+        return [self.config.NUMPY_SEED]
+
+    def build_spiking_region_node(self, label="", input_node=None, *args, **kwargs):
+        """This methods builds a NumPyRegionNode instance,
+           which consists of a pandas.Series of all SpikingPopulation instances,
+           residing at a particular brain region node.
+           Arguments:
+            label: name (string) of the region node. Default = ""
+            input_node: an already created SpikingRegionNode() class. Default = None.
+            *args, **kwargs: other optional positional or keyword arguments
+           Returns:
+            a SpikingRegionNode class instance
+        """
+        return NumPyRegionNode(label, input_node, self.numpy_simulator)
+
+    def build_and_connect_devices(self, devices):
+        """Method to build and connect input or output devices, organized by
+           - the variable they measure or stimulate (pandas.Series), and the
+           - population(s) (pandas.Series), and
+           - brain region nodes (pandas.Series) they target.
+           See tvb_multiscale.core.spiking_models.builders.factory
+           and tvb_multiscale.tvb_numpy.numpy_models.builders.numpy_factory"""
+        return build_and_connect_devices(devices, create_device, connect_device,
+                                         self._spiking_brain, self.config, numpy_simulator=self.numpy_simulator)
+
+    def build(self):
+        """A method to build the final NumPyNetwork class based on the already created constituents."""
+        return NumPyNetwork(self.numpy_simulator, self._spiking_brain,
+                            self._output_devices, self._input_devices, config=self.config)
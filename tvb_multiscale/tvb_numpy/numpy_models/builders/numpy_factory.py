@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+from copy import deepcopy
+
+import numpy as np
+
+from tvb_multiscale.tvb_numpy.config import CONFIGURED, initialize_logger
+from tvb_multiscale.tvb_numpy.numpy_simulator.simulator import NumPySimulator
+from tvb_multiscale.tvb_numpy.numpy_models.devices import NumPyInputDeviceDict, NumPyOutputDeviceDict
+
+from tvb.contrib.scripts.utils.log_error_utils import raise_value_error, warning
+
+
+LOG = initialize_logger(__name__)
+
+
+# Helper functions with the NumPy simulator
+
+
+def load_numpy_simulator(config=CONFIGURED, logger=LOG):
+    """This method will create a NumPy simulator instance and return it.
+        Arguments:
+         config: configuration class instance. Default: imported default CONFIGURED object.
+         logger: logger object. Default: local LOG object.
+        Returns:
+         the NumPySimulator instance
+    """
+    logger.info("Loading a NumPy simulator instance...")
+    return NumPySimulator(seed=config.NUMPY_SEED)
+
+
+def get_populations_neurons(population, inds_fun=None):
+    """This method will return a subset NodeCollection instance
+       of the NumPyPopulation._population, if inds_fun argument is a function
+       Arguments:
+        population: a NumPyPopulation class instance
+        inds_fun: a function that takes a NodeCollection as argument and returns another NodeCollection
+       Returns:
+        NodeCollection NumPyPopulation._population instance
+    """
+    if inds_fun is None:
+        return population._population
+    return inds_fun(population._population)
+
+
+def create_conn_spec(n_src=1, n_trg=1, src_is_trg=False, config=CONFIGURED, **kwargs):
+    """This function returns a conn_spec dictionary and the expected/accurate number of total connections.
+       Arguments:
+        n_src: number (int) of source neurons. Default = 1.
+        n_trg: number (int) of target neurons. Default = 1.
+        src_is_trg: a (bool) flag to determine if the source and target populations are the same one. Default = False.
+        config: configuration class instance. Default: imported default CONFIGURED object.
+    """
+    conn_spec = dict(config.DEFAULT_CONNECTION["conn_spec"])
+    P_DEF = conn_spec["p"]
+    conn_spec.update(kwargs)
+    rule = conn_spec["rule"]
+    p = conn_spec["p"]
+    N = conn_spec["N"]
+    autapses = conn_spec["allow_autapses"]
+    multapses = conn_spec["allow_multapses"]
+    indegree = conn_spec["indegree"]
+    outdegree = conn_spec["outdegree"]
+    conn_spec = {
+        'rule': rule,
+        'allow_autapses': autapses,  # self-connections flag
+        'allow_multapses': multapses  # multiple connections per neurons' pairs flag
+    }
+    if rule == 'one_to_one':
+        return conn_spec, np.minimum(n_src, n_trg)
+    elif rule == 'fixed_total_number':
+        if N is None:
+            # Assume all to all if N is not given:
+            N = n_src * n_trg
+            if p is not None:
+                # ...prune to end up to connection probability p if p is given
+                N = int(np.round(p * N))
+        conn_spec['N'] = N
+        return conn_spec, N
+    elif rule == 'fixed_indegree':
+        if indegree is None:
+            # Compute indegree following connection probability p if not given
+            if p is None:
+                p = P_DEF
+            indegree = int(np.round(p * n_src))
+        conn_spec['indegree'] = indegree
+        return conn_spec, indegree * n_trg
+    elif rule == 'fixed_outdegree':
+        if outdegree is None:
+            # Compute outdegree following connection probability p if not given
+            if p is None:
+                p = P_DEF
+            outdegree = int(np.round(p * n_trg))
+        conn_spec['outdegree'] = outdegree
+        return conn_spec, outdegree * n_src
+    else:
+        Nall = n_src * n_trg
+        if src_is_trg and autapses is False:
+            Nall -= n_src
+        if rule == 'pairwise_bernoulli':
+            if p is None:
+                p = P_DEF
+            conn_spec['p'] = p
+            return conn_spec, int(np.round(p * Nall))
+        else:  # assuming rule == 'all_to_all':
+            return conn_spec, Nall
+
+
+def create_device(device_model, params=None, config=CONFIGURED, numpy_simulator=None, **kwargs):
+    """Method to create a NumPyDevice.
+       Arguments:
+        device_model: name (string) of the device model
+        params: dictionary of parameters of device and/or its synapse. Default = None
+        config: configuration class instance. Default: imported default CONFIGURED object.
+        numpy_simulator: the NumPySimulator instance.
+                         Default = None, in which case we are going to create one, and also return it in the output
+       Returns:
+        the NumPyDevice class, and optionally, the NumPySimulator instance if it is created here.
+    """
+    if numpy_simulator is None:
+        numpy_simulator = load_numpy_simulator(config=config)
+        return_numpy_simulator = True
+    else:
+        return_numpy_simulator = False
+    label = kwargs.pop("label", "")
+    if device_model in NumPyInputDeviceDict.keys():
+        devices_dict = NumPyInputDeviceDict
+        default_params = deepcopy(config.NUMPY_INPUT_DEVICES_PARAMS_DEF.get(device_model, {}))
+    elif device_model in NumPyOutputDeviceDict.keys():
+        devices_dict = NumPyOutputDeviceDict
+        default_params = deepcopy(config.NUMPY_OUTPUT_DEVICES_PARAMS_DEF.get(device_model, {}))
+    else:
+        raise_value_error("%s is neither one of the available input devices: %s\n "
+                          "nor of the output ones: %s!" %
+                          (device_model, str(config.NUMPY_INPUT_DEVICES_PARAMS_DEF),
+                           str(config.NUMPY_OUTPUT_DEVICES_PARAMS_DEF)))
+    if isinstance(params, dict) and len(params) > 0:
+        default_params.update(params)
+    label = default_params.pop("label", label)
+    numpy_device = numpy_simulator.create_device(device_model, params=default_params)
+    default_params["label"] = label
+    numpy_device = devices_dict[device_model](numpy_device, numpy_simulator, **default_params)
+    if return_numpy_simulator:
+        return numpy_device, numpy_simulator
+    else:
+        return numpy_device
+
+
+def create_devices(device_model, number_of_devices, params=None, labels=None, config=CONFIGURED,
+                   numpy_simulator=None, **kwargs):
+    """Method to create several NumPyDevice instances of the same model,
+       as the channels of a single multi-channel device.
+       The NumPy simulator creates one DeviceNode per channel.
+       Arguments:
+        device_model: name (string) of the device model
+        number_of_devices: the number (int) of devices to create
+        params: dictionary of parameters of the devices and/or their synapse. Default = None
+        labels: a sequence of the labels (strings) of the devices. Default = None
+        config: configuration class instance. Default: imported default CONFIGURED object.
+        numpy_simulator: the NumPySimulator instance. Default = None, which raises an error.
+       Returns:
+        a list of the NumPyDevice instances
+    """
+    if numpy_simulator is None:
+        raise_value_error("There is no NumPy simulator instance!")
+    if labels is None:
+        labels = [""] * number_of_devices
+    return [create_device(device_model, params=params, config=config, numpy_simulator=numpy_simulator, label=label)
+            for label in labels]
+
+
+def _assert_device_delay(delay, resolution):
+    # Make sure that the delay of a device's connection is not smaller than the NumPy simulator resolution:
+    if isinstance(delay, dict):
+        if delay["low"] < resolution:
+            delay["low"] = resolution
+            warning("Minimum delay %f is smaller than the NumPy simulator resolution %f!\n"
+                    "Setting minimum delay equal to resolution!" % (delay["low"], resolution))
+        if delay["high"] <= delay["low"]:
+            raise_value_error("Maximum delay %f is not smaller than minimum one %f!" % (delay["high"], delay["low"]))
+    else:
+        if delay < resolution:
+            delay = resolution
+            warning("Delay %f is smaller than the NumPy simulator resolution %f!\n"
+                    "Setting minimum delay equal to resolution!" % (delay, resolution))
+    return delay
+
+
+def connect_device(numpy_device, population, neurons_inds_fun, weight=1.0, delay=0.0, receptor_type=0,
+                   numpy_simulator=None, config=CONFIGURED, **kwargs):
+    """This method connects a NumPyDevice to a NumPyPopulation instance.
+       Arguments:
+        numpy_device: the NumPyDevice instance
+        population: the NumPyPopulation instance
+        neurons_inds_fun: a function to return a NumPyPopulation or a subset thereof of the target population.
+                          Default = None.
+        weight: the weights of the connection. Default = 1.0.
+        delay: the delays of the connection. Default = 0.0.
+        receptor_type: type of the synaptic receptor. Default = 0.
+        config: configuration class instance. Default: imported default CONFIGURED object.
+        numpy_simulator: the NumPySimulator instance. Default = None, which raises an error.
+       Returns:
+        the connected NumPyDevice
+    """
+    if receptor_type is None:
+        receptor_type = 0
+    if numpy_simulator is None:
+        raise_value_error("There is no NumPy simulator instance!")
+    syn_spec = {"weight": weight, "delay": _assert_device_delay(delay, numpy_simulator.dt),
+                "receptor_type": receptor_type}
+    neurons = get_populations_neurons(population, neurons_inds_fun)
+    if numpy_device.model == "spike_recorder":
+        #                       source  ->  target
+        numpy_simulator.connect(neurons, numpy_device.device, syn_spec=syn_spec)
+    else:
+        numpy_simulator.connect(numpy_device.device, neurons, syn_spec=syn_spec)
+    numpy_device.connectivity_changed()
+    return numpy_device
+
+
+def connect_devices(devices_connections, numpy_simulator=None, config=CONFIGURED, **kwargs):
+    """This method connects several NumPyDevice instances, e.g., the channels of a multi-channel device,
+       to NumPyPopulation instances, by drawing the connections of all of them first,
+       and then creating them all together, with a single NumPySimulator.add_connections call.
+       Arguments:
+        devices_connections: a list of
+                             (numpy_device, population, neurons_inds_fun, weight, delay, receptor_type) tuples,
+                             see connect_device
+        numpy_simulator: the NumPySimulator instance. Default = None, which raises an error.
+        config: configuration class instance. Default: imported default CONFIGURED object.
+    """
+    if numpy_simulator is None:
+        raise_value_error("There is no NumPy simulator instance!")
+    connections = []
+    for numpy_device, population, neurons_inds_fun, weight, delay, receptor_type in devices_connections:
+        if receptor_type is None:
+            receptor_type = 0
+        syn_spec = {"weight": weight, "delay": _assert_device_delay(delay, numpy_simulator.dt),
+                    "receptor_type": receptor_type}
+        neurons = get_populations_neurons(population, neurons_inds_fun)
+        if numpy_device.model == "spike_recorder":
+            #                                                     source  ->  target
+            connections.append(numpy_simulator.draw_connections(neurons, numpy_device.device, syn_spec=syn_spec))
+        else:
+            connections.append(numpy_simulator.draw_connections(numpy_device.device, neurons, syn_spec=syn_spec))
+    if len(connections):
+        numpy_simulator.add_connections(dict([(attr, np.concatenate([conns[attr] for conns in connections]))
+                                              for attr in connections[0].keys()]))
+        for numpy_device, _, _, _, _, _ in devices_connections:
+            numpy_device.connectivity_changed()
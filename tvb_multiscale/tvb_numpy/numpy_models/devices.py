@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABCMeta
+
+import numpy as np
+
+from tvb_multiscale.core.spiking_models.devices import \
+    Device, InputDevice, OutputDevice, SpikeRecorder, Multimeter, Voltmeter
+from tvb_multiscale.core.utils.data_structures_utils import flatten_neurons_inds_in_DataArray
+
+from tvb.contrib.scripts.utils.data_structures_utils import ensure_list, extract_integer_intervals
+
+
+# These classes wrap around the devices of the NumPy simulator.
+
+
+class NumPyDevice(Device):
+    __metaclass__ = ABCMeta
+
+    """NumPyDevice class to wrap around a NumPy simulator output (recording) or input (stimulating) device"""
+
+    numpy_simulator = None
+    _weight_attr = "weight"
+    _delay_attr = "delay"
+    _receptor_attr = "receptor"
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "numpy_device")
+        super(NumPyDevice, self).__init__(device, *args, **kwargs)
+        self.numpy_simulator = numpy_simulator
+
+    def _assert_numpy_simulator(self):
+        if self.numpy_simulator is None:
+            raise ValueError("No NumPy simulator associated to this %s of model %s!" %
+                             (self.__class__.__name__, self.model))
+
+    def _assert_device(self):
+        """Method to assert that the node of the network is a device"""
+        try:
+            self.device.get("global_id")
+        except:
+            raise ValueError("Failed to Get device %s!" % str(self.device))
+
+    @property
+    def global_id(self):
+        return self.device.global_id
+
+    @property
+    def spiking_simulator_module(self):
+        return self.numpy_simulator
+
+    @property
+    def numpy_model(self):
+        return self.device.model
+
+    def Set(self, values_dict):
+        """Method to set attributes of the device
+           Arguments:
+            values_dict: dictionary of attributes names' and values.
+        """
+        self.device.set(values_dict)
+
+    def Get(self, attrs=None):
+        """Method to get attributes of the device.
+           Arguments:
+            attrs: names of attributes to be returned. Default = None, corresponds to all device's attributes.
+           Returns:
+            Dictionary of attributes.
+        """
+        if attrs is None:
+            return self.device.get()
+        else:
+            return self.device.get(ensure_list(attrs))
+
+    def _GetConnections(self, **kwargs):
+        """Method to get attributes of the connections from/to the device
+           Return:
+            connections' objects
+        """
+        self._assert_numpy_simulator()
+        connections = self.numpy_simulator.get_connections(**kwargs)
+        if len(connections) == 0:
+            return ()
+        else:
+            return connections
+
+    def _SetToConnections(self, values_dict, connections=None):
+        """Method to set attributes of the connections from/to the device
+            Arguments:
+             values_dict: dictionary of attributes names' and values.
+             connections: A SynapseCollection. Default = None, corresponding to all device's connections
+        """
+        if connections is None:
+            connections = self._GetConnections()
+        connections.set(values_dict)
+
+    def _GetFromConnections(self, attrs=None, connections=None):
+        """Method to get attributes of the connections from/to the device
+           Arguments:
+            attrs: collection (list, tuple, array) of the attributes to be included in the output.
+                   Default = None, corresponding to all devices' attributes
+            connections: A SynapseCollection. Default = None, corresponding to all device's connections
+           Returns:
+            Dictionary of arrays of connections' attributes.
+        """
+        if connections is None:
+            connections = self._GetConnections()
+        if len(connections) == 0:
+            return {}
+        if attrs is None:
+            return connections.get()
+        else:
+            return connections.get(ensure_list(attrs))
+
+    def GetConnections(self):
+        """Method to get all connections of the device to neurons.
+           Returns:
+            SynapseCollection.
+        """
+        return self._GetConnections(source=self.device)
+
+    @property
+    def connections(self):
+        """Method to get all connections of the device to neurons.
+           Returns:
+            SynapseCollection.
+        """
+        return self._GetConnections(source=self.device)
+
+    def get_neurons(self, source_or_target="target"):
+        """Method to get the indices of all the neurons the device is connected from/to.
+           Mind that for all input and all out output devices, except for spike recorder,
+           the devices connects to the neurons, and not vice-versa,
+           i.e., neurons are the target of the device connection.
+        """
+        connections = self.connections
+        if len(connections) == 0:
+            return ()
+        return tuple(np.unique(connections.get(source_or_target)).tolist())
+
+    @property
+    def neurons(self):
+        """Method to get the indices of all the neurons the device is connected to."""
+        return self.get_neurons("target")
+
+    def _print_neurons(self, neurons):
+        return "%d neurons: %s" % (self.number_of_neurons, extract_integer_intervals(neurons, print=True))
+
+
+class NumPyInputDevice(NumPyDevice, InputDevice):
+
+    """NumPyInputDevice class to wrap around a NumPy simulator input (stimulating) device"""
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "numpy_input_device")
+        super(NumPyInputDevice, self).__init__(device, numpy_simulator, *args, **kwargs)
+
+
+class NumPyPoissonGenerator(NumPyInputDevice):
+
+    """NumPyPoissonGenerator class to wrap around a NumPy simulator poisson_generator device"""
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "poisson_generator")
+        super(NumPyPoissonGenerator, self).__init__(device, numpy_simulator, *args, **kwargs)
+
+
+class NumPyInhomogeneousPoissonGenerator(NumPyInputDevice):
+
+    """NumPyInhomogeneousPoissonGenerator class
+       to wrap around a NumPy simulator inhomogeneous_poisson_generator device"""
+
+    _array_parameters = ["rate_times", "rate_values"]
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "inhomogeneous_poisson_generator")
+        super(NumPyInhomogeneousPoissonGenerator, self).__init__(device, numpy_simulator, *args, **kwargs)
+
+
+class NumPySpikeGenerator(NumPyInputDevice):
+
+    """NumPySpikeGenerator class to wrap around a NumPy simulator spike_generator device"""
+
+    _array_parameters = ["spike_times", "spike_weights"]
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "spike_generator")
+        super(NumPySpikeGenerator, self).__init__(device, numpy_simulator, *args, **kwargs)
+
+
+class NumPyDCGenerator(NumPyInputDevice):
+
+    """NumPyDCGenerator class to wrap around a NumPy simulator dc_generator device"""
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "dc_generator")
+        super(NumPyDCGenerator, self).__init__(device, numpy_simulator, *args, **kwargs)
+
+
+NumPySpikeInputDeviceDict = {"poisson_generator": NumPyPoissonGenerator,
+                             "inhomogeneous_poisson_generator": NumPyInhomogeneousPoissonGenerator,
+                             "spike_generator": NumPySpikeGenerator
+                             }
+
+
+NumPyCurrentInputDeviceDict = {"dc_generator": NumPyDCGenerator}
+
+
+NumPyInputDeviceDict = {}
+NumPyInputDeviceDict.update(NumPySpikeInputDeviceDict)
+NumPyInputDeviceDict.update(NumPyCurrentInputDeviceDict)
+
+
+class NumPyOutputDevice(NumPyDevice, OutputDevice):
+
+    """NumPyOutputDevice class to wrap around a NumPy simulator output (recording) device,
+       which keeps its events in memory."""
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "numpy_output_device")
+        super(NumPyOutputDevice, self).__init__(device, numpy_simulator, *args, **kwargs)
+
+    @property
+    def record_from(self):
+        return []
+
+    @property
+    def events(self):
+        return self.device.events
+
+    @property
+    def number_of_events(self):
+        return self.device.number_of_events
+
+    @property
+    def n_events(self):
+        return self.number_of_events
+
+    def reset(self):
+        self.device.reset()
+
+
+class NumPySpikeRecorder(NumPyOutputDevice, SpikeRecorder):
+
+    """NumPySpikeRecorder class to wrap around a NumPy simulator spike_recorder device"""
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "spike_recorder")
+        super(NumPySpikeRecorder, self).__init__(device, numpy_simulator, *args, **kwargs)
+
+    # Only SpikeRecorder is the target of connections with neurons:
+
+    def GetConnections(self):
+        """Method to get connections of the device from neurons.
+           Returns:
+            connections' objects.
+        """
+        return self._GetConnections(target=self.device)
+
+    @property
+    def connections(self):
+        """Method to get all connections of the device from neurons.
+           Returns:
+            connections' objects.
+        """
+        return self._GetConnections(target=self.device)
+
+    @property
+    def neurons(self):
+        """Method to get the indices of all the neurons the device is connected to."""
+        return self.get_neurons("source")
+
+
+class NumPyMultimeter(NumPyOutputDevice, Multimeter):
+
+    """NumPyMultimeter class to wrap around a NumPy simulator multimeter device,
+       the data of which are read directly from its TimeSeriesBuffer, without converting them to events."""
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "multimeter")
+        super(NumPyMultimeter, self).__init__(device, numpy_simulator, *args, **kwargs)
+
+    @property
+    def record_from(self):
+        return self.device.record_from
+
+    def get_data(self, variables=None, name=None, dims_names=["Time", "Variable", "Neuron"], flatten_neurons_inds=True):
+        """This method returns time series' data recorded by the multimeter.
+           Arguments:
+            variables: a sequence of variables' names (strings) to be selected.
+                       Default = None, corresponds to all variables the multimeter records from.
+            name: label of output. Default = None, which defaults to the label of the Device
+            dims_names: sequence of dimensions' labels (strings) for the output array.
+                        Default = ["Time", "Variable", "Neuron"]
+           Returns:
+            a xarray DataArray with the output data
+        """
+        if name is None:
+            name = self.label
+        data = self.device.buffer.to_DataArray(name, dims_names)
+        if data.size:
+            data = data.loc[:, self._determine_variables(variables)]
+            if flatten_neurons_inds:
+                data = flatten_neurons_inds_in_DataArray(data, data.dims[2])
+        return data
+
+    def latest_window(self, t_from=None, variables=None):
+        """This method returns the data recorded by the multimeter after a given time,
+           averaged across the time points of that window, for each variable and neuron,
+           reading only the latest chunks of the multimeter's buffer.
+           Arguments:
+            t_from: the time after which (excluded) recorded samples are returned.
+                    Default = None, corresponding to the samples of the last recorded time point only.
+            variables: a sequence of variables' names (strings) to be selected.
+                       Default = None, corresponds to all variables the multimeter records from.
+           Returns:
+            a numpy array of shape (number of variables, number of neurons),
+            which is empty along the neurons' dimension if no samples have been recorded after t_from, and
+            the time of the last recorded sample, or t_from, if there is no such sample
+        """
+        variables = self._determine_variables(variables)
+        times, data = self.device.buffer.get_window(t_from)
+        if len(times) == 0:
+            return np.zeros((len(variables), 0)), t_from
+        variables_inds = [self.record_from.index(var) for var in variables]
+        return data[:, variables_inds].mean(axis=0), times[-1]
+
+
+class NumPyVoltmeter(NumPyMultimeter, Voltmeter):
+
+    """NumPyVoltmeter class to wrap around a NumPy simulator voltmeter device"""
+
+    def __init__(self, device, numpy_simulator, *args, **kwargs):
+        kwargs["model"] = kwargs.pop("model", "voltmeter")
+        super(NumPyVoltmeter, self).__init__(device, numpy_simulator, *args, **kwargs)
+        assert self.var in self.record_from
+
+    @property
+    def var(self):
+        return "V_m"
+
+    @property
+    def get_V_m(self):
+        return self.var
+
+    @property
+    def V_m(self):
+        return self.var
+
+
+NumPyOutputSpikeDeviceDict = {"spike_recorder": NumPySpikeRecorder}
+
+
+NumPyOutputContinuousTimeDeviceDict = {"multimeter": NumPyMultimeter,
+                                       "voltmeter": NumPyVoltmeter}
+
+
+NumPyOutputDeviceDict = {}
+NumPyOutputDeviceDict.update(NumPyOutputSpikeDeviceDict)
+NumPyOutputDeviceDict.update(NumPyOutputContinuousTimeDeviceDict)
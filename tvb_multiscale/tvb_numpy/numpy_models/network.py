@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from tvb_multiscale.tvb_numpy.config import CONFIGURED, initialize_logger
+from tvb_multiscale.tvb_numpy.numpy_models.builders.numpy_factory import load_numpy_simulator
+from tvb_multiscale.tvb_numpy.numpy_models.devices import \
+    NumPyOutputSpikeDeviceDict, NumPyOutputContinuousTimeDeviceDict
+from tvb_multiscale.core.spiking_models.network import SpikingNetwork
+
+
+LOG = initialize_logger(__name__)
+
+
+class NumPyNetwork(SpikingNetwork):
+    """
+        NumPyNetwork is a class representing a spiking network of the reference NumPy simulator, comprising of:
+        - a NumPyBrain class, i.e., neural populations organized per brain region they reside and neural model,
+        - a pandas.Series of DeviceSet classes of output (measuring/recording/monitor) NumPy simulator devices,
+        - a pandas.Series of DeviceSet classes of input (stimulating) NumPy simulator devices,
+        all of which are implemented as indexed mappings by inheriting from pandas.Series class.
+        The class also includes methods to return measurements (mean, sum/total data, spikes, spikes rates etc)
+        from output devices, as xarray.DataArrays.
+        Since the NumPy simulator needs no external installation,
+        it can be used for testing and benchmarking the co-simulation with TVB.
+    """
+
+    numpy_simulator = None
+
+    _OutputSpikeDeviceDict = NumPyOutputSpikeDeviceDict
+    _OutputContinuousTimeDeviceDict = NumPyOutputContinuousTimeDeviceDict
+
+    def __init__(self, numpy_simulator=None,
+                 brain_regions=None,
+                 output_devices=None,
+                 input_devices=None,
+                 config=CONFIGURED):
+        if numpy_simulator is None:
+            numpy_simulator = load_numpy_simulator(config, LOG)
+        self.numpy_simulator = numpy_simulator
+        super(NumPyNetwork, self).__init__(brain_regions, output_devices, input_devices, config)
+
+    @property
+    def spiking_simulator_module(self):
+        return self.numpy_simulator
+
+    @property
+    def min_delay(self):
+        return self.numpy_simulator.min_delay
+
+    def configure(self, *args, **kwargs):
+        """Method to configure the NumPy simulator's network simulation.
+           It will build the simulator's data structures for running, i.e., numpy_simulator.prepare()
+        """
+        self.numpy_simulator.prepare()
+
+    def Run(self, simulation_length, *args, **kwargs):
+        """Method to simulate the NumPy simulator's network for a specific simulation_length (in ms).
+           It will run numpy_simulator.run(simulation_length)
+        """
+        self.numpy_simulator.run(simulation_length)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from tvb_multiscale.core.spiking_models.region_node import SpikingRegionNode
+
+
+class NumPyRegionNode(SpikingRegionNode):
+
+    """NumPyRegionNode class is an indexed mapping
+       (based on inheriting from pandas.Series class)
+       between populations labels and NumPyPopulation instances,
+       residing at a specific brain region node.
+    """
+
+    numpy_simulator = None
+    _weight_attr = "weight"
+    _delay_attr = "delay"
+    _receptor_attr = "receptor"
+
+    def __init__(self, label="", input_nodes=None, numpy_simulator=None, **kwargs):
+        self.numpy_simulator = numpy_simulator
+        super(NumPyRegionNode, self).__init__(label, input_nodes, **kwargs)
+
+    @property
+    def spiking_simulator_module(self):
+        if self.numpy_simulator is None:
+            for i_pop, pop_lbl, pop in self._loop_generator():
+                self.numpy_simulator = pop.numpy_simulator
+                if self.numpy_simulator is not None:
+                    break
+        return self.numpy_simulator
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+from copy import deepcopy
+
+import numpy as np
+
+from tvb_multiscale.core.utils.buffers import SpikesBuffer, TimeSeriesBuffer
+from tvb_multiscale.core.utils.data_structures_utils import continuous_data_to_events
+
+from tvb.contrib.scripts.utils.data_structures_utils import ensure_list
+
+
+class DeviceNode(object):
+
+    """DeviceNode is the base class of the input (stimulating) and output (recording) devices
+       of the NumPy simulator. Every device is a node of the simulator with its own global id,
+       and it can be connected to or from neurons, like the neurons themselves."""
+
+    model = ""
+    default_params = {}
+
+    def __init__(self, simulator, global_id, params=None):
+        self.simulator = simulator
+        self.global_id = global_id
+        self.params = deepcopy(self.default_params)
+        if params:
+            self.set(params)
+
+    def __len__(self):
+        return 1
+
+    def __repr__(self):
+        return "%s(global_id=%d)" % (self.model, self.global_id)
+
+    def tolist(self):
+        return [self.global_id]
+
+    def set(self, values_dict):
+        """Method to set parameters of the device.
+           Arguments:
+            values_dict: dictionary of parameters names' and values
+        """
+        self.params.update(values_dict)
+
+    def get(self, attrs=None):
+        """Method to get parameters of the device.
+           Arguments:
+            attrs: name, or sequence of names, of parameters to be returned.
+                   Default = None, corresponds to all parameters.
+           Returns:
+            the value of a single parameter, or a dictionary of parameters' names and values
+        """
+        if attrs is None:
+            output = deepcopy(self.params)
+            output.update({"model": self.model, "global_id": self.global_id})
+            return output
+        if isinstance(attrs, str):
+            return self._get(attrs)
+        return dict([(attr, self._get(attr)) for attr in attrs])
+
+    def _get(self, attr):
+        if attr == "model":
+            return self.model
+        elif attr == "global_id":
+            return self.global_id
+        return self.params[attr]
+
+
+class InputDeviceNode(DeviceNode):
+
+    """InputDeviceNode is the base class of the input (stimulating) devices of the NumPy simulator.
+       Their activity is computed in advance for all time steps of a simulation run,
+       and then delivered to the target neurons at every time step, for all devices of the same kind at once."""
+
+    def _is_active(self, times):
+        origin = self.params.get("origin", 0.0)
+        start = self.params.get("start", 0.0)
+        stop = self.params.get("stop", None)
+        if stop is None:
+            stop = np.inf
+        # Compare on the grid of time steps, so that rounding errors do not shift the activity by a time step:
+        dt = self.simulator.dt
+        steps = np.round(times / dt)
+        return np.logical_and(steps > np.round((origin + start) / dt), steps <= np.round((origin + stop) / dt))
+
+
+class PoissonGeneratorNode(InputDeviceNode):
+
+    """Device generating independent Poisson spike trains of a constant rate (Hz) for each of its targets."""
+
+    model = "poisson_generator"
+    default_params = {"rate": 0.0, "origin": 0.0, "start": 0.0, "stop": None}
+
+    def get_rates(self, times):
+        """Method to get the rates of the generator at the end times of the time steps of a simulation run."""
+        return np.where(self._is_active(times), self.params["rate"], 0.0)
+
+
+class InhomogeneousPoissonGeneratorNode(InputDeviceNode):
+
+    """Device generating independent Poisson spike trains for each of its targets,
+       with a rate (Hz) that changes at given times."""
+
+    model = "inhomogeneous_poisson_generator"
+    default_params = {"rate_times": [], "rate_values": []}
+
+    def get_rates(self, times):
+        """Method to get the rates of the generator at the end times of the time steps of a simulation run."""
+        rate_times = np.asarray(self.params["rate_times"], dtype="f8").ravel()
+        rate_values = np.asarray(self.params["rate_values"], dtype="f8").ravel()
+        if rate_times.size == 0:
+            return np.zeros(times.shape)
+        inds = np.searchsorted(rate_times, times, side="right") - 1
+        return np.where(inds >= 0, rate_values[np.maximum(inds, 0)], 0.0)
+
+
+class SpikeGeneratorNode(InputDeviceNode):
+
+    """Device emitting spikes at given times, optionally with given weights, to all of its targets."""
+
+    model = "spike_generator"
+    default_params = {"spike_times": [], "spike_weights": [], "origin": 0.0}
+
+    def get_spikes(self, edges):
+        """Method to get the (weighted) number of spikes of the generator
+           within each time step (edges[i], edges[i+1]] of a simulation run."""
+        spike_times = self.params["origin"] + np.asarray(self.params["spike_times"], dtype="f8").ravel()
+        spike_weights = np.asarray(self.params["spike_weights"], dtype="f8").ravel()
+        if spike_weights.size != spike_times.size:
+            spike_weights = np.ones(spike_times.shape)
+        inds = np.searchsorted(edges, spike_times, side="left") - 1
+        valid = np.logical_and(inds >= 0, inds < edges.size - 1)
+        return np.bincount(inds[valid], spike_weights[valid], minlength=edges.size - 1)
+
+
+class DCGeneratorNode(InputDeviceNode):
+
+    """Device injecting a constant current (pA) to all of its targets."""
+
+    model = "dc_generator"
+    default_params = {"amplitude": 0.0, "origin": 0.0, "start": 0.0, "stop": None}
+
+    def get_amplitudes(self, times):
+        """Method to get the current of the generator at the end times of the time steps of a simulation run."""
+        return np.where(self._is_active(times), self.params["amplitude"], 0.0)
+
+
+class OutputDeviceNode(DeviceNode):
+
+    """OutputDeviceNode is the base class of the output (recording) devices of the NumPy simulator,
+       which keep their events in memory, until they are reset, by setting n_events to 0."""
+
+    @property
+    def number_of_events(self):
+        return 0
+
+    @property
+    def events(self):
+        return {}
+
+    def reset(self):
+        pass
+
+    def set(self, values_dict):
+        values_dict = dict(values_dict)
+        n_events = values_dict.pop("n_events", None)
+        if n_events is not None:
+            if n_events != 0:
+                raise ValueError("n_events can only be set to 0, in order to delete the events of %s!" % self)
+            self.reset()
+        super(OutputDeviceNode, self).set(values_dict)
+
+    def _get(self, attr):
+        if attr == "events":
+            return self.events
+        elif attr == "n_events":
+            return self.number_of_events
+        return super(OutputDeviceNode, self)._get(attr)
+
+
+class SpikeRecorderNode(OutputDeviceNode):
+
+    """Device recording the spikes of its source neurons."""
+
+    model = "spike_recorder"
+    default_params = {}
+
+    def __init__(self, simulator, global_id, params=None):
+        self.buffer = SpikesBuffer()
+        super(SpikeRecorderNode, self).__init__(simulator, global_id, params)
+
+    def record(self, times, senders):
+        self.buffer.append(times, senders)
+
+    @property
+    def number_of_events(self):
+        return self.buffer.number_of_events
+
+    @property
+    def events(self):
+        return self.buffer.get_events()
+
+    def reset(self):
+        self.buffer.clear()
+
+
+class MultimeterNode(OutputDeviceNode):
+
+    """Device recording state variables of its target neurons every interval ms."""
+
+    model = "multimeter"
+    default_params = {"record_from": ["V_m"], "interval": 1.0}
+
+    def __init__(self, simulator, global_id, params=None):
+        self.buffer = TimeSeriesBuffer()
+        super(MultimeterNode, self).__init__(simulator, global_id, params)
+
+    @property
+    def record_from(self):
+        return ensure_list(self.params["record_from"])
+
+    def record(self, data, times, neurons):
+        self.buffer.append(data, times, variables=self.record_from, neurons=neurons)
+
+    @property
+    def number_of_events(self):
+        return self.buffer.shape[0] * self.buffer.shape[2]
+
+    @property
+    def events(self):
+        neurons = self.buffer.neurons
+        if neurons is None:
+            neurons = []
+        return continuous_data_to_events(self.buffer.data, self.buffer.times, self.record_from, neurons)
+
+    def reset(self):
+        self.buffer.clear()
+
+
+class VoltmeterNode(MultimeterNode):
+
+    """Device recording the membrane potential of its target neurons every interval ms."""
+
+    model = "voltmeter"
+    default_params = {"record_from": ["V_m"], "interval": 1.0}
+
+
+NUMPY_INPUT_DEVICES = {"poisson_generator": PoissonGeneratorNode,
+                       "inhomogeneous_poisson_generator": InhomogeneousPoissonGeneratorNode,
+                       "spike_generator": SpikeGeneratorNode,
+                       "dc_generator": DCGeneratorNode}
+
+
+NUMPY_OUTPUT_DEVICES = {"spike_recorder": SpikeRecorderNode,
+                        "multimeter": MultimeterNode,
+                        "voltmeter": VoltmeterNode}
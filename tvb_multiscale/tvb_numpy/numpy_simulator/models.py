@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from tvb.contrib.scripts.utils.data_structures_utils import ensure_list
+
+
+class NeuronModel(object):
+
+    """NeuronModel is the base class of the neuron models of the NumPy simulator.
+       A NeuronModel instance holds the parameters and the state variables
+       of all the neurons of a population, as arrays of size number_of_neurons,
+       and integrates all of them at once, with vectorized operations, for every time step.
+    """
+
+    name = ""
+    default_params = {}
+    # The state variables, and their initial values, which can be recorded by a multimeter:
+    default_state = {}
+
+    offset = 0  # The global id of the first neuron of the population in the simulator
+
+    def __init__(self, number_of_neurons, params=None, offset=0):
+        self.number_of_neurons = int(number_of_neurons)
+        self.offset = offset
+        self.params = dict([(param, np.full((self.number_of_neurons,), value, dtype="f8"))
+                            for param, value in self.default_params.items()])
+        self.state = dict([(var, np.full((self.number_of_neurons,), value, dtype="f8"))
+                           for var, value in self.default_state.items()])
+        self._prepared_dt = None
+        if params:
+            self.set(params)
+
+    @property
+    def record_from(self):
+        return list(self.state.keys())
+
+    @property
+    def global_ids(self):
+        return self.offset + np.arange(self.number_of_neurons)
+
+    def set(self, values_dict, inds=slice(None)):
+        """Method to set parameters or state variables of (some of) the neurons.
+           Arguments:
+            values_dict: dictionary of attributes names' and values,
+                         either scalars or sequences of the size of the selected neurons
+            inds: the indices of the selected neurons in the population. Default = all neurons.
+        """
+        for attr, value in values_dict.items():
+            if attr in self.params:
+                self.params[attr][inds] = value
+                self._prepared_dt = None
+            elif attr in self.state:
+                self.state[attr][inds] = value
+            else:
+                raise ValueError("%s is neither a parameter nor a state variable of neuron model %s!"
+                                 % (attr, self.name))
+
+    def get(self, attrs=None, inds=slice(None)):
+        """Method to get parameters or state variables of (some of) the neurons.
+           Arguments:
+            attrs: names of attributes to be returned. Default = None, corresponds to all attributes.
+            inds: the indices of the selected neurons in the population. Default = all neurons.
+           Returns:
+            Dictionary of arrays of the neurons' attributes.
+        """
+        if attrs is None:
+            attrs = list(self.params.keys()) + list(self.state.keys())
+        output = {}
+        for attr in ensure_list(attrs):
+            if attr in self.params:
+                output[attr] = self.params[attr][inds].copy()
+            elif attr in self.state:
+                output[attr] = self.state[attr][inds].copy()
+            else:
+                raise ValueError("%s is neither a parameter nor a state variable of neuron model %s!"
+                                 % (attr, self.name))
+        return output
+
+    def prepare(self, dt):
+        """Method to precompute the quantities that depend only on the parameters and the time step."""
+        self._prepared_dt = dt
+
+    def update(self, spikes_input, currents, dt, rng):
+        """Method to integrate all neurons for one time step.
+           Arguments:
+            spikes_input: an array of the summed weights of the spikes arriving to each neuron at this time step
+            currents: an array (or a scalar) of the currents injected to each neuron by current generators
+            dt: the time step
+            rng: the numpy random Generator of the simulator
+           Returns:
+            a boolean array of the neurons that spiked at this time step
+        """
+        raise NotImplementedError
+
+
+class IafPscExp(NeuronModel):
+
+    """Leaky integrate-and-fire neuron model with exponentially decaying synaptic currents,
+       similar to NEST's iaf_psc_exp, but with a single synaptic current, incremented by the spikes' weights (pA)
+       that are excitatory or inhibitory depending on their sign.
+    """
+
+    name = "iaf_psc_exp"
+    default_params = {"C_m": 250.0,  # pF
+                      "tau_m": 10.0,  # ms
+                      "tau_syn": 2.0,  # ms
+                      "t_ref": 2.0,  # ms
+                      "E_L": -70.0,  # mV
+                      "V_reset": -70.0,  # mV
+                      "V_th": -55.0,  # mV
+                      "I_e": 0.0}  # pA
+    default_state = {"V_m": -70.0,  # mV
+                     "I_syn": 0.0}  # pA
+
+    def __init__(self, number_of_neurons, params=None, offset=0):
+        super(IafPscExp, self).__init__(number_of_neurons, params, offset)
+        self._refractory_steps = np.zeros((self.number_of_neurons,), dtype="i8")
+
+    def prepare(self, dt):
+        self._syn_decay = np.exp(-dt / self.params["tau_syn"])
+        self._dt_tau_m = dt / self.params["tau_m"]
+        self._dt_C_m = dt / self.params["C_m"]
+        self._t_ref_steps = np.round(self.params["t_ref"] / dt).astype("i8")
+        super(IafPscExp, self).prepare(dt)
+
+    def update(self, spikes_input, currents, dt, rng):
+        V_m = self.state["V_m"]
+        I_syn = self.state["I_syn"]
+        I_syn *= self._syn_decay
+        I_syn += spikes_input
+        active = self._refractory_steps == 0
+        dV = self._dt_tau_m * (self.params["E_L"] - V_m) + self._dt_C_m * (I_syn + self.params["I_e"] + currents)
+        V_m += np.where(active, dV, 0.0)
+        self._refractory_steps -= ~active
+        spikes = V_m >= self.params["V_th"]
+        V_m[spikes] = self.params["V_reset"][spikes]
+        self._refractory_steps[spikes] = self._t_ref_steps[spikes]
+        return spikes
+
+
+class PoissonNeuron(NeuronModel):
+
+    """Neuron model that spikes following a Poisson process of a given rate (Hz), independently of its input."""
+
+    name = "poisson_neuron"
+    default_params = {"rate": 0.0}  # Hz
+    default_state = {}
+
+    def prepare(self, dt):
+        self._p_spike = self.params["rate"] * dt / 1000.0
+        super(PoissonNeuron, self).prepare(dt)
+
+    def update(self, spikes_input, currents, dt, rng):
+        return rng.random(self.number_of_neurons) < self._p_spike
+
+
+NUMPY_NEURON_MODELS = {"iaf_psc_exp": IafPscExp,
+                       "poisson_neuron": PoissonNeuron}
+
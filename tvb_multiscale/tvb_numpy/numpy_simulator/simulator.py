@@ -0,0 +1,660 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from tvb_multiscale.tvb_numpy.numpy_simulator.models import NeuronModel, NUMPY_NEURON_MODELS
+from tvb_multiscale.tvb_numpy.numpy_simulator.devices import \
+    DeviceNode, PoissonGeneratorNode, InhomogeneousPoissonGeneratorNode, SpikeGeneratorNode, DCGeneratorNode, \
+    SpikeRecorderNode, MultimeterNode, NUMPY_INPUT_DEVICES, NUMPY_OUTPUT_DEVICES
+
+
+CONNECTIONS_ATTRS = ["source", "target", "weight", "delay", "receptor"]
+
+
+def csr_rows_indices(indptr, rows):
+    """Function to get the indices of all the elements of some rows of a CSR (compressed sparse row) structure,
+       without looping over the rows.
+       Arguments:
+        indptr: the array of the start (and end) indices of the rows' elements, of size number_of_rows + 1
+        rows: an array of the selected rows
+       Returns:
+        an array of the indices of the elements of the selected rows, in the order of the rows
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    n_elements = counts.sum()
+    if n_elements == 0:
+        return np.array([], dtype="i8")
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(n_elements)
+
+
+class NodeCollection(object):
+
+    """NodeCollection class represents a sequence of neurons of the NumPy simulator, via their global ids,
+       similarly to NEST's NodeCollection."""
+
+    def __init__(self, simulator, global_ids):
+        self.simulator = simulator
+        self.global_id = np.atleast_1d(np.asarray(global_ids, dtype="i8"))
+
+    def __len__(self):
+        return self.global_id.size
+
+    def __iter__(self):
+        return iter(self.global_id.tolist())
+
+    def __getitem__(self, keys):
+        return NodeCollection(self.simulator, self.global_id[keys])
+
+    def __eq__(self, other):
+        return isinstance(other, NodeCollection) and np.array_equal(self.global_id, other.global_id)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "NodeCollection(%d neurons)" % len(self)
+
+    def tolist(self):
+        return self.global_id.tolist()
+
+    def get(self, attrs=None):
+        """Method to get parameters or state variables of the neurons.
+           Arguments:
+            attrs: names of attributes to be returned. Default = None, corresponds to all attributes.
+           Returns:
+            Dictionary of arrays of the neurons' attributes.
+        """
+        return self.simulator.get_status(self.global_id, attrs)
+
+    def set(self, values_dict):
+        """Method to set parameters or state variables of the neurons.
+           Arguments:
+            values_dict: dictionary of attributes names' and values,
+                         either scalars or sequences of the size of the collection.
+        """
+        self.simulator.set_status(self.global_id, values_dict)
+
+
+class SynapseCollection(object):
+
+    """SynapseCollection class represents a sequence of connections of the NumPy simulator,
+       via their indices, similarly to NEST's SynapseCollection."""
+
+    def __init__(self, simulator, indices):
+        self.simulator = simulator
+        self.indices = np.asarray(indices, dtype="i8")
+
+    def __len__(self):
+        return self.indices.size
+
+    def __iter__(self):
+        for ind in self.indices:
+            yield SynapseCollection(self.simulator, [ind])
+
+    def __repr__(self):
+        return "SynapseCollection(%d connections)" % len(self)
+
+    @property
+    def source(self):
+        return self.get("source")
+
+    @property
+    def target(self):
+        return self.get("target")
+
+    def get(self, attrs=None):
+        """Method to get attributes of the connections.
+           Arguments:
+            attrs: name, or sequence of names, of the attributes to be returned.
+                   Default = None, corresponds to all of source, target, weight, delay and receptor
+           Returns:
+            the array of a single attribute, or a dictionary of attributes' names and arrays
+        """
+        connections = self.simulator.connections
+        if isinstance(attrs, str):
+            return connections[attrs][self.indices].copy()
+        if attrs is None:
+            attrs = CONNECTIONS_ATTRS
+        return dict([(attr, connections[attr][self.indices].copy()) for attr in attrs])
+
+    def set(self, values_dict):
+        """Method to set weight, delay or receptor attributes of the connections.
+           Arguments:
+            values_dict: dictionary of attributes names' and values,
+                         either scalars or sequences of the size of the collection.
+        """
+        self.simulator.set_connections(self.indices, values_dict)
+
+
+class NumPySimulator(object):
+
+    """NumPySimulator is a reference spiking network simulator, written in pure NumPy.
+       All neurons, devices and connections are held in arrays,
+       and every time step is integrated with vectorized operations,
+       so that the spiking network, the devices and the TVB interfaces
+       can be run, profiled and benchmarked without any external spiking simulator.
+       - Neurons and devices are nodes with consecutive global ids.
+       - Neurons are integrated per population (see models.NeuronModel).
+       - Spikes are delivered to a ring buffer of size (maximum delay in time steps + 1, number of nodes),
+         via connections sorted by source, in compressed sparse row (CSR) format.
+       - Poisson, inhomogeneous Poisson, spike and dc generators are computed for all time steps of a run,
+         before running it, and they are delivered for all generators of the same kind at once.
+       - Spike recorders and multimeters record into SpikesBuffer and TimeSeriesBuffer instances respectively,
+         once per run.
+       The time of a spike, or of a recorded sample, is the end time of the time step it is emitted in.
+    """
+
+    dt = 0.1
+    seed = 0
+
+    def __init__(self, dt=0.1, seed=0):
+        self.reset(dt, seed)
+
+    def reset(self, dt=None, seed=None):
+        """Method to delete all nodes and connections of the simulator and reset its time to 0.0.
+           Arguments:
+            dt: the time step (ms). Default = None, corresponding to keeping the current one.
+            seed: the seed of the random number generator. Default = None, corresponding to keeping the current one.
+        """
+        if dt is not None:
+            self.dt = dt
+        if seed is not None:
+            self.seed = seed
+        self.rng = np.random.default_rng(self.seed)
+        self._step = 0
+        self._n_nodes = 0
+        self._owners = []  # NeuronModel and DeviceNode instances, in the order of their global ids
+        self._owners_offsets = np.array([], dtype="i8")
+        self._connections_chunks = dict([(attr, []) for attr in CONNECTIONS_ATTRS])
+        self._connections = None
+        self._input_buffer = np.zeros((1, 0))
+        self._prepared = False
+
+    @property
+    def time(self):
+        return self._step * self.dt
+
+    @property
+    def number_of_nodes(self):
+        return self._n_nodes
+
+    @property
+    def populations(self):
+        return [owner for owner in self._owners if isinstance(owner, NeuronModel)]
+
+    @property
+    def devices(self):
+        return [owner for owner in self._owners if isinstance(owner, DeviceNode)]
+
+    @property
+    def connections(self):
+        """The dictionary of the arrays of the attributes of all connections."""
+        if self._connections is None or len(self._connections_chunks["source"]):
+            chunks = self._connections_chunks
+            if self._connections is not None:
+                for attr in CONNECTIONS_ATTRS:
+                    chunks[attr].insert(0, self._connections[attr])
+            self._connections = \
+                dict([(attr, np.concatenate(chunks[attr]) if len(chunks[attr])
+                              else np.array([], dtype="f8" if attr in ["weight", "delay"] else "i8"))
+                      for attr in CONNECTIONS_ATTRS])
+            self._connections_chunks = dict([(attr, []) for attr in CONNECTIONS_ATTRS])
+        return self._connections
+
+    @property
+    def number_of_connections(self):
+        return self.connections["source"].size
+
+    @property
+    def min_delay(self):
+        delays = self.connections["delay"]
+        if delays.size:
+            return np.maximum(self.dt, delays.min())
+        return self.dt
+
+    def _add_owner(self, owner, number_of_nodes):
+        self._owners.append(owner)
+        self._owners_offsets = np.append(self._owners_offsets, self._n_nodes)
+        self._n_nodes += number_of_nodes
+        self._prepared = False
+
+    def _get_owners_inds(self, global_ids):
+        return np.searchsorted(self._owners_offsets, global_ids, side="right") - 1
+
+    def _global_ids(self, nodes):
+        if hasattr(nodes, "global_id"):
+            nodes = nodes.global_id
+        global_ids = np.atleast_1d(np.asarray(nodes, dtype="i8")).ravel()
+        if global_ids.size and (global_ids.min() < 0 or global_ids.max() >= self._n_nodes):
+            raise ValueError("Global ids %s are not nodes of the NumPy simulator!" % str(global_ids))
+        return global_ids
+
+    def create_neurons(self, model, number_of_neurons, params=None):
+        """Method to create a population of neurons.
+           Arguments:
+            model: the name of the neuron model (see models.NUMPY_NEURON_MODELS)
+            number_of_neurons: the number of neurons
+            params: a dictionary of parameters of the neuron model to be set. Default = None
+           Returns:
+            a NodeCollection of the neurons
+        """
+        if model not in NUMPY_NEURON_MODELS:
+            raise ValueError("Neuron model %s is not one of the NumPy simulator's neuron models %s!"
+                             % (model, str(list(NUMPY_NEURON_MODELS.keys()))))
+        population = NUMPY_NEURON_MODELS[model](number_of_neurons, params, offset=self._n_nodes)
+        self._add_owner(population, population.number_of_neurons)
+        return NodeCollection(self, population.global_ids)
+
+    def create_device(self, model, params=None):
+        """Method to create an input or output device.
+           Arguments:
+            model: the name of the device model (see devices.NUMPY_INPUT_DEVICES and devices.NUMPY_OUTPUT_DEVICES)
+            params: a dictionary of parameters of the device to be set. Default = None
+           Returns:
+            the DeviceNode instance
+        """
+        device_class = NUMPY_INPUT_DEVICES.get(model, NUMPY_OUTPUT_DEVICES.get(model, None))
+        if device_class is None:
+            raise ValueError("Device model %s is not one of the NumPy simulator's devices' models %s!"
+                             % (model, str(list(NUMPY_INPUT_DEVICES.keys()) + list(NUMPY_OUTPUT_DEVICES.keys()))))
+        device = device_class(self, self._n_nodes, params)
+        self._add_owner(device, 1)
+        return device
+
+    def get_status(self, global_ids, attrs=None):
+        """Method to get parameters or state variables of neurons, possibly of different populations.
+           Arguments:
+            global_ids: the global ids of the neurons
+            attrs: names of attributes to be returned. Default = None, corresponds to all attributes.
+           Returns:
+            Dictionary of arrays of the neurons' attributes.
+        """
+        global_ids = self._global_ids(global_ids)
+        owners_inds = self._get_owners_inds(global_ids)
+        unique_owners_inds = np.unique(owners_inds)
+        if unique_owners_inds.size == 1:
+            owner = self._owners[unique_owners_inds[0]]
+            if isinstance(owner, DeviceNode):
+                return owner.get(attrs)
+            return owner.get(attrs, global_ids - owner.offset)
+        output = {}
+        for owner_ind in unique_owners_inds:
+            owner = self._owners[owner_ind]
+            if isinstance(owner, DeviceNode):
+                raise ValueError("Cannot get attributes of neurons and devices together!")
+            inds = owners_inds == owner_ind
+            for attr, values in owner.get(attrs, global_ids[inds] - owner.offset).items():
+                if attr not in output:
+                    output[attr] = np.full(global_ids.shape, np.nan)
+                output[attr][inds] = values
+        return output
+
+    def set_status(self, global_ids, values_dict):
+        """Method to set parameters or state variables of neurons, possibly of different populations.
+           Arguments:
+            global_ids: the global ids of the neurons
+            values_dict: dictionary of attributes names' and values,
+                         either scalars or sequences of the size of global_ids.
+        """
+        global_ids = self._global_ids(global_ids)
+        owners_inds = self._get_owners_inds(global_ids)
+        for owner_ind in np.unique(owners_inds):
+            owner = self._owners[owner_ind]
+            if isinstance(owner, DeviceNode):
+                owner.set(values_dict)
+                continue
+            inds = owners_inds == owner_ind
+            owner_values = {}
+            for attr, value in values_dict.items():
+                value = np.asarray(value)
+                if value.ndim and value.size == global_ids.size:
+                    value = value[inds]
+                owner_values[attr] = value
+            owner.set(owner_values, global_ids[inds] - owner.offset)
+
+    def _draw(self, value, n):
+        """Method to get n values of a connection attribute,
+           given as a scalar, a sequence of n values, or a distribution dictionary."""
+        if isinstance(value, dict):
+            distribution = value.get("distribution", "uniform")
+            if distribution == "uniform":
+                return self.rng.uniform(value["low"], value["high"], n)
+            elif distribution == "normal":
+                return self.rng.normal(value["mu"], value["sigma"], n)
+            raise ValueError("Only uniform and normal distributions are allowed, not %s!" % distribution)
+        value = np.asarray(value, dtype="f8")
+        if value.size == 1:
+            return np.full((n,), value.item())
+        if value.size != n:
+            raise ValueError("%d values given for %d connections!" % (value.size, n))
+        return value.ravel()
+
+    def _draw_indices(self, n_pool, n_rows, n_per_row, multapses):
+        """Method to draw n_per_row indices in range(n_pool) for each one of n_rows rows,
+           with or without replacement within each row, depending on multapses."""
+        if multapses:
+            return self.rng.integers(0, n_pool, (n_rows, n_per_row)).ravel()
+        if n_per_row > n_pool:
+            raise ValueError("Cannot draw %d connections per neuron out of %d neurons without multapses!"
+                             % (n_per_row, n_pool))
+        return np.argsort(self.rng.random((n_rows, n_pool)), axis=1)[:, :n_per_row].ravel()
+
+    def _connect_pairs(self, sources, targets, conn_spec):
+        """Method to compute the source and target global ids of all connections, given a connectivity rule."""
+        rule = conn_spec.get("rule", "all_to_all")
+        multapses = conn_spec.get("allow_multapses", True)
+        n_src = sources.size
+        n_trg = targets.size
+        if rule == "one_to_one":
+            if n_src != n_trg:
+                raise ValueError("Cannot connect one to one %d source with %d target neurons!" % (n_src, n_trg))
+        elif rule == "all_to_all":
+            sources, targets = np.repeat(sources, n_trg), np.tile(targets, n_src)
+        elif rule == "pairwise_bernoulli":
+            src_inds, trg_inds = np.nonzero(self.rng.random((n_src, n_trg)) < conn_spec["p"])
+            sources, targets = sources[src_inds], targets[trg_inds]
+        elif rule == "fixed_indegree":
+            indegree = int(conn_spec["indegree"])
+            sources = sources[self._draw_indices(n_src, n_trg, indegree, multapses)]
+            targets = np.repeat(targets, indegree)
+        elif rule == "fixed_outdegree":
+            outdegree = int(conn_spec["outdegree"])
+            targets = targets[self._draw_indices(n_trg, n_src, outdegree, multapses)]
+            sources = np.repeat(sources, outdegree)
+        elif rule == "fixed_total_number":
+            N = int(conn_spec["N"])
+            if multapses:
+                inds = self.rng.integers(0, n_src * n_trg, N)
+            else:
+                inds = self.rng.choice(n_src * n_trg, N, replace=False)
+            sources, targets = sources[inds // n_trg], targets[inds % n_trg]
+        else:
+            raise ValueError("Connectivity rule %s is not one of the NumPy simulator's rules!" % rule)
+        if not conn_spec.get("allow_autapses", True):
+            # Self-connections are removed, without drawing new ones instead:
+            keep = sources != targets
+            sources, targets = sources[keep], targets[keep]
+        return sources, targets
+
+    def draw_connections(self, source, target, conn_spec=None, syn_spec=None):
+        """Method to draw the connections among nodes (neurons or devices), without creating them,
+           so that the connections of many calls can be created together, with add_connections.
+           Arguments:
+            the same as for connect
+           Returns:
+            a dictionary of the arrays of the attributes of the connections, see CONNECTIONS_ATTRS
+        """
+        sources, targets = self._connect_pairs(self._global_ids(source), self._global_ids(target),
+                                               dict(conn_spec or {}))
+        n_connections = sources.size
+        syn_spec = dict(syn_spec or {})
+        delays = self._draw(syn_spec.get("delay", self.dt), n_connections)
+        if n_connections and delays.min() < self.dt - 1e-9:
+            raise ValueError("Connections' delays %g ms smaller than the time step %g ms are not possible!"
+                             % (delays.min(), self.dt))
+        return dict(zip(CONNECTIONS_ATTRS,
+                        [sources, targets, self._draw(syn_spec.get("weight", 1.0), n_connections), delays,
+                         np.broadcast_to(np.asarray(syn_spec.get("receptor_type", 0), dtype="i8"),
+                                         (n_connections,)).copy()]))
+
+    def add_connections(self, connections):
+        """Method to create connections, e.g., drawn by draw_connections.
+           Arguments:
+            connections: a dictionary of the arrays of the attributes of the connections, see CONNECTIONS_ATTRS
+           Returns:
+            the SynapseCollection of the new connections
+        """
+        n_previous = self.number_of_connections
+        for attr in CONNECTIONS_ATTRS:
+            self._connections_chunks[attr].append(connections[attr])
+        self._prepared = False
+        return SynapseCollection(self, n_previous + np.arange(len(connections["source"])))
+
+    def connect(self, source, target, conn_spec=None, syn_spec=None):
+        """Method to connect nodes (neurons or devices), similarly to nest.Connect.
+           Arguments:
+            source: the source NodeCollection, DeviceNode, or sequence of global ids
+            target: the target NodeCollection, DeviceNode, or sequence of global ids
+            conn_spec: a dictionary of the connectivity rule and its parameters,
+                       e.g., {"rule": "fixed_indegree", "indegree": 10, "allow_autapses": False}.
+                       Default = None, corresponding to {"rule": "all_to_all"}
+            syn_spec: a dictionary of the "weight", "delay" and "receptor_type" of the connections,
+                      each one given as a scalar, a sequence of values for every connection,
+                      or a distribution dictionary, e.g., {"distribution": "uniform", "low": 1.0, "high": 2.0}.
+                      Default = None, corresponding to weight = 1.0, delay = dt, receptor_type = 0
+           Returns:
+            the SynapseCollection of the new connections
+        """
+        return self.add_connections(self.draw_connections(source, target, conn_spec, syn_spec))
+
+    def get_connections(self, source=None, target=None):
+        """Method to get the connections from and/or to some nodes, similarly to nest.GetConnections.
+           Arguments:
+            source: the source nodes. Default = None, corresponding to any source
+            target: the target nodes. Default = None, corresponding to any target
+           Returns:
+            a SynapseCollection
+        """
+        connections = self.connections
+        selected = np.ones(connections["source"].shape, dtype="bool")
+        if source is not None:
+            selected = np.logical_and(selected, np.isin(connections["source"], self._global_ids(source)))
+        if target is not None:
+            selected = np.logical_and(selected, np.isin(connections["target"], self._global_ids(target)))
+        return SynapseCollection(self, np.flatnonzero(selected))
+
+    def set_connections(self, indices, values_dict):
+        """Method to set weight, delay or receptor attributes of connections.
+           Arguments:
+            indices: the indices of the connections
+            values_dict: dictionary of attributes names' and values,
+                         either scalars or sequences of the size of indices.
+        """
+        connections = self.connections
+        for attr, values in values_dict.items():
+            if attr not in ["weight", "delay", "receptor"]:
+                raise ValueError("Only weight, delay and receptor of connections can be set, not %s!" % attr)
+            connections[attr][indices] = values
+        self._prepared = False
+
+    def _device_connections(self, device_class, device_is_source=True):
+        """Method to select the connections of devices of a given class to (or from) neurons.
+           Returns:
+            the list of the connected devices, and the indices of the device of every connection in that list,
+            and the indices of the connections
+        """
+        connections = self.connections
+        is_device = np.zeros((self._n_nodes,), dtype="bool")
+        devices = [owner for owner in self._owners if isinstance(owner, device_class)]
+        devices_global_ids = np.array([device.global_id for device in devices], dtype="i8")
+        is_device[devices_global_ids] = True
+        if device_is_source:
+            devices_ids, neurons_ids = connections["source"], connections["target"]
+        else:
+            devices_ids, neurons_ids = connections["target"], connections["source"]
+        selected = np.logical_and(is_device[devices_ids], self._is_neuron[neurons_ids])
+        # Keep only the devices that are connected:
+        connected_global_ids, conns_devices = np.unique(devices_ids[selected], return_inverse=True)
+        devices = [devices[ind] for ind in np.searchsorted(devices_global_ids, connected_global_ids)]
+        return devices, conns_devices, np.flatnonzero(selected)
+
+    def _sort_by_source(self, inds):
+        """Method to sort connections by their source global ids and compute the CSR rows' indices pointer."""
+        inds = inds[np.argsort(self.connections["source"][inds], kind="stable")]
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(self.connections["source"][inds],
+                                                            minlength=self._n_nodes))])
+        return inds, indptr
+
+    def prepare(self):
+        """Method to prepare the simulator's data structures for running, after any change of the network."""
+        connections = self.connections
+        self._is_neuron = np.zeros((self._n_nodes,), dtype="bool")
+        for population in self.populations:
+            self._is_neuron[population.global_ids] = True
+        delays_steps = np.maximum(1, np.round(connections["delay"] / self.dt)).astype("i8")
+        # Neurons -> neurons synapses, in CSR format by source:
+        synapses = np.flatnonzero(np.logical_and(self._is_neuron[connections["source"]],
+                                                 self._is_neuron[connections["target"]]))
+        synapses, self._synapses_indptr = self._sort_by_source(synapses)
+        self._synapses_targets = connections["target"][synapses]
+        self._synapses_weights = connections["weight"][synapses]
+        self._synapses_delays = delays_steps[synapses]
+        # Generators -> neurons:
+        self._generators = {}
+        for generator_type, generator_classes in \
+                zip(["rate", "spikes", "current"],
+                    [(PoissonGeneratorNode, InhomogeneousPoissonGeneratorNode), SpikeGeneratorNode, DCGeneratorNode]):
+            generators, conns_generators, inds = self._device_connections(generator_classes, device_is_source=True)
+            self._generators[generator_type] = (generators, conns_generators, connections["target"][inds],
+                                                connections["weight"][inds], delays_steps[inds])
+        # Neurons -> spike recorders, in CSR format by source:
+        self._spike_recorders, conns_recorders, inds = \
+            self._device_connections(SpikeRecorderNode, device_is_source=False)
+        order = np.argsort(connections["source"][inds], kind="stable")
+        inds, self._spike_recorders_indptr = self._sort_by_source(inds)
+        self._spike_recorders_conns = conns_recorders[order]
+        self._spike_recorders_sources = connections["source"][inds]
+        # Multimeters -> neurons, grouped by the neurons' populations:
+        multimeters, conns_multimeters, inds = self._device_connections(MultimeterNode, device_is_source=True)
+        self._multimeters = []
+        for i_multimeter, multimeter in enumerate(multimeters):
+            neurons = np.unique(connections["target"][inds[conns_multimeters == i_multimeter]])
+            owners_inds = self._get_owners_inds(neurons)
+            groups = [(self._owners[owner_ind], neurons[owners_inds == owner_ind] - self._owners[owner_ind].offset,
+                       np.flatnonzero(owners_inds == owner_ind))
+                      for owner_ind in np.unique(owners_inds)]
+            self._multimeters.append((multimeter, neurons, groups))
+        # The ring buffer of the spikes' inputs, keeping any inputs already scheduled for the next time steps:
+        n_slots = int(np.max(np.concatenate([[1], delays_steps]))) + 1
+        input_buffer = np.zeros((n_slots, self._n_nodes))
+        old_n_slots, old_n_nodes = self._input_buffer.shape
+        for i_step in range(min(n_slots, old_n_slots)):
+            input_buffer[(self._step + i_step) % n_slots, :old_n_nodes] = \
+                self._input_buffer[(self._step + i_step) % old_n_slots]
+        self._input_buffer = input_buffer
+        self._prepared = True
+
+    def _deliver(self, step, targets, weights, delays):
+        n_slots = self._input_buffer.shape[0]
+        np.add.at(self._input_buffer, ((step + delays) % n_slots, targets), weights)
+
+    def _get_generators_activity(self, n_steps):
+        """Method to compute the activity of all generators for all time steps of a run."""
+        times = (self._step + 1 + np.arange(n_steps)) * self.dt
+        edges = (self._step + np.arange(n_steps + 1)) * self.dt
+        activity = {}
+        for generator_type, (generators, conns_generators, targets, weights, delays) in self._generators.items():
+            if len(generators) == 0:
+                activity[generator_type] = None
+                continue
+            if generator_type == "rate":
+                # Expected number of spikes per time step:
+                values = np.array([generator.get_rates(times) for generator in generators]) * self.dt / 1000.0
+            elif generator_type == "spikes":
+                values = np.array([generator.get_spikes(edges) for generator in generators])
+            else:
+                values = np.array([generator.get_amplitudes(times) for generator in generators])
+            activity[generator_type] = values
+        return activity
+
+    def _prepare_multimeters(self, n_steps):
+        """Method to preallocate the data of all multimeters for all their sampling time steps of a run."""
+        multimeters_data = []
+        for multimeter, neurons, groups in self._multimeters:
+            interval_steps = max(1, int(np.round(multimeter.params["interval"] / self.dt)))
+            steps = self._step + 1 + np.arange(n_steps)
+            recording_steps = np.flatnonzero(steps % interval_steps == 0)
+            data = np.full((recording_steps.size, len(multimeter.record_from), neurons.size), np.nan)
+            multimeters_data.append((recording_steps, steps[recording_steps] * self.dt, data))
+        return multimeters_data
+
+    def _record_multimeters(self, i_step, multimeters_data):
+        for (multimeter, neurons, groups), (recording_steps, times, data) in zip(self._multimeters, multimeters_data):
+            i_sample = np.searchsorted(recording_steps, i_step)
+            if i_sample < recording_steps.size and recording_steps[i_sample] == i_step:
+                for i_var, var in enumerate(multimeter.record_from):
+                    for population, local_inds, cols in groups:
+                        if var in population.state:
+                            data[i_sample, i_var, cols] = population.state[var][local_inds]
+
+    def run(self, simulation_length):
+        """Method to simulate the network for simulation_length ms,
+           rounded to an integer number of time steps."""
+        if not self._prepared:
+            self.prepare()
+        populations = self.populations
+        for population in populations:
+            if population._prepared_dt != self.dt:
+                population.prepare(self.dt)
+        n_steps = int(np.round(simulation_length / self.dt))
+        if n_steps < 1:
+            return
+        n_slots = self._input_buffer.shape[0]
+        activity = self._get_generators_activity(n_steps)
+        multimeters_data = self._prepare_multimeters(n_steps)
+        recorded_conns = []
+        recorded_steps = []
+        for i_step in range(n_steps):
+            step = self._step
+            slot = step % n_slots
+            inputs = self._input_buffer[slot]
+            if activity["current"] is not None:
+                generators, conns_generators, targets, weights, delays = self._generators["current"]
+                currents = np.zeros((self._n_nodes,))
+                np.add.at(currents, targets, activity["current"][conns_generators, i_step] * weights)
+            else:
+                currents = np.zeros((self._n_nodes,))
+            spiking = []
+            for population in populations:
+                neurons = slice(population.offset, population.offset + population.number_of_neurons)
+                spikes = np.flatnonzero(population.update(inputs[neurons], currents[neurons], self.dt, self.rng))
+                if spikes.size:
+                    spiking.append(spikes + population.offset)
+            inputs[:] = 0.0
+            if len(spiking):
+                spiking = np.concatenate(spiking)
+                inds = csr_rows_indices(self._synapses_indptr, spiking)
+                if inds.size:
+                    self._deliver(step, self._synapses_targets[inds], self._synapses_weights[inds],
+                                  self._synapses_delays[inds])
+                inds = csr_rows_indices(self._spike_recorders_indptr, spiking)
+                if inds.size:
+                    recorded_conns.append(inds)
+                    recorded_steps.append(np.full(inds.shape, step + 1))
+            if activity["rate"] is not None:
+                generators, conns_generators, targets, weights, delays = self._generators["rate"]
+                counts = self.rng.poisson(activity["rate"][conns_generators, i_step])
+                inds = np.flatnonzero(counts)
+                if inds.size:
+                    self._deliver(step, targets[inds], counts[inds] * weights[inds], delays[inds])
+            if activity["spikes"] is not None:
+                generators, conns_generators, targets, weights, delays = self._generators["spikes"]
+                counts = activity["spikes"][conns_generators, i_step]
+                inds = np.flatnonzero(counts)
+                if inds.size:
+                    self._deliver(step, targets[inds], counts[inds] * weights[inds], delays[inds])
+            self._step += 1
+            self._record_multimeters(i_step, multimeters_data)
+        self._record_spikes(recorded_conns, recorded_steps)
+        for (multimeter, neurons, groups), (recording_steps, times, data) in zip(self._multimeters, multimeters_data):
+            multimeter.record(data, times, neurons)
+
+    def _record_spikes(self, recorded_conns, recorded_steps):
+        """Method to append the spikes of a run to the spike recorders, with one append per recorder."""
+        if len(recorded_conns) == 0:
+            return
+        recorded_conns = np.concatenate(recorded_conns)
+        times = np.concatenate(recorded_steps) * self.dt
+        recorders = self._spike_recorders_conns[recorded_conns]
+        senders = self._spike_recorders_sources[recorded_conns]
+        # Sort by recorder, keeping the time order of each recorder's spikes:
+        order = np.argsort(recorders, kind="stable")
+        recorders, times, senders = recorders[order], times[order], senders[order]
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(recorders, minlength=len(self._spike_recorders)))])
+        for i_recorder, recorder in enumerate(self._spike_recorders):
+            recorder.record(times[bounds[i_recorder]:bounds[i_recorder + 1]],
+                            senders[bounds[i_recorder]:bounds[i_recorder + 1]])
+